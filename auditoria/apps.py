@@ -2,4 +2,9 @@ from django.apps import AppConfig
 
 class AuditoriaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'auditoria'
\ No newline at end of file
+    name = 'auditoria'
+
+    def ready(self):
+        # El índice de plantillas se construye al iniciar (ver utils.template_index)
+        from .utils.template_index import template_index
+        template_index.warm()
@@ -3,35 +3,40 @@ Utilidades modularizadas para procesamiento de documentos Excel.
 Funciones principales para modificar documentos Excel normales y con macros.
 """
 
-from openpyxl import load_workbook
 from .date_formatter import format_audit_dates
 from .xlsm_processor import modify_document_excel_with_macros
 from ..processors.excel.sheet_processor import process_excel_sheets
+from ..processors.shared.text_replacer import get_replacement_engine
 from ..utils.replacements_utils import (
     get_replacements_config,
     get_tables_config,
     build_replacements_dict,
 )
 from ..utils.data_db import get_all_financial_data
+from ..utils.template_pool import open_workbook_template
+from ..utils.template_fast_path import render_xlsx_text_only
 
-def modify_document_excel(template_path, audit):
+def modify_document_excel(template_path, audit, financial_data=None):
     """
     Modifica un documento Excel (.xlsx) aplicando reemplazos y procesando hojas.
     
     Args:
         template_path: Ruta al archivo Excel template
         audit: Objeto Audit con los datos para reemplazar
+        financial_data: Resultado de get_all_financial_data si ya se obtuvo
+            (p. ej. al exportar varios archivos de la misma auditoría)
         
     Returns:
         Workbook: Objeto openpyxl Workbook procesado
     """
-    wb = load_workbook(template_path)
+    wb = open_workbook_template(template_path)
 
     # Formatear fechas de auditoría
     fecha_inicio, fecha_fin = format_audit_dates(audit)
 
     # Obtener datos financieros
-    financial_data = get_all_financial_data(audit.id)
+    if financial_data is None:
+        financial_data = get_all_financial_data(audit.id)
     data_bd = financial_data['organized']
     
     # Obtener configuraciones
@@ -53,9 +58,32 @@ def modify_document_excel(template_path, audit):
     
     return wb
 
+def render_document_excel_text_only(template_path, audit):
+    """
+    Genera un .xlsx de solo texto reescribiendo su XML, sin openpyxl ni datos
+    financieros (ver utils.template_fast_path).
+
+    Returns:
+        bytes | None: Contenido del archivo o None si requiere la ruta completa
+    """
+    fecha_inicio, fecha_fin = format_audit_dates(audit)
+    replacements = build_replacements_dict(
+        config=get_replacements_config(),
+        audit=audit,
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_fin,
+    )
+    tables_config = get_tables_config()
+    return render_xlsx_text_only(
+        template_path,
+        get_replacement_engine(replacements),
+        tables_config.get('patrones_exactos', {}),
+    )
+
 # Exportar las funciones principales para compatibilidad hacia atrás
 __all__ = [
     'modify_document_excel',
     'modify_document_excel_with_macros',
+    'render_document_excel_text_only',
     'format_audit_dates'
 ]
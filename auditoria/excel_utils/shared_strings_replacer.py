@@ -5,6 +5,8 @@ Funciona como fallback cuando xlwings no está disponible.
 
 import zipfile
 
+from ..processors.shared.text_replacer import get_replacement_engine
+
 def replace_in_xlsm_shared_strings(src_path: str, dst_path: str, replacements: dict):
     """
     Copia un .xlsm y reemplaza placeholders en:
@@ -23,6 +25,7 @@ def replace_in_xlsm_shared_strings(src_path: str, dst_path: str, replacements: d
     """
     total_hits = 0
     files_touched = []
+    engine = get_replacement_engine(replacements)
     
     with zipfile.ZipFile(src_path, 'r') as zin, zipfile.ZipFile(dst_path, 'w', compression=zipfile.ZIP_DEFLATED) as zout:
         for item in zin.infolist():
@@ -41,17 +44,7 @@ def replace_in_xlsm_shared_strings(src_path: str, dst_path: str, replacements: d
                 except UnicodeDecodeError:
                     text = data.decode('utf-8', errors='ignore')
                 
-                file_hits = 0
-                for k, v in replacements.items():
-                    if not isinstance(v, str):
-                        v = str(v)
-                    if not k:
-                        continue
-                    
-                    occurrences = text.count(k)
-                    if occurrences:
-                        text = text.replace(k, v)
-                        file_hits += occurrences
+                text, file_hits = engine.replace_count(text)
                 
                 if file_hits:
                     files_touched.append((item.filename, file_hits))
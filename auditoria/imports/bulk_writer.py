@@ -0,0 +1,207 @@
+"""
+Buffer de inserciones masivas para los importadores de estados financieros.
+
+Los importadores validan cada fila y, en lugar de llamar a
+``Model.objects.create`` una vez por valor, agregan las instancias a este
+buffer. Al terminar una hoja el importador las escribe en lotes, dentro de la
+transacción de la importación:
+
+- ``flush()`` inserta todo con ``bulk_create``.
+- ``sync()`` compara las filas nuevas con las que ya existen en la auditoría
+  y solo inserta, actualiza o elimina lo que cambió, de modo que volver a
+  importar el mismo archivo no duplica filas.
+"""
+
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.db import models
+
+from auditoria.models import (
+    BalanceCuentas,
+    RegistroAuxiliar,
+    SaldoInicial,
+    AjustesReclasificaciones,
+)
+
+DEFAULT_BATCH_SIZE = 500
+
+# Claves repetidas que se listan en el mensaje de error
+_MAX_DUPLICADOS_LISTADOS = 10
+
+# Por modelo: (campos que identifican la fila dentro de la auditoría, campos de valor)
+SYNC_KEYS = {
+    BalanceCuentas: (('tipo_balance', 'fecha_corte', 'seccion', 'nombre_cuenta', 'tipo_cuenta'), ('valor',)),
+    RegistroAuxiliar: (('cuenta',), ('saldo',)),
+    SaldoInicial: (('cuenta', 'fecha_corte'), ('saldo',)),
+    AjustesReclasificaciones: (('nombre_cuenta',), ('debe', 'haber')),
+}
+
+# Campos clave que la restricción única compara con Coalesce(campo, ''):
+# None y '' son la misma clave
+BLANK_KEYS = {
+    BalanceCuentas: ('tipo_cuenta',),
+}
+
+
+def _normalize(field, value):
+    """Lleva un valor al tipo y precisión con que queda guardado en la BD."""
+    if value is None:
+        return None
+    value = field.to_python(value)
+    if isinstance(field, models.DecimalField):
+        value = Decimal(value).quantize(Decimal(1).scaleb(-field.decimal_places))
+    return value
+
+
+class BulkWriter:
+    """Acumula instancias sin guardar y las escribe por modelo en lotes."""
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._pending: Dict[type, List] = {}
+
+    def add(self, instance) -> None:
+        """Agrega una instancia (sin guardar) al buffer."""
+        self._pending.setdefault(type(instance), []).append(instance)
+
+    def pending(self) -> int:
+        """Cantidad de instancias pendientes de escribir."""
+        return sum(len(objs) for objs in self._pending.values())
+
+    def flush(self) -> int:
+        """Escribe las instancias pendientes y devuelve cuántas filas se insertaron."""
+        written = 0
+        for model, objs in self._pending.items():
+            model.objects.bulk_create(objs, batch_size=self.batch_size)
+            written += len(objs)
+        self._pending = {}
+        return written
+
+    def discard(self) -> None:
+        """Descarta las instancias pendientes sin escribirlas."""
+        self._pending = {}
+
+    def sync(self, audit_id: int, scopes: Optional[Dict[type, dict]] = None) -> Dict[str, int]:
+        """
+        Sincroniza las filas existentes de la auditoría con las pendientes.
+
+        Para cada modelo con filas pendientes o incluido en ``scopes`` se leen
+        las filas existentes de la auditoría (acotadas por los filtros del
+        scope, p. ej. ``{'tipo_balance': 'ANUAL'}``), se comparan por los
+        campos clave de ``SYNC_KEYS`` y se aplican solo las diferencias con
+        bulk_create, bulk_update y delete.
+
+        Si una clave aparece varias veces en el archivo no se escribe nada:
+        elegir una de las filas perdería las demás sin avisar.
+
+        Returns:
+            dict: Cantidad de filas creadas, actualizadas, eliminadas y sin cambios
+
+        Raises:
+            ValueError: Si el archivo repite una clave; el mensaje lista las claves repetidas
+        """
+        scopes = scopes or {}
+        # Se validan todos los modelos antes de escribir para no aplicar la hoja a medias
+        incoming = {model: self._incoming(model, objs) for model, objs in self._pending.items()}
+        counts = {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+        for model in list(self._pending) + [m for m in scopes if m not in self._pending]:
+            result = self._sync_model(model, audit_id, scopes.get(model, {}), incoming.get(model, {}))
+            for name, value in result.items():
+                counts[name] += value
+        self._pending = {}
+        return counts
+
+    @staticmethod
+    def _fields(model):
+        key_fields, value_fields = SYNC_KEYS[model]
+        meta_fields = {name: model._meta.get_field(name) for name in key_fields + value_fields}
+
+        blank_keys = BLANK_KEYS.get(model, ())
+
+        def key_of(values):
+            key = []
+            for name in key_fields:
+                value = _normalize(meta_fields[name], values[name])
+                if value is None and name in blank_keys:
+                    value = ''
+                key.append(value)
+            return tuple(key)
+
+        def values_of(values):
+            return tuple(_normalize(meta_fields[name], values[name]) for name in value_fields)
+
+        return key_fields, value_fields, key_of, values_of
+
+    def _incoming(self, model, objs):
+        """Filas del archivo por clave; falla si alguna clave se repite."""
+        key_fields, value_fields, key_of, values_of = self._fields(model)
+        incoming = {}
+        repeated = {}
+        for obj in objs:
+            row = {name: getattr(obj, name) for name in key_fields + value_fields}
+            key = key_of(row)
+            if key in incoming:
+                repeated[key] = repeated.get(key, 1) + 1
+            else:
+                incoming[key] = (obj, values_of(row))
+
+        if repeated:
+            listed = [
+                f"{', '.join(f'{name}={value}' for name, value in zip(key_fields, key))} ({times} veces)"
+                for key, times in list(repeated.items())[:_MAX_DUPLICADOS_LISTADOS]
+            ]
+            if len(repeated) > _MAX_DUPLICADOS_LISTADOS:
+                listed.append(f"y {len(repeated) - _MAX_DUPLICADOS_LISTADOS} más")
+            raise ValueError(
+                f"El archivo repite {len(repeated)} fila(s) de {model._meta.verbose_name_plural}: "
+                + "; ".join(listed)
+            )
+        return incoming
+
+    def _sync_model(self, model, audit_id, scope, incoming) -> Dict[str, int]:
+        key_fields, value_fields, key_of, values_of = self._fields(model)
+
+        existing = {}
+        duplicated = []
+        rows = (
+            model.objects.filter(audit_id=audit_id, **scope)
+            .order_by('pk')
+            .values_list('pk', *key_fields, *value_fields)
+        )
+        for pk, *raw in rows.iterator():
+            row = dict(zip(key_fields + value_fields, raw))
+            key = key_of(row)
+            if key in existing:
+                # Duplicados de importaciones anteriores: se conserva el primero
+                duplicated.append(pk)
+            else:
+                existing[key] = (pk, values_of(row))
+
+        to_create, to_update, unchanged = [], [], 0
+        for key, (obj, values) in incoming.items():
+            current = existing.pop(key, None)
+            if current is None:
+                to_create.append(obj)
+            elif current[1] != values:
+                obj.pk = current[0]
+                to_update.append(obj)
+            else:
+                unchanged += 1
+
+        to_delete = [pk for pk, _ in existing.values()] + duplicated
+        # Se borra antes de insertar para que las filas nuevas no choquen con
+        # las que reemplazan en la restricción única
+        for start in range(0, len(to_delete), self.batch_size):
+            model.objects.filter(pk__in=to_delete[start:start + self.batch_size]).delete()
+        if to_create:
+            model.objects.bulk_create(to_create, batch_size=self.batch_size)
+        if to_update:
+            model.objects.bulk_update(to_update, value_fields, batch_size=self.batch_size)
+
+        return {
+            'created': len(to_create),
+            'updated': len(to_update),
+            'deleted': len(to_delete),
+            'unchanged': unchanged,
+        }
@@ -1,17 +1,23 @@
 import openpyxl
+import logging
+import time
 from datetime import datetime
 from django.db import transaction
 from audits.models import Audit
-from auditoria.models import BalanceCuentas, RegistroAuxiliar, SaldoInicial
+from auditoria.models import BalanceCuentas, RegistroAuxiliar, SaldoInicial, AjustesReclasificaciones
 import traceback
 import io
 
+from .bulk_writer import BulkWriter
+
 # Importadores delegados
 from .processors.annual_importer import process_annual_sheet as _process_annual_sheet
 from .processors.semestral_importer import process_semestral_sheet as _process_semestral_sheet
 from .processors.auxiliary_importer import process_auxiliary_records as _process_auxiliary_records
 from .processors.initial_balances_importer import process_initial_balances as _process_initial_balances
 
+logger = logging.getLogger(__name__)
+
 class EstadosFinancierosImporter:
     """
     Importador unificado para archivos de estados financieros que contiene
@@ -21,6 +27,13 @@ class EstadosFinancierosImporter:
     - Una hoja "ESTADOS FINANCIEROS ANUAL" con balances anuales (2 fechas)
     - Una hoja "ESTADOS FINANCIEROS SEMESTRALES" con balances semestrales (4 fechas)
     - Opcionalmente, hojas para registros auxiliares y saldos iniciales
+
+    El archivo se lee una sola vez en modo ``read_only`` (streaming) y las filas
+    validadas de cada hoja se sincronizan con las existentes dentro de una
+    única transacción: solo se insertan, actualizan o eliminan las filas que
+    cambiaron, por lo que reimportar el archivo no genera duplicados. Al
+    terminar, ``stats`` contiene las filas, los cambios y el tiempo de cada
+    hoja y las filas por segundo de la importación completa.
     """
     def __init__(self, file_obj, audit_id):
         """
@@ -32,16 +45,34 @@ class EstadosFinancierosImporter:
         """
         self.file_obj = file_obj
         self.audit_id = audit_id
+        self.stats = {
+            'sheets': {},
+            'rows': 0,
+            'changes': {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0},
+            'seconds': 0.0,
+            'rows_per_second': 0.0,
+        }
+        self._workbook = None
 
-    def validate_file(self):
-        """Valida que el archivo contenga al menos una de las hojas requeridas"""
-        try:
+    def _load_workbook(self):
+        """Carga el libro una única vez en modo streaming (read_only)."""
+        if self._workbook is None:
             # Leemos directamente desde el objeto de archivo
             file_content = io.BytesIO(self.file_obj.read())
             # Importante: restaurar el puntero para lecturas futuras
             self.file_obj.seek(0)
-            
-            wb = openpyxl.load_workbook(file_content, read_only=True, data_only=True)
+            self._workbook = openpyxl.load_workbook(file_content, read_only=True, data_only=True)
+        return self._workbook
+
+    def _close_workbook(self):
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+
+    def validate_file(self):
+        """Valida que el archivo contenga al menos una de las hojas requeridas"""
+        try:
+            wb = self._load_workbook()
             sheet_names_lower = [name.lower() for name in wb.sheetnames]
             
             # Verificar si existe al menos una de las hojas principales
@@ -55,13 +86,9 @@ class EstadosFinancierosImporter:
     @transaction.atomic
     def process_file(self):
         """Procesa todas las hojas relevantes del archivo"""
+        started = time.perf_counter()
         try:
-            # Leemos directamente desde el objeto de archivo
-            file_content = io.BytesIO(self.file_obj.read())
-            # Importante: restaurar el puntero para futuras operaciones
-            self.file_obj.seek(0)
-            
-            wb = openpyxl.load_workbook(file_content, data_only=True)
+            wb = self._load_workbook()
             
             # Convertir nombres de hojas a minúsculas para comparación
             sheet_names_lower = {name.lower(): name for name in wb.sheetnames}
@@ -74,54 +101,110 @@ class EstadosFinancierosImporter:
             anual_sheet_name = next((sheet_names_lower[name] for name in sheet_names_lower 
                                     if 'anual' in name and 'semestral' not in name), None)
             if anual_sheet_name:
-                self.process_annual_sheet(wb[anual_sheet_name])
+                self._process_sheet(wb, anual_sheet_name, self.process_annual_sheet,
+                                    {BalanceCuentas: {'tipo_balance': 'ANUAL'}})
                 anual_processed = True
             
             # Procesar la hoja de estados financieros semestrales si existe
             semestral_sheet_name = next((sheet_names_lower[name] for name in sheet_names_lower 
                                         if 'semestral' in name), None)
             if semestral_sheet_name:
-                self.process_semestral_sheet(wb[semestral_sheet_name])
+                self._process_sheet(wb, semestral_sheet_name, self.process_semestral_sheet,
+                                    {BalanceCuentas: {'tipo_balance': 'SEMESTRAL'}, AjustesReclasificaciones: {}})
                 semestral_processed = True
             
             # Procesar la hoja de registros auxiliares si existe
             aux_sheet_name = next((sheet_names_lower[name] for name in sheet_names_lower 
                                   if 'auxiliar' in name), None)
             if aux_sheet_name:
-                self.process_auxiliary_records(wb[aux_sheet_name])
+                self._process_sheet(wb, aux_sheet_name, self.process_auxiliary_records,
+                                    {RegistroAuxiliar: {}})
             
             # Procesar la hoja de saldos iniciales si existe
+            # (después de escribir los balances: toma de ellos la fecha de corte)
             initial_sheet_name = next((sheet_names_lower[name] for name in sheet_names_lower 
                                       if 'saldo' in name), None)
             if initial_sheet_name:
-                self.process_initial_balances(wb[initial_sheet_name])
+                self._process_sheet(wb, initial_sheet_name, self.process_initial_balances,
+                                    {SaldoInicial: {}})
             
             # Verificar que se haya procesado al menos una hoja principal
             if not (anual_processed or semestral_processed):
                 return False, "❌ No se encontró ninguna hoja válida de estados financieros"
             
-            return True, "✅ Importación completada exitosamente"
+            changes = self.stats['changes']
+            return True, (
+                "✅ Importación completada exitosamente "
+                f"({changes['created']} filas nuevas, {changes['updated']} actualizadas, "
+                f"{changes['deleted']} eliminadas)"
+            )
         except Exception as e:
+            # Se revierten también las hojas ya sincronizadas: el archivo se aplica entero o no se aplica
+            transaction.set_rollback(True)
             error_msg = f"Error procesando archivo: {str(e)}"
             traceback.print_exc()
             return False, error_msg
+        finally:
+            self._close_workbook()
+            self._finish_stats(started)
+
+    def _process_sheet(self, wb, sheet_name, processor, scopes):
+        """
+        Ejecuta el importador de una hoja con un buffer propio y sincroniza sus
+        filas con las existentes dentro de ``scopes`` (modelo -> filtros).
+        Si la hoja falla, sus filas se descartan y no se modifica nada.
+        """
+        started = time.perf_counter()
+        sheet = wb[sheet_name]
+        # Las dimensiones declaradas en el archivo pueden estar mal: se leen todas las filas
+        sheet.reset_dimensions()
+
+        writer = BulkWriter()
+        result = processor(sheet, writer)
+        rows = writer.pending()
+        if result:
+            changes = writer.sync(self.audit_id, scopes)
+        else:
+            writer.discard()
+            rows = 0
+            changes = {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+
+        elapsed = time.perf_counter() - started
+        self.stats['sheets'][sheet_name] = {'rows': rows, 'seconds': round(elapsed, 3), **changes}
+        self.stats['rows'] += rows
+        for name, value in changes.items():
+            self.stats['changes'][name] += value
+        logger.info(
+            f"Hoja '{sheet_name}' importada: {rows} filas en {elapsed:.3f}s "
+            f"({changes['created']} nuevas, {changes['updated']} actualizadas, {changes['deleted']} eliminadas)"
+        )
+        return result
+
+    def _finish_stats(self, started):
+        elapsed = time.perf_counter() - started
+        self.stats['seconds'] = round(elapsed, 3)
+        self.stats['rows_per_second'] = round(self.stats['rows'] / elapsed, 1) if elapsed > 0 else 0.0
+        logger.info(
+            f"Importación de la auditoría {self.audit_id}: {self.stats['rows']} filas en "
+            f"{elapsed:.3f}s ({self.stats['rows_per_second']} filas/s)"
+        )
 
     # ------------------------------------------------------------------
     #  Nuevos wrappers que delegan al importador especializado
     # ------------------------------------------------------------------
 
-    def process_annual_sheet(self, sheet):
+    def process_annual_sheet(self, sheet, writer=None):
         """Enrutador hacia `imports.annual_importer.process_annual_sheet`."""
-        return _process_annual_sheet(sheet, self.audit_id)
+        return _process_annual_sheet(sheet, self.audit_id, writer)
 
-    def process_semestral_sheet(self, sheet):
+    def process_semestral_sheet(self, sheet, writer=None):
         """Enrutador hacia `imports.semestral_importer.process_semestral_sheet`."""
-        return _process_semestral_sheet(sheet, self.audit_id)
+        return _process_semestral_sheet(sheet, self.audit_id, writer)
 
-    def process_auxiliary_records(self, sheet):
+    def process_auxiliary_records(self, sheet, writer=None):
         """Enrutador hacia `imports.auxiliary_importer.process_auxiliary_records`."""
-        return _process_auxiliary_records(sheet, self.audit_id)
+        return _process_auxiliary_records(sheet, self.audit_id, writer)
 
-    def process_initial_balances(self, sheet):
+    def process_initial_balances(self, sheet, writer=None):
         """Enrutador hacia `imports.initial_balances_importer.process_initial_balances`."""
-        return _process_initial_balances(sheet, self.audit_id)
\ No newline at end of file
+        return _process_initial_balances(sheet, self.audit_id, writer)
\ No newline at end of file
@@ -2,10 +2,11 @@ from datetime import datetime
 import traceback
 from audits.models import Audit
 from auditoria.models import BalanceCuentas
+from ..bulk_writer import BulkWriter
 
 __all__ = ["process_annual_sheet"]
 
-def process_annual_sheet(sheet, audit_id):
+def process_annual_sheet(sheet, audit_id, writer=None):
     """Procesa la hoja *ESTADOS FINANCIEROS ANUAL* con la estructura actual.
 
     Columnas esperadas por fila de cuenta:
@@ -14,9 +15,12 @@ def process_annual_sheet(sheet, audit_id):
         C -> Valor año actual
         D -> Tipo. Cuenta (C / NC)
 
-    Crea registros en BalanceCuentas (valores de años).
+    Crea registros en BalanceCuentas (valores de años). Si se recibe un
+    ``BulkWriter`` las filas quedan en el buffer para que el llamador las escriba.
     """
     try:
+        own_writer = writer is None
+        writer = writer or BulkWriter()
         current_section = None
         audit_instance = Audit.objects.get(pk=audit_id)
 
@@ -103,7 +107,7 @@ def process_annual_sheet(sheet, audit_id):
 
             tipo_balance = "ANUAL"
             if valor_anterior is not None:
-                BalanceCuentas.objects.create(
+                writer.add(BalanceCuentas(
                     audit=audit_instance,
                     tipo_balance=tipo_balance,
                     fecha_corte=fechas_globales_anterior,
@@ -111,9 +115,9 @@ def process_annual_sheet(sheet, audit_id):
                     nombre_cuenta=nombre_cuenta,
                     tipo_cuenta=tipo_cuenta,
                     valor=valor_anterior,
-                )
+                ))
             if valor_actual is not None:
-                BalanceCuentas.objects.create(
+                writer.add(BalanceCuentas(
                     audit=audit_instance,
                     tipo_balance=tipo_balance,
                     fecha_corte=fechas_globales_actual,
@@ -121,7 +125,9 @@ def process_annual_sheet(sheet, audit_id):
                     nombre_cuenta=nombre_cuenta,
                     tipo_cuenta=tipo_cuenta,
                     valor=valor_actual,
-                )
+                ))
+        if own_writer:
+            writer.flush()
         return True
     except Exception:
         traceback.print_exc()
@@ -1,13 +1,16 @@
 import traceback
 from auditoria.models import RegistroAuxiliar
+from ..bulk_writer import BulkWriter
 
 __all__ = ["process_auxiliary_records"]
 
-def process_auxiliary_records(sheet, audit_id):
+def process_auxiliary_records(sheet, audit_id, writer=None):
     """Procesa la hoja de registros auxiliares y guarda cada cuenta/saldo."""
     try:
+        own_writer = writer is None
+        writer = writer or BulkWriter()
         records_created = 0
-        for row in sheet.iter_rows(min_row=2, values_only=True):
+        for row in sheet.iter_rows(min_row=2, max_col=3, values_only=True):
             if not any(cell for cell in row):
                 continue
             cuenta = str(row[1]).strip() if row[1] else None
@@ -15,12 +18,14 @@ def process_auxiliary_records(sheet, audit_id):
             if cuenta and cuenta.upper().startswith("TOTAL"):
                 continue
             if cuenta and saldo is not None:
-                RegistroAuxiliar.objects.create(
+                writer.add(RegistroAuxiliar(
                     audit_id=audit_id,
                     cuenta=cuenta,
                     saldo=saldo,
-                )
+                ))
                 records_created += 1
+        if own_writer:
+            writer.flush()
         return records_created > 0
     except Exception:
         traceback.print_exc()
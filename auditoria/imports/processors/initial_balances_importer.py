@@ -1,16 +1,19 @@
 from datetime import datetime
 import traceback
 from auditoria.models import SaldoInicial, BalanceCuentas
+from ..bulk_writer import BulkWriter
 
 __all__ = ["process_initial_balances"]
 
-def process_initial_balances(sheet, audit_id):
+def process_initial_balances(sheet, audit_id, writer=None):
     """Procesa la hoja de saldos iniciales y crea registros en la BD.
 
     Se toma la fecha de corte del balance más reciente para la auditoría, o la
     fecha actual si no existe.
     """
     try:
+        own_writer = writer is None
+        writer = writer or BulkWriter()
         # Determinar fecha de corte por defecto
         fecha_corte = datetime.now().date()
         try:
@@ -20,7 +23,7 @@ def process_initial_balances(sheet, audit_id):
         except Exception:
             pass
 
-        for row in sheet.iter_rows(min_row=2, values_only=True):
+        for row in sheet.iter_rows(min_row=2, max_col=3, values_only=True):
             if not any(cell for cell in row):
                 continue
             cuenta = str(row[1]).strip() if row[1] else None
@@ -28,12 +31,14 @@ def process_initial_balances(sheet, audit_id):
             if cuenta and cuenta.upper().startswith("TOTAL"):
                 continue
             if cuenta and saldo is not None:
-                SaldoInicial.objects.create(
+                writer.add(SaldoInicial(
                     audit_id=audit_id,
                     cuenta=cuenta,
                     saldo=saldo,
                     fecha_corte=fecha_corte,
-                )
+                ))
+        if own_writer:
+            writer.flush()
         return True
     except Exception:
         traceback.print_exc()
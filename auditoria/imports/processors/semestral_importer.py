@@ -2,19 +2,23 @@ from datetime import datetime
 import traceback
 from audits.models import Audit
 from auditoria.models import BalanceCuentas, AjustesReclasificaciones
+from ..bulk_writer import BulkWriter
 
 __all__ = ["process_semestral_sheet"]
 
-def process_semestral_sheet(sheet, audit_id):
+def process_semestral_sheet(sheet, audit_id, writer=None):
     """Procesa la hoja de estados financieros semestrales con 6 columnas de valores
     (tres cortes del año anterior, una del año actual) y columnas de ajustes
-    (Debe/Haber)."""
+    (Debe/Haber). Si se recibe un ``BulkWriter`` las filas quedan en el buffer
+    para que el llamador las escriba."""
     try:
+        own_writer = writer is None
+        writer = writer or BulkWriter()
         current_section = None
         fechas_globales = []
         audit_instance = Audit.objects.get(pk=audit_id)
 
-        for row in sheet.iter_rows(min_row=2, values_only=True):
+        for row in sheet.iter_rows(min_row=2, max_col=7, values_only=True):
             row_vals = row[:7]  # A-G
             primera_columna = str(row_vals[0]).strip() if row_vals[0] is not None else ""
 
@@ -84,7 +88,7 @@ def process_semestral_sheet(sheet, audit_id):
 
             for valor, fecha in zip(valores_balance, fechas_globales):
                 if valor is not None and fecha is not None:
-                    BalanceCuentas.objects.create(
+                    writer.add(BalanceCuentas(
                         audit=audit_instance,
                         tipo_balance=tipo_balance,
                         fecha_corte=fecha,
@@ -92,16 +96,18 @@ def process_semestral_sheet(sheet, audit_id):
                         nombre_cuenta=nombre_cuenta,
                         tipo_cuenta=tipo_cuenta,
                         valor=valor,
-                    )
+                    ))
 
             # Guardar ajustes/reclasificaciones
             if (debe_val is not None and debe_val != 0) or (haber_val is not None and haber_val != 0):
-                AjustesReclasificaciones.objects.create(
+                writer.add(AjustesReclasificaciones(
                     audit=audit_instance,
                     nombre_cuenta=nombre_cuenta,
                     debe=debe_val or 0,
                     haber=haber_val or 0,
-                )
+                ))
+        if own_writer:
+            writer.flush()
         return True
     except Exception:
         traceback.print_exc()
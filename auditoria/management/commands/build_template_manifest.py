@@ -0,0 +1,52 @@
+"""
+Construye el manifiesto de plantillas Excel (ver auditoria.utils.template_manifest).
+
+Se ejecuta al desplegar y cada vez que cambian las plantillas o la
+configuración de reemplazos; mientras tanto, las plantillas modificadas se
+procesan sin manifiesto.
+
+Uso:
+    python manage.py build_template_manifest
+    python manage.py build_template_manifest --output /ruta/manifiesto.json
+"""
+
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from auditoria.utils.template_index import template_base_path
+from auditoria.utils.template_manifest import build_manifest, write_manifest
+
+
+class Command(BaseCommand):
+    help = "Precalcula procesador, cuenta, hojas con reemplazos y filas ancla de cada plantilla Excel."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default=None,
+            help="Archivo de salida (por defecto TEMPLATE_MANIFEST_PATH)",
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        plantillas = []
+        for is_internal in (False, True):
+            for root, dirs, files in os.walk(template_base_path(is_internal)):
+                dirs.sort()
+                for nombre in sorted(files):
+                    # Los archivos temporales de Office (~$...) no son plantillas
+                    if nombre.lower().endswith('.xlsx') and not nombre.startswith('~$'):
+                        plantillas.append(os.path.join(root, nombre))
+
+        manifest = build_manifest(plantillas)
+        path = write_manifest(manifest, options['output'])
+
+        entradas = manifest['plantillas'].values()
+        sin_reemplazos = sum(1 for entrada in entradas if not entrada['hojas_con_reemplazos'])
+        con_procesador = sum(1 for entrada in entradas if entrada['procesador'])
+        self.stdout.write(
+            f"Plantillas: {len(manifest['plantillas'])}/{len(plantillas)} | "
+            f"con procesador: {con_procesador} | sin reemplazos: {sin_reemplazos}"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Manifiesto escrito en {path} ({time.monotonic() - inicio:.1f}s)"))
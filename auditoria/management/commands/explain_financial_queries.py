@@ -0,0 +1,65 @@
+"""
+Muestra el plan de ejecución (EXPLAIN) de las consultas más frecuentes sobre
+los datos financieros de una auditoría, en el motor de base de datos configurado.
+
+Uso:
+    python manage.py explain_financial_queries
+    python manage.py explain_financial_queries --audit 12 --analyze
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from audits.models import Audit
+from auditoria.utils.data_db import (
+    get_balance_data,
+    get_auxiliary_records,
+    get_initial_balances,
+    get_adjustment_records,
+)
+from auditoria.utils.render_cache import fingerprint_querysets
+
+
+class Command(BaseCommand):
+    help = "Imprime el EXPLAIN de las consultas de datos financieros usadas al generar documentos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--audit', type=int, default=None,
+            help="ID de la auditoría a usar en los filtros (por defecto, la primera existente)",
+        )
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help="Ejecuta las consultas y muestra tiempos reales (solo PostgreSQL)",
+        )
+
+    def handle(self, *args, **options):
+        audit_id = options['audit']
+        if audit_id is None:
+            audit_id = Audit.objects.order_by('id').values_list('id', flat=True).first() or 0
+
+        explain_options = {}
+        if options['analyze']:
+            if connection.vendor != 'postgresql':
+                raise CommandError("--analyze solo está disponible con PostgreSQL.")
+            explain_options['analyze'] = True
+
+        self.stdout.write(f"Motor: {connection.vendor} | Auditoría: {audit_id}\n")
+        for name, queryset in self._hot_queries(audit_id):
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write("")
+
+    @staticmethod
+    def _hot_queries(audit_id):
+        """Consultas de get_all_financial_data y de la huella de la caché de documentos."""
+        queries = [
+            ("Balances (get_balance_data)", get_balance_data(audit_id)['balances']),
+            ("Registros auxiliares (get_auxiliary_records)", get_auxiliary_records(audit_id)['registros']),
+            ("Saldos iniciales (get_initial_balances)", get_initial_balances(audit_id)['saldos']),
+            ("Ajustes (get_adjustment_records)", get_adjustment_records(audit_id)['ajustes']),
+        ]
+        for model, queryset in fingerprint_querysets(audit_id):
+            queries.append((f"Huella de caché ({model.__name__})", queryset))
+        return queries
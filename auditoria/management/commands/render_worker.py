@@ -0,0 +1,45 @@
+"""
+Procesa la cola de generación de documentos (ver auditoria.utils.render_jobs).
+
+Uso:
+    python manage.py render_worker
+    python manage.py render_worker --concurrency 4
+    python manage.py render_worker --purge
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from auditoria.utils.render_jobs import RenderWorkerPool, purge_finished_jobs
+
+
+class Command(BaseCommand):
+    help = "Procesa los trabajos de generación de documentos encolados por las descargas."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=None,
+            help="Cantidad de hilos (por defecto RENDER_JOBS_CONCURRENCY)",
+        )
+        parser.add_argument(
+            '--purge', action='store_true',
+            help="Solo elimina los trabajos terminados más antiguos que RENDER_JOBS_RETENTION_HOURS",
+        )
+
+    def handle(self, *args, **options):
+        if options['purge']:
+            borrados = purge_finished_jobs()
+            self.stdout.write(f"Trabajos eliminados: {borrados}")
+            return
+
+        pool = RenderWorkerPool(concurrency=options['concurrency'])
+        pool.start()
+        self.stdout.write(f"Worker de generación iniciado con {pool.concurrency} hilos")
+        try:
+            while pool.is_alive():
+                time.sleep(1)
+        except KeyboardInterrupt:
+            self.stdout.write("Deteniendo worker...")
+        finally:
+            pool.stop(timeout=30)
@@ -0,0 +1,74 @@
+"""
+Revisa el índice de plantillas (ver auditoria.utils.template_index).
+
+Lista los nombres que se normalizan igual dentro de una misma carpeta (la
+búsqueda sin tildes ni mayúsculas elige solo uno) y los patrones de
+hipervínculo (``A-1``, ``R-programa``...) que no llevan a ninguna plantilla.
+
+Uso:
+    python manage.py template_index
+    python manage.py template_index --tipo interna
+"""
+
+from django.core.management.base import BaseCommand
+
+from auditoria.processors.shared import get_file_info_from_pattern
+from auditoria.processors.shared.urls_programs import (
+    PATTERN_TO_FILE,
+    INTERNAL_PATTERN_TO_FILE,
+    SPECIAL_PATTERNS,
+    PREFIX_TO_PROGRAM,
+    INTERNAL_PREFIX_TO_PROGRAM,
+)
+from auditoria.utils.template_index import template_index
+
+TIPOS = {'financiera': False, 'interna': True}
+
+
+class Command(BaseCommand):
+    help = "Reporta colisiones del índice de plantillas y patrones de hipervínculo sin plantilla."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tipo', choices=sorted(TIPOS), default=None,
+            help="Tipo de auditoría a revisar (por defecto, ambos)",
+        )
+
+    def handle(self, *args, **options):
+        tipos = [options['tipo']] if options['tipo'] else list(TIPOS)
+        template_index.clear()
+        problemas = 0
+        for tipo in tipos:
+            is_internal = TIPOS[tipo]
+            self.stdout.write(self.style.MIGRATE_HEADING(f"Auditoría {tipo}"))
+
+            colisiones = template_index.collisions(is_internal)
+            self.stdout.write(f"Colisiones: {len(colisiones)}")
+            for carpeta, clave, rutas in colisiones:
+                self.stdout.write(f"  {carpeta} | '{clave}'")
+                for ruta in rutas:
+                    self.stdout.write(f"    {ruta}")
+
+            sin_plantilla = [
+                patron for patron in self._patrones(is_internal)
+                if get_file_info_from_pattern(patron, is_internal=is_internal) is None
+            ]
+            self.stdout.write(f"Patrones sin plantilla: {len(sin_plantilla)}")
+            for patron in sin_plantilla:
+                self.stdout.write(f"  {patron}")
+            problemas += len(colisiones) + len(sin_plantilla)
+
+        estilo = self.style.WARNING if problemas else self.style.SUCCESS
+        self.stdout.write(estilo(f"Total de problemas: {problemas}"))
+
+    @staticmethod
+    def _patrones(is_internal):
+        """Patrones que pueden aparecer en los hipervínculos de los documentos."""
+        if is_internal:
+            patrones = list(INTERNAL_PATTERN_TO_FILE)
+            prefijos = INTERNAL_PREFIX_TO_PROGRAM
+        else:
+            patrones = list(PATTERN_TO_FILE) + list(SPECIAL_PATTERNS)
+            prefijos = PREFIX_TO_PROGRAM
+        patrones += [f"{prefijo}-programa" for prefijo in prefijos]
+        return list(dict.fromkeys(patrones))
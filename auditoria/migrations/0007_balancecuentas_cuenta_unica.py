@@ -0,0 +1,26 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditoria', '0006_remove_balancecuentas_debe_and_more'),
+        ('audits', '0003_audit_moneda'),
+    ]
+
+    operations = [
+        # La primera versión de esta migración borraba las cuentas repetidas y
+        # creaba esta restricción sin tipo_cuenta. Las bases que ya la
+        # aplicaron la conservan; en las demás solo queda en el estado para no
+        # perder filas, y 0010 la reemplaza en ambos casos.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='balancecuentas',
+                    constraint=models.UniqueConstraint(fields=('audit', 'tipo_balance', 'fecha_corte', 'seccion', 'nombre_cuenta'), name='auditoria_balancecuentas_cuenta_unica'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditoria', '0007_balancecuentas_cuenta_unica'),
+        ('audits', '0003_audit_moneda'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ajustesreclasificaciones',
+            index=models.Index(fields=['audit', 'nombre_cuenta'], name='auditoria_ajustes_audit_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registroauxiliar',
+            index=models.Index(fields=['audit', 'cuenta'], name='auditoria_regaux_audit_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='saldoinicial',
+            index=models.Index(fields=['audit', 'cuenta', 'fecha_corte'], name='auditoria_saldoini_audit_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:36
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditoria', '0008_indices_por_auditoria'),
+        ('audits', '0003_audit_moneda'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderJob',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('template_path', models.CharField(max_length=500, verbose_name='Plantilla')),
+                ('filename', models.CharField(max_length=255, verbose_name='Archivo')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En proceso'), ('COMPLETADO', 'Completado'), ('FALLIDO', 'Fallido')], default='PENDIENTE', max_length=10, verbose_name='Estado')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('max_intentos', models.PositiveSmallIntegerField(default=3, verbose_name='Máximo de intentos')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Último error')),
+                ('resultado', models.CharField(blank=True, default='', max_length=500, verbose_name='Archivo generado')),
+                ('desde_cache', models.BooleanField(default=False, verbose_name='Servido desde caché')),
+                ('worker', models.CharField(blank=True, default='', max_length=100, verbose_name='Worker')),
+                ('creado', models.DateTimeField(auto_now_add=True, verbose_name='Creado')),
+                ('disponible_desde', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Disponible desde')),
+                ('iniciado', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado')),
+                ('finalizado', models.DateTimeField(blank=True, null=True, verbose_name='Finalizado')),
+                ('segundos_espera', models.FloatField(blank=True, null=True, verbose_name='Segundos en cola')),
+                ('segundos_render', models.FloatField(blank=True, null=True, verbose_name='Segundos de generación')),
+                ('audit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='render_jobs', to='audits.audit', verbose_name='Auditoría')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='render_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de generación',
+                'verbose_name_plural': 'Trabajos de generación',
+                'ordering': ['-creado'],
+                'indexes': [models.Index(fields=['estado', 'disponible_desde'], name='auditoria_renderjob_cola_idx')],
+            },
+        ),
+    ]
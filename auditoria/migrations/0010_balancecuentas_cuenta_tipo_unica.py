@@ -0,0 +1,89 @@
+# Generated by Django 5.0.6 on 2026-10-18 18:02
+
+from django.db import migrations, models
+from django.db.models import Count, Value
+from django.db.models.functions import Coalesce
+
+RESTRICCION_ANTERIOR = 'auditoria_balancecuentas_cuenta_unica'
+
+# Filas repetidas que se listan en el error
+MAX_LISTADOS = 20
+
+
+def eliminar_restriccion_anterior(apps, schema_editor):
+    """Elimina la restricción sin tipo_cuenta si la creó la primera versión de 0007."""
+    BalanceCuentas = apps.get_model('auditoria', 'BalanceCuentas')
+    with schema_editor.connection.cursor() as cursor:
+        existentes = schema_editor.connection.introspection.get_constraints(cursor, BalanceCuentas._meta.db_table)
+    if RESTRICCION_ANTERIOR in existentes:
+        schema_editor.remove_constraint(
+            BalanceCuentas,
+            models.UniqueConstraint(
+                fields=['audit', 'tipo_balance', 'fecha_corte', 'seccion', 'nombre_cuenta'],
+                name=RESTRICCION_ANTERIOR,
+            ),
+        )
+
+
+def verificar_balances_duplicados(apps, schema_editor):
+    """
+    Falla si hay cuentas repetidas (de reimportaciones anteriores) en vez de
+    elegir una y borrar las demás: hay que revisarlas y corregirlas a mano
+    antes de aplicar la restricción.
+    """
+    BalanceCuentas = apps.get_model('auditoria', 'BalanceCuentas')
+    campos = ('audit', 'tipo_balance', 'fecha_corte', 'seccion', 'nombre_cuenta', 'tipo')
+    duplicados = list(
+        BalanceCuentas.objects.order_by()
+        .annotate(tipo=Coalesce('tipo_cuenta', Value('')))
+        .values(*campos)
+        .annotate(cantidad=Count('id'))
+        .filter(cantidad__gt=1)
+    )
+    if not duplicados:
+        return
+
+    lineas = []
+    for duplicado in duplicados[:MAX_LISTADOS]:
+        ids = list(
+            BalanceCuentas.objects.annotate(tipo=Coalesce('tipo_cuenta', Value('')))
+            .filter(**{campo: duplicado[campo] for campo in campos})
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+        lineas.append(
+            f"  auditoría {duplicado['audit']}, {duplicado['tipo_balance']} {duplicado['fecha_corte']}, "
+            f"{duplicado['seccion']}, '{duplicado['nombre_cuenta']}', tipo '{duplicado['tipo']}': ids {ids}"
+        )
+    if len(duplicados) > MAX_LISTADOS:
+        lineas.append(f"  y {len(duplicados) - MAX_LISTADOS} más")
+    raise RuntimeError(
+        f"Hay {len(duplicados)} cuenta(s) repetidas en auditoria_balancecuentas; "
+        "elimine o corrija las filas sobrantes y vuelva a migrar:\n" + "\n".join(lineas)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditoria', '0009_render_job'),
+    ]
+
+    operations = [
+        # Primero el estado: sin la restricción en el modelo, el borrado en
+        # SQLite reconstruye la tabla sin ella
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveConstraint(
+                    model_name='balancecuentas',
+                    name=RESTRICCION_ANTERIOR,
+                ),
+            ],
+        ),
+        migrations.RunPython(eliminar_restriccion_anterior, migrations.RunPython.noop),
+        migrations.RunPython(verificar_balances_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='balancecuentas',
+            constraint=models.UniqueConstraint(models.F('audit'), models.F('tipo_balance'), models.F('fecha_corte'), models.F('seccion'), models.F('nombre_cuenta'), Coalesce('tipo_cuenta', models.Value('')), name='auditoria_balancecuentas_cuenta_tipo_unica'),
+        ),
+    ]
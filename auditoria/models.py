@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from audits.models import Audit
 
 # -----------------------------------------------------------------------------
@@ -30,6 +34,18 @@ class BalanceCuentas(models.Model):
         verbose_name = 'Balance de Cuentas'
         verbose_name_plural = 'Balances de Cuentas'
         ordering = ['audit', 'tipo_balance', 'fecha_corte', 'seccion', 'nombre_cuenta']
+        constraints = [
+            # Una cuenta aparece una sola vez por balance, fecha, sección y tipo
+            # (corriente / no corriente); el índice único también sirve para
+            # comparar filas al reimportar y, como empieza por las columnas de
+            # ordering, para leerlas ordenadas. Con Coalesce las cuentas sin
+            # tipo también chocan entre sí (en un índice único dos NULL no chocan)
+            models.UniqueConstraint(
+                'audit', 'tipo_balance', 'fecha_corte', 'seccion', 'nombre_cuenta',
+                Coalesce('tipo_cuenta', Value('')),
+                name='auditoria_balancecuentas_cuenta_tipo_unica',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.audit.id} - {self.tipo_balance} - {self.fecha_corte} - {self.seccion} - {self.nombre_cuenta}"
@@ -47,6 +63,9 @@ class RegistroAuxiliar(models.Model):
         verbose_name = 'Registro Auxiliar'
         verbose_name_plural = 'Registros Auxiliares'
         ordering = ['audit', 'cuenta']
+        indexes = [
+            models.Index(fields=['audit', 'cuenta'], name='auditoria_regaux_audit_idx'),
+        ]
 
     def __str__(self):
         return f"{self.audit.id} - {self.cuenta}"
@@ -65,6 +84,9 @@ class SaldoInicial(models.Model):
         verbose_name = 'Saldo Inicial'
         verbose_name_plural = 'Saldos Iniciales'
         ordering = ['audit', 'cuenta']
+        indexes = [
+            models.Index(fields=['audit', 'cuenta', 'fecha_corte'], name='auditoria_saldoini_audit_idx'),
+        ]
 
     def __str__(self):
         return f"{self.audit.id} - {self.cuenta} - {self.fecha_corte}"
@@ -103,6 +125,62 @@ class AjustesReclasificaciones(models.Model):
         verbose_name = 'Ajuste / Reclasificación'
         verbose_name_plural = 'Ajustes / Reclasificaciones'
         ordering = ['audit', 'nombre_cuenta']
+        indexes = [
+            models.Index(fields=['audit', 'nombre_cuenta'], name='auditoria_ajustes_audit_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.audit.id} - {self.nombre_cuenta}"
\ No newline at end of file
+        return f"{self.audit.id} - {self.nombre_cuenta}"
+# -----------------------------------------------------------------------------
+# Modelo para la cola de generación de documentos en segundo plano
+# -----------------------------------------------------------------------------
+class RenderJob(models.Model):
+    PENDIENTE = 'PENDIENTE'
+    EN_PROCESO = 'EN_PROCESO'
+    COMPLETADO = 'COMPLETADO'
+    FALLIDO = 'FALLIDO'
+
+    ESTADO_CHOICES = [
+        (PENDIENTE, 'Pendiente'),
+        (EN_PROCESO, 'En proceso'),
+        (COMPLETADO, 'Completado'),
+        (FALLIDO, 'Fallido'),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    audit = models.ForeignKey(Audit, on_delete=models.CASCADE, related_name='render_jobs', verbose_name='Auditoría')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='render_jobs',
+        verbose_name='Usuario',
+    )
+    template_path = models.CharField(max_length=500, verbose_name='Plantilla')
+    filename = models.CharField(max_length=255, verbose_name='Archivo')
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default=PENDIENTE, verbose_name='Estado')
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')
+    max_intentos = models.PositiveSmallIntegerField(default=3, verbose_name='Máximo de intentos')
+    error = models.TextField(blank=True, default='', verbose_name='Último error')
+    resultado = models.CharField(max_length=500, blank=True, default='', verbose_name='Archivo generado')
+    desde_cache = models.BooleanField(default=False, verbose_name='Servido desde caché')
+    worker = models.CharField(max_length=100, blank=True, default='', verbose_name='Worker')
+    creado = models.DateTimeField(auto_now_add=True, verbose_name='Creado')
+    disponible_desde = models.DateTimeField(default=timezone.now, verbose_name='Disponible desde')
+    iniciado = models.DateTimeField(null=True, blank=True, verbose_name='Iniciado')
+    finalizado = models.DateTimeField(null=True, blank=True, verbose_name='Finalizado')
+    segundos_espera = models.FloatField(null=True, blank=True, verbose_name='Segundos en cola')
+    segundos_render = models.FloatField(null=True, blank=True, verbose_name='Segundos de generación')
+
+    class Meta:
+        verbose_name = 'Trabajo de generación'
+        verbose_name_plural = 'Trabajos de generación'
+        ordering = ['-creado']
+        indexes = [
+            # El worker toma el pendiente más antiguo que ya esté disponible
+            models.Index(fields=['estado', 'disponible_desde'], name='auditoria_renderjob_cola_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.audit.id} - {self.filename} - {self.estado}"
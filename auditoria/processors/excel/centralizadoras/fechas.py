@@ -1,52 +1,34 @@
-import re
 from datetime import datetime
 from openpyxl.utils import get_column_letter
 from openpyxl.styles import Alignment
 
+from ....utils.balance_index import as_balance_index
+
 def obtener_todas_fechas_semestrales(balances):
     """
     Obtiene todas las fechas semestrales disponibles en los balances
 
     Args:
-        balances: Diccionario con los balances financieros
+        balances: Índice (o diccionario) con los balances financieros
 
     Returns:
         Lista con todas las fechas semestrales en formato YYYY-MM-DD
     """
-    patron_fecha = re.compile(r'SEMESTRAL-(\d{4}-\d{2}-\d{2})')
-    fechas = set()
-
-    for clave in balances:
-        match = patron_fecha.search(clave)
-        if match:
-            fecha_completa = match.group(1)
-            fechas.add(fecha_completa)
-
-    # Devolver las fechas ordenadas
-    return sorted(list(fechas))
+    return as_balance_index(balances).fechas('SEMESTRAL')
 
 def filtrar_cuentas_por_seccion(balances, fecha, seccion):
     """
     Filtra las cuentas de una sección específica para una fecha dada
 
     Args:
-        balances: Diccionario con los balances financieros
+        balances: Índice (o diccionario) con los balances financieros
         fecha: Fecha en formato YYYY-MM-DD
         seccion: Nombre de la sección (Activo, Pasivo, Patrimonio, ESTADO DE RESULTADOS)
 
     Returns:
         Diccionario con las cuentas y sus valores
     """
-    cuentas_filtradas = {}
-    patron = re.compile(f'SEMESTRAL-{fecha}-{seccion}-(.*)')
-
-    for clave, valor in balances.items():
-        match = patron.match(clave)
-        if match:
-            nombre_cuenta = match.group(1)
-            cuentas_filtradas[nombre_cuenta] = valor
-
-    return cuentas_filtradas
+    return as_balance_index(balances).cuentas('SEMESTRAL', fecha, seccion)
 
 def preparar_fechas_excel(fechas_semestrales):
     """
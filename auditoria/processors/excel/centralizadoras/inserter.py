@@ -1,5 +1,7 @@
 from .fechas import preparar_fechas_excel, insertar_fechas_en_celdas
-from .utils import mover_imagenes_por_insercion, buscar_fila_por_valor
+from .utils import buscar_fila_por_valor
+from ..formula_translation import formula_suma
+from ..row_expansion import ExpansionFilas
 
 def procesar_seccion_centralizadora(
     sheet,
@@ -14,31 +16,95 @@ def procesar_seccion_centralizadora(
     """
     Función genérica para procesar una sección de una hoja centralizadora.
     """
-    # 1. Obtener cuentas únicas para las secciones dadas
+    return procesar_secciones_centralizadora(
+        sheet, cuentas_por_fecha, fechas_columnas, ajustes_reclasificaciones,
+        [{
+            'secciones': secciones,
+            'fila_inicio': fila_inicio,
+            'texto_suma': texto_suma,
+            'columnas_suma': columnas_suma,
+        }],
+    )[0]
+
+def procesar_secciones_centralizadora(
+    sheet,
+    cuentas_por_fecha,
+    fechas_columnas,
+    ajustes_reclasificaciones,
+    secciones_hoja
+):
+    """
+    Procesa varias secciones de una hoja centralizadora. Las filas que faltan
+    en todas las secciones se insertan con un solo desplazamiento de la hoja.
+
+    Args:
+        secciones_hoja: Lista de dicts con 'secciones', 'fila_inicio',
+            'texto_suma' y 'columnas_suma'. 'fila_inicio' es la fila de la
+            plantilla original, sin contar las filas insertadas en secciones
+            anteriores.
+
+    Returns:
+        Lista con las filas insertadas en cada sección
+    """
+    # 1. Planificar el espacio de cada sección sobre la plantilla original
+    expansion = ExpansionFilas(sheet)
+    planes = []
+    for seccion_hoja in secciones_hoja:
+        cuentas_ordenadas = _cuentas_ordenadas(cuentas_por_fecha, seccion_hoja['secciones'])
+        fila_inicio = seccion_hoja['fila_inicio']
+
+        suma_row = buscar_fila_por_valor(sheet, 'B', seccion_hoja['texto_suma'])
+        if not suma_row:
+            suma_row = fila_inicio + len(cuentas_ordenadas) + 1 # Fallback si no se encuentra
+
+        filas_disponibles = max(0, suma_row - fila_inicio)
+        filas_a_insertar = max(0, len(cuentas_ordenadas) - filas_disponibles)
+        expansion.insertar(suma_row, filas_a_insertar)
+        planes.append((seccion_hoja, cuentas_ordenadas, fila_inicio, suma_row, filas_a_insertar))
+
+    # 2. Insertar todas las filas de una vez
+    expansion.aplicar()
+
+    # 3. Llenar cada sección en su posición final
+    for seccion_hoja, cuentas_ordenadas, fila_inicio, suma_row, _ in planes:
+        _llenar_seccion(
+            sheet,
+            cuentas_ordenadas,
+            cuentas_por_fecha,
+            fechas_columnas,
+            ajustes_reclasificaciones,
+            seccion_hoja['secciones'],
+            # Las filas nuevas quedan justo después de la fila anterior al inicio
+            expansion.fila(fila_inicio - 1) + 1,
+            expansion.fila(suma_row),
+            seccion_hoja['columnas_suma'],
+        )
+
+    return [filas_a_insertar for *_, filas_a_insertar in planes]
+
+def _cuentas_ordenadas(cuentas_por_fecha, secciones):
+    """Cuentas únicas de las secciones dadas, ordenadas."""
     cuentas_unicas = set()
     for fecha, data in cuentas_por_fecha.items():
         for seccion in secciones:
             # Manejar estructura de datos anidada y plana
             cuentas_seccion = data.get(seccion, data if not isinstance(list(data.values())[0], dict) else {})
             cuentas_unicas.update(cuentas_seccion.keys())
-    
-    cuentas_ordenadas = sorted(list(cuentas_unicas))
-
-    # 2. Asegurar espacio en la hoja, insertando filas si es necesario
-    suma_row = buscar_fila_por_valor(sheet, 'B', texto_suma)
-    if not suma_row:
-        suma_row = fila_inicio + len(cuentas_ordenadas) + 1 # Fallback si no se encuentra
 
-    filas_disponibles = max(0, suma_row - fila_inicio)
-    filas_necesarias = len(cuentas_ordenadas)
-    filas_a_insertar = max(0, filas_necesarias - filas_disponibles)
+    return sorted(list(cuentas_unicas))
 
-    if filas_a_insertar > 0:
-        sheet.insert_rows(suma_row, filas_a_insertar)
-        mover_imagenes_por_insercion(sheet, suma_row, filas_a_insertar)
-        suma_row += filas_a_insertar
-
-    # 3. Insertar datos en cada fila
+def _llenar_seccion(
+    sheet,
+    cuentas_ordenadas,
+    cuentas_por_fecha,
+    fechas_columnas,
+    ajustes_reclasificaciones,
+    secciones,
+    fila_inicio,
+    suma_row,
+    columnas_suma
+):
+    """Escribe cuentas, saldos, ajustes y la fila de suma de una sección."""
     for i, cuenta in enumerate(cuentas_ordenadas):
         fila_actual = fila_inicio + i
         sheet[f'B{fila_actual}'] = cuenta
@@ -61,10 +127,8 @@ def procesar_seccion_centralizadora(
         sheet[f'G{fila_actual}'] = ajustes_reclasificaciones.get(cuenta, {}).get('debe', 0)
         sheet[f'H{fila_actual}'] = ajustes_reclasificaciones.get(cuenta, {}).get('haber', 0)
 
-    # 4. Actualizar la fila de suma
+    # Actualizar la fila de suma
     if cuentas_ordenadas:
         last_row = fila_inicio + len(cuentas_ordenadas) - 1
         for col in columnas_suma:
-            sheet[f"{col}{suma_row}"] = f"=SUM({col}{fila_inicio}:{col}{last_row})"
-            
-    return filas_a_insertar
+            sheet[f"{col}{suma_row}"] = formula_suma(col, fila_inicio, last_row)
@@ -1,6 +1,5 @@
 from ..fechas import preparar_fechas_excel, insertar_fechas_en_celdas
-from ..inserter import procesar_seccion_centralizadora
-from ..utils import buscar_fila_por_valor
+from ..inserter import procesar_secciones_centralizadora
 
 def insertar_datos_balance(workbook, cuentas_por_fecha, fechas_semestrales, ajustes_reclasificaciones):
     sheet = workbook.active
@@ -15,26 +14,25 @@ def insertar_datos_balance(workbook, cuentas_por_fecha, fechas_semestrales, ajus
         'I': fecha_mas_reciente
     }
 
-    # Procesar ACTIVO
-    filas_insertadas_activo = procesar_seccion_centralizadora(
+    # ACTIVO y PASIVO Y PATRIMONIO se planifican juntos: las filas que falten
+    # en ambas secciones se insertan con un solo desplazamiento
+    procesar_secciones_centralizadora(
         sheet=sheet,
         cuentas_por_fecha=cuentas_por_fecha,
         fechas_columnas=fechas_columnas,
         ajustes_reclasificaciones=ajustes_reclasificaciones,
-        secciones=['Activo'],
-        fila_inicio=13,
-        texto_suma='Suma Activo',
-        columnas_suma=['D', 'E', 'F', 'G', 'H', 'I']
-    )
-
-    # Procesar PASIVO Y PATRIMONIO, ajustando la fila de inicio
-    procesar_seccion_centralizadora(
-        sheet=sheet,
-        cuentas_por_fecha=cuentas_por_fecha,
-        fechas_columnas=fechas_columnas,
-        ajustes_reclasificaciones=ajustes_reclasificaciones,
-        secciones=['Pasivo', 'Patrimonio'],
-        fila_inicio=22 + filas_insertadas_activo, # Ajuste dinámico
-        texto_suma='Suma Pasivo y Patrimonio',
-        columnas_suma=['D', 'E', 'F', 'G', 'H', 'I']
+        secciones_hoja=[
+            {
+                'secciones': ['Activo'],
+                'fila_inicio': 13,
+                'texto_suma': 'Suma Activo',
+                'columnas_suma': ['D', 'E', 'F', 'G', 'H', 'I'],
+            },
+            {
+                'secciones': ['Pasivo', 'Patrimonio'],
+                'fila_inicio': 22,
+                'texto_suma': 'Suma Pasivo y Patrimonio',
+                'columnas_suma': ['D', 'E', 'F', 'G', 'H', 'I'],
+            },
+        ],
     )
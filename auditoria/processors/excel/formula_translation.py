@@ -0,0 +1,144 @@
+"""
+Traslado de fórmulas Excel entre filas.
+
+Al copiar la fila modelo de una plantilla a N filas nuevas hay que ajustar
+sus referencias como lo haría Excel: las filas relativas (``D34``) se
+desplazan y las absolutas (``D$34``) se conservan. Reemplazar texto
+(``formula.replace("$13", "$14")``) solo acierta con ciertas referencias y
+vuelve a recorrer la fórmula por cada celda y cada fila.
+
+Aquí cada fórmula se analiza una sola vez con el tokenizador de openpyxl y se
+guarda en forma *relocalizable*: los fragmentos de texto fijos y, entre
+ellos, las filas relativas. Trasladarla a otra fila es unir esos fragmentos
+sumando el desplazamiento. Tanto el análisis como cada traslado
+``(fórmula, desplazamiento)`` se guardan en caches LRU, así que las filas
+modelo de una plantilla se analizan una vez por proceso.
+
+Solo se trasladan filas; las columnas no cambian al insertar filas.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Tuple, Union
+
+from openpyxl.formula import Tokenizer
+from openpyxl.formula.tokenizer import Token, TokenizerError
+
+__all__ = [
+    "FormulaRelocalizable",
+    "formula_relocalizable",
+    "trasladar_formula",
+    "formula_suma",
+]
+
+_CELDA = re.compile(r"(\$?[A-Za-z]{1,3})(\$?)(\d+)")
+_COLUMNA = re.compile(r"\$?[A-Za-z]{1,3}")
+_FILA = re.compile(r"(\$?)(\d+)")
+
+# Fragmento fijo o (texto previo, fila relativa)
+_Parte = Union[str, Tuple[str, int]]
+
+
+class FormulaRelocalizable:
+    """Fórmula analizada: fragmentos fijos y filas relativas."""
+
+    __slots__ = ("formula", "_partes", "_filas_minimas")
+
+    def __init__(self, formula: str, partes: List[_Parte]):
+        self.formula = formula
+        self._partes = partes
+        filas = [parte[1] for parte in partes if not isinstance(parte, str)]
+        self._filas_minimas = min(filas) if filas else None
+
+    @property
+    def es_relativa(self) -> bool:
+        """True si la fórmula tiene alguna fila relativa."""
+        return self._filas_minimas is not None
+
+    def trasladar(self, desplazamiento: int) -> str:
+        """Fórmula con las filas relativas desplazadas ``desplazamiento`` filas."""
+        if not desplazamiento or not self.es_relativa:
+            return self.formula
+        if self._filas_minimas + desplazamiento < 1:
+            # Excel marcaría la referencia como inválida; openpyxl haría lo mismo
+            return "=#REF!"
+        return "".join(
+            parte if isinstance(parte, str) else f"{parte[0]}{parte[1] + desplazamiento}"
+            for parte in self._partes
+        )
+
+    def copias(self, fila_origen: int, filas: Iterable[int]) -> Iterator[Tuple[int, str]]:
+        """``(fila, fórmula)`` para cada fila destino."""
+        for fila in filas:
+            yield fila, trasladar_formula(self.formula, fila - fila_origen)
+
+
+def _partes_referencia(referencia: str):
+    """
+    Divide una referencia (``A1``, ``$A1:B$2``, ``Hoja!A1``, ``1:3``) en partes.
+    Devuelve None si no es una referencia de celdas o filas (nombres, tablas...).
+    """
+    hoja, separador, rango = referencia.rpartition("!")
+    partes: List[_Parte] = [hoja + separador]
+    for i, extremo in enumerate(rango.split(":")):
+        prefijo = ":" if i else ""
+        if match := _CELDA.fullmatch(extremo):
+            columna, absoluta, fila = match.groups()
+            if absoluta:
+                partes.append(prefijo + extremo)
+            else:
+                partes.append((prefijo + columna, int(fila)))
+        elif _COLUMNA.fullmatch(extremo):
+            partes.append(prefijo + extremo)
+        elif match := _FILA.fullmatch(extremo):
+            absoluta, fila = match.groups()
+            if absoluta:
+                partes.append(prefijo + extremo)
+            else:
+                partes.append((prefijo, int(fila)))
+        else:
+            return None
+    return partes
+
+
+def _agregar(partes: List[_Parte], nuevas: Iterable[_Parte]):
+    for parte in nuevas:
+        if isinstance(parte, str) and partes and isinstance(partes[-1], str):
+            partes[-1] += parte
+        elif parte != "":
+            partes.append(parte)
+
+
+@lru_cache(maxsize=1024)
+def formula_relocalizable(formula: str) -> FormulaRelocalizable:
+    """Analiza la fórmula una vez; el resultado se comparte entre llamadas."""
+    try:
+        tokenizer = Tokenizer(formula)
+    except TokenizerError:
+        return FormulaRelocalizable(formula, [formula])
+    if tokenizer.render() != formula:
+        # El tokenizador no reproduce la fórmula exacta: no se traslada
+        return FormulaRelocalizable(formula, [formula])
+
+    partes: List[_Parte] = ["=" if formula.startswith("=") else ""]
+    for token in tokenizer.items:
+        referencia = None
+        if token.type == Token.OPERAND and token.subtype == Token.RANGE:
+            referencia = _partes_referencia(token.value)
+        _agregar(partes, referencia if referencia is not None else [token.value])
+    return FormulaRelocalizable(formula, partes)
+
+
+@lru_cache(maxsize=4096)
+def trasladar_formula(formula: str, desplazamiento: int) -> str:
+    """Traslada ``formula`` ``desplazamiento`` filas (negativo: hacia arriba)."""
+    if not isinstance(formula, str) or not formula.startswith("="):
+        return formula
+    return formula_relocalizable(formula).trasladar(desplazamiento)
+
+
+def formula_suma(columna: str, fila_inicio: int, fila_fin: int) -> str:
+    """``=SUM(<col><inicio>:<col><fin>)``."""
+    return f"=SUM({columna}{fila_inicio}:{columna}{fila_fin})"
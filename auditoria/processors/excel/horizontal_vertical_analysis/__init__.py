@@ -1,13 +1,15 @@
 from .data_extraction import extraer_cuentas_por_seccion
 from .sheet_processing import procesar_hoja_balance
 
-def process_horizontal_vertical_analysis(workbook, balances):
+def process_horizontal_vertical_analysis(workbook, balances, secciones=None):
     """
     Procesa el archivo de análisis horizontal y vertical
 
     Args:
         workbook: El libro de Excel a procesar
         balances: Diccionario con los balances financieros
+        secciones: Filas de las secciones precalculadas por título de hoja
+            (opcional, ver utils.template_manifest)
 
     Returns:
         El libro de Excel procesado
@@ -24,6 +26,6 @@ def process_horizontal_vertical_analysis(workbook, balances):
 
     for sheet in workbook.worksheets:
         if "BALANCE" in sheet.title.upper() or "BG" in sheet.title.upper():
-            procesar_hoja_balance(sheet, cuentas_por_seccion, años)
+            procesar_hoja_balance(sheet, cuentas_por_seccion, años, (secciones or {}).get(sheet.title))
             
     return workbook
@@ -1,6 +1,8 @@
 import logging
-import re
-from copy import copy
+
+from ..formula_translation import trasladar_formula
+from ..label_index import indice_etiquetas
+from ..row_expansion import ExpansionFilas
 
 logger = logging.getLogger(__name__)
 
@@ -24,44 +26,33 @@ def actualizar_fechas_encabezados(sheet, fecha_balance, fecha_saldos_iniciales):
         fecha_saldos_formateada = "01/01/AAAA"
     
     # Buscar y reemplazar fechas en los encabezados
-    for row_idx in range(1, 50):
-        for col_idx in range(1, 10):
-            if cell_value := sheet.cell(row=row_idx, column=col_idx).value:
-                if isinstance(cell_value, str):
-                    if "31/12/AAAA" in cell_value:
-                        sheet.cell(row=row_idx, column=col_idx).value = cell_value.replace("31/12/AAAA", fecha_balance_formateada)
-                    
-                    if "01/01/AAAA" in cell_value:
-                        sheet.cell(row=row_idx, column=col_idx).value = cell_value.replace("01/01/AAAA", fecha_saldos_formateada)
+    indice = indice_etiquetas(sheet)
+    for row_idx, col_idx in indice.buscar("31/12/AAAA", "01/01/AAAA", filas=range(1, 50), columnas=range(1, 10)):
+        celda = sheet.cell(row=row_idx, column=col_idx)
+        celda.value = celda.value.replace("31/12/AAAA", fecha_balance_formateada).replace("01/01/AAAA", fecha_saldos_formateada)
+        indice.actualizar(celda)
 
 def buscar_fila_encabezado(sheet):
     """Busca la fila de encabezado en la hoja donde se insertarán los datos"""
-    for row_idx in range(1, 50):
-        for col_idx in range(1, 10):
-            if cell_value := sheet.cell(row=row_idx, column=col_idx).value:
-                if isinstance(cell_value, str) and any(term in cell_value.lower() for term in ["cuenta", "descripción"]):
-                    return row_idx
-    return None
+    posicion = indice_etiquetas(sheet).primera("cuenta", "descripción", filas=range(1, 50), columnas=range(1, 10))
+    return posicion[0] if posicion else None
 
 def insertar_datos_en_hoja(sheet, fila_encabezado, cuentas_balance, cuentas_saldos_iniciales, fecha_ultimo_dia):
     """Inserta los datos de balances y saldos iniciales en la hoja"""
     # Buscar la tabla "Evaluación de Saldos Iniciales"
-    fila_tabla = next((row_idx for row_idx in range(1, 50) 
-                      for col_idx in range(1, 15) 
-                      if isinstance(sheet.cell(row=row_idx, column=col_idx).value, str) 
-                      and "evaluación de saldos iniciales" in sheet.cell(row=row_idx, column=col_idx).value.lower()), None)
+    indice = indice_etiquetas(sheet)
+    posicion_tabla = indice.primera("evaluación de saldos iniciales", filas=range(1, 50), columnas=range(1, 15))
     
-    if not fila_tabla:
+    if not posicion_tabla:
         return
+    fila_tabla = posicion_tabla[0]
     
     # Buscar fila de encabezados
-    fila_encabezados = next((i for i in range(fila_tabla, fila_tabla + 5)
-                           for col_idx in range(1, 15)
-                           if isinstance(sheet.cell(row=i, column=col_idx).value, str)
-                           and "cuenta" in sheet.cell(row=i, column=col_idx).value.lower()), None)
+    posicion_encabezados = indice.primera("cuenta", filas=range(fila_tabla, fila_tabla + 5), columnas=range(1, 15))
     
-    if not fila_encabezados:
+    if not posicion_encabezados:
         return
+    fila_encabezados = posicion_encabezados[0]
     
     # Buscar columnas específicas
     col_cuenta = encontrar_columna_por_texto(sheet, fila_encabezados, ["cuenta"])
@@ -87,49 +78,28 @@ def insertar_datos_en_hoja(sheet, fila_encabezado, cuentas_balance, cuentas_sald
     
     # Insertar filas adicionales si es necesario
     if filas_adicionales_necesarias > 0:
-        # Guardar las fórmulas y valores de las filas que se pueden usar como plantilla
+        # Las filas nuevas toman el estilo y las fórmulas de la fila plantilla
         fila_plantilla = 34
-        formulas_y_valores = {}
-        
-        # Capturar todas las fórmulas y valores de la fila plantilla
-        for col in range(1, sheet.max_column + 1):
-            celda = sheet.cell(row=fila_plantilla, column=col)
-            if celda.value is not None:
-                # Guardar la fórmula si existe
-                if celda.data_type == 'f':
-                    formulas_y_valores[col] = {'formula': celda.value, 'tipo': 'formula'}
-                else:
-                    formulas_y_valores[col] = {'valor': celda.value, 'tipo': 'valor'}
-        
-        # Insertar las filas nuevas
-        sheet.insert_rows(35, filas_adicionales_necesarias)
-        
-        # Copiar estilos y fórmulas a las nuevas filas
-        for i in range(filas_adicionales_necesarias):
-            fila_destino = 35 + i
-            for col in range(1, sheet.max_column + 1):
-                try:
-                    celda_destino = sheet.cell(row=fila_destino, column=col)
-                    celda_origen = sheet.cell(row=fila_plantilla, column=col)
-                    
-                    # Copiar el estilo
-                    copiar_estilo(celda_origen, celda_destino)
-                    
-                    # Aplicar fórmulas o valores si existen en la plantilla
-                    if col in formulas_y_valores:
-                        if formulas_y_valores[col]['tipo'] == 'formula':
-                            # Ajustar la referencia de fila en la fórmula si es necesario
-                            formula = formulas_y_valores[col]['formula']
-                            # Reemplazar referencias de fila si la fórmula contiene referencias a celdas
-                            if isinstance(formula, str) and formula.startswith('='):
-                                # Ajustar la fórmula para la nueva fila
-                                formula_ajustada = ajustar_formula_para_nueva_fila(formula, fila_plantilla, fila_destino)
-                                celda_destino.value = formula_ajustada
-                        elif formulas_y_valores[col]['tipo'] == 'valor' and col != col_cuenta and col != col_saldo_final and col != col_saldo_inicial:
-                            # Solo copiar valores que no sean de las columnas que se llenarán con datos
-                            celda_destino.value = formulas_y_valores[col]['valor']
-                except Exception as e:
-                    logger.error(f"Error al copiar estilo o fórmula: {str(e)}")
+        expansion = ExpansionFilas(sheet)
+        expansion.insertar(
+            35,
+            filas_adicionales_necesarias,
+            fila_modelo=fila_plantilla,
+            copiar_formulas=True,
+        )
+        expansion.aplicar()
+
+        # Copiar los valores fijos de la fila plantilla, salvo las columnas que se llenarán con datos
+        valores_fijos = {
+            col: celda.value
+            for col in range(1, sheet.max_column + 1)
+            if (celda := sheet.cell(row=fila_plantilla, column=col)).value is not None
+            and celda.data_type != 'f'
+            and col not in (col_cuenta, col_saldo_final, col_saldo_inicial)
+        }
+        for fila_destino in expansion.filas_nuevas(35):
+            for col, valor in valores_fijos.items():
+                sheet.cell(row=fila_destino, column=col).value = valor
     
     # Insertar los datos
     fila_actual = fila_inicial
@@ -145,45 +115,11 @@ def insertar_datos_en_hoja(sheet, fila_encabezado, cuentas_balance, cuentas_sald
         
         fila_actual += 1
 
-def copiar_estilo(celda_origen, celda_destino):
-    """Copia el estilo completo de una celda a otra"""
-    if celda_origen is None or celda_destino is None:
-        return
-        
-    for attr in ['font', 'fill', 'border', 'alignment', 'number_format']:
-        if hasattr(celda_origen, attr) and getattr(celda_origen, attr):
-            setattr(celda_destino, attr, copy(getattr(celda_origen, attr)))
-
 def encontrar_columna_por_texto(sheet, fila, textos_buscar):
     """Encuentra el número de columna que contiene alguno de los textos especificados"""
-    for col_idx in range(1, sheet.max_column + 1):
-        if cell_value := sheet.cell(row=fila, column=col_idx).value:
-            if isinstance(cell_value, str):
-                cell_value_lower = cell_value.lower()
-                if any(texto.lower() in cell_value_lower for texto in textos_buscar):
-                    return col_idx
-    return None
+    posicion = indice_etiquetas(sheet).primera(*textos_buscar, filas=(fila,))
+    return posicion[1] if posicion else None
 
 def ajustar_formula_para_nueva_fila(formula, fila_origen, fila_destino):
     """Ajusta las referencias de fila en una fórmula para una nueva fila"""
-    if not isinstance(formula, str) or not formula.startswith('='):
-        return formula
-    
-    # Diferencia entre filas
-    diferencia = fila_destino - fila_origen
-    
-    # Patrón para encontrar referencias de celda (ej: A34, $B$34, C34:D34)
-    patron_celda = re.compile(r'([A-Z]+\$?)(\d+)')
-    
-    def reemplazar_fila(match):
-        columna, fila = match.groups()
-        # No ajustar si la fila tiene un $ (referencia absoluta)
-        if '$' in fila:
-            return match.group(0)
-        # Ajustar la fila sumando la diferencia
-        nueva_fila = int(fila) + diferencia
-        return f"{columna}{nueva_fila}"
-    
-    # Reemplazar todas las referencias de celda en la fórmula
-    formula_ajustada = patron_celda.sub(reemplazar_fila, formula)
-    return formula_ajustada
+    return trasladar_formula(formula, fila_destino - fila_origen)
@@ -0,0 +1,158 @@
+"""
+Índice de etiquetas de texto por hoja.
+
+Los procesadores ubican sus tablas buscando rótulos ("Suma Activo", "Cuenta",
+"Saldos s/ Balance"...) con recorridos ``sheet.cell(row, col)`` fila por fila.
+Cada búsqueda vuelve a recorrer la hoja y, de paso, crea celdas vacías.
+
+``indice_etiquetas(sheet)`` construye, la primera vez que se usa, un mapa
+``texto (casefold) -> [(fila, columna)]`` a partir de las celdas que la hoja
+ya tiene en memoria. Una consulta recorre los textos distintos de la hoja (no
+sus celdas) una sola vez; el resultado queda guardado, así que repetirla es
+una búsqueda en un diccionario.
+
+El índice se mantiene consistente:
+
+- ``ExpansionFilas`` lo reubica al insertar filas,
+- ``actualizar_celda`` registra una celda escrita después de construirlo,
+- las posiciones cuyo valor cambió sin registrarse se descartan al consultar.
+"""
+
+from __future__ import annotations
+
+import weakref
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+__all__ = ["IndiceEtiquetas", "indice_etiquetas", "reubicar_indice", "actualizar_celda"]
+
+_Posicion = Tuple[int, int]
+
+_indices: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _clave(valor) -> Optional[str]:
+    if isinstance(valor, str) and valor:
+        return valor.casefold()
+    return None
+
+
+def _en_rango(valor: int, rango) -> bool:
+    return rango is None or valor in rango
+
+
+class IndiceEtiquetas:
+    """Posiciones de cada texto de una hoja."""
+
+    def __init__(self, sheet):
+        self._sheet = sheet
+        self._posiciones: Dict[str, List[_Posicion]] = {}
+        # (textos, exacto) -> posiciones ordenadas por fila y columna
+        self._consultas: Dict[tuple, List[Tuple[int, int, str]]] = {}
+        for (fila, columna), celda in sheet._cells.items():
+            clave = _clave(celda._value)
+            if clave is not None:
+                self._posiciones.setdefault(clave, []).append((fila, columna))
+
+    # ------------------------------------------------------------------
+    #  Consultas
+    # ------------------------------------------------------------------
+
+    def buscar(
+        self,
+        *textos: str,
+        filas: Optional[Iterable[int]] = None,
+        columnas: Optional[Iterable[int]] = None,
+        exacto: bool = False,
+    ) -> List[_Posicion]:
+        """
+        Celdas cuyo texto contiene alguno de ``textos`` (o es igual, con
+        ``exacto``), sin distinguir mayúsculas, ordenadas por fila y columna.
+        ``filas`` y ``columnas`` limitan la búsqueda (``range``, tupla...).
+        """
+        consulta = (tuple(texto.casefold() for texto in textos), exacto)
+        candidatos = self._consultas.get(consulta)
+        if candidatos is None:
+            candidatos = self._resolver(*consulta)
+            self._consultas[consulta] = candidatos
+
+        celdas = self._sheet._cells
+        resultado = []
+        for fila, columna, clave in candidatos:
+            if not (_en_rango(fila, filas) and _en_rango(columna, columnas)):
+                continue
+            celda = celdas.get((fila, columna))
+            # Descarta celdas que cambiaron sin pasar por actualizar_celda
+            if celda is not None and _clave(celda._value) == clave:
+                resultado.append((fila, columna))
+        return resultado
+
+    def primera(self, *textos: str, filas=None, columnas=None, exacto: bool = False) -> Optional[_Posicion]:
+        """Primera celda (por fila y luego columna) que cumple ``buscar``."""
+        encontradas = self.buscar(*textos, filas=filas, columnas=columnas, exacto=exacto)
+        return encontradas[0] if encontradas else None
+
+    def textos(self, filas=None, columnas=None) -> List[Tuple[int, int, str]]:
+        """``(fila, columna, valor)`` de las celdas con texto del rango, por fila y columna."""
+        celdas = self._sheet._cells
+        resultado = []
+        for posiciones in self._posiciones.values():
+            for fila, columna in posiciones:
+                if _en_rango(fila, filas) and _en_rango(columna, columnas):
+                    celda = celdas.get((fila, columna))
+                    if celda is not None and isinstance(celda._value, str):
+                        resultado.append((fila, columna, celda._value))
+        # Un texto puede haberse registrado dos veces al actualizar celdas
+        return sorted(set(resultado))
+
+    def _resolver(self, textos: Tuple[str, ...], exacto: bool) -> List[Tuple[int, int, str]]:
+        candidatos = set()
+        for clave, posiciones in self._posiciones.items():
+            if any((clave == texto) if exacto else (texto in clave) for texto in textos):
+                candidatos.update((fila, columna, clave) for fila, columna in posiciones)
+        return sorted(candidatos)
+
+    # ------------------------------------------------------------------
+    #  Mantenimiento
+    # ------------------------------------------------------------------
+
+    def actualizar(self, celda) -> None:
+        """Registra el valor actual de una celda escrita después de construir el índice."""
+        clave = _clave(celda._value)
+        if clave is None:
+            return
+        posicion = (celda.row, celda.column)
+        posiciones = self._posiciones.setdefault(clave, [])
+        if posicion not in posiciones:
+            posiciones.append(posicion)
+            self._consultas.clear()
+
+    def reubicar(self, nueva_fila: Callable[[int], int]) -> None:
+        """Aplica un desplazamiento de filas (``fila original -> fila nueva``)."""
+        self._posiciones = {
+            clave: [(nueva_fila(fila), columna) for fila, columna in posiciones]
+            for clave, posiciones in self._posiciones.items()
+        }
+        self._consultas.clear()
+
+
+def indice_etiquetas(sheet) -> IndiceEtiquetas:
+    """Índice de la hoja; se construye en la primera llamada."""
+    indice = _indices.get(sheet)
+    if indice is None:
+        indice = IndiceEtiquetas(sheet)
+        _indices[sheet] = indice
+    return indice
+
+
+def reubicar_indice(sheet, nueva_fila: Callable[[int], int]) -> None:
+    """Reubica el índice de la hoja, si ya se construyó, tras insertar filas."""
+    indice = _indices.get(sheet)
+    if indice is not None:
+        indice.reubicar(nueva_fila)
+
+
+def actualizar_celda(celda) -> None:
+    """Registra en el índice de su hoja (si existe) una celda recién escrita."""
+    indice = _indices.get(celda.parent)
+    if indice is not None:
+        indice.actualizar(celda)
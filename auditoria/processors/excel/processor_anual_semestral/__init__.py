@@ -1,21 +1,27 @@
 from .data_extraction import extraer_y_clasificar_datos
 from .sheet_processing import procesar_hoja_anual, procesar_hoja_semestral
 
-def process_anual_semestral_sheets(workbook, balances):
-    """Procesa las hojas ANUAL y SEMESTRAL del Excel insertando las fechas y cuentas."""
+def process_anual_semestral_sheets(workbook, balances, filas_clave=None):
+    """
+    Procesa las hojas ANUAL y SEMESTRAL del Excel insertando las fechas y cuentas.
+
+    ``filas_clave`` son las filas clave precalculadas por título de hoja (ver
+    utils.template_manifest); las hojas que no aparecen se recorren.
+    """
     # 1. Extraer y clasificar todos los datos necesarios
     datos = extraer_y_clasificar_datos(balances)
 
     # 2. Procesar cada hoja del libro de trabajo
     for sheet in workbook.worksheets:
         sheet_title = sheet.title.upper()
+        filas = (filas_clave or {}).get(sheet.title)
 
         try:
             if sheet_title in ['ACTUAL', 'ANUAL'] and datos['fechas_anual']:
-                procesar_hoja_anual(sheet, datos['cuentas_anual'], datos['fechas_anual'], balances)
+                procesar_hoja_anual(sheet, datos['cuentas_anual'], datos['fechas_anual'], balances, filas)
             
             elif sheet_title == 'SEMESTRAL' and datos['fechas_semestral']:
-                procesar_hoja_semestral(sheet, datos['cuentas_semestral'], datos['fechas_semestral'], balances)
+                procesar_hoja_semestral(sheet, datos['cuentas_semestral'], datos['fechas_semestral'], balances, filas)
         except Exception as e:
             pass
             
@@ -1,10 +1,14 @@
+from ....utils.balance_index import as_balance_index
+
+
 def extraer_y_clasificar_datos(balances):
     """Extrae fechas y clasifica cuentas de los balances para ANUAL y SEMESTRAL."""
-    fechas_anual = sorted(list(set(k.split('-')[1] + '-' + k.split('-')[2] + '-' + k.split('-')[3] for k in balances if k.startswith('ANUAL-'))))
-    fechas_semestral = sorted(list(set(k.split('-')[1] + '-' + k.split('-')[2] + '-' + k.split('-')[3] for k in balances if k.startswith('SEMESTRAL-'))))
+    indice = as_balance_index(balances)
+    fechas_anual = indice.fechas('ANUAL')
+    fechas_semestral = indice.fechas('SEMESTRAL')
 
-    cuentas_anual = _clasificar_cuentas_por_seccion(balances, 'ANUAL')
-    cuentas_semestral = _clasificar_cuentas_por_seccion(balances, 'SEMESTRAL')
+    cuentas_anual = _clasificar_cuentas_por_seccion(indice, 'ANUAL')
+    cuentas_semestral = _clasificar_cuentas_por_seccion(indice, 'SEMESTRAL')
 
     return {
         'fechas_anual': fechas_anual,
@@ -13,7 +17,7 @@ def extraer_y_clasificar_datos(balances):
         'cuentas_semestral': cuentas_semestral
     }
 
-def _clasificar_cuentas_por_seccion(balances, tipo_balance):
+def _clasificar_cuentas_por_seccion(indice, tipo_balance):
     """Clasifica las cuentas del balance por sección para un tipo de balance específico."""
     cuentas_por_seccion = {
         'Activo': [],
@@ -23,14 +27,12 @@ def _clasificar_cuentas_por_seccion(balances, tipo_balance):
     }
     cuentas_vistas = set()
 
-    for clave in balances.keys():
-        partes = clave.split('-')
-        if len(partes) >= 5 and partes[0] == tipo_balance:
-            seccion = partes[4]
-            cuenta = '-'.join(partes[5:])
-            if seccion in cuentas_por_seccion and cuenta not in cuentas_vistas:
-                cuentas_por_seccion[seccion].append(cuenta)
-                cuentas_vistas.add(cuenta)
+    for entrada in indice.entradas(tipo_balance):
+        seccion = entrada.seccion
+        cuenta = entrada.cuenta
+        if seccion in cuentas_por_seccion and cuenta not in cuentas_vistas:
+            cuentas_por_seccion[seccion].append(cuenta)
+            cuentas_vistas.add(cuenta)
 
     for seccion in cuentas_por_seccion:
         cuentas_por_seccion[seccion].sort()
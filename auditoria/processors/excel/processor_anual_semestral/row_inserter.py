@@ -1,67 +1,75 @@
+from ..row_expansion import ExpansionFilas
 from .utils import copiar_estilo_fila, buscar_filas_clave, encontrar_fila_cuenta_normal, _actualizar_formula_suma, _columnas_valores
 
-def insertar_cuentas_en_hoja(sheet, cuentas_por_seccion, tipo_balance, fechas, balances):
+def insertar_cuentas_en_hoja(sheet, cuentas_por_seccion, tipo_balance, fechas, balances, filas_clave=None):
     """Inserta las cuentas en las posiciones correctas de la hoja Excel."""
-    filas = buscar_filas_clave(sheet)
+    filas = dict(filas_clave) if filas_clave else buscar_filas_clave(sheet)
     fila_balance_general = filas['BALANCE GENERAL']
     fila_total_activo = filas['TOTAL ACTIVO']
     fila_total_pasivo_patrimonio = filas['TOTAL PASIVO Y PATRIMONIO']
 
-    # 1. Insertar ACTIVO
-    fila_actual, fila_total_activo, fila_estilo = _insertar_seccion_cuentas(
-        sheet, 'Activo', cuentas_por_seccion['Activo'], tipo_balance, fechas, balances,
-        fila_balance_general + 1, fila_total_activo, fila_balance_general
+    cuentas_activo = cuentas_por_seccion['Activo']
+    cuentas_pasivo_patrimonio = list(cuentas_por_seccion['Pasivo']) + list(cuentas_por_seccion['Patrimonio'])
+    cuentas_resultados = cuentas_por_seccion['ESTADO DE RESULTADOS']
+
+    # 1. Planificar las filas que faltan en cada sección (coordenadas de la plantilla)
+    #    y desplazar la hoja una sola vez. Las filas nuevas de ACTIVO y PASIVO Y
+    #    PATRIMONIO toman el estilo de la última fila antes del total.
+    expansion = ExpansionFilas(sheet)
+    expansion.insertar(
+        fila_total_activo,
+        _filas_faltantes(len(cuentas_activo), fila_balance_general + 1, fila_total_activo),
+        fila_modelo=max(fila_balance_general, fila_total_activo - 1),
+    )
+    expansion.insertar(
+        fila_total_pasivo_patrimonio,
+        _filas_faltantes(len(cuentas_pasivo_patrimonio), fila_total_activo + 1, fila_total_pasivo_patrimonio),
+        fila_modelo=max(fila_total_activo, fila_total_pasivo_patrimonio - 1),
+    )
+    # ESTADO DE RESULTADOS ocupa las filas que siguen al total hasta el final de la hoja
+    expansion.insertar(
+        fila_total_pasivo_patrimonio + 1,
+        _filas_faltantes(len(cuentas_resultados), fila_total_pasivo_patrimonio + 1, sheet.max_row),
     )
+    expansion.aplicar()
+
+    fila_balance_general = expansion.fila(fila_balance_general)
+    fila_total_activo = expansion.fila(fila_total_activo)
+    fila_total_pasivo_patrimonio = expansion.fila(fila_total_pasivo_patrimonio)
     cols_valores = _columnas_valores(tipo_balance, fechas)
-    _actualizar_formula_suma(sheet, fila_total_activo, cols_valores, fila_balance_general + 1, fila_total_activo - 1)
 
-    # Ajustar filas posteriores
-    filas_insertadas_activo = fila_total_activo - filas['TOTAL ACTIVO']
-    fila_total_pasivo_patrimonio += filas_insertadas_activo
+    # 2. Insertar ACTIVO
+    _escribir_cuentas(sheet, 'Activo', cuentas_activo, tipo_balance, fechas, balances, fila_balance_general + 1)
+    _actualizar_formula_suma(sheet, fila_total_activo, cols_valores, fila_balance_general + 1, fila_total_activo - 1)
 
-    # 2. Insertar PASIVO y PATRIMONIO
-    fila_actual = fila_total_activo + 1
-    fila_actual, fila_total_pasivo_patrimonio, _ = _insertar_seccion_cuentas(
-        sheet, 'Pasivo', cuentas_por_seccion['Pasivo'], tipo_balance, fechas, balances,
-        fila_actual, fila_total_pasivo_patrimonio, fila_total_activo
-    )
-    fila_actual, fila_total_pasivo_patrimonio, _ = _insertar_seccion_cuentas(
-        sheet, 'Patrimonio', cuentas_por_seccion['Patrimonio'], tipo_balance, fechas, balances,
-        fila_actual, fila_total_pasivo_patrimonio, fila_actual - 1
+    # 3. Insertar PASIVO y PATRIMONIO
+    fila_actual = _escribir_cuentas(
+        sheet, 'Pasivo', cuentas_por_seccion['Pasivo'], tipo_balance, fechas, balances, fila_total_activo + 1
     )
+    _escribir_cuentas(sheet, 'Patrimonio', cuentas_por_seccion['Patrimonio'], tipo_balance, fechas, balances, fila_actual)
     _actualizar_formula_suma(sheet, fila_total_pasivo_patrimonio, cols_valores, fila_total_activo + 1, fila_total_pasivo_patrimonio - 1)
 
-    # 3. Insertar ESTADO DE RESULTADOS
-    _insertar_estado_resultados(sheet, cuentas_por_seccion['ESTADO DE RESULTADOS'], tipo_balance, fechas, balances, fila_total_pasivo_patrimonio + 1, fila_balance_general)
+    # 4. Insertar ESTADO DE RESULTADOS
+    _insertar_estado_resultados(sheet, cuentas_resultados, tipo_balance, fechas, balances, fila_total_pasivo_patrimonio + 1, fila_balance_general)
+
+def _filas_faltantes(cuentas, fila_inicio, fila_limite):
+    """Filas que hay que insertar para que quepan las cuentas entre fila_inicio y fila_limite (exclusive)."""
+    return max(0, cuentas - max(0, fila_limite - fila_inicio))
 
-def _insertar_seccion_cuentas(sheet, seccion, cuentas, tipo_balance, fechas, balances, fila_inicio, fila_limite, fila_estilo):
-    """Inserta cuentas de una sección, gestionando la inserción de filas."""
+def _escribir_cuentas(sheet, seccion, cuentas, tipo_balance, fechas, balances, fila_inicio):
+    """Escribe las cuentas de una sección desde fila_inicio; devuelve la fila siguiente."""
     fila_actual = fila_inicio
     for cuenta in cuentas:
-        if fila_actual >= fila_limite:
-            sheet.insert_rows(fila_actual)
-            copiar_estilo_fila(sheet, fila_estilo, fila_actual)
-            fila_limite += 1
-        
         sheet.cell(row=fila_actual, column=2).value = cuenta
         _insertar_valores_fila(sheet, fila_actual, tipo_balance, fechas, seccion, cuenta, balances)
-        
-        fila_estilo = fila_actual
         fila_actual += 1
-
-    return fila_actual, fila_limite, fila_estilo
+    return fila_actual
 
 def _insertar_estado_resultados(sheet, cuentas, tipo_balance, fechas, balances, fila_inicio, fila_referencia_estilo):
-    """Inserta las cuentas de ESTADO DE RESULTADOS al final."""
+    """Inserta las cuentas de ESTADO DE RESULTADOS al final (las filas ya fueron insertadas)."""
     fila_actual = fila_inicio
     fila_cuenta_normal = encontrar_fila_cuenta_normal(sheet, fila_referencia_estilo + 1, sheet.max_row) or fila_referencia_estilo + 1
 
-    espacio_disponible = sheet.max_row - fila_actual
-    if espacio_disponible < len(cuentas):
-        for _ in range(len(cuentas) - espacio_disponible):
-            sheet.insert_rows(fila_actual)
-            copiar_estilo_fila(sheet, fila_cuenta_normal, fila_actual)
-
     for cuenta in cuentas:
         sheet.cell(row=fila_actual, column=2).value = cuenta
         _insertar_valores_fila(sheet, fila_actual, tipo_balance, fechas, 'ESTADO DE RESULTADOS', cuenta, balances)
@@ -1,4 +1,8 @@
-from copy import copy
+from openpyxl.utils import get_column_letter
+
+from ..formula_translation import formula_suma
+from ..label_index import indice_etiquetas
+from ..row_expansion import copiar_estilo_celda
 
 def formatear_fecha(fecha_str):
     """Formatea una fecha en formato YYYY-MM-DD a 'Al DD/MM/YYYY'"""
@@ -13,22 +17,23 @@ def copiar_estilo_fila(sheet, fila_origen, fila_destino, columnas=None):
     if columnas is None:
         columnas = range(1, sheet.max_column + 1)
     for col in columnas:
-        celda_origen = sheet.cell(row=fila_origen, column=col)
-        celda_destino = sheet.cell(row=fila_destino, column=col)
-        if celda_origen.has_style:
-            for attr in ['border', 'font', 'fill', 'alignment']:
-                setattr(celda_destino, attr, copy(getattr(celda_origen, attr)))
-            celda_destino.number_format = celda_origen.number_format
+        copiar_estilo_celda(sheet.cell(row=fila_origen, column=col), sheet.cell(row=fila_destino, column=col))
+
+_FILAS_CLAVE = ('BALANCE GENERAL', 'TOTAL ACTIVO', 'TOTAL PASIVO Y PATRIMONIO')
+
+def firma_celda_filas_clave(valor):
+    """Condiciones que ``buscar_filas_clave`` evalúa sobre el valor de una celda."""
+    valor_celda = str(valor).upper() if valor else ""
+    return tuple(clave in valor_celda for clave in _FILAS_CLAVE)
 
 def buscar_filas_clave(sheet):
     """Busca las filas clave (TOTAL ACTIVO, etc.) en la hoja Excel."""
-    filas = {'BALANCE GENERAL': None, 'TOTAL ACTIVO': None, 'TOTAL PASIVO Y PATRIMONIO': None}
-    for i in range(1, sheet.max_row + 1):
-        for col in [2, 1]: # Prioriza columna B
-            valor_celda = str(sheet.cell(row=i, column=col).value).upper() if sheet.cell(row=i, column=col).value else ""
-            for clave in filas:
-                if filas[clave] is None and clave in valor_celda:
-                    filas[clave] = i
+    indice = indice_etiquetas(sheet)
+    filas = {}
+    for clave in _FILAS_CLAVE:
+        # Primera fila con el rótulo en la columna B o A
+        posicion = indice.primera(clave, columnas=(1, 2))
+        filas[clave] = posicion[0] if posicion else None
     return {
         'BALANCE GENERAL': filas.get('BALANCE GENERAL') or 14,
         'TOTAL ACTIVO': filas.get('TOTAL ACTIVO') or 22,
@@ -51,6 +56,4 @@ def _actualizar_formula_suma(sheet, fila_suma: int, columnas: list[int], fila_in
     """Reescribe la fórmula de suma en la fila dada para las columnas indicadas."""
     if fila_fin >= fila_inicio:
         for col in columnas:
-            celda_inicio = sheet.cell(row=fila_inicio, column=col).coordinate
-            celda_fin = sheet.cell(row=fila_fin, column=col).coordinate
-            sheet.cell(row=fila_suma, column=col).value = f"=SUM({celda_inicio}:{celda_fin})"
+            sheet.cell(row=fila_suma, column=col).value = formula_suma(get_column_letter(col), fila_inicio, fila_fin)
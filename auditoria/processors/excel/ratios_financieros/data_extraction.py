@@ -1,12 +1,9 @@
+from ....utils.balance_index import as_balance_index
+
+
 def extraer_fechas_anuales(balances):
     """Extrae las fechas anuales únicas del diccionario balances y las devuelve ordenadas."""
-    fechas = set()
-    for clave in balances.keys():
-        partes = clave.split('-')
-        if len(partes) >= 4 and partes[0] == 'ANUAL':
-            fecha = f"{partes[1]}-{partes[2]}-{partes[3]}"
-            fechas.add(fecha)
-    return sorted(list(fechas))
+    return as_balance_index(balances).fechas('ANUAL')
 
 def clasificar_cuentas_por_seccion_y_tipo(balances, año_actual, año_anterior):
     """
@@ -25,21 +22,16 @@ def clasificar_cuentas_por_seccion_y_tipo(balances, año_actual, año_anterior):
         'ESTADO DE RESULTADOS': {año_actual: {}, año_anterior: {}}
     }
 
-    for clave, valor in balances.items():
-        partes = clave.split('-')
-        if len(partes) >= 6 and partes[0] == 'ANUAL':
-            fecha = f"{partes[1]}-{partes[2]}-{partes[3]}"
-            if fecha not in [año_actual, año_anterior]:
+    indice = as_balance_index(balances)
+    for fecha in dict.fromkeys((año_actual, año_anterior)):
+        for entrada in indice.entradas('ANUAL', fecha):
+            seccion = entrada.seccion
+            if seccion not in estructura:
                 continue
-
-            seccion = partes[4]
-            cuenta = partes[5]
-            tipo_cuenta = partes[6]
-
-            if seccion in estructura:
-                if seccion in ['Activo', 'Pasivo'] and tipo_cuenta in estructura[seccion]:
-                    estructura[seccion][tipo_cuenta][fecha][cuenta] = valor
-                elif seccion in ['Patrimonio', 'ESTADO DE RESULTADOS']:
-                    estructura[seccion][fecha][cuenta] = valor
+            if seccion in ['Activo', 'Pasivo']:
+                if entrada.tipo_cuenta in estructura[seccion]:
+                    estructura[seccion][entrada.tipo_cuenta][fecha][entrada.cuenta] = entrada.valor
+            else:
+                estructura[seccion][fecha][entrada.cuenta] = entrada.valor
 
     return estructura
@@ -1,16 +1,20 @@
+from ..label_index import indice_etiquetas
+
 def encontrar_columnas_años(sheet):
     """Encuentra las columnas donde están 'Año actual' y 'Año anterior' en las primeras 10 filas."""
-    columnas = {'año_actual': None, 'año_anterior': None}
-    for fila in range(1, 11):
-        for col in range(1, 15):
-            celda = sheet.cell(row=fila, column=col)
-            if isinstance(celda.value, str):
-                valor = celda.value.strip().lower()
-                if 'año actual' in valor:
-                    columnas['año_actual'] = col
-                elif 'año anterior' in valor:
-                    columnas['año_anterior'] = col
-    return columnas
+    indice = indice_etiquetas(sheet)
+    filas, columnas_busqueda = range(1, 11), range(1, 15)
+    actual = indice.buscar('año actual', filas=filas, columnas=columnas_busqueda)
+    # Una celda con ambos textos cuenta como 'Año actual'
+    anterior = [
+        posicion for posicion in indice.buscar('año anterior', filas=filas, columnas=columnas_busqueda)
+        if posicion not in actual
+    ]
+    # Si hay varias coincidencias, vale la última
+    return {
+        'año_actual': actual[-1][1] if actual else None,
+        'año_anterior': anterior[-1][1] if anterior else None,
+    }
 
 def obtener_rangos_fijos_por_hoja(sheet_title):
     """
@@ -0,0 +1,280 @@
+"""
+Inserción planificada de filas en hojas openpyxl.
+
+``sheet.insert_rows`` mueve celda por celda todo lo que está debajo del punto
+de inserción y no actualiza nada más: rangos combinados, imágenes,
+validaciones de datos, formatos condicionales ni altos de fila quedan en su
+posición original. Cuando una hoja tiene varias secciones que crecen, cada
+llamada vuelve a desplazar la hoja entera.
+
+``ExpansionFilas`` recibe primero todas las inserciones de la hoja, expresadas
+en las coordenadas originales de la plantilla, y al aplicarlas:
+
+- desplaza las celdas en una sola pasada,
+- desplaza (o extiende, si la inserción cae dentro) rangos combinados,
+  validaciones de datos, formatos condicionales, imágenes, hipervínculos,
+  altos de fila y el índice de etiquetas de la hoja,
+- da a las filas nuevas el estilo de la fila modelo compartiendo sus ids de
+  estilo, y opcionalmente sus fórmulas (trasladadas) y combinaciones.
+
+Igual que ``insert_rows``, no traduce las fórmulas existentes: los
+procesadores reescriben las sumas de cada sección después de llenarla.
+
+Uso::
+
+    expansion = ExpansionFilas(sheet)
+    expansion.insertar(fila_suma, 3, fila_modelo=fila_suma - 1)
+    expansion.aplicar()
+    fila_suma = expansion.fila(fila_suma)
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from copy import copy
+from typing import List, Optional
+
+from openpyxl.cell.cell import MergedCell
+from openpyxl.utils.cell import coordinate_from_string
+from openpyxl.formatting.formatting import ConditionalFormatting, ConditionalFormattingList
+from openpyxl.worksheet.cell_range import MultiCellRange
+from openpyxl.worksheet.dimensions import RowDimension
+from openpyxl.worksheet.merge import MergedCellRange
+
+from .formula_translation import formula_relocalizable
+from .label_index import actualizar_celda, reubicar_indice
+
+__all__ = ["ExpansionFilas", "copiar_estilo_celda"]
+
+
+def copiar_estilo_celda(celda_origen, celda_destino) -> None:
+    """Asigna a *celda_destino* el estilo de *celda_origen* (mismos ids de estilo)."""
+    if celda_origen is not None and celda_destino is not None and celda_origen.has_style:
+        celda_destino._style = copy(celda_origen._style)
+
+
+class _Insercion:
+    __slots__ = ("antes_de", "cantidad", "fila_modelo", "copiar_formulas", "combinar")
+
+    def __init__(self, antes_de, cantidad, fila_modelo, copiar_formulas, combinar):
+        self.antes_de = antes_de
+        self.cantidad = cantidad
+        self.fila_modelo = fila_modelo
+        self.copiar_formulas = copiar_formulas
+        self.combinar = combinar
+
+
+class ExpansionFilas:
+    """Plan de inserciones de una hoja que se aplica con un solo desplazamiento."""
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self._inserciones: List[_Insercion] = []
+        self._puntos: List[int] = []        # filas de inserción ordenadas
+        self._acumulado: List[int] = []     # filas insertadas hasta cada punto (inclusive)
+        self._aplicada = False
+
+    # ------------------------------------------------------------------
+    #  Planificación
+    # ------------------------------------------------------------------
+
+    def insertar(
+        self,
+        antes_de: int,
+        cantidad: int,
+        fila_modelo: Optional[int] = None,
+        copiar_formulas: bool = False,
+        combinar: bool = False,
+    ) -> None:
+        """
+        Planifica ``cantidad`` filas nuevas antes de la fila ``antes_de``
+        (como ``sheet.insert_rows(antes_de, cantidad)``).
+
+        Args:
+            antes_de: Fila de la plantilla original antes de la cual se insertan.
+            cantidad: Número de filas; si es 0 no hace nada.
+            fila_modelo: Fila original cuyo estilo reciben las filas nuevas.
+            copiar_formulas: Copiar las fórmulas de la fila modelo a cada fila
+                nueva, trasladadas como en Excel (ver formula_translation).
+            combinar: Repetir en cada fila nueva las combinaciones de una sola
+                fila que tenga la fila modelo.
+        """
+        if self._aplicada:
+            raise RuntimeError("La expansión ya fue aplicada")
+        if cantidad <= 0:
+            return
+        self._inserciones.append(_Insercion(antes_de, cantidad, fila_modelo, copiar_formulas, combinar))
+        self._recalcular_puntos()
+
+    def _recalcular_puntos(self):
+        por_fila = {}
+        for insercion in self._inserciones:
+            por_fila[insercion.antes_de] = por_fila.get(insercion.antes_de, 0) + insercion.cantidad
+        self._puntos = sorted(por_fila)
+        total = 0
+        self._acumulado = []
+        for punto in self._puntos:
+            total += por_fila[punto]
+            self._acumulado.append(total)
+
+    @property
+    def total_insertadas(self) -> int:
+        return self._acumulado[-1] if self._acumulado else 0
+
+    def fila(self, fila_original: int) -> int:
+        """Posición que ocupa (u ocupará) una fila original después de aplicar el plan."""
+        idx = bisect_right(self._puntos, fila_original)
+        return fila_original + (self._acumulado[idx - 1] if idx else 0)
+
+    def filas_nuevas(self, antes_de: int) -> range:
+        """Filas (ya desplazadas) insertadas antes de la fila original ``antes_de``."""
+        fin = self.fila(antes_de)
+        cantidad = sum(i.cantidad for i in self._inserciones if i.antes_de == antes_de)
+        return range(fin - cantidad, fin)
+
+    # ------------------------------------------------------------------
+    #  Aplicación
+    # ------------------------------------------------------------------
+
+    def aplicar(self) -> "ExpansionFilas":
+        """Inserta todas las filas planificadas. Solo puede llamarse una vez."""
+        if self._aplicada:
+            raise RuntimeError("La expansión ya fue aplicada")
+        self._aplicada = True
+        if not self._inserciones:
+            return self
+
+        sheet = self.sheet
+        combinados_modelo = self._combinados_de_modelos()
+        self._desplazar_celdas()
+        reubicar_indice(sheet, self.fila)
+        self._desplazar_dimensiones()
+        self._desplazar_combinados()
+        self._desplazar_validaciones()
+        self._desplazar_formatos_condicionales()
+        self._desplazar_imagenes()
+
+        # Filas nuevas: estilo, fórmulas y combinaciones de la fila modelo
+        inicio_por_punto = {}
+        for insercion in self._inserciones:
+            # Varias inserciones en el mismo punto se ubican en el orden en que se planificaron
+            inicio = inicio_por_punto.get(insercion.antes_de, self.filas_nuevas(insercion.antes_de).start)
+            inicio_por_punto[insercion.antes_de] = inicio + insercion.cantidad
+            if insercion.fila_modelo is None:
+                continue
+            self._copiar_modelo(insercion, range(inicio, inicio + insercion.cantidad))
+            if insercion.combinar:
+                for min_col, max_col in combinados_modelo.get(insercion.fila_modelo, ()):
+                    for fila in range(inicio, inicio + insercion.cantidad):
+                        sheet.merge_cells(start_row=fila, start_column=min_col, end_row=fila, end_column=max_col)
+        return self
+
+    def _combinados_de_modelos(self):
+        """Columnas de las combinaciones de una sola fila de cada fila modelo (coordenadas originales)."""
+        modelos = {i.fila_modelo for i in self._inserciones if i.combinar and i.fila_modelo is not None}
+        combinados = {}
+        for rango in self.sheet.merged_cells.ranges:
+            if rango.min_row == rango.max_row and rango.min_row in modelos and rango.max_col > rango.min_col:
+                combinados.setdefault(rango.min_row, []).append((rango.min_col, rango.max_col))
+        for columnas in combinados.values():
+            columnas.sort()
+        return combinados
+
+    def _desplazar_celdas(self):
+        sheet = self.sheet
+        celdas = {}
+        for (fila, columna), celda in sheet._cells.items():
+            nueva = self.fila(fila)
+            if nueva != fila:
+                celda.row = nueva
+                if getattr(celda, "_hyperlink", None) is not None:
+                    celda._hyperlink.ref = celda.coordinate
+            celdas[(nueva, columna)] = celda
+        sheet._cells = celdas
+
+    def _desplazar_dimensiones(self):
+        dimensiones = self.sheet.row_dimensions
+        existentes = list(dimensiones.items())
+        dimensiones.clear()
+        for fila, dimension in existentes:
+            dimension.index = self.fila(fila)
+            dimensiones[dimension.index] = dimension
+
+        for insercion in self._inserciones:
+            modelo = dimensiones.get(self.fila(insercion.fila_modelo)) if insercion.fila_modelo else None
+            if modelo is None or not modelo.customHeight:
+                continue
+            for fila in self.filas_nuevas(insercion.antes_de):
+                dimensiones[fila] = RowDimension(self.sheet, index=fila, ht=modelo.ht, customHeight=True)
+
+    def _coord(self, rango) -> str:
+        """Coordenada del rango desplazado; se extiende si una inserción cae dentro."""
+        rango = copy(rango)
+        min_row, max_row = self.fila(rango.min_row), self.fila(rango.max_row)
+        rango.shift(row_shift=min_row - rango.min_row)
+        rango.expand(down=max_row - rango.max_row)
+        return rango.coord
+
+    def _multi(self, multi) -> MultiCellRange:
+        return MultiCellRange(" ".join(self._coord(rango) for rango in multi.ranges))
+
+    def _desplazar_combinados(self):
+        sheet = self.sheet
+        rangos = []
+        for rango in sheet.merged_cells.ranges:
+            nuevo = MergedCellRange(sheet, self._coord(rango))
+            if nuevo.size["rows"] != rango.size["rows"]:
+                # Las filas insertadas dentro de la combinación necesitan sus MergedCell
+                for fila, columna in nuevo.cells:
+                    if (fila, columna) != (nuevo.min_row, nuevo.min_col) and (fila, columna) not in sheet._cells:
+                        sheet._cells[(fila, columna)] = MergedCell(sheet, row=fila, column=columna)
+            rangos.append(nuevo)
+        sheet.merged_cells = MultiCellRange(rangos)
+
+    def _desplazar_validaciones(self):
+        for validacion in self.sheet.data_validations.dataValidation:
+            validacion.sqref = self._multi(validacion.sqref)
+
+    def _desplazar_formatos_condicionales(self):
+        anteriores = self.sheet.conditional_formatting
+        if not anteriores:
+            return
+        nuevos = ConditionalFormattingList()
+        for formato in anteriores:
+            nuevo = ConditionalFormatting(sqref=self._multi(formato.sqref), pivot=formato.pivot)
+            nuevos._cf_rules[nuevo] = formato.rules
+        nuevos.max_priority = anteriores.max_priority
+        self.sheet.conditional_formatting = nuevos
+
+    def _desplazar_imagenes(self):
+        for imagen in getattr(self.sheet, "_images", ()):
+            anchor = imagen.anchor
+            if isinstance(anchor, str):
+                imagen.anchor = self._coord_celda(anchor)
+                continue
+            # Los anchors de dibujo usan filas base 0
+            if hasattr(anchor, "_from"):
+                anchor._from.row = self.fila(anchor._from.row + 1) - 1
+                if getattr(anchor, "to", None) is not None:
+                    anchor.to.row = self.fila(anchor.to.row + 1) - 1
+
+    def _coord_celda(self, coordenada: str) -> str:
+        columna, fila = coordinate_from_string(coordenada)
+        return f"{columna}{self.fila(fila)}"
+
+    def _copiar_modelo(self, insercion: _Insercion, filas: range):
+        sheet = self.sheet
+        fila_modelo = self.fila(insercion.fila_modelo)
+        modelos = [
+            celda for celda in (sheet._cells.get((fila_modelo, col)) for col in range(1, sheet.max_column + 1))
+            if celda is not None
+        ]
+        for modelo in modelos:
+            for fila in filas:
+                copiar_estilo_celda(modelo, sheet.cell(row=fila, column=modelo.column))
+            if insercion.copiar_formulas and modelo.data_type == "f" and isinstance(modelo.value, str):
+                # La fórmula se analiza una vez y se traslada a cada fila nueva
+                for fila, formula in formula_relocalizable(modelo.value).copias(fila_modelo, filas):
+                    destino = sheet.cell(row=fila, column=modelo.column)
+                    destino.value = formula
+                    actualizar_celda(destino)
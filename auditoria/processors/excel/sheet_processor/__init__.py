@@ -1,4 +1,4 @@
-from ...shared.text_replacer import replace_text
+from ...shared.text_replacer import get_replacement_engine
 from ..processor_anual_semestral import process_anual_semestral_sheets
 from ..auxiliary_file import process_auxiliary_file_sheets
 from ..comparative_actual_auxiliar import process_comparative_file
@@ -9,7 +9,11 @@ from ..centralizadoras import process_centralizadora_file
 from ..sumaria import process_sumaria_file
 from ..importance_relativa import process_importance_relative
 from ..ratios_financieros import process_ratios_financieros
+from ..sumaria.deteccion import firma_celda_tabla_sumaria
+from ..processor_anual_semestral.utils import firma_celda_filas_clave
+from ..horizontal_vertical_analysis.sheet_processing import firma_celda_secciones
 from .normalizar_balances import normalizar_balances
+from ....utils.template_manifest import template_manifest
 import os
 import re
 import logging
@@ -17,6 +21,71 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Procesador específico por nombre exacto de archivo (inserción de filas,
+# fórmulas, datos financieros), además de los reemplazos de texto
+PROCESADOR_POR_ARCHIVO = {
+    "6 RATIOS FINANCIEROS.xlsx": "ratios_financieros",
+    "1 Estados Financieros Actuales y Anterior.xlsx": "estados_financieros",
+    "19 Estados Financieros Actuales y Anterior.xlsx": "estados_financieros",
+    "2 REGISTROS AUXILIARES.xlsx": "registros_auxiliares",
+    "3 Comparativo Estados Financieros y Registros Auxiliares.xlsx": "comparativo",
+    "8 MATERIALIDAD.xlsx": "materialidad",
+    "23 MATERIALIDAD.xlsx": "materialidad",
+    "4 ANÁLISIS HORIZONTAL DE BALANCE GENERAL.xlsx": "analisis_horizontal_vertical",
+    "20 ANÁLISIS HORIZONTAL DE BALANCE GENERAL.xlsx": "analisis_horizontal_vertical",
+    "5 ANÁLISIS VERTICAL DE BALANCE GENERAL.xlsx": "analisis_horizontal_vertical",
+    "21 ANÁLISIS VERTICAL DE BALANCE GENERAL.xlsx": "analisis_horizontal_vertical",
+    "6 Prueba de Saldos Iniciales.xlsx": "saldos_iniciales",
+}
+ARCHIVOS_ESTRUCTURALES = tuple(PROCESADOR_POR_ARCHIVO)
+
+
+def procesador_para_archivo(file_name):
+    """Nombre del procesador específico del archivo, o None si solo lleva reemplazos."""
+    procesador = PROCESADOR_POR_ARCHIVO.get(file_name)
+    if procesador:
+        return procesador
+    if file_name.startswith("CENTRALIZADORA"):
+        return "centralizadora"
+    if "SUMARIA" in file_name.upper():
+        return "sumaria"
+    if "IMPORTANCIA RELATIVA" in file_name.upper():
+        return "importancia_relativa"
+    return None
+
+
+# Condiciones por celda de la búsqueda de anclas de cada procesador
+FIRMA_ANCLAS = {
+    "sumaria": firma_celda_tabla_sumaria,
+    "estados_financieros": firma_celda_filas_clave,
+    "analisis_horizontal_vertical": firma_celda_secciones,
+}
+
+
+def requiere_procesador_estructural(file_name):
+    """Indica si process_excel_sheets hace algo más que reemplazar texto en el archivo."""
+    return procesador_para_archivo(file_name) is not None
+
+def _reemplazar_valor(valor_original, replacements, engine, patrones_exactos, patrones_regex):
+    """Devuelve el nuevo valor de la celda o None si ningún reemplazo aplica."""
+    # Reemplazos exactos
+    if valor_original in patrones_exactos:
+        placeholder = patrones_exactos[valor_original]
+        if placeholder in replacements:
+            return replacements[placeholder]
+
+    # Reemplazos de texto parciales
+    nuevo_valor = engine.replace(valor_original)
+    if nuevo_valor != valor_original:
+        return nuevo_valor
+
+    # Reemplazos con regex (si están definidos como diccionario)
+    if isinstance(patrones_regex, dict):
+        for patron, placeholder in patrones_regex.items():
+            if patron in valor_original and placeholder in replacements:
+                return valor_original.replace(patron, replacements[placeholder])
+    return None
+
 def process_excel_sheets(workbook, tables_config, replacements, data_bd, file_path=None):
     """
     Procesa las hojas del Excel aplicando los reemplazos de texto
@@ -34,86 +103,89 @@ def process_excel_sheets(workbook, tables_config, replacements, data_bd, file_pa
     saldos_iniciales = data_bd.get('saldos_iniciales', {})
     ajustes_reclasificaciones = data_bd.get('ajustes_reclasificaciones', {})
 
+    # Los reemplazos se compilan una sola vez para todas las celdas del libro
+    engine = get_replacement_engine(replacements)
+
+    # Hojas, procesador y anclas precalculados (ver utils.template_manifest)
+    manifiesto = template_manifest.entry(file_path) if file_path else None
+    if manifiesto:
+        procesador = manifiesto['procesador']
+        anclas = dict(manifiesto['anclas'])
+    else:
+        procesador = procesador_para_archivo(os.path.basename(file_path)) if file_path else None
+        anclas = {}
+    firma_anclas = FIRMA_ANCLAS.get(procesador)
+
+    # Procesar reemplazos normales usando tables_config
+    patrones_exactos = tables_config.get('patrones_exactos', {})
+    patrones_regex = tables_config.get('patrones_regex', {})
+
     # Procesar reemplazos normales en todas las hojas
     for sheet in workbook.worksheets:
+        if manifiesto and sheet.title not in manifiesto['hojas_con_reemplazos']:
+            continue
         print(f"\n Procesando reemplazos en hoja: {sheet.title}")
-
-        # Procesar reemplazos normales usando tables_config
-        patrones_exactos = tables_config.get('patrones_exactos', {})
-        patrones_regex = tables_config.get('patrones_regex', {})
+        vigilar_anclas = firma_anclas if sheet.title in anclas else None
 
         # Procesar cada celda de la hoja para reemplazos
         for row in sheet.iter_rows():
             for cell in row:
                 if cell.value and isinstance(cell.value, str):
-                    valor_original = cell.value.strip()
-
-                    # Reemplazos exactos
-                    if valor_original in patrones_exactos:
-                        placeholder = patrones_exactos[valor_original]
-                        if placeholder in replacements:
-                            cell.value = replacements[placeholder]
-                            continue
-
-                    # Reemplazos de texto parciales
-                    nuevo_valor = replace_text(valor_original, replacements)
-                    if nuevo_valor != valor_original:
-                        cell.value = nuevo_valor
+                    nuevo_valor = _reemplazar_valor(
+                        cell.value.strip(), replacements, engine, patrones_exactos, patrones_regex
+                    )
+                    if nuevo_valor is None:
                         continue
-
-                    # Reemplazos con regex (si están definidos como diccionario)
-                    if isinstance(patrones_regex, dict):
-                        for patron, placeholder in patrones_regex.items():
-                            if patron in valor_original and placeholder in replacements:
-                                cell.value = valor_original.replace(
-                                    patron, replacements[placeholder])
-                                break
+                    # Si el reemplazo cambia lo que ve la búsqueda de anclas, la hoja se recorre
+                    if vigilar_anclas and vigilar_anclas(cell.value) != vigilar_anclas(nuevo_valor):
+                        anclas.pop(sheet.title, None)
+                        vigilar_anclas = None
+                    cell.value = nuevo_valor
 
     if file_path:
         file_name = os.path.basename(file_path)
 
         # Para RATIOS FINANCIEROS, usamos los balances originales con sufijos de tipo_cuenta
-        if file_name == "6 RATIOS FINANCIEROS.xlsx" and balances:
+        if procesador == "ratios_financieros" and balances:
             logger.info(
                 "Procesando RATIOS FINANCIEROS con balances originales (con sufijos tipo_cuenta)")
             workbook = process_ratios_financieros(workbook, balances)
-        else:
+        elif procesador is not None:
             # Para todos los demás archivos, normalizamos los balances eliminando sufijos
             balances_normalizados = normalizar_balances(balances)
-            if (file_name == "1 Estados Financieros Actuales y Anterior.xlsx" or
-                    file_name == "19 Estados Financieros Actuales y Anterior.xlsx") and balances_normalizados:
+            if procesador == "estados_financieros" and balances_normalizados:
 
                 logger.info(
                     "Procesando Estados Financieros Actuales y Anterior con balances normalizados")
                 logger.debug("Balances normalizados: %s",
                              balances_normalizados)
                 workbook = process_anual_semestral_sheets(
-                    workbook, balances_normalizados)
-            elif file_name == "2 REGISTROS AUXILIARES.xlsx" and registros_auxiliares:
+                    workbook, balances_normalizados, anclas)
+            elif procesador == "registros_auxiliares" and registros_auxiliares:
                 workbook = process_auxiliary_file_sheets(
                     workbook, registros_auxiliares)
-            elif file_name == "3 Comparativo Estados Financieros y Registros Auxiliares.xlsx" and balances_normalizados and registros_auxiliares:
+            elif procesador == "comparativo" and balances_normalizados and registros_auxiliares:
                 workbook = process_comparative_file(
                     workbook, balances_normalizados, registros_auxiliares)
-            elif file_name == "8 MATERIALIDAD.xlsx" or file_name == "23 MATERIALIDAD.xlsx" and balances_normalizados:
+            elif procesador == "materialidad":
                 workbook = process_materialidad_file(
                     workbook, balances_normalizados)
-            elif (file_name == "4 ANÁLISIS HORIZONTAL DE BALANCE GENERAL.xlsx" or
-                  file_name == "20 ANÁLISIS HORIZONTAL DE BALANCE GENERAL.xlsx" or
-                  file_name == "5 ANÁLISIS VERTICAL DE BALANCE GENERAL.xlsx" or
-                  file_name == "21 ANÁLISIS VERTICAL DE BALANCE GENERAL.xlsx") and balances_normalizados:
+            elif procesador == "analisis_horizontal_vertical" and balances_normalizados:
                 workbook = process_horizontal_vertical_analysis(
-                    workbook, balances_normalizados)
-            elif file_name == "6 Prueba de Saldos Iniciales.xlsx" and balances_normalizados and saldos_iniciales:
+                    workbook, balances_normalizados, anclas)
+            elif procesador == "saldos_iniciales" and balances_normalizados and saldos_iniciales:
                 workbook = process_initial_balance_tests(
                     workbook, balances_normalizados, saldos_iniciales)
-            elif file_name.startswith("CENTRALIZADORA") and balances_normalizados:
+            elif procesador == "centralizadora" and balances_normalizados:
                 workbook = process_centralizadora_file(
                     workbook, balances_normalizados, ajustes_reclasificaciones, file_name)
-            elif "SUMARIA" in file_name.upper() and balances_normalizados:
+            elif procesador == "sumaria" and balances_normalizados:
                 workbook = process_sumaria_file(
-                    workbook, balances_normalizados, ajustes_reclasificaciones, file_name)
-            elif "IMPORTANCIA RELATIVA" in file_name.upper() and balances_normalizados:
+                    workbook, balances_normalizados, ajustes_reclasificaciones, file_name,
+                    cuenta_asociada=manifiesto['cuenta'] if manifiesto else None,
+                    anclas=anclas,
+                )
+            elif procesador == "importancia_relativa" and balances_normalizados:
                 workbook = process_importance_relative(
                     workbook, balances_normalizados)
 
@@ -1,5 +1,8 @@
 import re
 
+from ....utils.balance_index import BalanceIndex
+
+
 def normalizar_balances(balances):
     """
     Normaliza las claves del diccionario balances eliminando los sufijos de tipo_cuenta.
@@ -10,6 +13,10 @@ def normalizar_balances(balances):
     Returns:
         Diccionario con claves normalizadas (sin sufijos de tipo_cuenta)
     """
+    # El índice ya conoce el tipo_cuenta de cada fila y guarda su versión normalizada
+    if isinstance(balances, BalanceIndex):
+        return balances.normalizado()
+
     balances_normalizados = {}
     # Acepta C, NC, NT, Corriente y No Corriente (con espacio o guion), case-insensitive
     patron_sufijo = re.compile(r'^(.*?)-(?:C|NC|NT|CORRIENTE|NO[ -]?CORRIENTE)$', re.IGNORECASE)
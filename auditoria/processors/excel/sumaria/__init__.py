@@ -20,6 +20,14 @@ from .data_extraction import obtener_todas_cuentas_seccion
 from .insercion import insertar_datos_cuenta, insertar_multiples_cuentas, actualizar_fechas_encabezados
 
 
+def _tabla_sumaria(sheet, anclas):
+    if anclas and sheet.title in anclas:
+        tabla_info = anclas[sheet.title]
+        # Copia: la inserción no debe modificar la entrada del manifiesto
+        return dict(tabla_info, columnas_fechas=list(tabla_info['columnas_fechas'])) if tabla_info else None
+    return buscar_tabla_sumaria(sheet)
+
+
 # ---------------------------------------------------------------------
 # API Principal del procesador SUMARIA
 # ---------------------------------------------------------------------
@@ -29,8 +37,14 @@ def process_sumaria_file(
     balances: dict[str, float],
     ajustes_reclasificaciones: dict[str, float],
     file_name: str,
+    cuenta_asociada: str | None = None,
+    anclas: dict | None = None,
 ):
-    """Procesa archivos SUMARIA insertando datos de balances financieros."""
+    """Procesa archivos SUMARIA insertando datos de balances financieros.
+
+    ``cuenta_asociada`` y la tabla de cada hoja (``anclas``, por título)
+    pueden venir precalculadas (ver utils.template_manifest); si no, se detectan.
+    """
 
     sheet = workbook.active
     # 1. fechas disponibles
@@ -39,7 +53,8 @@ def process_sumaria_file(
         return workbook
 
     # 2. cuenta asociada según nombre de archivo
-    cuenta_asociada = determinar_cuenta_por_nombre_archivo(file_name)
+    if cuenta_asociada is None:
+        cuenta_asociada = determinar_cuenta_por_nombre_archivo(file_name)
     if not cuenta_asociada:
         return workbook
 
@@ -57,7 +72,7 @@ def process_sumaria_file(
         if not todas_cuentas:
             return workbook
 
-        tabla_info = buscar_tabla_sumaria(sheet)
+        tabla_info = _tabla_sumaria(sheet, anclas)
         if not tabla_info:
             return workbook
 
@@ -73,7 +88,7 @@ def process_sumaria_file(
     if not cuenta_existe:
         return workbook
 
-    tabla_info = buscar_tabla_sumaria(sheet)
+    tabla_info = _tabla_sumaria(sheet, anclas)
     if not tabla_info:
         return workbook
 
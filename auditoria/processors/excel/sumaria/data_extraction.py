@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 from typing import Dict, List
-import re
+
+from ....utils.balance_index import as_balance_index
 
 __all__ = [
     "encontrar_ajuste_para_cuenta",
@@ -56,16 +57,13 @@ def obtener_todas_cuentas_seccion(
 ) -> Dict[str, Dict[str, float]]:
     """Construye un dict {nombre_cuenta: {fecha: valor, ...}} para *seccion*."""
 
+    indice = as_balance_index(balances)
     todas_cuentas: Dict[str, Dict[str, float]] = {}
-    patron = re.compile(fr"SEMESTRAL-(.*?)-{seccion}-(.*)")
 
-    for clave, valor in balances.items():
-        m = patron.match(clave)
-        if not m:
-            continue
-        fecha, nombre_cuenta = m.groups()
+    for fecha in indice.fechas("SEMESTRAL"):
         if fecha not in fechas_semestrales:
             continue
-        todas_cuentas.setdefault(nombre_cuenta, {})[fecha] = valor
+        for nombre_cuenta, valor in indice.cuentas("SEMESTRAL", fecha, seccion).items():
+            todas_cuentas.setdefault(nombre_cuenta, {})[fecha] = valor
 
-    return todas_cuentas
\ No newline at end of file
+    return todas_cuentas
@@ -7,10 +7,14 @@ from typing import Tuple, Dict, List, Optional
 
 from openpyxl.worksheet.worksheet import Worksheet
 
+from ....utils.balance_index import as_balance_index
+from ..label_index import indice_etiquetas
+
 __all__ = [
     "determinar_cuenta_por_nombre_archivo",
     "verificar_cuenta_en_balances",
     "buscar_tabla_sumaria",
+    "firma_celda_tabla_sumaria",
 ]
 
 
@@ -47,6 +51,9 @@ _MAPEO_CUENTAS: dict[str, str] = {
     "COSTO": "Costos",
 }
 
+# Palabras clave de más largas a más cortas (orden de búsqueda)
+_CLAVES_POR_LONGITUD = sorted(_MAPEO_CUENTAS, key=len, reverse=True)
+
 
 # ---------------------------------------------------------------------
 # Detección de cuenta por nombre de archivo
@@ -62,7 +69,7 @@ def determinar_cuenta_por_nombre_archivo(file_name: str) -> str | None:
     nombre_limpio = re.sub(r"^\d+\s*", "", file_name.replace(".xlsx", ""))
 
     # Buscar por palabras clave, de más largas a más cortas
-    for palabra_clave in sorted(_MAPEO_CUENTAS, key=len, reverse=True):
+    for palabra_clave in _CLAVES_POR_LONGITUD:
         if palabra_clave in nombre_limpio.upper():
             return _MAPEO_CUENTAS[palabra_clave]
 
@@ -88,28 +95,29 @@ def verificar_cuenta_en_balances(
     Retorna `(existe, datos_por_fecha)`.
     """
 
+    indice = as_balance_index(balances)
     datos_cuenta: dict[str, float] = {}
     cuenta_existe = False
     cuenta_normalizada = cuenta_asociada.lower().strip()
 
     for seccion in ["Activo", "Pasivo", "Patrimonio", "ESTADO DE RESULTADOS"]:
         for fecha in fechas_semestrales:
-            clave_exacta = f"SEMESTRAL-{fecha}-{seccion}-{cuenta_asociada}"
-            if clave_exacta in balances:
-                datos_cuenta[fecha] = balances[clave_exacta]
+            cuentas = indice.cuentas("SEMESTRAL", fecha, seccion)
+            if cuenta_asociada in cuentas:
+                datos_cuenta[fecha] = cuentas[cuenta_asociada]
                 cuenta_existe = True
                 continue
 
             # Buscar coincidencias parciales si no hay exactas
             if fecha not in datos_cuenta:
                 prefijo = f"SEMESTRAL-{fecha}-{seccion}-"
-                for clave, valor in balances.items():
-                    if clave.startswith(prefijo):
-                        nombre_cuenta = "-".join(clave.split("-")[3:]).lower().strip()
-                        if cuenta_normalizada in nombre_cuenta or nombre_cuenta in cuenta_normalizada:
-                            datos_cuenta[fecha] = valor
-                            cuenta_existe = True
-                            break
+                for cuenta, valor in cuentas.items():
+                    # Se compara contra el resto de la clave heredada a partir del día
+                    nombre_cuenta = "-".join(f"{prefijo}{cuenta}".split("-")[3:]).lower().strip()
+                    if cuenta_normalizada in nombre_cuenta or nombre_cuenta in cuenta_normalizada:
+                        datos_cuenta[fecha] = valor
+                        cuenta_existe = True
+                        break
 
     return cuenta_existe, datos_cuenta
 
@@ -118,6 +126,18 @@ def verificar_cuenta_en_balances(
 # Localización de tabla SUMARIA en hoja Excel
 # ---------------------------------------------------------------------
 
+def firma_celda_tabla_sumaria(val) -> tuple:
+    """Condiciones que ``buscar_tabla_sumaria`` evalúa sobre el valor de una celda."""
+    if not isinstance(val, str):
+        return ()
+    val = val.upper()
+    return (
+        "SUMARIA" in val or "CEDULA" in val,
+        "SALDOS S/ BALANCE" in val,
+        "CUENTA" in val or "DESCRIPCIÓN" in val,
+    )
+
+
 def buscar_tabla_sumaria(sheet: Worksheet) -> Optional[Dict[str, int | List[int]]]:
     """Intenta ubicar la tabla SUMARIA en *sheet*.
 
@@ -130,49 +150,25 @@ def buscar_tabla_sumaria(sheet: Worksheet) -> Optional[Dict[str, int | List[int]
     o **None** si la tabla no se encuentra.
     """
 
-    fila_titulo = None
-    for row_idx in range(1, 30):
-        for col_idx in range(1, 15):
-            val = sheet.cell(row=row_idx, column=col_idx).value
-            if isinstance(val, str) and (
-                "SUMARIA" in val.upper() or "CEDULA" in val.upper()
-            ):
-                fila_titulo = row_idx
-                break
-        if fila_titulo:
-            break
-
-    if not fila_titulo:
+    indice = indice_etiquetas(sheet)
+    columnas = range(1, 15)
+
+    titulo = indice.primera("SUMARIA", "CEDULA", filas=range(1, 30), columnas=columnas)
+    if not titulo:
         return None
+    fila_titulo = titulo[0]
 
-    fila_encabezados = None
-    for row_idx in range(fila_titulo, fila_titulo + 15):
-        for col_idx in range(1, 15):
-            val = sheet.cell(row=row_idx, column=col_idx).value
-            if isinstance(val, str) and "SALDOS S/ BALANCE" in val.upper():
-                fila_encabezados = row_idx
-                break
-        if fila_encabezados:
-            break
-
-    if not fila_encabezados:
+    encabezados = indice.primera("SALDOS S/ BALANCE", filas=range(fila_titulo, fila_titulo + 15), columnas=columnas)
+    if not encabezados:
         return None
+    fila_encabezados = encabezados[0]
 
     columnas_fechas: List[int] = [
-        col
-        for col in range(1, 15)
-        if isinstance(sheet.cell(row=fila_encabezados, column=col).value, str)
-        and "SALDOS S/ BALANCE" in sheet.cell(row=fila_encabezados, column=col).value.upper()
+        col for _, col in indice.buscar("SALDOS S/ BALANCE", filas=(fila_encabezados,), columnas=columnas)
     ]
 
-    columna_cuenta = None
-    for col_idx in range(1, 15):
-        val = sheet.cell(row=fila_encabezados + 1, column=col_idx).value
-        if isinstance(val, str) and (
-            "CUENTA" in val.upper() or "DESCRIPCIÓN" in val.upper()
-        ):
-            columna_cuenta = col_idx
-            break
+    cuenta = indice.primera("CUENTA", "DESCRIPCIÓN", filas=(fila_encabezados + 1,), columnas=columnas)
+    columna_cuenta = cuenta[1] if cuenta else None
 
     fila_inicio_datos = fila_encabezados + 2
 
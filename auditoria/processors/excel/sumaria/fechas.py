@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
-import re
 from datetime import datetime
 from typing import List
 
+from ....utils.balance_index import as_balance_index
+
 
 # ---------------------------------------------------------------------
 # Extracción de fechas semestrales desde balances
@@ -19,14 +20,7 @@ def obtener_fechas_semestrales(balances: dict[str, float]) -> List[str]:
     Devuelve una lista ordenada ascendentemente.
     """
 
-    patron_fecha = re.compile(r"SEMESTRAL-(\d{4}-\d{2}-\d{2})")
-    fechas: set[str] = set()
-
-    for clave in balances:
-        if m := patron_fecha.search(clave):
-            fechas.add(m.group(1))
-
-    return sorted(fechas)
+    return as_balance_index(balances).fechas("SEMESTRAL")
 
 
 # ---------------------------------------------------------------------
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from ..formula_translation import trasladar_formula
+
 __all__ = ["ajustar_formula_para_nueva_fila"]
 
 
@@ -10,10 +12,10 @@ __all__ = ["ajustar_formula_para_nueva_fila"]
 # ---------------------------------------------------------------------
 
 def ajustar_formula_para_nueva_fila(formula: str, fila_origen: int, fila_destino: int) -> str:
-    """Reemplaza las referencias de `fila_origen` por `fila_destino` en la fórmula.
+    """Traslada la fórmula de `fila_origen` a `fila_destino`.
 
-    Nota: Asume referencias absolutas tipo ``$13``. Para casos más complejos se
-    requerirá un parser más robusto.
+    Las filas relativas se desplazan y las absolutas (``$13``) se conservan,
+    como al copiar la fila en Excel (ver ``formula_translation``).
     """
 
-    return formula.replace(f"${fila_origen}", f"${fila_destino}")
+    return trasladar_formula(formula, fila_destino - fila_origen)
@@ -4,11 +4,10 @@ from __future__ import annotations
 
 from typing import Dict, List
 
-from openpyxl.utils import get_column_letter
 from openpyxl.styles import Alignment
 from openpyxl.worksheet.worksheet import Worksheet
 
-from .formulas import ajustar_formula_para_nueva_fila
+from ..row_expansion import ExpansionFilas
 from .data_extraction import encontrar_ajuste_para_cuenta
 from .fechas import _formatear_fecha_ddmmaa
 
@@ -73,67 +72,17 @@ def insertar_multiples_cuentas(
     filas_disponibles = 1  # la plantilla tiene 1 fila vacía (13)
     filas_a_insertar = max(0, filas_necesarias - filas_disponibles)
 
-    # Guardar rangos combinados de la fila 13
-    celdas_combinadas_originales = []
-    for merged_range in sheet.merged_cells.ranges:
-        if 13 in range(merged_range.min_row, merged_range.max_row + 1):
-            celdas_combinadas_originales.append(
-                {
-                    "min_row": merged_range.min_row,
-                    "max_row": merged_range.max_row,
-                    "min_col": merged_range.min_col,
-                    "max_col": merged_range.max_col,
-                }
-            )
-
     if filas_a_insertar:
-        # Copiar estilos/fórmulas de la fila 13
-        estilos_fila_13 = {}
-        formulas_fila_13 = {}
-        for col in range(1, sheet.max_column + 1):
-            celda = sheet.cell(row=13, column=col)
-            estilos_fila_13[col] = {
-                "font": celda.font.copy() if celda.font else None,
-                "border": celda.border.copy() if celda.border else None,
-                "fill": celda.fill.copy() if celda.fill else None,
-                "number_format": celda.number_format,
-                "alignment": celda.alignment.copy() if celda.alignment else None,
-                "protection": celda.protection.copy() if celda.protection else None,
-            }
-            if celda.data_type == "f":
-                formulas_fila_13[col] = celda.value
-
-        sheet.insert_rows(14, filas_a_insertar)
-
-        for i in range(filas_a_insertar):
-            fila_destino = 14 + i
-            for col, estilos in estilos_fila_13.items():
-                celda_dest = sheet.cell(row=fila_destino, column=col)
-                if estilos["font"]:
-                    celda_dest.font = estilos["font"]
-                if estilos["border"]:
-                    celda_dest.border = estilos["border"]
-                if estilos["fill"]:
-                    celda_dest.fill = estilos["fill"]
-                celda_dest.number_format = estilos["number_format"]
-                if estilos["alignment"]:
-                    celda_dest.alignment = estilos["alignment"]
-                if estilos["protection"]:
-                    celda_dest.protection = estilos["protection"]
-
-                # Ajustar fórmulas
-                if col in formulas_fila_13:
-                    formula_orig = formulas_fila_13[col]
-                    if isinstance(formula_orig, str) and formula_orig.startswith("="):
-                        celda_dest.value = ajustar_formula_para_nueva_fila(
-                            formula_orig, 13, fila_destino
-                        )
-
-            # Restaurar combinaciones
-            for rng in celdas_combinadas_originales:
-                if rng["max_col"] > rng["min_col"]:
-                    rango = f"{get_column_letter(rng['min_col'])}{fila_destino}:{get_column_letter(rng['max_col'])}{fila_destino}"
-                    sheet.merge_cells(rango)
+        # Las filas nuevas toman estilo, fórmulas y combinaciones de la fila 13
+        expansion = ExpansionFilas(sheet)
+        expansion.insertar(
+            14,
+            filas_a_insertar,
+            fila_modelo=13,
+            copiar_formulas=True,
+            combinar=True,
+        )
+        expansion.aplicar()
 
     # Escribir datos en filas
     for i, nombre_cuenta in enumerate(cuentas_ordenadas):
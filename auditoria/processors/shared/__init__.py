@@ -1,4 +1,4 @@
-from .text_replacer import replace_text
+from .text_replacer import replace_text, ReplacementEngine, get_replacement_engine
 from .urls_programs.main_functions import get_file_info_from_pattern
 
-__all__ = ["replace_text", "get_file_info_from_pattern"]
\ No newline at end of file
+__all__ = ["replace_text", "ReplacementEngine", "get_replacement_engine", "get_file_info_from_pattern"]
\ No newline at end of file
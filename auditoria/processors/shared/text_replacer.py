@@ -1,29 +1,128 @@
 import re
+from collections import OrderedDict
+from threading import Lock
+
+# Motores compilados por contenido de reemplazos (una auditoría = un motor)
+_ENGINE_CACHE_SIZE = 32
+_engine_cache = OrderedDict()
+_engine_lock = Lock()
+
+
+class ReplacementEngine:
+    """
+    Reemplazos simples y regex precompilados para un diccionario de reemplazos.
+
+    ``replace_text`` recorría todas las claves por cada celda o párrafo,
+    pasando el texto a minúsculas una vez por clave. El motor se construye una
+    sola vez por petición y compila:
+
+    - Un detector con todas las claves literales en una sola alternación.
+      Si el texto no contiene ninguna, la fase de reemplazos simples se omite.
+    - Las reglas regex (con IGNORECASE) y un detector combinado para ellas.
+
+    Cuando el detector encuentra alguna clave, los reemplazos se aplican en el
+    mismo orden y de la misma forma que antes, porque hay claves que reemplazan
+    el resultado de otras (p. ej. ``[ENTIDAD_COMPLETA]`` y ``Entidad: ``).
+    Las claves vacías se ignoran.
+    """
+
+    __slots__ = ('_pares', '_detector', '_reglas', '_detector_reglas')
+
+    def __init__(self, replacements, regex_patterns=None):
+        self._pares = [(key, str(value)) for key, value in replacements.items() if key]
+        self._detector = _compilar_alternacion(
+            re.escape(key) for key, _ in sorted(self._pares, key=lambda par: len(par[0]), reverse=True)
+        )
+
+        self._reglas = []
+        for rule in regex_patterns or ():
+            pattern = rule.get("pattern")
+            value = replacements.get(rule.get("reemplazar_por"))
+            if pattern and value:
+                self._reglas.append((re.compile(pattern, re.IGNORECASE), str(value)))
+        self._detector_reglas = _compilar_alternacion(
+            (regla.pattern for regla, _ in self._reglas), re.IGNORECASE
+        )
+
+    def keys(self):
+        """Claves literales del motor, en el orden en que se aplican."""
+        return [key for key, _ in self._pares]
+
+    def replace(self, text):
+        """Aplica los reemplazos simples y luego los regex sobre *text*."""
+        return self.replace_count(text)[0]
+
+    def replace_count(self, text):
+        """
+        Igual que ``replace`` pero devuelve ``(texto, ocurrencias)``, donde
+        ocurrencias es la cantidad de reemplazos simples aplicados.
+        """
+        hits = 0
+        if self._pares and (self._detector is None or self._detector.search(text)):
+            for key, value in self._pares:
+                occurrences = text.count(key)
+                if occurrences:
+                    text = text.replace(key, value)
+                    hits += occurrences
+
+        if self._reglas and (self._detector_reglas is None or self._detector_reglas.search(text)):
+            for regla, value in self._reglas:
+                text = regla.sub(value, text)
+        return text, hits
+
+
+def _compilar_alternacion(patrones, flags=0):
+    """Une los patrones en una sola regex; devuelve None si no hay o no compila."""
+    patrones = list(patrones)
+    if not patrones:
+        return None
+    try:
+        return re.compile("|".join(f"(?:{patron})" for patron in patrones), flags)
+    except re.error:
+        # Patrones con grupos con nombre repetidos o flags inline: sin detector
+        return None
+
+
+def get_replacement_engine(replacements, regex_patterns=None):
+    """
+    Devuelve un ``ReplacementEngine`` para estos reemplazos, reutilizando el
+    último compilado si el contenido es el mismo.
+    """
+    try:
+        key = (
+            tuple(replacements.items()),
+            tuple((rule.get("pattern"), rule.get("reemplazar_por")) for rule in regex_patterns or ()),
+        )
+        hash(key)
+    except TypeError:
+        return ReplacementEngine(replacements, regex_patterns)
+
+    with _engine_lock:
+        engine = _engine_cache.get(key)
+        if engine is not None:
+            _engine_cache.move_to_end(key)
+            return engine
+
+    engine = ReplacementEngine(replacements, regex_patterns)
+    with _engine_lock:
+        _engine_cache[key] = engine
+        while len(_engine_cache) > _ENGINE_CACHE_SIZE:
+            _engine_cache.popitem(last=False)
+    return engine
+
 
 def replace_text(text, replacements, regex_patterns=None):
     """
     Reemplaza texto con coincidencias simples y patrones regex dinámicos.
-    
+
     Args:
         text (str): Texto original a procesar
-        replacements (dict): Diccionario de reemplazos simples
+        replacements (dict | ReplacementEngine): Diccionario de reemplazos simples
+            o un motor ya compilado
         regex_patterns (list): Lista de patrones regex con claves a reemplazar (opcional)
     Returns:
         str: Texto con los reemplazos aplicados
     """
-    # Reemplazo directo (case-insensitive)
-    for key, value in replacements.items():
-        if key.lower() in text.lower():
-            text = text.replace(key, str(value))
-
-    # Reemplazos por regex si están definidos
-    if regex_patterns:
-        for rule in regex_patterns:
-            pattern = rule.get("pattern")
-            key = rule.get("reemplazar_por")
-            value = replacements.get(key)
-
-            if pattern and value:
-                text = re.sub(pattern, str(value), text, flags=re.IGNORECASE)
-    return text
-    
\ No newline at end of file
+    if isinstance(replacements, ReplacementEngine):
+        return replacements.replace(text)
+    return get_replacement_engine(replacements, regex_patterns).replace(text)
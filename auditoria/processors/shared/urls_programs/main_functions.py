@@ -3,10 +3,10 @@ Módulo para mapear patrones de hipervínculos a rutas de archivos.
 Proporciona funciones para convertir patrones como 'A-1', 'R-10' a rutas de archivos reales.
 """
 
-import os
 import logging
 import json
-from django.conf import settings
+
+from auditoria.utils.template_index import template_index
 
 from .financial_audit_mappings import PREFIX_TO_FOLDER, PATTERN_TO_FILE
 from .internal_audit_mappings import INTERNAL_PREFIX_TO_FOLDER, INTERNAL_PATTERN_TO_FILE, INTERNAL_PREFIX_TO_PROGRAM
@@ -67,25 +67,11 @@ def get_file_info_from_pattern(pattern, is_internal=False):
             logger.warning(f"No se encontró archivo para el patrón: {pattern}")
             return None
     
-    # Construir la ruta completa según el tipo de auditoría
-    if is_internal:
-        base_path = os.path.join(settings.BASE_DIR, 'static', 'templates_base_interna')
-    else:
-        base_path = os.path.join(settings.BASE_DIR, 'static', 'templates_base_financiera')
-    
-    full_path = os.path.join(base_path, folder, filename)
-    
-    # Verificar si el archivo existe
-    if not os.path.exists(full_path):
-        logger.warning(f"El archivo no existe en la ruta: {full_path}")
-        # Intentar buscar el archivo de forma más flexible
-        from auditoria.views import normalize_text, get_template_path
-        template_path = get_template_path(folder, filename, is_internal=is_internal)
-        if template_path:
-            full_path = template_path
-        else:
-            logger.error(f"No se pudo encontrar el archivo para el patrón: {pattern}")
-            return None
+    # Buscar en el índice de plantillas (coincidencia exacta o normalizada)
+    full_path = template_index.resolve(folder, filename, is_internal=is_internal)
+    if not full_path:
+        logger.error(f"No se pudo encontrar el archivo para el patrón: {pattern}")
+        return None
     
     return {
         'folder': folder,
@@ -5,17 +5,23 @@ Función principal para procesar y reemplazar texto en tablas con soporte para h
 
 import logging
 import re
-from ...shared.text_replacer import replace_text
+from docx.table import _Cell
+from ...shared.text_replacer import get_replacement_engine, _compilar_alternacion
 from .style_utils import set_text_with_style_from_reference_cell, replace_text_preserving_format
 from .hyperlink_processor import apply_hyperlinks_to_document
 from .nomenclature_config import get_nomenclature_config
+from .table_walker import filas_de_tabla, texto_celda
 
 logger = logging.getLogger(__name__)
 
-def process_tables(doc, replacements, tables_config=None, document_name=None, document_path=None, audit_id=None):
+def process_tables(doc, replacements, tables_config=None, document_name=None, document_path=None, audit_id=None,
+                   ubicaciones=None):
     """
     Procesa y reemplaza texto en tablas de un documento Word.
-    
+
+    Cada tabla se recorre una sola vez sobre su XML (ver table_walker); solo
+    las celdas que cambian se envuelven en proxies de python-docx.
+
     Args:
         doc: Documento Word a procesar
         replacements: Diccionario con los valores a reemplazar
@@ -23,135 +29,135 @@ def process_tables(doc, replacements, tables_config=None, document_name=None, do
         document_name: Nombre del documento (para hipervínculos)
         document_path: Ruta del documento (para hipervínculos)
         audit_id: ID de la auditoría (para hipervínculos)
+        ubicaciones: Nodos con placeholders (utils.placeholder_map); si se
+            indica, solo se visitan esas celdas
         
     Returns:
         Documento Word procesado
     """
     patrones = tables_config.get("patrones", [])
     patrones_regex = tables_config.get("patrones_regex", [])
-    processed_cells = {}  # Diccionario para rastrear celdas ya procesadas
+    engine = get_replacement_engine(replacements)
     is_programa_document = "1 programa" in document_name.lower()
 
-    for idx, table in enumerate(doc.tables):
-        for row_idx, row in enumerate(table.rows):
-            for col_idx, cell in enumerate(row.cells):
-                # Generar un ID único para esta celda
-                cell_id = f"table_{idx}_row_{row_idx}_col_{col_idx}"
-                
-                # Si la celda ya fue procesada, continuamos con la siguiente
-                if cell_id in processed_cells:
-                    continue
-                    
-                cell_text = cell.text.strip().replace('\n', ' ').replace('  ', ' ')
-
-                # Para documentos "1 PROGRAMA", ejecutar Caso 3 (regex) PRIMERO con prioridad absoluta
-                if is_programa_document and patrones_regex:
-                    texto_original = cell.text
-                    patrones_aplicados = set()
-                    
-                    for patron_regex in patrones_regex:
-                        pattern = patron_regex.get("pattern")
-                        key = patron_regex.get("reemplazar_por")
-                        
-                        patron_id = f"{pattern}_{key}"
-                        if patron_id in patrones_aplicados:
-                            continue
-                            
-                        valor = replacements.get(key, "")
-                        
-                        if pattern and valor and cell.text:
-                            match = re.search(pattern, cell.text)
-                            if match:
-                                patrones_aplicados.add(patron_id)
-                                # Para patrones que terminan en \\s*$, agregar el valor después del patrón
-                                if pattern.endswith("\\s*$"):
-                                    # Reemplazar el patrón manteniendo la etiqueta y agregando el valor
-                                    matched_text = match.group(0)
-                                    # Extraer la etiqueta (ej: "Entidad:", "Auditoría:")
-                                    label = matched_text.rstrip()
-                                    new_text = f"{label} {valor}"
-                                    replace_text_preserving_format(cell, matched_text, new_text)
-                                else:
-                                    # Comportamiento original para otros patrones
-                                    matched_text = cell.text[match.start():match.end()]
-                                    replace_text_preserving_format(cell, matched_text, valor)
-                                processed_cells[cell_id] = True
-                    
-                    # Si ya se procesó con regex, continuar con la siguiente celda
-                    if cell_id in processed_cells:
-                        continue
-
-                # Para documentos que NO son "1 PROGRAMA", usar el flujo normal
-                if not is_programa_document:
-                    # Caso 1: reemplazo en celda adyacente con estilo
-                    for patron in patrones:
-                        buscar = patron.get("buscar")
-                        clave = patron.get("valor")
-                        valor = replacements.get(clave, "")
-
-                        if cell_text == buscar:
-                            try:
-                                next_cell = row.cells[col_idx + 1]
-                                next_cell_id = f"table_{idx}_row_{row_idx}_col_{col_idx + 1}"
-                                set_text_with_style_from_reference_cell(next_cell, valor, cell)
-                                processed_cells[cell_id] = processed_cells[next_cell_id] = True
-                            except IndexError:
-                                pass
-
-                    # Si la celda ya fue procesada, saltamos los otros casos
-                    if cell_id in processed_cells:
-                        continue
-
-                    # Caso 2: reemplazo parcial dentro de la misma celda (directo)
-                    for patron in patrones:
-                        buscar = patron.get("buscar")
-                        if buscar in cell_text:
-                            nuevo_texto = replace_text(cell_text, replacements)
-                            if nuevo_texto != cell_text:
-                                replace_text_preserving_format(cell, cell_text, nuevo_texto)
-                                processed_cells[cell_id] = True
-                    
-                    # Caso 3: aplicar reemplazos regex desde JSON para documentos normales
-                    if not cell_id in processed_cells and patrones_regex:
-                        texto_original = cell.text
-                        patrones_aplicados = set()
-                        
-                        for patron_regex in patrones_regex:
-                            pattern = patron_regex.get("pattern")
-                            key = patron_regex.get("reemplazar_por")
-                            
-                            patron_id = f"{pattern}_{key}"
-                            if patron_id in patrones_aplicados:
-                                continue
-                                
-                            valor = replacements.get(key, "")
-                            
-                            if pattern and valor and cell.text:
-                                match = re.search(pattern, cell.text)
-                                if match:
-                                    patrones_aplicados.add(patron_id)
-                                    # Para patrones que terminan en \\s*$, agregar el valor después del patrón
-                                    if pattern.endswith("\\s*$"):
-                                        # Reemplazar el patrón manteniendo la etiqueta y agregando el valor
-                                        matched_text = match.group(0)
-                                        # Extraer la etiqueta (ej: "Entidad:", "Auditoría:")
-                                        label = matched_text.rstrip()
-                                        new_text = f"{label} {valor}"
-                                        replace_text_preserving_format(cell, matched_text, new_text)
-                                    else:
-                                        # Comportamiento original para otros patrones
-                                        matched_text = cell.text[match.start():match.end()]
-                                        replace_text_preserving_format(cell, matched_text, valor)
-                                    processed_cells[cell_id] = True
-    
+    # Caso 1: etiqueta exacta -> valor para la celda adyacente (gana el último patrón)
+    etiquetas = {
+        patron.get("buscar"): replacements.get(patron.get("valor"), "")
+        for patron in patrones if patron.get("buscar") is not None
+    }
+    # Caso 2: etiquetas buscadas dentro del texto, una por patrón
+    parciales = [patron["buscar"] for patron in patrones if patron.get("buscar") is not None]
+    reglas, detector = _compilar_reglas_regex(patrones_regex, replacements)
+
+    processed_cells = set()  # Elementos w:tc ya procesados
+
+    celdas = _todas_las_celdas(doc) if ubicaciones is None else ubicaciones.celdas
+    for table, tc, next_tc in celdas:
+        # Si la celda ya fue procesada (o es la repetición de una combinada), seguimos
+        if tc in processed_cells:
+            continue
+
+        texto = texto_celda(tc)
+
+        # Para documentos "1 PROGRAMA", ejecutar Caso 3 (regex) PRIMERO con prioridad absoluta
+        if is_programa_document:
+            if reglas and _aplicar_reglas_regex(tc, table, texto, reglas, detector):
+                processed_cells.add(tc)
+            continue
+
+        cell_text = texto.strip().replace('\n', ' ').replace('  ', ' ')
+
+        # Caso 1: reemplazo en celda adyacente con estilo
+        if cell_text in etiquetas and next_tc is not None:
+            set_text_with_style_from_reference_cell(
+                _Cell(next_tc, table), etiquetas[cell_text], _Cell(tc, table)
+            )
+            processed_cells.add(tc)
+            processed_cells.add(next_tc)
+            continue
+
+        # Caso 2: reemplazo parcial dentro de la misma celda (directo)
+        coincidencias = [buscar for buscar in parciales if buscar in cell_text]
+        if coincidencias:
+            nuevo_texto = engine.replace(cell_text)
+            if nuevo_texto != cell_text:
+                cell = _Cell(tc, table)
+                # Una vez por patrón que coincide, como al recorrer los patrones
+                for _ in coincidencias:
+                    replace_text_preserving_format(cell, cell_text, nuevo_texto)
+                processed_cells.add(tc)
+
+        # Caso 3: aplicar reemplazos regex desde JSON para documentos normales
+        if tc not in processed_cells and reglas:
+            if _aplicar_reglas_regex(tc, table, texto, reglas, detector):
+                processed_cells.add(tc)
+
     # Aplicar hipervínculos si hay información suficiente
     if audit_id and document_name:
         # Obtener la configuración de nomenclatura
         nomenclature_config = get_nomenclature_config(document_name, document_path)
-        doc = apply_hyperlinks_to_document(doc, audit_id, document_name, document_path, nomenclature_config)
+        doc = apply_hyperlinks_to_document(
+            doc, audit_id, document_name, document_path, nomenclature_config, ubicaciones
+        )
 
     return doc
 
+
+def _todas_las_celdas(doc):
+    """``(tabla, w:tc, w:tc siguiente en la fila o None)`` por cada posición de la grilla."""
+    for table in doc.tables:
+        for celdas in filas_de_tabla(table._tbl):
+            for col_idx, tc in enumerate(celdas):
+                yield table, tc, celdas[col_idx + 1] if col_idx + 1 < len(celdas) else None
+
+
+def _compilar_reglas_regex(patrones_regex, replacements):
+    """
+    Reglas regex con valor, sin repetir (patrón, clave), y un detector con
+    todas ellas en una sola alternación. Si el detector no encuentra nada en
+    la celda, ninguna regla aplica.
+    """
+    reglas = []
+    vistos = set()
+    for patron_regex in patrones_regex:
+        pattern = patron_regex.get("pattern")
+        key = patron_regex.get("reemplazar_por")
+        valor = replacements.get(key, "")
+        if not pattern or not valor or (pattern, key) in vistos:
+            continue
+        vistos.add((pattern, key))
+        reglas.append((re.compile(pattern), pattern, valor))
+    detector = _compilar_alternacion(pattern for _, pattern, _ in reglas)
+    return reglas, detector
+
+
+def _aplicar_reglas_regex(tc, table, texto, reglas, detector):
+    """Aplica las reglas regex en orden sobre la celda. Devuelve True si alguna coincidió."""
+    if not texto or (detector is not None and not detector.search(texto)):
+        return False
+
+    cell = _Cell(tc, table)
+    aplicada = False
+    for regla, pattern, valor in reglas:
+        cell_text = cell.text
+        if not cell_text:
+            continue
+        match = regla.search(cell_text)
+        if not match:
+            continue
+        aplicada = True
+        # Para patrones que terminan en \\s*$, agregar el valor después del patrón
+        if pattern.endswith("\\s*$"):
+            # Reemplazar el patrón manteniendo la etiqueta y agregando el valor
+            matched_text = match.group(0)
+            # Extraer la etiqueta (ej: "Entidad:", "Auditoría:")
+            label = matched_text.rstrip()
+            replace_text_preserving_format(cell, matched_text, f"{label} {valor}")
+        else:
+            # Comportamiento original para otros patrones
+            replace_text_preserving_format(cell, match.group(0), valor)
+    return aplicada
+
 # Exportar las funciones principales para compatibilidad hacia atrás
 __all__ = [
     'process_tables',
@@ -0,0 +1,48 @@
+"""
+Recorrido de tablas Word directamente sobre el XML.
+
+``table.rows`` y ``row.cells`` crean un proxy de python-docx por cada
+posición de la grilla: una celda combinada horizontalmente aparece una vez
+por columna que abarca y una combinada verticalmente se vuelve a resolver
+(con xpath hacia la fila anterior) en cada fila que ocupa. Aquí cada ``w:tr``
+se recorre una sola vez, las combinaciones verticales se resuelven con la
+grilla de la fila anterior y cada celda se identifica por su elemento
+``w:tc``, no por su posición.
+"""
+
+from docx.oxml.ns import qn
+
+W_TR = qn('w:tr')
+W_TC = qn('w:tc')
+W_P = qn('w:p')
+
+
+def filas_de_tabla(tbl):
+    """
+    Genera, por cada ``w:tr`` de la tabla, la lista de ``w:tc`` de cada
+    columna de la grilla, igual que ``row.cells`` (sin las columnas de
+    ``gridBefore``). Una celda combinada aparece una vez por columna que abarca
+    y las continuaciones verticales apuntan al ``w:tc`` que tiene el contenido.
+    """
+    grilla_anterior = {}
+    for tr in tbl.iterchildren(W_TR):
+        grilla = {}
+        celdas = []
+        desplazamiento = tr.grid_before
+        for tc in tr.iterchildren(W_TC):
+            span = tc.grid_span
+            if tc.vMerge == 'continue':
+                # Si no hay celda arriba (XML inconsistente) se usa la propia
+                tc = grilla_anterior.get(desplazamiento, tc)
+            for columna in range(desplazamiento, desplazamiento + span):
+                grilla[columna] = tc
+            # Como row.cells: la celda se repite según su propio gridSpan
+            celdas.extend([tc] * tc.grid_span)
+            desplazamiento += span
+        grilla_anterior = grilla
+        yield celdas
+
+
+def texto_celda(tc):
+    """Mismo texto que ``cell.text`` (párrafos de la celda unidos por saltos de línea)."""
+    return "\n".join(p.text for p in tc.iterchildren(W_P))
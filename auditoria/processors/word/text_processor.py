@@ -1,6 +1,6 @@
-from ..shared.text_replacer import replace_text
+from ..shared.text_replacer import get_replacement_engine, replace_text
 
-def process_standard_text(doc, replacements, config):
+def process_standard_text(doc, replacements, config, ubicaciones=None):
     """
     Procesa el texto estándar en párrafos, encabezados y pies de página preservando estilos.
     Aplica tanto reemplazos directos como regex definidos en el JSON.
@@ -8,22 +8,27 @@ def process_standard_text(doc, replacements, config):
         doc: Documento Word
         replacements: Diccionario de reemplazos simples
         config: Configuración completa del JSON, incluyendo 'patrones_regex'
+        ubicaciones: Nodos con placeholders (utils.placeholder_map); si se
+            indica, solo se procesan esos párrafos del cuerpo
     """
     regex_patterns = config.get("patrones_regex", [])
+    engine = get_replacement_engine(replacements, regex_patterns)
 
-    for paragraph in doc.paragraphs:
-        replace_in_paragraph(paragraph, replacements, regex_patterns)
+    paragraphs = doc.paragraphs if ubicaciones is None else ubicaciones.parrafos
+    for paragraph in paragraphs:
+        replace_in_paragraph(paragraph, engine)
 
     for section in doc.sections:
         for header in section.header.paragraphs:
-            replace_in_paragraph(header, replacements, regex_patterns)
+            replace_in_paragraph(header, engine)
         for footer in section.footer.paragraphs:
-            replace_in_paragraph(footer, replacements, regex_patterns)
+            replace_in_paragraph(footer, engine)
 
 
 def replace_in_paragraph(paragraph, replacements, regex_patterns=None):
     """
     Reemplaza el texto de un párrafo preservando estilos, incluso si los patrones están repartidos en varios runs.
+    ``replacements`` puede ser un diccionario o un ``ReplacementEngine`` ya compilado.
     """
     full_text = paragraph.text
     new_text = replace_text(full_text, replacements, regex_patterns)
@@ -0,0 +1,785 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+from unittest import skipUnless
+from unittest.mock import patch
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from audits.models import Audit
+from users.models import Roles
+from .models import BalanceCuentas, RenderJob
+from .imports import EstadosFinancierosImporter
+from .imports.bulk_writer import BulkWriter
+from .processors.excel.formula_translation import trasladar_formula
+from .processors.excel.label_index import indice_etiquetas
+from .processors.excel.row_expansion import ExpansionFilas
+from .processors.word import process_tables
+from .processors.shared.text_replacer import ReplacementEngine, replace_text
+from .utils.balance_index import BalanceIndex
+from .utils.data_db import get_adjustment_records, get_auxiliary_records, get_balance_data, get_initial_balances
+from .utils.render_cache import CACHE_VERSION, RenderCache, compute_audit_fingerprint
+from .utils.render_jobs import RenderWorkerPool, claim_next_job, enqueue_render, requeue_stale_jobs, run_job
+from .utils.placeholder_map import clear_placeholder_maps, ubicaciones_documento
+from .utils.template_pool import TemplatePool
+from .utils.zip_export import stream_zip
+from .utils.template_index import TemplateIndex
+from .utils.template_manifest import build_manifest, template_manifest, write_manifest
+from .utils.template_fast_path import TEXT_ONLY, STRUCTURAL, classify_template, render_xlsx_text_only
+from docx.oxml.ns import qn
+from openpyxl import Workbook, load_workbook
+
+User = get_user_model()
+
+
+class AuditoriaTestCase(TestCase):
+    def setUp(self) -> None:
+        role, _ = Roles.objects.get_or_create(name="audit_manager", verbose_name="Jefe de Auditoría")
+        self.audit_manager = User.objects.create_user(
+            username="audit_manager",
+            first_name="audit_manager",
+            last_name="audit_manager",
+            email="audit_manager@gmail.com",
+            password="123",
+            role=role,
+        )
+        self.audit = Audit.objects.create(
+            title="Auditoría", identidad="Entidad", audit_manager=self.audit_manager
+        )
+
+
+class RenderCacheTestCase(AuditoriaTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = RenderCache(self.cache_dir, max_bytes=1024)
+        fd, self.template_path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.remove(self.template_path)
+
+    def test_fingerprint_changes_when_financial_rows_change(self):
+        before = compute_audit_fingerprint(self.audit)
+        self.assertEqual(before, compute_audit_fingerprint(self.audit))
+
+        BalanceCuentas.objects.create(
+            audit=self.audit,
+            tipo_balance="ANUAL",
+            fecha_corte=date(2024, 12, 31),
+            seccion="Activo",
+            nombre_cuenta="Caja",
+            valor=100,
+        )
+        self.assertNotEqual(before, compute_audit_fingerprint(self.audit))
+
+    def test_repeat_render_is_served_from_cache(self):
+        calls = []
+
+        def render():
+            calls.append(1)
+            return b"contenido"
+
+        data, from_cache = self.cache.get_or_render(self.template_path, self.audit, render)
+        self.assertEqual((data, from_cache), (b"contenido", False))
+        data, from_cache = self.cache.get_or_render(self.template_path, self.audit, render)
+        self.assertEqual((data, from_cache), (b"contenido", True))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_key_changes_with_config_and_cache_version(self):
+        key = RenderCache.build_key(self.template_path, "huella")
+        self.assertEqual(key, RenderCache.build_key(self.template_path, "huella"))
+
+        with patch("auditoria.utils.render_cache.config_fingerprint", return_value="otra configuración"):
+            self.assertNotEqual(key, RenderCache.build_key(self.template_path, "huella"))
+        with patch("auditoria.utils.render_cache.CACHE_VERSION", CACHE_VERSION + 1):
+            self.assertNotEqual(key, RenderCache.build_key(self.template_path, "huella"))
+
+    def test_cache_evicts_least_recently_used_entries(self):
+        self.cache.set("a", b"x" * 600)
+        os.utime(os.path.join(self.cache_dir, "a.bin"), (0, 0))
+        self.cache.set("b", b"x" * 600)
+
+        self.assertIsNone(self.cache.get("a"))
+        self.assertIsNotNone(self.cache.get("b"))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+
+class TemplatePoolTestCase(TestCase):
+    def setUp(self) -> None:
+        self.pool = TemplatePool()
+        fd, self.template_path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        wb = Workbook()
+        wb.active["A1"] = "[ENTIDAD]"
+        wb.save(self.template_path)
+
+    def tearDown(self) -> None:
+        os.remove(self.template_path)
+
+    def test_pool_returns_independent_copies(self):
+        first = self.pool.get_workbook(self.template_path)
+        first.active["A1"] = "Entidad modificada"
+        second = self.pool.get_workbook(self.template_path)
+
+        self.assertEqual(second.active["A1"].value, "[ENTIDAD]")
+        self.assertEqual(self.pool.stats()["hits"], 1)
+
+    def test_pool_reloads_template_when_mtime_changes(self):
+        self.pool.get_workbook(self.template_path)
+        wb = Workbook()
+        wb.active["A1"] = "[FECHA_FIN]"
+        wb.save(self.template_path)
+        os.utime(self.template_path, (0, 0))
+
+        self.assertEqual(self.pool.get_workbook(self.template_path).active["A1"].value, "[FECHA_FIN]")
+        self.assertEqual(self.pool.stats()["misses"], 2)
+
+
+class BalanceIndexTestCase(TestCase):
+    def setUp(self) -> None:
+        registros = [
+            ("SEMESTRAL", "2024-06-30", "Activo", "Caja", "Corriente", 10.0),
+            ("SEMESTRAL", "2023-12-31", "Activo", "Caja", "Corriente", 5.0),
+            ("SEMESTRAL", "2024-06-30", "Pasivo", "Préstamos", "No Corriente", 7.0),
+            ("ANUAL", "2024-12-31", "Activo", "Caja", "NT", 12.0),
+        ]
+        self.index = BalanceIndex.from_records(
+            {
+                "tipo_balance": tipo, "fecha_corte": fecha, "seccion": seccion,
+                "nombre_cuenta": cuenta, "tipo_cuenta": tipo_cuenta, "valor": valor,
+            }
+            for tipo, fecha, seccion, cuenta, tipo_cuenta, valor in registros
+        )
+
+    def test_index_keeps_legacy_keys(self):
+        self.assertEqual(self.index["SEMESTRAL-2024-06-30-Activo-Caja-Corriente"], 10.0)
+        self.assertEqual(list(self.index)[0], "SEMESTRAL-2024-06-30-Activo-Caja-Corriente")
+        self.assertEqual(len(self.index), 4)
+
+    def test_structured_lookups(self):
+        self.assertEqual(self.index.fechas("SEMESTRAL"), ["2023-12-31", "2024-06-30"])
+        self.assertEqual(self.index.cuentas("SEMESTRAL", "2024-06-30", "Pasivo"), {"Préstamos": 7.0})
+        self.assertEqual(self.index.valor("ANUAL", "2024-12-31", "Activo", "Caja"), 12.0)
+
+    def test_normalized_index_matches_legacy_normalization(self):
+        from .processors.excel.sheet_processor.normalizar_balances import normalizar_balances
+
+        legacy = normalizar_balances(dict(self.index.items()))
+        normalizado = normalizar_balances(self.index)
+        self.assertEqual(list(normalizado.items()), list(legacy.items()))
+        self.assertEqual(normalizado.cuentas("SEMESTRAL", "2024-06-30", "Activo"), {"Caja": 10.0})
+        self.assertEqual(BalanceIndex.from_mapping(legacy).fechas("ANUAL"), ["2024-12-31"])
+
+
+class ReplacementEngineTestCase(TestCase):
+    def setUp(self) -> None:
+        self.replacements = {
+            "[ENTIDAD_COMPLETA]": "Entidad: ACME",
+            "Entidad: ": "Entidad: ",
+            "[AUDITOR]": "Ana",
+        }
+        self.regex_patterns = [{"pattern": r"auditor:\s*$", "reemplazar_por": "[AUDITOR]"}]
+        self.engine = ReplacementEngine(self.replacements, self.regex_patterns)
+
+    def test_engine_matches_sequential_replacements(self):
+        for text in ["[ENTIDAD_COMPLETA]", "Sin marcadores", "Auditor: ", "[AUDITOR] - [ENTIDAD_COMPLETA]"]:
+            esperado = text
+            for key, value in self.replacements.items():
+                esperado = esperado.replace(key, value)
+            if esperado.lower().endswith("auditor: "):
+                esperado = esperado[:-len("Auditor: ")] + "Ana"
+            self.assertEqual(self.engine.replace(text), esperado)
+            self.assertEqual(replace_text(text, self.replacements, self.regex_patterns), esperado)
+
+    def test_replace_count_reports_simple_hits(self):
+        self.assertEqual(self.engine.replace_count("[AUDITOR] y [AUDITOR]"), ("Ana y Ana", 2))
+        self.assertEqual(self.engine.replace_count("nada"), ("nada", 0))
+
+
+class TemplateIndexTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.mkdtemp()
+        self.carpeta = os.path.join(self.tmp_dir, "static", "templates_base_financiera", "1 PLANIFICACIÓN", "Sub")
+        os.makedirs(self.carpeta)
+        self._crear("Programa de Auditoría.docx")
+        self.settings_override = override_settings(BASE_DIR=self.tmp_dir)
+        self.settings_override.enable()
+        self.index = TemplateIndex(check_seconds=0)
+
+    def tearDown(self) -> None:
+        self.settings_override.disable()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _crear(self, nombre):
+        path = os.path.join(self.carpeta, nombre)
+        open(path, "wb").close()
+        return path
+
+    def test_resolves_accent_and_case_insensitive(self):
+        path = os.path.join(self.carpeta, "Programa de Auditoría.docx")
+
+        self.assertEqual(self.index.resolve("1 PLANIFICACIÓN/Sub", "Programa de Auditoría.docx"), path)
+        self.assertEqual(self.index.resolve("1 planificacion", "PROGRAMA DE AUDITORIA"), path)
+        self.assertIsNone(self.index.resolve("1 planificacion", "Otro.docx"))
+        self.assertIsNone(self.index.resolve("", "Programa de Auditoría.docx"))
+
+    def test_refreshes_when_folder_changes_and_reports_collisions(self):
+        self.assertIsNone(self.index.resolve("1 planificacion/sub", "nuevo.xlsx"))
+        path = self._crear("Nuevo.xlsx")
+        self._crear("NUEVO.docx")
+        os.utime(self.carpeta, ns=(0, 0))
+
+        self.assertEqual(self.index.resolve("1 planificacion/sub", "nuevo.xlsx"), path)
+        self.assertEqual(
+            [(carpeta, clave) for carpeta, clave, _ in self.index.collisions()],
+            [(os.path.join("1 PLANIFICACIÓN", "Sub"), "nuevo")],
+        )
+
+
+class TemplateManifestTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            TEMPLATE_MANIFEST_PATH=os.path.join(self.tmp_dir, "manifest.json")
+        )
+        self.settings_override.enable()
+        self.path = os.path.join(self.tmp_dir, "2 SUMARIA INVENTARIOS.xlsx")
+        wb = Workbook()
+        wb.active.title = "Sumaria"
+        wb.active["A1"] = "Entidad: XXXXXXX"
+        wb.active["B3"] = "CEDULA SUMARIA"
+        wb.active["E5"] = "Saldos s/ Balance"
+        wb.active["B6"] = "Cuenta"
+        wb.create_sheet("Notas")["A1"] = "Sin placeholders"
+        wb.save(self.path)
+
+    def tearDown(self) -> None:
+        self.settings_override.disable()
+        template_manifest.clear()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_records_processor_sheets_and_anchors(self):
+        write_manifest(build_manifest([self.path]))
+        entrada = template_manifest.entry(self.path)
+
+        self.assertEqual(entrada["procesador"], "sumaria")
+        self.assertEqual(entrada["cuenta"], "Inventarios")
+        self.assertEqual(entrada["hojas_con_reemplazos"], ["Sumaria"])
+        self.assertEqual(entrada["anclas"]["Sumaria"]["fila_titulo"], 3)
+        self.assertEqual(entrada["anclas"]["Sumaria"]["columnas_fechas"], [5])
+
+    def test_changed_template_is_ignored(self):
+        write_manifest(build_manifest([self.path]))
+        with open(self.path, "ab") as f:
+            f.write(b"\0")
+
+        self.assertIsNone(template_manifest.entry(self.path))
+
+
+class ExpansionFilasTestCase(TestCase):
+    def setUp(self) -> None:
+        wb = Workbook()
+        self.sheet = wb.active
+        self.sheet["B5"] = "Modelo"
+        self.sheet["B5"].font = self.sheet["B5"].font.copy(bold=True)
+        self.sheet["E5"] = "=E5*$E$2"
+        self.sheet["B6"] = "Suma"
+        self.sheet["B10"] = "Otra sección"
+        self.sheet["B12"] = "Suma otra"
+        self.sheet.merge_cells("B5:D5")
+        self.sheet.merge_cells("F4:F7")
+        self.sheet.merge_cells("B12:D12")
+
+    def test_several_insertions_shift_once(self):
+        expansion = ExpansionFilas(self.sheet)
+        expansion.insertar(6, 2, fila_modelo=5, combinar=True, copiar_formulas=True)
+        expansion.insertar(12, 3)
+        expansion.aplicar()
+
+        self.assertEqual(self.sheet["B8"].value, "Suma")
+        self.assertEqual(self.sheet["B12"].value, "Otra sección")
+        self.assertEqual(self.sheet["B17"].value, "Suma otra")
+        self.assertEqual((expansion.fila(6), expansion.fila(12)), (8, 17))
+        self.assertEqual(list(expansion.filas_nuevas(12)), [14, 15, 16])
+        # Estilo, fórmula y combinación de la fila modelo
+        self.assertTrue(self.sheet["B7"].font.b)
+        self.assertEqual(self.sheet["E7"].value, "=E7*$E$2")
+        rangos = sorted(str(rango) for rango in self.sheet.merged_cells.ranges)
+        # F4:F7 contiene la inserción y se extiende; B12:D12 solo se desplaza
+        self.assertEqual(rangos, ["B17:D17", "B5:D5", "B6:D6", "B7:D7", "F4:F9"])
+
+
+class IndiceEtiquetasTestCase(TestCase):
+    def setUp(self) -> None:
+        self.sheet = Workbook().active
+        self.sheet["B3"] = "Suma Activo"
+        self.sheet["B9"] = "Suma Pasivo y Patrimonio"
+        self.sheet["D2"] = "CUENTA"
+
+    def test_lookups_are_case_insensitive_and_bounded(self):
+        indice = indice_etiquetas(self.sheet)
+        self.assertEqual(indice.primera("suma"), (3, 2))
+        self.assertEqual(indice.buscar("SUMA", columnas=(2,)), [(3, 2), (9, 2)])
+        self.assertEqual(indice.primera("cuenta", filas=range(1, 2)), None)
+        self.assertEqual(indice.primera("cuenta", exacto=True), (2, 4))
+
+    def test_index_follows_insertions_and_writes(self):
+        indice = indice_etiquetas(self.sheet)
+        self.assertEqual(indice.primera("suma pasivo"), (9, 2))
+        expansion = ExpansionFilas(self.sheet)
+        expansion.insertar(4, 5)
+        expansion.aplicar()
+        self.assertEqual(indice.primera("suma pasivo"), (14, 2))
+
+        self.sheet["B3"] = "Otro"
+        self.assertEqual(indice.primera("suma activo"), None)
+        indice.actualizar(self.sheet["B3"])
+        self.assertEqual(indice.primera("otro"), (3, 2))
+
+
+class FormulaTranslationTestCase(TestCase):
+    def test_relative_rows_move_and_absolute_rows_stay(self):
+        self.assertEqual(trasladar_formula("=D34-C34", 3), "=D37-C37")
+        self.assertEqual(trasladar_formula("=SUM($A$1:B2, C$3)*2", 2), "=SUM($A$1:B4, C$3)*2")
+        self.assertEqual(trasladar_formula("='Hoja 2'!A1+SUM(1:2)", 1), "='Hoja 2'!A2+SUM(2:3)")
+
+    def test_text_and_names_are_not_touched(self):
+        self.assertEqual(trasladar_formula('=IF(A1>0,"A1",Tabla1[#All])', 1), '=IF(A2>0,"A1",Tabla1[#All])')
+        self.assertEqual(trasladar_formula("=TASA2024*A1", 1), "=TASA2024*A2")
+        self.assertEqual(trasladar_formula("sin formula A1", 1), "sin formula A1")
+
+
+class ProcessTablesTestCase(TestCase):
+    tables_config = {
+        "patrones": [{"buscar": "Entidad:", "valor": "[IDENTIDAD]"}],
+        "patrones_regex": [{"pattern": "Auditoría:[^\n]*", "reemplazar_por": "[AUDITORIA_COMPLETA]"}],
+    }
+    replacements = {"[IDENTIDAD]": "Empresa SA", "[AUDITORIA_COMPLETA]": "Auditoría: Anual 2024"}
+
+    def _documento(self):
+        import docx
+        doc = docx.Document()
+        table = doc.add_table(rows=2, cols=3)
+        table.cell(0, 0).text = "Entidad:"
+        # Celda combinada horizontalmente: row.cells la repite en dos columnas
+        combinada = table.cell(1, 0).merge(table.cell(1, 1))
+        combinada.text = "Auditoría: XXX"
+        return doc, table
+
+    def test_adjacent_and_regex_replacements(self):
+        doc, table = self._documento()
+        process_tables(doc, self.replacements, self.tables_config, "Cedula.docx")
+        self.assertEqual(table.cell(0, 1).text, "Empresa SA")
+        self.assertEqual(table.cell(1, 0).text, "Auditoría: Anual 2024")
+
+    def test_merged_cells_are_processed_once(self):
+        doc, table = self._documento()
+        combinada = table.cell(1, 0)
+        combinada.text = "Entidad: XXX"
+        # El reemplazo no es idempotente: procesar la celda dos veces duplicaría el nombre
+        replacements = dict(self.replacements, **{"Entidad: ": "Entidad: Empresa SA"})
+        process_tables(doc, replacements, self.tables_config, "Cedula.docx")
+        self.assertEqual(combinada.text, "Entidad: Empresa SAXXX")
+
+
+class HyperlinkProcessorTestCase(TestCase):
+    def test_references_are_linked_without_merging_other_runs(self):
+        import docx
+        from .processors.word.table_processor.hyperlink_processor import apply_hyperlinks_to_document
+
+        doc = docx.Document()
+        paragraph = doc.add_paragraph()
+        paragraph.add_run("Ver ").bold = True
+        paragraph.add_run("A-2 y A-")
+        paragraph.add_run("10, A-2, A-99 y A-01")
+        apply_hyperlinks_to_document(doc, 7, "1 programa.docx", None, {"prefix": "A", "max_range": 18})
+
+        enlaces = paragraph._p.findall(qn('w:hyperlink'))
+        self.assertEqual(["".join(t.text for t in h.iter(qn('w:t'))) for h in enlaces], ["A-2", "A-10"])
+        self.assertEqual(paragraph.text, "Ver A-2 y A-10, A-2, A-99 y A-01")
+        # El run sin referencias conserva su formato
+        self.assertTrue(paragraph.runs[0].bold)
+        urls = sorted(rel.target_ref for rel in doc.part.rels.values() if rel.is_external)
+        self.assertEqual(urls, [f"{settings.BASE_URL}/auditoria/download/7/A-10", f"{settings.BASE_URL}/auditoria/download/7/A-2"])
+
+
+class PlaceholderMapTestCase(TestCase):
+    replacements = {"[ENTIDAD]": "Empresa SA", "[IDENTIDAD]": "Empresa SA", "Entidad: ": "Entidad: Empresa SA"}
+    tables_config = {"patrones": [{"buscar": "Entidad:", "valor": "[IDENTIDAD]"}], "patrones_regex": []}
+
+    def setUp(self):
+        import docx
+        clear_placeholder_maps()
+        self.tmpdir = tempfile.mkdtemp()
+        carpeta = os.path.join(self.tmpdir, "6 AUDITORIA DE PROCESOS", "6 Legal")
+        os.makedirs(carpeta)
+        self.path = os.path.join(carpeta, "4 Programa de Auditoría.docx")
+        doc = docx.Document()
+        doc.add_paragraph("Sin placeholders")
+        doc.add_paragraph("Cliente: [ENTIDAD], ver M-2")
+        table = doc.add_table(rows=2, cols=2)
+        table.cell(0, 0).text = "Entidad: [ENTIDAD]"
+        table.cell(1, 0).text = "Ref. M-3"
+        table.cell(1, 1).text = "Otro texto"
+        doc.save(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        clear_placeholder_maps()
+
+    def _render(self, usar_mapa):
+        import docx
+        from .processors.word import process_standard_text
+
+        doc = docx.Document(self.path)
+        ubicaciones = None
+        if usar_mapa:
+            ubicaciones = ubicaciones_documento(doc, self.path, self.replacements, {}, self.tables_config)
+            self.assertIsNotNone(ubicaciones)
+        process_standard_text(doc, self.replacements, {}, ubicaciones)
+        process_tables(doc, self.replacements, self.tables_config, os.path.basename(self.path),
+                       self.path, 1, ubicaciones)
+        return doc
+
+    def test_only_nodes_with_placeholders_are_visited(self):
+        doc = self._render(usar_mapa=True)
+        ubicaciones = ubicaciones_documento(doc, self.path, self.replacements, {}, self.tables_config)
+        self.assertEqual([p.text for p in ubicaciones.parrafos], ["Cliente: Empresa SA, ver M-2"])
+        self.assertEqual(len(ubicaciones.celdas), 1)
+        # Etiqueta, celda que recibe su valor y la referencia M-3; no "Otro texto"
+        self.assertEqual(len(ubicaciones.enlaces_celdas), 3)
+        self.assertEqual(doc.element.body.xml, self._render(usar_mapa=False).element.body.xml)
+
+    def test_map_is_rebuilt_when_template_changes(self):
+        import docx
+        self._render(usar_mapa=True)
+        doc = docx.Document(self.path)
+        doc.paragraphs[0].text = "Ahora con [ENTIDAD]"
+        doc.save(self.path)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        ubicaciones = ubicaciones_documento(docx.Document(self.path), self.path, self.replacements, {}, self.tables_config)
+        self.assertEqual([p.text for p in ubicaciones.parrafos], ["Ahora con [ENTIDAD]", "Cliente: [ENTIDAD], ver M-2"])
+
+
+class TemplateFastPathTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.mkdtemp()
+        self.engine = ReplacementEngine({"[ENTIDAD]": "ACME S.A."})
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _template(self, name, formula="=SUM(B1:B2)"):
+        path = os.path.join(self.tmp_dir, name)
+        wb = Workbook()
+        wb.active["A1"] = "  Entidad: [ENTIDAD]  "
+        wb.active["A2"] = "Sin cambios  "
+        wb.active["B3"] = formula
+        wb.save(path)
+        return path
+
+    def test_classifies_by_structural_processor(self):
+        self.assertEqual(classify_template(self._template("PLAN.xlsx")), TEXT_ONLY)
+        self.assertEqual(classify_template(self._template("8 MATERIALIDAD.xlsx")), STRUCTURAL)
+
+    def test_rewrites_shared_strings_only(self):
+        data = render_xlsx_text_only(self._template("PLAN.xlsx"), self.engine)
+        ws = load_workbook(io.BytesIO(data)).active
+
+        self.assertEqual(ws["A1"].value, "Entidad: ACME S.A.")
+        self.assertEqual(ws["A2"].value, "Sin cambios  ")
+        self.assertEqual(ws["B3"].value, "=SUM(B1:B2)")
+
+    def test_placeholder_in_formula_needs_full_path(self):
+        path = self._template("PLAN.xlsx", formula='=CONCAT("[ENTIDAD]", A2)')
+        self.assertIsNone(render_xlsx_text_only(path, self.engine))
+
+
+class EstadosFinancierosImporterTestCase(AuditoriaTestCase):
+    def _upload(self, caja_actual=150, incluir_inversiones=True):
+        wb = Workbook()
+        anual = wb.active
+        anual.title = "ESTADOS FINANCIEROS ANUAL"
+        anual.append(["CUENTA", "Fecha corte año anterior", "Fecha corte año actual"])
+        anual.append(["Activo", "Al 31/12/2023", "Al 31/12/2024"])
+        anual.append(["Caja", 100, caja_actual, "C"])
+        if incluir_inversiones:
+            anual.append(["Inversiones", 200, None, "NC"])
+        anual.append(["TOTAL ACTIVO", 300, 150])
+        auxiliar = wb.create_sheet("REGISTROS AUXILIARES")
+        auxiliar.append([None, "Cuenta", "Saldo"])
+        auxiliar.append([None, "Caja", 150])
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        buffer.seek(0)
+        return buffer
+
+    def test_import_writes_rows_in_bulk_and_reports_stats(self):
+        importer = EstadosFinancierosImporter(self._upload(), self.audit.id)
+        self.assertTrue(importer.validate_file())
+        success, _ = importer.process_file()
+
+        self.assertTrue(success)
+        self.assertEqual(
+            sorted(BalanceCuentas.objects.filter(audit=self.audit).values_list("nombre_cuenta", "tipo_cuenta", "valor")),
+            [("Caja", "Corriente", 100), ("Caja", "Corriente", 150), ("Inversiones", "No Corriente", 200)],
+        )
+        self.assertEqual(importer.stats["sheets"]["ESTADOS FINANCIEROS ANUAL"]["rows"], 3)
+        self.assertEqual(importer.stats["sheets"]["REGISTROS AUXILIARES"]["rows"], 1)
+        self.assertEqual(importer.stats["rows"], 4)
+        self.assertGreater(importer.stats["rows_per_second"], 0)
+
+    def test_reimport_only_applies_changes(self):
+        EstadosFinancierosImporter(self._upload(), self.audit.id).process_file()
+
+        importer = EstadosFinancierosImporter(self._upload(), self.audit.id)
+        importer.process_file()
+        self.assertEqual(BalanceCuentas.objects.filter(audit=self.audit).count(), 3)
+        self.assertEqual(importer.stats["changes"], {"created": 0, "updated": 0, "deleted": 0, "unchanged": 4})
+
+        importer = EstadosFinancierosImporter(self._upload(caja_actual=175, incluir_inversiones=False), self.audit.id)
+        success, message = importer.process_file()
+        self.assertTrue(success)
+        self.assertEqual(importer.stats["changes"], {"created": 0, "updated": 1, "deleted": 1, "unchanged": 2})
+        self.assertIn("1 actualizadas", message)
+        self.assertEqual(
+            sorted(BalanceCuentas.objects.filter(audit=self.audit).values_list("valor", flat=True)),
+            [100, 175],
+        )
+
+    def test_same_account_as_current_and_non_current_keeps_both_rows(self):
+        upload = self._upload(incluir_inversiones=False)
+        wb = load_workbook(upload)
+        wb["ESTADOS FINANCIEROS ANUAL"].insert_rows(4)
+        for column, value in enumerate(["Caja", 40, 60, "NC"], start=1):
+            wb["ESTADOS FINANCIEROS ANUAL"].cell(row=4, column=column, value=value)
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        buffer.seek(0)
+
+        success, _ = EstadosFinancierosImporter(buffer, self.audit.id).process_file()
+
+        self.assertTrue(success)
+        self.assertEqual(
+            sorted(BalanceCuentas.objects.filter(audit=self.audit).values_list("tipo_cuenta", "valor")),
+            [("Corriente", 100), ("Corriente", 150), ("No Corriente", 40), ("No Corriente", 60)],
+        )
+
+    def test_sync_treats_blank_account_type_as_none(self):
+        fila = dict(audit=self.audit, tipo_balance="ANUAL", fecha_corte=date(2024, 12, 31),
+                    seccion="Activo", nombre_cuenta="Caja")
+        BalanceCuentas.objects.create(tipo_cuenta=None, valor=100, **fila)
+
+        writer = BulkWriter()
+        writer.add(BalanceCuentas(tipo_cuenta="", valor=150, **fila))
+        changes = writer.sync(self.audit.id, {BalanceCuentas: {"tipo_balance": "ANUAL"}})
+
+        self.assertEqual(changes, {"created": 0, "updated": 1, "deleted": 0, "unchanged": 0})
+        self.assertEqual(list(BalanceCuentas.objects.filter(audit=self.audit).values_list("valor", flat=True)), [150])
+
+    def test_repeated_account_rejects_the_file(self):
+        EstadosFinancierosImporter(self._upload(), self.audit.id).process_file()
+        upload = self._upload(caja_actual=175)
+        wb = load_workbook(upload)
+        wb["REGISTROS AUXILIARES"].append([None, "Caja", 10])
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        buffer.seek(0)
+
+        success, message = EstadosFinancierosImporter(buffer, self.audit.id).process_file()
+
+        self.assertFalse(success)
+        self.assertIn("cuenta=Caja (2 veces)", message)
+        # No se aplica nada del archivo, tampoco la hoja anual ya sincronizada
+        self.assertEqual(
+            sorted(BalanceCuentas.objects.filter(audit=self.audit).values_list("valor", flat=True)),
+            [100, 150, 200],
+        )
+
+
+class FinancialQueriesTestCase(AuditoriaTestCase):
+    @skipUnless(connection.vendor == "sqlite", "el formato del plan es el de SQLite")
+    def test_fetches_are_sorted_by_their_index(self):
+        for datos in (get_balance_data, get_auxiliary_records, get_initial_balances, get_adjustment_records):
+            queryset = next(iter(datos(self.audit.id).values()))
+            with self.subTest(datos.__name__):
+                plan = queryset.explain()
+                self.assertIn("USING INDEX", plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+
+
+class RenderJobQueueTestCase(AuditoriaTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.jobs_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(RENDER_JOBS_DIR=self.jobs_dir, RENDER_JOBS_IN_PROCESS=False)
+        self.settings_override.enable()
+
+    def tearDown(self) -> None:
+        self.settings_override.disable()
+        shutil.rmtree(self.jobs_dir, ignore_errors=True)
+
+    def test_enqueue_reuses_active_job(self):
+        first = enqueue_render(self.audit, "/tmp/plantilla.xlsx", "plantilla.xlsx", user=self.audit_manager)
+        second = enqueue_render(self.audit, "/tmp/plantilla.xlsx", "plantilla.xlsx", user=self.audit_manager)
+
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(claim_next_job("w1").id, first.id)
+        self.assertIsNone(claim_next_job("w2"))
+
+    def test_enqueue_does_not_share_jobs_between_users(self):
+        other_user = User.objects.create_user(username="auditor", email="auditor@gmail.com", password="123")
+        first = enqueue_render(self.audit, "/tmp/plantilla.xlsx", "plantilla.xlsx", user=self.audit_manager)
+        second = enqueue_render(self.audit, "/tmp/plantilla.xlsx", "plantilla.xlsx", user=other_user)
+
+        self.assertNotEqual(first.id, second.id)
+        self.assertEqual(second.user, other_user)
+
+    def test_worker_pool_purges_finished_jobs(self):
+        job = enqueue_render(self.audit, "/tmp/plantilla.xlsx", "plantilla.xlsx")
+        job = run_job(claim_next_job("w1"), render=lambda *args: (b"contenido", "MISS"))
+        RenderJob.objects.filter(id=job.id).update(finalizado=job.finalizado - timedelta(days=2))
+
+        pool = RenderWorkerPool(concurrency=1)
+        pool.purge_if_due()
+        self.assertFalse(RenderJob.objects.filter(id=job.id).exists())
+        self.assertFalse(os.path.exists(job.resultado))
+
+        # Hasta el siguiente intervalo no se vuelve a consultar
+        with self.assertNumQueries(0):
+            pool.purge_if_due()
+
+    def test_failed_render_is_retried_then_completed(self):
+        job = enqueue_render(self.audit, "/tmp/plantilla.xlsx", "plantilla.xlsx")
+        calls = []
+
+        def render(template_path, filename, audit):
+            calls.append(1)
+            if len(calls) == 1:
+                raise ValueError("plantilla dañada")
+            return b"contenido", "MISS"
+
+        job = run_job(claim_next_job("w1"), render=render)
+        self.assertEqual((job.estado, job.intentos, job.error), (RenderJob.PENDIENTE, 1, "plantilla dañada"))
+
+        RenderJob.objects.filter(id=job.id).update(disponible_desde=job.creado)
+        job = run_job(claim_next_job("w1"), render=render)
+        self.assertEqual(job.estado, RenderJob.COMPLETADO)
+        self.assertIsNotNone(job.segundos_render)
+        with open(job.resultado, "rb") as f:
+            self.assertEqual(f.read(), b"contenido")
+
+    def test_stale_worker_does_not_overwrite_requeued_job(self):
+        job = enqueue_render(self.audit, "/tmp/plantilla.xlsx", "plantilla.xlsx")
+
+        def render(template_path, filename, audit):
+            # Mientras w1 genera, el trabajo se vence y lo toma w2
+            RenderJob.objects.filter(id=job.id).update(iniciado=timezone.now() - timedelta(days=1))
+            requeue_stale_jobs()
+            claim_next_job("w2")
+            return b"contenido", "MISS"
+
+        job = run_job(claim_next_job("w1"), render=render)
+
+        self.assertEqual((job.estado, job.worker, job.intentos, job.resultado), (RenderJob.EN_PROCESO, "w2", 1, ""))
+        self.assertEqual(os.listdir(self.jobs_dir), [])
+
+    def test_render_gives_up_after_max_attempts(self):
+        job = enqueue_render(self.audit, "/tmp/plantilla.xlsx", "plantilla.xlsx")
+        RenderJob.objects.filter(id=job.id).update(max_intentos=1)
+
+        def render(template_path, filename, audit):
+            raise ValueError("sin memoria")
+
+        job = run_job(claim_next_job("w1"), render=render)
+        self.assertEqual(job.estado, RenderJob.FALLIDO)
+        self.assertIsNotNone(job.finalizado)
+
+
+@override_settings(RENDER_CACHE_ENABLED=False)
+class ZipExportTestCase(AuditoriaTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_streams_rendered_files_and_lists_errors(self):
+        path = os.path.join(self.tmp_dir, "PLAN.xlsx")
+        wb = Workbook()
+        wb.active["A1"] = "[IDENTIDAD]"
+        wb.save(path)
+        archivos = [
+            ("1 PLANIFICACION/PLAN.xlsx", path, "PLAN.xlsx"),
+            ("1 PLANIFICACION/FALTA.xlsx", os.path.join(self.tmp_dir, "FALTA.xlsx"), "FALTA.xlsx"),
+        ]
+
+        data = b"".join(stream_zip(self.audit, archivos, workers=1))
+
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            self.assertEqual(zf.namelist(), ["1 PLANIFICACION/PLAN.xlsx", "ERRORES.txt"])
+            self.assertIn("FALTA.xlsx", zf.read("ERRORES.txt").decode())
+            ws = load_workbook(io.BytesIO(zf.read("1 PLANIFICACION/PLAN.xlsx"))).active
+        self.assertEqual(ws["A1"].value, "Entidad")
+
+    def test_broken_pool_falls_back_to_current_process(self):
+        path = os.path.join(self.tmp_dir, "PLAN.xlsx")
+        wb = Workbook()
+        wb.active["A1"] = "[IDENTIDAD]"
+        wb.save(path)
+        archivos = [(f"{i}/PLAN.xlsx", path, "PLAN.xlsx") for i in range(3)]
+
+        class PoolRoto:
+            cerrado = False
+
+            def submit(self, *args):
+                futuro = Future()
+                futuro.set_exception(BrokenProcessPool())
+                return futuro
+
+            def shutdown(self, **kwargs):
+                self.cerrado = True
+
+        pool = PoolRoto()
+        with patch("auditoria.utils.zip_export._get_pool", return_value=pool):
+            data = b"".join(stream_zip(self.audit, archivos, workers=2))
+
+        self.assertTrue(pool.cerrado)
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            self.assertEqual(sorted(zf.namelist()), [arcname for arcname, _, _ in archivos])
+            for arcname, _, _ in archivos:
+                self.assertEqual(load_workbook(io.BytesIO(zf.read(arcname))).active["A1"].value, "Entidad")
+
+    def test_concurrent_exports_keep_their_own_audit(self):
+        path = os.path.join(self.tmp_dir, "PLAN.xlsx")
+        wb = Workbook()
+        wb.active["A1"] = "[IDENTIDAD]"
+        wb.save(path)
+        other = Audit.objects.create(title="Otra", identidad="Otra entidad", audit_manager=self.audit_manager)
+        archivos = [("1/PLAN.xlsx", path, "PLAN.xlsx"), ("2/PLAN.xlsx", path, "PLAN.xlsx")]
+
+        # Otra exportación completa entre el primer y el segundo archivo de la primera
+        first = stream_zip(self.audit, archivos, workers=1)
+        first_data = next(first)
+        second_data = b"".join(stream_zip(other, archivos, workers=1))
+        first_data += b"".join(first)
+
+        for data, identidad in ((first_data, "Entidad"), (second_data, "Otra entidad")):
+            with zipfile.ZipFile(io.BytesIO(data)) as zf:
+                for arcname in ("1/PLAN.xlsx", "2/PLAN.xlsx"):
+                    ws = load_workbook(io.BytesIO(zf.read(arcname))).active
+                    self.assertEqual(ws["A1"].value, identidad)
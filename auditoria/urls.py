@@ -9,7 +9,11 @@ urlpatterns = [
     path('interna/', views.auditoria_interna_view, name='auditoria_interna'),
     path('detalle/<int:audit_id>/', views.auditoria_detalle_view, name='auditoria_detalle'),
     path('download/<int:audit_id>/<path:folder>/<str:filename>/', views.download_document, name='download_document'),
+    path('download/<int:audit_id>/zip/', views.download_audit_zip, name='download_audit_zip'),
     path('download/<int:audit_id>/<str:pattern>/', views.download_document_by_pattern, name='download_document_by_pattern'),
+    path('cache/estadisticas/', views.render_cache_stats, name='render_cache_stats'),
+    path('trabajos/<int:job_id>/', views.render_job_status, name='render_job_status'),
+    path('trabajos/<int:job_id>/descargar/', views.render_job_download, name='render_job_download'),
     path('detalle/<int:audit_id>/exportar/<str:tipo>/', export_cuentas_contables, name='export_cuentas_contables'),
     path('auditoria/detalle/<int:audit_id>/importar-cuentas/', importar_cuentas_contables, name='importar_cuentas_contables'),
 ]
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""
+Índice estructurado en memoria de los balances de una auditoría.
+
+Históricamente los balances se aplanaban en claves de texto del tipo
+``SEMESTRAL-2024-06-30-Activo-Caja-No Corriente`` y cada procesador volvía a
+partir o a recorrer con regex el diccionario completo, muchas veces una vez por
+fecha y sección. ``BalanceIndex`` se construye una sola vez por petición y
+guarda cada fila indexada por tipo de balance, fecha de corte y sección, con
+listas de fechas ya ordenadas, de modo que esas consultas son búsquedas
+directas.
+
+Para no romper a los procesadores que todavía trabajan con claves de texto, el
+índice implementa la interfaz de ``Mapping`` sobre las claves heredadas y
+conserva su orden de inserción.
+"""
+
+import re
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, List, Optional
+
+# Sufijos de tipo_cuenta que se eliminan al normalizar (igual que normalizar_balances)
+_TIPO_CUENTA_NORMALIZABLE = re.compile(r'(?:C|NC|NT|CORRIENTE|NO[ -]?CORRIENTE)', re.IGNORECASE)
+
+# Clave heredada: <tipo_balance>-<YYYY-MM-DD>-<seccion>-<cuenta>[-<tipo_cuenta>]
+_CLAVE_HEREDADA = re.compile(r'^([^-]+)-(\d{4}-\d{2}-\d{2})-([^-]+)-(.*)$')
+_SUFIJO_TIPO_CUENTA = re.compile(r'^(.*?)-(C|NC|NT|CORRIENTE|NO[ -]?CORRIENTE)$', re.IGNORECASE)
+
+
+class BalanceEntry:
+    """Fila de balance ya separada en sus componentes."""
+
+    __slots__ = ('tipo_balance', 'fecha_corte', 'seccion', 'cuenta', 'tipo_cuenta', 'valor', 'clave')
+
+    def __init__(self, tipo_balance, fecha_corte, seccion, cuenta, tipo_cuenta, valor, clave=None):
+        self.tipo_balance = tipo_balance
+        self.fecha_corte = fecha_corte
+        self.seccion = seccion
+        self.cuenta = cuenta
+        self.tipo_cuenta = tipo_cuenta
+        self.valor = valor
+        if clave is None:
+            clave = f"{tipo_balance}-{fecha_corte}-{seccion}-{cuenta}"
+            if tipo_cuenta is not None:
+                clave = f"{clave}-{tipo_cuenta}"
+        self.clave = clave
+
+    def __repr__(self):
+        return f"BalanceEntry({self.clave!r}, {self.valor!r})"
+
+
+class BalanceIndex(Mapping):
+    """
+    Índice de balances por tipo de balance, fecha de corte y sección.
+
+    Se comporta como el diccionario ``{clave_heredada: valor}`` que usaban los
+    procesadores y además ofrece consultas directas:
+
+    - ``fechas(tipo_balance)``: fechas de corte ordenadas.
+    - ``cuentas(tipo_balance, fecha_corte, seccion)``: ``{cuenta: valor}``.
+    - ``entradas(tipo_balance, fecha_corte=None)``: filas en orden de inserción.
+    - ``normalizado()``: índice sin sufijos de tipo_cuenta (en caché).
+    """
+
+    __slots__ = ('_entradas', '_valores', '_por_tipo', '_por_fecha', '_grupos', '_fechas', '_normalizado')
+
+    def __init__(self, entradas: Iterable[BalanceEntry] = (), valores_extra: Optional[Dict[str, Any]] = None):
+        # Las claves repetidas conservan su posición original y el último valor,
+        # igual que al asignarlas en un dict
+        unicas: Dict[str, BalanceEntry] = {}
+        for entrada in entradas:
+            unicas[entrada.clave] = entrada
+
+        self._entradas = unicas
+        self._valores: Dict[str, Any] = {clave: entrada.valor for clave, entrada in unicas.items()}
+        if valores_extra:
+            # Claves que no siguen el formato estándar: solo accesibles como Mapping
+            for clave, valor in valores_extra.items():
+                self._valores.setdefault(clave, valor)
+
+        self._por_tipo: Dict[str, List[BalanceEntry]] = {}
+        self._por_fecha: Dict[tuple, List[BalanceEntry]] = {}
+        self._grupos: Dict[tuple, Dict[str, Any]] = {}
+        fechas: Dict[str, set] = {}
+
+        for entrada in unicas.values():
+            tipo, fecha = entrada.tipo_balance, entrada.fecha_corte
+            self._por_tipo.setdefault(tipo, []).append(entrada)
+            self._por_fecha.setdefault((tipo, fecha), []).append(entrada)
+            self._grupos.setdefault((tipo, fecha, entrada.seccion), {})[entrada.cuenta] = entrada.valor
+            if fecha is not None:
+                fechas.setdefault(tipo, set()).add(fecha)
+
+        self._fechas: Dict[str, List[str]] = {tipo: sorted(valores) for tipo, valores in fechas.items()}
+        self._normalizado: Optional['BalanceIndex'] = None
+
+    # ------------------------------------------------------------------
+    #  Construcción
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_records(cls, registros: Iterable[Dict[str, Any]]) -> 'BalanceIndex':
+        """Construye el índice a partir de balances serializados (ver data_db)."""
+        return cls(
+            BalanceEntry(
+                r['tipo_balance'], r['fecha_corte'], r['seccion'],
+                r['nombre_cuenta'], r['tipo_cuenta'], r['valor'],
+            )
+            for r in registros
+        )
+
+    @classmethod
+    def from_mapping(cls, balances: Dict[str, Any]) -> 'BalanceIndex':
+        """Construye el índice a partir de un diccionario con claves heredadas."""
+        entradas = []
+        extra = {}
+        for clave, valor in balances.items():
+            match = _CLAVE_HEREDADA.match(clave)
+            if not match:
+                extra[clave] = valor
+                continue
+            tipo, fecha, seccion, resto = match.groups()
+            sufijo = _SUFIJO_TIPO_CUENTA.match(resto)
+            cuenta, tipo_cuenta = sufijo.groups() if sufijo else (resto, None)
+            entradas.append(BalanceEntry(tipo, fecha, seccion, cuenta, tipo_cuenta, valor, clave))
+        return cls(entradas, extra)
+
+    # ------------------------------------------------------------------
+    #  Interfaz Mapping sobre las claves heredadas
+    # ------------------------------------------------------------------
+
+    def __getitem__(self, clave):
+        return self._valores[clave]
+
+    def __contains__(self, clave):
+        return clave in self._valores
+
+    def __iter__(self):
+        return iter(self._valores)
+
+    def __len__(self):
+        return len(self._valores)
+
+    def keys(self):
+        return self._valores.keys()
+
+    def items(self):
+        return self._valores.items()
+
+    def values(self):
+        return self._valores.values()
+
+    def get(self, clave, default=None):
+        return self._valores.get(clave, default)
+
+    def __repr__(self):
+        return repr(self._valores)
+
+    # ------------------------------------------------------------------
+    #  Consultas estructuradas
+    # ------------------------------------------------------------------
+
+    def fechas(self, tipo_balance: str) -> List[str]:
+        """Fechas de corte (YYYY-MM-DD) del tipo de balance, en orden ascendente."""
+        return list(self._fechas.get(tipo_balance, ()))
+
+    def cuentas(self, tipo_balance: str, fecha_corte: str, seccion: str) -> Dict[str, Any]:
+        """Devuelve ``{cuenta: valor}`` de una sección en una fecha de corte."""
+        return dict(self._grupos.get((tipo_balance, fecha_corte, seccion), ()))
+
+    def valor(self, tipo_balance: str, fecha_corte: str, seccion: str, cuenta: str, default=None):
+        """Valor de una cuenta concreta o ``default`` si no existe."""
+        return self._grupos.get((tipo_balance, fecha_corte, seccion), {}).get(cuenta, default)
+
+    def entradas(self, tipo_balance: str, fecha_corte: Optional[str] = None) -> List[BalanceEntry]:
+        """Filas del tipo de balance (y opcionalmente de una fecha) en orden de inserción."""
+        if fecha_corte is None:
+            return list(self._por_tipo.get(tipo_balance, ()))
+        return list(self._por_fecha.get((tipo_balance, fecha_corte), ()))
+
+    def normalizado(self) -> 'BalanceIndex':
+        """
+        Devuelve el índice sin los sufijos de tipo_cuenta (C, NC, NT, Corriente,
+        No Corriente). Se calcula una sola vez.
+        """
+        if self._normalizado is None:
+            entradas = []
+            for entrada in self._entradas.values():
+                tipo_cuenta = entrada.tipo_cuenta
+                if tipo_cuenta is not None and _TIPO_CUENTA_NORMALIZABLE.fullmatch(tipo_cuenta):
+                    entrada = BalanceEntry(
+                        entrada.tipo_balance, entrada.fecha_corte, entrada.seccion,
+                        entrada.cuenta.rstrip(), None, entrada.valor,
+                    )
+                entradas.append(entrada)
+            extra = {clave: valor for clave, valor in self._valores.items() if clave not in self._entradas}
+            normalizado = BalanceIndex(entradas, extra)
+            # Normalizar dos veces no cambia nada
+            normalizado._normalizado = normalizado
+            self._normalizado = normalizado
+        return self._normalizado
+
+
+def as_balance_index(balances) -> BalanceIndex:
+    """Devuelve *balances* como ``BalanceIndex``, construyéndolo si es un dict."""
+    if isinstance(balances, BalanceIndex):
+        return balances
+    return BalanceIndex.from_mapping(balances or {})
@@ -7,25 +7,32 @@ from auditoria.models import (
     SaldoInicial,
     AjustesReclasificaciones,
 )
+from auditoria.utils.balance_index import BalanceIndex
 
 logger = logging.getLogger(__name__)
 
+# Columnas leídas por cada consulta; se obtienen con values_list para no
+# instanciar modelos. El orden lo da el Meta.ordering de cada modelo, que
+# coincide con su índice compuesto por auditoría o, en BalanceCuentas, con
+# las primeras columnas de su índice único (la última es el tipo de cuenta).
+BALANCE_FIELDS = ('id', 'audit_id', 'tipo_balance', 'fecha_corte', 'seccion', 'nombre_cuenta', 'tipo_cuenta', 'valor')
+REGISTRO_AUXILIAR_FIELDS = ('id', 'audit_id', 'cuenta', 'saldo')
+SALDO_INICIAL_FIELDS = ('id', 'audit_id', 'cuenta', 'saldo', 'fecha_corte')
+AJUSTE_FIELDS = ('nombre_cuenta', 'debe', 'haber')
+
 def get_balance_data(audit_id: int) -> Dict[str, Any]:
     """
     Obtiene los datos de balance para una auditoría específica
     """
     try:
         # Obtener datos de BalanceCuentas
-        balances = BalanceCuentas.objects.filter(audit_id=audit_id)
+        balances = BalanceCuentas.objects.filter(audit_id=audit_id).values_list(*BALANCE_FIELDS, named=True)
         
-        return {
-            'balances': balances,
-            'total_balances': balances.count()
-        }
+        return {'balances': balances}
     except Exception as e:
         logger.error(f"Error al obtener datos de balance: {str(e)}")
         logger.exception(e)
-        return {'balances': [], 'total_balances': 0}
+        return {'balances': []}
 
 def get_auxiliary_records(audit_id: int) -> Dict[str, Any]:
     """
@@ -33,16 +40,13 @@ def get_auxiliary_records(audit_id: int) -> Dict[str, Any]:
     """
     try:
         # Obtener datos de RegistroAuxiliar
-        registros = RegistroAuxiliar.objects.filter(audit_id=audit_id)
+        registros = RegistroAuxiliar.objects.filter(audit_id=audit_id).values_list(*REGISTRO_AUXILIAR_FIELDS, named=True)
         
-        return {
-            'registros': registros,
-            'total_registros': registros.count()
-        }
+        return {'registros': registros}
     except Exception as e:
         logger.error(f"Error al obtener registros auxiliares: {str(e)}")
         logger.exception(e)
-        return {'registros': [], 'total_registros': 0}
+        return {'registros': []}
 
 def get_initial_balances(audit_id: int) -> Dict[str, Any]:
     """
@@ -50,25 +54,22 @@ def get_initial_balances(audit_id: int) -> Dict[str, Any]:
     """
     try:
         # Obtener datos de SaldoInicial
-        saldos = SaldoInicial.objects.filter(audit_id=audit_id)
+        saldos = SaldoInicial.objects.filter(audit_id=audit_id).values_list(*SALDO_INICIAL_FIELDS, named=True)
         
-        return {
-            'saldos': saldos,
-            'total_saldos': saldos.count()
-        }
+        return {'saldos': saldos}
     except Exception as e:
         logger.error(f"Error al obtener saldos iniciales: {str(e)}")
         logger.exception(e)
-        return {'saldos': [], 'total_saldos': 0}
+        return {'saldos': []}
 
 def get_adjustment_records(audit_id: int) -> Dict[str, Any]:
     """Obtiene ajustes y reclasificaciones para la auditoría."""
-    ajustes = AjustesReclasificaciones.objects.filter(audit_id=audit_id)
+    ajustes = AjustesReclasificaciones.objects.filter(audit_id=audit_id).values_list(*AJUSTE_FIELDS, named=True)
     return {'ajustes': ajustes}
 
-def _serialize_balance(balance: BalanceCuentas) -> Dict[str, Any]:
+def _serialize_balance(balance) -> Dict[str, Any]:
     """
-    Serializa un objeto BalanceCuentas a un diccionario
+    Serializa una fila de BalanceCuentas a un diccionario
     """
     return {
         'id': balance.id,
@@ -76,14 +77,14 @@ def _serialize_balance(balance: BalanceCuentas) -> Dict[str, Any]:
         'fecha_corte': balance.fecha_corte.isoformat() if balance.fecha_corte else None,
         'seccion': balance.seccion,
         'nombre_cuenta': balance.nombre_cuenta,
-        'tipo_cuenta': balance.tipo_cuenta if hasattr(balance, 'tipo_cuenta') and balance.tipo_cuenta else 'NT',
+        'tipo_cuenta': balance.tipo_cuenta or 'NT',
         'valor': float(balance.valor) if balance.valor else 0,
         'audit_id': balance.audit_id
     }
 
-def _serialize_registro_auxiliar(registro: RegistroAuxiliar) -> Dict[str, Any]:
+def _serialize_registro_auxiliar(registro) -> Dict[str, Any]:
     """
-    Serializa un objeto RegistroAuxiliar a un diccionario
+    Serializa una fila de RegistroAuxiliar a un diccionario
     """
     return {
         'id': registro.id,
@@ -92,9 +93,9 @@ def _serialize_registro_auxiliar(registro: RegistroAuxiliar) -> Dict[str, Any]:
         'audit_id': registro.audit_id
     }
 
-def _serialize_saldo_inicial(saldo: SaldoInicial) -> Dict[str, Any]:
+def _serialize_saldo_inicial(saldo) -> Dict[str, Any]:
     """
-    Serializa un objeto SaldoInicial a un diccionario
+    Serializa una fila de SaldoInicial a un diccionario
     """
     return {
         'id': saldo.id,
@@ -104,9 +105,9 @@ def _serialize_saldo_inicial(saldo: SaldoInicial) -> Dict[str, Any]:
         'audit_id': saldo.audit_id
     }
 
-def _serialize_ajuste(ajuste: AjustesReclasificaciones) -> Dict[str, Any]:
+def _serialize_ajuste(ajuste) -> Dict[str, Any]:
     """
-    Serializa un objeto AjustesReclasificaciones a un diccionario
+    Serializa una fila de AjustesReclasificaciones a un diccionario
     """
     return {
         'cuenta': ajuste.nombre_cuenta,
@@ -126,10 +127,9 @@ def organize_financial_data(financial_data: Dict[str, Any]) -> Dict[str, Any]:
         'ajustes_reclasificaciones': {},
     }
     
-    # Organizar balances
-    for balance in financial_data['balances']:
-        key = f"{balance['tipo_balance']}-{balance['fecha_corte']}-{balance['seccion']}-{balance['nombre_cuenta']}-{balance['tipo_cuenta']}"
-        organized_data['balances'][key] = balance['valor']
+    # Organizar balances en un índice estructurado; sigue siendo accesible con
+    # las claves "<tipo_balance>-<fecha_corte>-<seccion>-<cuenta>-<tipo_cuenta>"
+    organized_data['balances'] = BalanceIndex.from_records(financial_data['balances'])
     
     # Organizar registros auxiliares
     for registro in financial_data['registros_auxiliares']:
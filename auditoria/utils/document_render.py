@@ -0,0 +1,95 @@
+"""
+Generación de documentos de auditoría a partir de sus plantillas.
+
+Punto común para las descargas individuales, la cola de trabajos
+(utils.render_jobs) y la exportación en ZIP (utils.zip_export).
+"""
+
+import io
+import logging
+import os
+
+from django.conf import settings
+
+from ..excel_utils import (
+    modify_document_excel,
+    modify_document_excel_with_macros,
+    render_document_excel_text_only,
+)
+from ..word_utils import modify_document_word, render_document_word_text_only
+from .render_cache import render_cache
+from .template_fast_path import classify_template, TEXT_ONLY
+
+logger = logging.getLogger(__name__)
+
+
+def render_document(template_path, filename, audit, financial_data=None):
+    """
+    Genera el documento procesado para la auditoría.
+
+    Args:
+        template_path: Ruta a la plantilla
+        filename: Nombre del archivo solicitado (determina el tipo de documento)
+        audit: Objeto Audit
+        financial_data: Resultado de get_all_financial_data ya obtenido (opcional)
+
+    Returns:
+        bytes: Contenido del documento generado
+    """
+    extension = os.path.splitext(filename.lower())[1]
+    data = _render_text_only(template_path, extension, audit)
+    if data is not None:
+        return data
+
+    buffer = io.BytesIO()
+    if extension == '.docx':
+        doc = modify_document_word(template_path, audit)
+        doc.save(buffer)
+    elif extension == '.xlsx':
+        wb = modify_document_excel(template_path, audit, financial_data)
+        wb.save(buffer)
+    elif extension == '.xlsm':
+        # modify_document_excel_with_macros devuelve una ruta de archivo, no un objeto workbook
+        processed_file_path = modify_document_excel_with_macros(template_path, audit)
+        with open(processed_file_path, 'rb') as f:
+            buffer.write(f.read())
+    return buffer.getvalue()
+
+
+def _render_text_only(template_path, extension, audit):
+    """
+    Usa la ruta rápida de reescritura de XML para plantillas de solo texto.
+    Devuelve None cuando la plantilla necesita openpyxl o python-docx.
+    """
+    if not getattr(settings, 'TEMPLATE_FAST_PATH_ENABLED', True):
+        return None
+    if extension not in ('.docx', '.xlsx') or classify_template(template_path) != TEXT_ONLY:
+        return None
+    try:
+        if extension == '.docx':
+            return render_document_word_text_only(template_path, audit)
+        return render_document_excel_text_only(template_path, audit)
+    except Exception:
+        logger.exception("Ruta rápida falló para %s, se usa la ruta completa", template_path)
+        return None
+
+
+def render_with_cache(template_path, filename, audit, financial_data=None, fingerprint=None):
+    """
+    Genera el documento pasando por la caché de documentos renderizados si
+    está habilitada.
+
+    Args:
+        financial_data: Datos financieros ya obtenidos, para no leerlos por archivo
+        fingerprint: Huella de la auditoría ya calculada (ver render_cache)
+
+    Returns:
+        tuple: (bytes del documento, estado de la caché: HIT, MISS o BYPASS)
+    """
+    def render():
+        return render_document(template_path, filename, audit, financial_data)
+
+    if getattr(settings, 'RENDER_CACHE_ENABLED', True):
+        data, from_cache = render_cache.get_or_render(template_path, audit, render, fingerprint=fingerprint)
+        return data, 'HIT' if from_cache else 'MISS'
+    return render(), 'BYPASS'
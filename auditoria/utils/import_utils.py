@@ -19,7 +19,10 @@ def importar_cuentas_contables(request, audit_id):
         
         if importer.validate_file():
             success, message = importer.process_file()
-            return JsonResponse({"success": success, "message": message}, status=200 if success else 500)
+            return JsonResponse(
+                {"success": success, "message": message, "stats": importer.stats},
+                status=200 if success else 500,
+            )
         else:
             return JsonResponse({
                 "success": False, 
@@ -0,0 +1,272 @@
+"""
+Mapa de ubicaciones de placeholders en plantillas Word.
+
+``modify_document_word`` pasa ``process_standard_text`` por todos los
+párrafos del cuerpo y ``process_tables`` (con sus hipervínculos) por todas las
+celdas, aunque cada plantilla solo tiene unos pocos placeholders en posiciones
+fijas. Que un párrafo o una celda cambie depende únicamente de su texto en la
+plantilla y de la configuración (las claves de los reemplazos, sus patrones
+regex, ``tables.json`` y la nomenclatura del documento), no de los valores de
+la auditoría.
+
+La primera vez que se renderiza una plantilla se recorre su cuerpo y se
+guardan las rutas XML (índices de hijos desde ``w:body``) de:
+
+- los párrafos que algún reemplazo podría modificar,
+- las celdas de tabla con etiquetas de ``patrones``, texto buscado o texto que
+  coincide con ``patrones_regex``, junto con su celda siguiente en la fila,
+- los párrafos y celdas donde puede haber referencias de nomenclatura: las que
+  ya las tienen y las que se modifican (el valor insertado podría tenerlas).
+
+En los siguientes renders solo se visitan esos nodos. El mapa se guarda por
+proceso y se recalcula si cambia el mtime de la plantilla o la configuración.
+Los encabezados y pies de página se siguen procesando completos.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+
+from ..processors.shared.text_replacer import _compilar_alternacion
+from ..processors.word.table_processor.nomenclature_config import get_nomenclature_config
+from ..processors.word.table_processor.table_walker import filas_de_tabla, texto_celda, W_P, W_TC
+
+logger = logging.getLogger(__name__)
+
+W_TBL = qn('w:tbl')
+
+_Ruta = Tuple[int, ...]
+
+_mapas = {}
+_mapas_lock = threading.Lock()
+
+
+class MapaPlaceholders:
+    """Rutas (desde ``w:body``) de los nodos que el render debe visitar."""
+
+    __slots__ = ('parrafos', 'celdas', 'enlaces_parrafos', 'enlaces_celdas')
+
+    def __init__(self):
+        self.parrafos: List[_Ruta] = []
+        # (índice de tabla, ruta de la celda, ruta de la celda siguiente o None)
+        self.celdas: List[Tuple[int, _Ruta, Optional[_Ruta]]] = []
+        self.enlaces_parrafos: List[_Ruta] = []
+        self.enlaces_celdas: List[_Ruta] = []
+
+    def resolver(self, doc) -> Optional['UbicacionesDocumento']:
+        """
+        Convierte las rutas en elementos del documento. Hay que llamarlo antes
+        de modificarlo. Devuelve None si alguna ruta no coincide.
+        """
+        body = doc.element.body
+        try:
+            parrafos = [_elemento(body, ruta, W_P) for ruta in self.parrafos]
+            enlaces_parrafos = [_elemento(body, ruta, W_P) for ruta in self.enlaces_parrafos]
+            enlaces_celdas = [_elemento(body, ruta, W_TC) for ruta in self.enlaces_celdas]
+            tablas = doc.tables if self.celdas else []
+            celdas = [
+                (
+                    tablas[indice],
+                    _elemento(body, ruta, W_TC),
+                    _elemento(body, siguiente, W_TC) if siguiente is not None else None,
+                )
+                for indice, ruta, siguiente in self.celdas
+            ]
+        except (IndexError, ValueError):
+            return None
+        return UbicacionesDocumento(
+            [Paragraph(p, doc._body) for p in parrafos], celdas, enlaces_parrafos, enlaces_celdas
+        )
+
+
+class UbicacionesDocumento:
+    """Nodos de un documento concreto a procesar (ver ``MapaPlaceholders.resolver``)."""
+
+    __slots__ = ('parrafos', 'celdas', 'enlaces_parrafos', 'enlaces_celdas')
+
+    def __init__(self, parrafos, celdas, enlaces_parrafos, enlaces_celdas):
+        self.parrafos = parrafos
+        self.celdas = celdas
+        self.enlaces_parrafos = enlaces_parrafos
+        self.enlaces_celdas = enlaces_celdas
+
+
+def _elemento(body, ruta, tag):
+    elemento = body
+    for indice in ruta:
+        elemento = elemento[indice]
+    if elemento.tag != tag:
+        raise ValueError(f"La ruta {ruta} no apunta a {tag}")
+    return elemento
+
+
+def _ruta(elemento, body) -> _Ruta:
+    ruta = []
+    while elemento is not body:
+        padre = elemento.getparent()
+        ruta.append(padre.index(elemento))
+        elemento = padre
+    return tuple(reversed(ruta))
+
+
+# ----------------------------------------------------------------------
+#  Construcción
+# ----------------------------------------------------------------------
+
+def _detector(patrones, flags=0):
+    """
+    Función ``texto -> bool`` que indica si alguno de los patrones aparece.
+    Sin patrones nunca coincide; si no compilan juntos, siempre coincide.
+    """
+    patrones = list(patrones)
+    if not patrones:
+        return lambda texto: False
+    regex = _compilar_alternacion(patrones, flags)
+    if regex is None:
+        return lambda texto: True
+    return lambda texto: regex.search(texto) is not None
+
+
+def construir_mapa(doc, replacements, replacements_config, tables_config, document_name, document_path=None):
+    """Recorre el cuerpo del documento (sin modificarlo) y devuelve su ``MapaPlaceholders``."""
+    # Mismas condiciones que ReplacementEngine, sin depender de los valores
+    claves = sorted((clave for clave in replacements if clave), key=len, reverse=True)
+    por_clave = _detector(re.escape(clave) for clave in claves)
+    regex_texto = [regla.get("pattern") for regla in replacements_config.get("patrones_regex", [])]
+    por_regex = _detector((patron for patron in regex_texto if patron), re.IGNORECASE)
+
+    def cambia_texto(texto):
+        return por_clave(texto) or por_regex(texto)
+
+    # Mismas condiciones que process_tables
+    patrones = tables_config.get("patrones", [])
+    etiquetas = [patron["buscar"] for patron in patrones if patron.get("buscar") is not None]
+    regex_tablas = _detector(
+        patron.get("pattern") for patron in tables_config.get("patrones_regex", []) if patron.get("pattern")
+    )
+    es_programa = "1 programa" in document_name.lower()
+
+    def cambia_celda(texto):
+        if regex_tablas(texto):
+            return True
+        if es_programa:
+            return False
+        texto = texto.strip().replace('\n', ' ').replace('  ', ' ')
+        return any(etiqueta in texto for etiqueta in etiquetas)
+
+    nomenclatura = get_nomenclature_config(document_name, document_path) or {}
+    prefijo = nomenclatura.get("prefix")
+    referencia = f"{prefijo}-" if prefijo else None
+
+    mapa = MapaPlaceholders()
+    body = doc.element.body
+    indice_tabla = -1
+    for hijo in body:
+        if hijo.tag == W_P:
+            texto = hijo.text
+            cambia = cambia_texto(texto)
+            if cambia:
+                mapa.parrafos.append(_ruta(hijo, body))
+            if referencia and (cambia or referencia in texto):
+                mapa.enlaces_parrafos.append(_ruta(hijo, body))
+        elif hijo.tag == W_TBL:
+            indice_tabla += 1
+            vistas = set()
+            con_enlaces = []
+            for celdas in filas_de_tabla(hijo):
+                for col_idx, tc in enumerate(celdas):
+                    if tc in vistas:
+                        continue
+                    vistas.add(tc)
+                    texto = texto_celda(tc)
+                    siguiente = celdas[col_idx + 1] if col_idx + 1 < len(celdas) else None
+                    cambia = cambia_celda(texto)
+                    if cambia:
+                        mapa.celdas.append((
+                            indice_tabla,
+                            _ruta(tc, body),
+                            _ruta(siguiente, body) if siguiente is not None else None,
+                        ))
+                    if referencia:
+                        if cambia or referencia in texto:
+                            con_enlaces.append(tc)
+                        if cambia and siguiente is not None:
+                            # La celda siguiente recibe el valor de la etiqueta
+                            con_enlaces.append(siguiente)
+            # En el orden de la tabla y sin repetir, como el recorrido completo
+            orden = {tc: i for i, tc in enumerate(_celdas_unicas(hijo))}
+            for tc in sorted(set(con_enlaces), key=orden.__getitem__):
+                mapa.enlaces_celdas.append(_ruta(tc, body))
+    return mapa
+
+
+def _celdas_unicas(tbl):
+    vistas = {}
+    for celdas in filas_de_tabla(tbl):
+        for tc in celdas:
+            vistas.setdefault(tc, None)
+    return list(vistas)
+
+
+# ----------------------------------------------------------------------
+#  Caché por proceso
+# ----------------------------------------------------------------------
+
+def _firma(replacements, replacements_config, tables_config) -> str:
+    """Todo lo que, además de la plantilla, decide qué nodos cambian."""
+    return json.dumps(
+        [
+            sorted(replacements),
+            [regla.get("pattern") for regla in replacements_config.get("patrones_regex", [])],
+            tables_config,
+        ],
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+
+
+def ubicaciones_documento(doc, template_path, replacements, replacements_config, tables_config):
+    """
+    Devuelve las ``UbicacionesDocumento`` de ``doc`` (recién abierto desde
+    ``template_path``) o None si el mapa está deshabilitado o no aplica; en ese
+    caso se procesa el documento completo.
+    """
+    if not getattr(settings, 'PLACEHOLDER_MAP_ENABLED', True):
+        return None
+    try:
+        mtime = os.stat(template_path).st_mtime_ns
+    except OSError:
+        return None
+    firma = _firma(replacements, replacements_config, tables_config)
+
+    with _mapas_lock:
+        cached = _mapas.get(template_path)
+    if cached is not None and cached[0] == mtime and cached[1] == firma:
+        mapa = cached[2]
+    else:
+        try:
+            mapa = construir_mapa(
+                doc, replacements, replacements_config, tables_config,
+                os.path.basename(template_path), template_path,
+            )
+        except Exception:
+            logger.exception("No se pudo construir el mapa de placeholders de %s", template_path)
+            return None
+        with _mapas_lock:
+            _mapas[template_path] = (mtime, firma, mapa)
+
+    ubicaciones = mapa.resolver(doc)
+    if ubicaciones is None:
+        logger.warning("El mapa de placeholders no coincide con %s; se procesa completo", template_path)
+    return ubicaciones
+
+
+def clear_placeholder_maps() -> None:
+    with _mapas_lock:
+        _mapas.clear()
@@ -0,0 +1,244 @@
+"""
+Caché en disco de documentos renderizados.
+
+Cada documento generado por ``download_document`` depende únicamente de la
+plantilla y del estado de la auditoría (sus campos y sus filas financieras).
+Esta caché guarda los bytes resultantes bajo una clave que combina la ruta de la
+plantilla, su fecha de modificación y una huella del estado de la auditoría, de
+modo que las descargas repetidas se sirven sin volver a procesar el documento.
+Cuando una importación o una edición de la auditoría cambia la huella, la clave
+deja de coincidir y el documento se vuelve a generar automáticamente.
+
+La clave incluye además ``CACHE_VERSION`` y la huella de la configuración de
+reemplazos (``template_manifest.config_fingerprint``): la caché persiste entre
+despliegues, así que un cambio en los procesadores que altere los documentos
+generados debe incrementar la versión.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+
+from auditoria.models import (
+    BalanceCuentas,
+    RegistroAuxiliar,
+    SaldoInicial,
+    AjustesReclasificaciones,
+)
+from .template_manifest import config_fingerprint
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Incrementar cuando cambie el código que genera los documentos
+CACHE_VERSION = 1
+
+# Columnas que influyen en el documento generado, por modelo
+_FINGERPRINT_FIELDS = (
+    (BalanceCuentas, ('id', 'tipo_balance', 'fecha_corte', 'seccion', 'nombre_cuenta', 'tipo_cuenta', 'valor')),
+    (RegistroAuxiliar, ('id', 'cuenta', 'saldo')),
+    (SaldoInicial, ('id', 'cuenta', 'saldo', 'fecha_corte')),
+    (AjustesReclasificaciones, ('id', 'nombre_cuenta', 'debe', 'haber')),
+)
+
+
+def fingerprint_querysets(audit_id: int):
+    """Consultas (modelo, queryset) cuyas filas forman parte de la huella."""
+    return [
+        (model, model.objects.filter(audit_id=audit_id).order_by('id').values_list(*fields))
+        for model, fields in _FINGERPRINT_FIELDS
+    ]
+
+
+def compute_audit_fingerprint(audit) -> str:
+    """
+    Calcula una huella del estado de la auditoría.
+
+    Incluye los campos de la auditoría usados en los reemplazos y todas sus
+    filas financieras, leídas con ``values_list`` para no instanciar modelos.
+
+    Args:
+        audit: Objeto Audit
+
+    Returns:
+        str: Huella hexadecimal (sha256)
+    """
+    digest = hashlib.sha256()
+    manager = audit.audit_manager
+    audit_fields = (
+        audit.id, audit.title, audit.identidad, audit.fechaInit, audit.fechaEnd,
+        audit.tipoAuditoria, audit.moneda, audit.updated_at,
+        manager.first_name if manager else None,
+        manager.last_name if manager else None,
+    )
+    digest.update(repr(audit_fields).encode('utf-8'))
+
+    for model, rows in fingerprint_querysets(audit.id):
+        digest.update(model.__name__.encode('utf-8'))
+        for row in rows.iterator():
+            digest.update(repr(row).encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    Caché de documentos renderizados en disco, direccionada por contenido y
+    limitada en tamaño con desalojo LRU (según la fecha de último acceso
+    registrada en el mtime de cada archivo).
+    """
+
+    def __init__(self, directory, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    # ------------------------------------------------------------------
+    #  Claves
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def build_key(template_path: str, fingerprint: str) -> str:
+        """Construye la clave a partir de la plantilla, su mtime, la configuración y la huella."""
+        mtime = os.path.getmtime(template_path)
+        raw = f"{CACHE_VERSION}|{config_fingerprint()}|{os.path.abspath(template_path)}|{mtime}|{fingerprint}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.bin")
+
+    # ------------------------------------------------------------------
+    #  Lectura / escritura
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Devuelve los bytes almacenados para la clave o None si no existen."""
+        path = self._path_for(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # Marcar como usado recientemente para el desalojo LRU
+            os.utime(path, None)
+        except OSError:
+            self._increment('misses')
+            return None
+        self._increment('hits')
+        return data
+
+    def set(self, key: str, data: bytes) -> None:
+        """Guarda los bytes de forma atómica y aplica el límite de tamaño."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path_for(key))
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el documento en caché: {str(e)}")
+            return
+        self._increment('stores')
+        self._evict()
+
+    def peek(self, template_path: str, audit) -> Optional[bytes]:
+        """Devuelve el documento si ya está en caché, sin generarlo."""
+        return self.get(self.build_key(template_path, compute_audit_fingerprint(audit)))
+
+    def get_or_render(
+        self, template_path: str, audit, render: Callable[[], bytes], fingerprint: Optional[str] = None,
+    ) -> Tuple[bytes, bool]:
+        """
+        Devuelve el documento desde la caché o lo genera con ``render`` y lo guarda.
+
+        Args:
+            template_path: Ruta a la plantilla
+            audit: Objeto Audit
+            render: Función sin argumentos que devuelve los bytes del documento
+            fingerprint: Huella de la auditoría ya calculada (opcional)
+
+        Returns:
+            tuple: (contenido del documento, True si provino de la caché)
+        """
+        if fingerprint is None:
+            fingerprint = compute_audit_fingerprint(audit)
+        key = self.build_key(template_path, fingerprint)
+        data = self.get(key)
+        if data is not None:
+            return data, True
+        data = render()
+        self.set(key, data)
+        return data, False
+
+    def clear(self) -> None:
+        """Elimina todas las entradas almacenadas."""
+        for entry in self._entries():
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------
+    #  Desalojo y estadísticas
+    # ------------------------------------------------------------------
+
+    def _entries(self):
+        try:
+            return [e for e in os.scandir(self.directory) if e.is_file() and e.name.endswith('.bin')]
+        except OSError:
+            return []
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in self._entries():
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            # Eliminar primero las entradas usadas hace más tiempo
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                self._counters['evictions'] += 1
+
+    def _increment(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Devuelve los contadores de aciertos/fallos y el tamaño actual."""
+        entries = self._entries()
+        size = 0
+        for entry in entries:
+            try:
+                size += entry.stat().st_size
+            except OSError:
+                pass
+        with self._lock:
+            counters = dict(self._counters)
+        counters.update({'entries': len(entries), 'bytes': size, 'max_bytes': self.max_bytes})
+        return counters
+
+
+render_cache = RenderCache(
+    directory=getattr(settings, 'RENDER_CACHE_DIR', os.path.join(settings.BASE_DIR, 'cache', 'renders')),
+    max_bytes=getattr(settings, 'RENDER_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES),
+)
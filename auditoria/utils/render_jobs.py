@@ -0,0 +1,293 @@
+"""
+Cola de generación de documentos respaldada por la base de datos.
+
+Generar un libro grande dentro de la petición ocupa un worker de gunicorn y
+puede superar su timeout. Con ``RENDER_JOBS_ENABLED`` la descarga encola un
+``RenderJob`` y devuelve una página que consulta su estado. Un pool de hilos
+procesa la cola y deja el archivo generado en ``RENDER_JOBS_DIR``, desde donde
+el navegador lo descarga al terminar.
+
+El pool puede correr dentro del proceso web (``RENDER_JOBS_IN_PROCESS``) o
+aparte con ``python manage.py render_worker``. No hace falta un broker
+externo: los trabajos se toman con un UPDATE condicional sobre la tabla, así
+que varios procesos pueden compartir la misma cola.
+
+Cada trabajo guarda sus intentos, el último error y los tiempos en cola y de
+generación. Si la generación falla, se reintenta con espera exponencial hasta
+``max_intentos``. Si un worker muere, sus trabajos en proceso vuelven a la
+cola cuando superan ``RENDER_JOBS_STALE_SECONDS``. Los workers eliminan los
+trabajos terminados (y sus archivos) cada ``RENDER_JOBS_PURGE_INTERVAL_SECONDS``.
+
+La generación no se interrumpe: un hilo no se puede cancelar desde afuera. Si
+un documento tarda más que ``RENDER_JOBS_STALE_SECONDS`` el trabajo vuelve a
+la cola y otro worker lo genera de nuevo; el primero, al terminar, ya no es
+dueño del trabajo y descarta su resultado. Por eso ese límite debe ser mayor
+que la generación más lenta.
+"""
+
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from auditoria.models import RenderJob
+from .document_render import render_with_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 2
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_POLL_SECONDS = 1.0
+DEFAULT_STALE_SECONDS = 600
+DEFAULT_RETENTION_HOURS = 24
+DEFAULT_PURGE_INTERVAL_SECONDS = 3600
+
+_ACTIVOS = (RenderJob.PENDIENTE, RenderJob.EN_PROCESO)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def jobs_directory() -> str:
+    """Carpeta donde se guardan los documentos generados por la cola."""
+    return str(_setting('RENDER_JOBS_DIR', os.path.join(settings.BASE_DIR, 'cache', 'jobs')))
+
+
+# ----------------------------------------------------------------------
+#  Encolar
+# ----------------------------------------------------------------------
+
+def enqueue_render(audit, template_path: str, filename: str, user=None) -> RenderJob:
+    """
+    Encola la generación de un documento. Si el usuario ya tiene un trabajo
+    pendiente o en proceso para la misma auditoría y plantilla, devuelve ese
+    trabajo (el estado y la descarga solo se muestran a quien lo encoló).
+    """
+    job = (
+        RenderJob.objects.filter(
+            audit=audit, template_path=template_path, user=user, estado__in=_ACTIVOS,
+        )
+        .order_by('id')
+        .first()
+    )
+    if job is None:
+        job = RenderJob.objects.create(
+            audit=audit,
+            user=user,
+            template_path=template_path,
+            filename=filename,
+            max_intentos=_setting('RENDER_JOBS_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS),
+        )
+    if _setting('RENDER_JOBS_IN_PROCESS', True):
+        ensure_in_process_workers()
+    return job
+
+
+# ----------------------------------------------------------------------
+#  Procesar
+# ----------------------------------------------------------------------
+
+def requeue_stale_jobs() -> int:
+    """Devuelve a la cola los trabajos en proceso que superaron el tiempo máximo."""
+    ahora = timezone.now()
+    limite = ahora - timedelta(seconds=_setting('RENDER_JOBS_STALE_SECONDS', DEFAULT_STALE_SECONDS))
+    vencidos = RenderJob.objects.filter(estado=RenderJob.EN_PROCESO, iniciado__lt=limite)
+    error = 'El worker no terminó el trabajo a tiempo'
+    # El intento vencido cuenta como fallido
+    vencidos.filter(intentos__gte=F('max_intentos') - 1).update(
+        estado=RenderJob.FALLIDO, intentos=F('intentos') + 1, error=error, finalizado=ahora,
+    )
+    return vencidos.update(
+        estado=RenderJob.PENDIENTE, intentos=F('intentos') + 1, error=error, disponible_desde=ahora,
+    )
+
+
+def claim_next_job(worker_name: str) -> Optional[RenderJob]:
+    """
+    Toma el trabajo pendiente más antiguo. El UPDATE condicional garantiza
+    que dos workers no tomen el mismo trabajo.
+    """
+    while True:
+        ahora = timezone.now()
+        candidato = (
+            RenderJob.objects.filter(estado=RenderJob.PENDIENTE, disponible_desde__lte=ahora)
+            .order_by('disponible_desde', 'id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if candidato is None:
+            return None
+        tomado = RenderJob.objects.filter(id=candidato, estado=RenderJob.PENDIENTE).update(
+            estado=RenderJob.EN_PROCESO, iniciado=ahora, worker=worker_name,
+        )
+        if tomado:
+            return RenderJob.objects.select_related('audit').get(id=candidato)
+
+
+def run_job(job: RenderJob, render=None) -> RenderJob:
+    """
+    Genera el documento del trabajo y registra el resultado o el error.
+
+    Args:
+        job: Trabajo ya tomado (estado EN_PROCESO)
+        render: Función ``(template_path, filename, audit) -> (bytes, estado_cache)``;
+            por defecto la misma que usan las descargas
+    """
+    if render is None:
+        render = render_with_cache
+
+    inicio = time.monotonic()
+    job.intentos += 1
+    job.segundos_espera = (job.iniciado - job.creado).total_seconds() if job.iniciado else None
+    try:
+        data, cache_status = render(job.template_path, job.filename, job.audit)
+        job.resultado = _store_result(job, data)
+    except Exception as e:
+        logger.exception("Falló la generación del trabajo %s (%s)", job.id, job.filename)
+        job.error = str(e)
+        if job.intentos < job.max_intentos:
+            job.estado = RenderJob.PENDIENTE
+            job.disponible_desde = timezone.now() + timedelta(seconds=2 ** job.intentos)
+        else:
+            job.estado = RenderJob.FALLIDO
+            job.finalizado = timezone.now()
+    else:
+        job.estado = RenderJob.COMPLETADO
+        job.error = ''
+        job.desde_cache = cache_status == 'HIT'
+        job.segundos_render = time.monotonic() - inicio
+        job.finalizado = timezone.now()
+
+    # Solo se guarda si el trabajo sigue tomado por este worker: si se venció,
+    # requeue_stale_jobs lo devolvió a la cola y puede tenerlo otro worker
+    campos = (
+        'estado', 'intentos', 'error', 'resultado', 'desde_cache', 'disponible_desde',
+        'finalizado', 'segundos_espera', 'segundos_render',
+    )
+    guardado = RenderJob.objects.filter(
+        id=job.id, estado=RenderJob.EN_PROCESO, worker=job.worker, iniciado=job.iniciado,
+    ).update(**{campo: getattr(job, campo) for campo in campos})
+    if not guardado:
+        logger.warning("El trabajo %s ya no pertenece a %s; se descarta su resultado", job.id, job.worker)
+        if job.resultado:
+            _remove_result(job.resultado)
+        job.refresh_from_db()
+    return job
+
+
+def _store_result(job, data: bytes) -> str:
+    directory = jobs_directory()
+    os.makedirs(directory, exist_ok=True)
+    extension = os.path.splitext(job.filename.lower())[1]
+    # Nombre único por generación: si el trabajo se generó dos veces (ver
+    # run_job), el resultado descartado no pisa ni borra el que queda
+    fd, path = tempfile.mkstemp(dir=directory, prefix=f"{job.id}-", suffix=extension)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def _remove_result(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def purge_finished_jobs(older_than_hours: Optional[float] = None) -> int:
+    """Elimina los trabajos terminados (y sus archivos) más antiguos que el límite."""
+    if older_than_hours is None:
+        older_than_hours = _setting('RENDER_JOBS_RETENTION_HOURS', DEFAULT_RETENTION_HOURS)
+    limite = timezone.now() - timedelta(hours=older_than_hours)
+    viejos = RenderJob.objects.filter(
+        estado__in=(RenderJob.COMPLETADO, RenderJob.FALLIDO), finalizado__lt=limite,
+    )
+    for path in viejos.exclude(resultado='').values_list('resultado', flat=True):
+        _remove_result(path)
+    borrados, _ = viejos.delete()
+    return borrados
+
+
+# ----------------------------------------------------------------------
+#  Pool de workers
+# ----------------------------------------------------------------------
+
+class RenderWorkerPool:
+    """Hilos que procesan la cola hasta que se llama a ``stop()``."""
+
+    def __init__(self, concurrency: Optional[int] = None, poll_seconds: Optional[float] = None):
+        self.concurrency = max(1, concurrency or _setting('RENDER_JOBS_CONCURRENCY', DEFAULT_CONCURRENCY))
+        self.poll_seconds = poll_seconds or _setting('RENDER_JOBS_POLL_SECONDS', DEFAULT_POLL_SECONDS)
+        self._stop = threading.Event()
+        self._threads = []
+        self._purge_lock = threading.Lock()
+        self._next_purge = 0.0
+
+    def start(self) -> None:
+        base = f"{socket.gethostname()}:{os.getpid()}"
+        for index in range(self.concurrency):
+            thread = threading.Thread(
+                target=self._loop, args=(f"{base}:{index}",), name=f"render-worker-{index}", daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def purge_if_due(self) -> None:
+        """Elimina los trabajos viejos si pasó el intervalo (un solo hilo por vez)."""
+        ahora = time.monotonic()
+        with self._purge_lock:
+            if ahora < self._next_purge:
+                return
+            self._next_purge = ahora + _setting(
+                'RENDER_JOBS_PURGE_INTERVAL_SECONDS', DEFAULT_PURGE_INTERVAL_SECONDS
+            )
+        borrados = purge_finished_jobs()
+        if borrados:
+            logger.info("Trabajos de generación eliminados: %s", borrados)
+
+    def _loop(self, worker_name: str) -> None:
+        while not self._stop.is_set():
+            close_old_connections()
+            try:
+                self.purge_if_due()
+                requeue_stale_jobs()
+                job = claim_next_job(worker_name)
+                if job is not None:
+                    run_job(job)
+                    continue
+            except Exception:
+                logger.exception("Error en el worker de generación %s", worker_name)
+            self._stop.wait(self.poll_seconds)
+        close_old_connections()
+
+
+_in_process_pool: Optional[RenderWorkerPool] = None
+_in_process_lock = threading.Lock()
+
+
+def ensure_in_process_workers() -> RenderWorkerPool:
+    """Arranca (una vez por proceso) el pool de workers dentro del proceso web."""
+    global _in_process_pool
+    with _in_process_lock:
+        if _in_process_pool is None or not _in_process_pool.is_alive():
+            _in_process_pool = RenderWorkerPool()
+            _in_process_pool.start()
+        return _in_process_pool
@@ -0,0 +1,308 @@
+"""
+Ruta rápida para plantillas que solo necesitan reemplazo de texto.
+
+La mayoría de las plantillas .xlsx y .docx no insertan filas ni tablas: solo
+cambian placeholders como ``[ENTIDAD]`` o ``Período:``. Para esas plantillas
+cargar el modelo completo de openpyxl o python-docx y volver a guardarlo es la
+parte más cara de la descarga. Además, openpyxl descarta las formas y el texto
+enriquecido que no entiende.
+
+Este módulo clasifica cada plantilla una sola vez (por ruta y mtime) como
+``TEXT_ONLY`` o ``STRUCTURAL``. Para las de solo texto, recorre el zip y
+reescribe únicamente las partes XML con texto. El resto de las entradas
+(estilos, imágenes, fórmulas, macros) se copian tal cual.
+
+Los reemplazos siguen las mismas reglas que la ruta completa:
+
+- Excel: celdas de texto de ``sharedStrings.xml`` y celdas ``inlineStr``,
+  como ``process_excel_sheets``.
+- Word: párrafos del cuerpo y encabezados y pies de página por defecto, como
+  ``process_standard_text``.
+
+Si al renderizar aparece algo que la ruta rápida no reproduce de forma exacta
+(p. ej. un placeholder dentro de una fórmula), las funciones devuelven
+``None`` y quien llama usa la ruta completa.
+"""
+
+import io
+import logging
+import os
+import posixpath
+import re
+import threading
+import zipfile
+from typing import Optional
+from xml.sax.saxutils import escape
+
+from docx.enum.section import WD_HEADER_FOOTER
+from docx.opc.oxml import serialize_part_xml
+from docx.oxml import parse_xml
+from docx.text.paragraph import Paragraph
+from lxml import etree
+
+from ..processors.excel.sheet_processor import requiere_procesador_estructural
+from ..processors.word.table_processor.nomenclature_config import get_nomenclature_config
+from ..processors.word.text_processor import replace_in_paragraph
+
+logger = logging.getLogger(__name__)
+
+TEXT_ONLY = 'text-only'
+STRUCTURAL = 'structural'
+
+_NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_NS_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+_SHEET_XML = re.compile(r'^xl/worksheets/[^/]+\.xml$')
+
+_classification_cache = {}
+_classification_lock = threading.Lock()
+
+
+# ----------------------------------------------------------------------
+#  Clasificación
+# ----------------------------------------------------------------------
+
+def classify_template(template_path: str) -> str:
+    """
+    Devuelve ``TEXT_ONLY`` o ``STRUCTURAL`` para la plantilla. El resultado se
+    guarda por proceso y se recalcula si cambia el mtime del archivo.
+    """
+    try:
+        mtime = os.stat(template_path).st_mtime_ns
+    except OSError:
+        return STRUCTURAL
+
+    with _classification_lock:
+        cached = _classification_cache.get(template_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        result = _classify(template_path)
+    except (OSError, zipfile.BadZipFile, KeyError, etree.XMLSyntaxError):
+        result = STRUCTURAL
+
+    with _classification_lock:
+        _classification_cache[template_path] = (mtime, result)
+    return result
+
+
+def _classify(template_path):
+    file_name = os.path.basename(template_path)
+    extension = os.path.splitext(file_name.lower())[1]
+
+    if extension == '.xlsx':
+        # Los procesadores por nombre de archivo insertan filas y fórmulas
+        return STRUCTURAL if requiere_procesador_estructural(file_name) else TEXT_ONLY
+
+    if extension == '.docx':
+        with zipfile.ZipFile(template_path) as zin:
+            document_xml = zin.read('word/document.xml')
+        # Las tablas pasan por process_tables (celdas adyacentes, patrones regex)
+        if b'<w:tbl>' in document_xml or b'<w:tbl ' in document_xml:
+            return STRUCTURAL
+        # Los documentos con nomenclatura reciben hipervínculos
+        nomenclature = get_nomenclature_config(file_name, template_path)
+        if nomenclature and nomenclature.get('prefix'):
+            return STRUCTURAL
+        return TEXT_ONLY
+
+    return STRUCTURAL
+
+
+# ----------------------------------------------------------------------
+#  Excel
+# ----------------------------------------------------------------------
+
+def render_xlsx_text_only(template_path: str, engine, patrones_exactos=None) -> Optional[bytes]:
+    """
+    Aplica ``engine`` a las celdas de texto de un .xlsx sin cargarlo en
+    openpyxl. Devuelve los bytes del archivo o ``None`` si hace falta la ruta
+    completa.
+    """
+    if patrones_exactos:
+        return None
+
+    detector = _xml_detector(engine)
+    output = io.BytesIO()
+    with zipfile.ZipFile(template_path) as zin, \
+            zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as zout:
+        for item in zin.infolist():
+            data = zin.read(item)
+            if item.filename == 'xl/sharedStrings.xml':
+                data = _rewrite_shared_strings(data, engine, detector)
+            elif _SHEET_XML.match(item.filename):
+                data = _rewrite_worksheet(data, engine, detector)
+            if data is None:
+                return None
+            zout.writestr(item, data)
+    return output.getvalue()
+
+
+def _xml_detector(engine):
+    """Regex que encuentra cualquier clave, tal cual o escapada en XML."""
+    formas = set()
+    for key in engine.keys():
+        formas.update((key, escape(key), escape(key, {'"': '&quot;', "'": '&apos;'})))
+    if not formas:
+        return None
+    return re.compile('|'.join(re.escape(forma) for forma in sorted(formas, key=len, reverse=True)))
+
+
+def _cell_text(element):
+    """Texto de un <si> o <is> tal como lo lee openpyxl (sin rPh)."""
+    partes = []
+    for t in element.iter(f'{{{_NS_MAIN}}}t'):
+        if t.getparent().tag == f'{{{_NS_MAIN}}}rPh':
+            continue
+        partes.append(t.text or '')
+    return ''.join(partes)
+
+
+def _replaced_value(texto, engine):
+    """
+    Igual que process_excel_sheets: el texto se recorta y, si algún
+    reemplazo cambia, la celda queda con el texto recortado y reemplazado.
+    Devuelve None si la celda no cambia.
+    """
+    if not texto:
+        return None
+    original = texto.strip()
+    nuevo = engine.replace(original)
+    return nuevo if nuevo != original else None
+
+
+def _set_cell_text(element, texto):
+    for child in list(element):
+        element.remove(child)
+    t = etree.SubElement(element, f'{{{_NS_MAIN}}}t')
+    t.text = texto
+    if texto != texto.strip():
+        t.set(_XML_SPACE, 'preserve')
+
+
+def _rewrite_shared_strings(data, engine, detector):
+    if detector is None or not detector.search(data.decode('utf-8', errors='ignore')):
+        return data
+
+    root = etree.fromstring(data)
+    changed = False
+    for si in root.iterchildren(f'{{{_NS_MAIN}}}si'):
+        nuevo = _replaced_value(_cell_text(si), engine)
+        if nuevo is None:
+            continue
+        if nuevo.startswith('='):
+            # openpyxl lo convertiría en fórmula
+            return None
+        _set_cell_text(si, nuevo)
+        changed = True
+
+    if not changed:
+        return data
+    return etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+
+def _rewrite_worksheet(data, engine, detector):
+    # Las celdas de texto compartido ya se resolvieron en sharedStrings.xml
+    if detector is None or not detector.search(data.decode('utf-8', errors='ignore')):
+        return data
+
+    root = etree.fromstring(data)
+    changed = False
+    for cell in root.iter(f'{{{_NS_MAIN}}}c'):
+        formula = cell.find(f'{{{_NS_MAIN}}}f')
+        if formula is not None:
+            # openpyxl reemplazaría dentro del texto de la fórmula
+            if formula.text and _replaced_value(f'={formula.text}', engine) is not None:
+                return None
+            continue
+
+        tipo = cell.get('t')
+        if tipo == 'inlineStr':
+            inline = cell.find(f'{{{_NS_MAIN}}}is')
+            if inline is None:
+                continue
+            nuevo = _replaced_value(_cell_text(inline), engine)
+            if nuevo is None:
+                continue
+            if nuevo.startswith('='):
+                return None
+            _set_cell_text(inline, nuevo)
+            changed = True
+        elif tipo in ('e', 'str'):
+            valor = cell.find(f'{{{_NS_MAIN}}}v')
+            if valor is not None and _replaced_value(valor.text, engine) is not None:
+                return None
+
+    if not changed:
+        return data
+    return etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+
+# ----------------------------------------------------------------------
+#  Word
+# ----------------------------------------------------------------------
+
+def render_docx_text_only(template_path: str, engine) -> Optional[bytes]:
+    """
+    Aplica ``engine`` a los párrafos del cuerpo y a los encabezados y pies de
+    página por defecto de un .docx sin cargar el Document completo.
+
+    A diferencia de python-docx, no agrega un encabezado vacío a la primera
+    sección cuando esta no define uno.
+    """
+    with zipfile.ZipFile(template_path) as zin:
+        document = parse_xml(zin.read('word/document.xml'))
+        targets = _document_rels(zin)
+
+        partes = {'word/document.xml': document}
+        for paragraph in document.body.p_lst:
+            replace_in_paragraph(Paragraph(paragraph, None), engine)
+
+        # Mismo orden que process_standard_text: encabezado y pie de cada sección,
+        # heredando la definición de la sección anterior si no tiene una propia
+        for sectPr in document.sectPr_lst:
+            for getter in ('get_headerReference', 'get_footerReference'):
+                part_name = _resolve_headerfooter(sectPr, getter, targets)
+                if part_name is None:
+                    continue
+                if part_name not in partes:
+                    partes[part_name] = parse_xml(zin.read(part_name))
+                for paragraph in partes[part_name].p_lst:
+                    replace_in_paragraph(Paragraph(paragraph, None), engine)
+
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as zout:
+            for item in zin.infolist():
+                if item.filename in partes:
+                    zout.writestr(item, serialize_part_xml(partes[item.filename]))
+                else:
+                    zout.writestr(item, zin.read(item))
+    return output.getvalue()
+
+
+def _document_rels(zin):
+    """Devuelve ``{rId: nombre de la parte}`` de las relaciones de document.xml."""
+    try:
+        root = etree.fromstring(zin.read('word/_rels/document.xml.rels'))
+    except KeyError:
+        return {}
+    targets = {}
+    for rel in root.iterchildren(f'{{{_NS_REL}}}Relationship'):
+        if rel.get('TargetMode') == 'External':
+            continue
+        target = rel.get('Target', '')
+        if target.startswith('/'):
+            targets[rel.get('Id')] = target.lstrip('/')
+        else:
+            targets[rel.get('Id')] = posixpath.normpath(posixpath.join('word', target))
+    return targets
+
+
+def _resolve_headerfooter(sectPr, getter, targets):
+    while sectPr is not None:
+        reference = getattr(sectPr, getter)(WD_HEADER_FOOTER.PRIMARY)
+        if reference is not None:
+            return targets.get(reference.rId)
+        sectPr = sectPr.preceding_sectPr
+    return None
@@ -0,0 +1,209 @@
+"""
+Índice en memoria de las plantillas base (financiera e interna).
+
+``get_template_path`` recorría los directorios con ``os.listdir``/``os.walk`` y
+normalizaba cada nombre en cada descarga que no coincidía exactamente. El
+índice recorre una sola vez ``static/templates_base_financiera`` y
+``static/templates_base_interna`` y guarda, por carpeta:
+
+- sus subcarpetas por nombre normalizado (sin tildes, sin mayúsculas),
+- los archivos de toda la subcarpeta por nombre normalizado, con y sin
+  extensión.
+
+Así resolver una ruta es una búsqueda en diccionarios por componente. Cada
+``TEMPLATE_INDEX_CHECK_SECONDS`` se compara el mtime de las carpetas indexadas
+y, si alguna cambió (archivo agregado, eliminado o renombrado), el índice se
+reconstruye.
+
+Cuando dos nombres distintos se normalizan igual, gana el primero en orden
+alfabético y de menor profundidad. ``python manage.py template_index`` lista
+esas colisiones.
+"""
+
+import os
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+DEFAULT_CHECK_SECONDS = 5.0
+
+
+def normalize_text(text):
+    """
+    Normaliza el texto removiendo tildes y caracteres especiales
+    """
+    # Normalizar Unicode y remover tildes
+    text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
+    # Convertir a minúsculas y remover espacios extras
+    return ' '.join(text.lower().split())
+
+
+def template_base_path(is_internal=False) -> str:
+    """Carpeta de plantillas según el tipo de auditoría."""
+    nombre = 'templates_base_interna' if is_internal else 'templates_base_financiera'
+    return os.path.join(settings.BASE_DIR, 'static', nombre)
+
+
+class _Carpeta:
+    """Entradas indexadas de una carpeta."""
+
+    __slots__ = ('subcarpetas', 'subcarpetas_norm', 'archivos_norm', 'archivos_base')
+
+    def __init__(self):
+        self.subcarpetas: Dict[str, str] = {}       # nombre exacto -> ruta
+        self.subcarpetas_norm: Dict[str, str] = {}  # nombre normalizado -> ruta
+        self.archivos_norm: Dict[str, str] = {}     # nombre normalizado (toda la subcarpeta) -> ruta
+        self.archivos_base: Dict[str, str] = {}     # ídem, sin extensión -> ruta
+
+
+class _Arbol:
+    """Índice inmutable de una carpeta base."""
+
+    def __init__(self, base_path):
+        self.base_path = base_path
+        self.carpetas: Dict[str, _Carpeta] = {}
+        self.archivos = set()
+        self.mtimes: Dict[str, int] = {}
+        # (carpeta, clave normalizada, rutas que comparten la clave)
+        self.colisiones: List[Tuple[str, str, List[str]]] = []
+        self._construir()
+
+    def _construir(self):
+        if not os.path.isdir(self.base_path):
+            return
+        colisiones = {}
+        for root, dirs, files in os.walk(self.base_path):
+            dirs.sort()
+            files.sort()
+            self.mtimes[root] = os.stat(root).st_mtime_ns
+            carpeta = self.carpetas.setdefault(root, _Carpeta())
+            for nombre in dirs:
+                ruta = os.path.join(root, nombre)
+                carpeta.subcarpetas[nombre] = ruta
+                self._agregar(carpeta.subcarpetas_norm, normalize_text(nombre), ruta, root, colisiones)
+
+            ancestros = self._ancestros(root)
+            for nombre in files:
+                ruta = os.path.join(root, nombre)
+                self.archivos.add(ruta)
+                clave = normalize_text(nombre)
+                clave_base = os.path.splitext(clave)[0]
+                for ancestro in ancestros:
+                    destino = self.carpetas[ancestro]
+                    # Las colisiones se reportan una vez, en la carpeta donde están los archivos
+                    carpeta_colision = root if ancestro == root else None
+                    self._agregar(destino.archivos_norm, clave, ruta, carpeta_colision, colisiones)
+                    self._agregar(destino.archivos_base, clave_base, ruta, carpeta_colision, colisiones)
+
+        self.colisiones = [
+            (os.path.relpath(carpeta, self.base_path), clave, rutas)
+            for (carpeta, clave), rutas in colisiones.items()
+        ]
+
+    def _ancestros(self, root):
+        ancestros = [root]
+        while root != self.base_path:
+            root = os.path.dirname(root)
+            ancestros.append(root)
+        return ancestros
+
+    @staticmethod
+    def _agregar(destino, clave, ruta, carpeta, colisiones):
+        existente = destino.setdefault(clave, ruta)
+        if existente != ruta and carpeta is not None:
+            colisiones.setdefault((carpeta, clave), [existente]).append(ruta)
+
+    def vigente(self) -> bool:
+        """True si ninguna carpeta indexada cambió desde que se construyó."""
+        try:
+            return all(os.stat(ruta).st_mtime_ns == mtime for ruta, mtime in self.mtimes.items())
+        except OSError:
+            return False
+
+    def resolver(self, folder, filename) -> Optional[str]:
+        carpeta_actual = self.base_path
+        for componente in folder.replace('\\', '/').split('/'):
+            if not componente:
+                continue
+            carpeta = self.carpetas.get(carpeta_actual)
+            if carpeta is None:
+                return None
+            siguiente = carpeta.subcarpetas.get(componente) or carpeta.subcarpetas_norm.get(normalize_text(componente))
+            if siguiente is None:
+                return None
+            carpeta_actual = siguiente
+
+        carpeta = self.carpetas.get(carpeta_actual)
+        if carpeta is None:
+            return None
+        # Primero intentar encontrar una coincidencia exacta
+        exacta = os.path.normpath(os.path.join(carpeta_actual, filename))
+        if exacta in self.archivos:
+            return exacta
+        # Si no, buscar en la carpeta y subcarpetas sin tildes ni mayúsculas, y luego sin extensión
+        clave = normalize_text(filename)
+        return carpeta.archivos_norm.get(clave) or carpeta.archivos_base.get(os.path.splitext(clave)[0])
+
+
+class TemplateIndex:
+    """Índice de las carpetas de plantillas, reconstruido cuando cambian."""
+
+    def __init__(self, check_seconds: Optional[float] = None):
+        self._check_seconds = check_seconds
+        self._arboles: Dict[bool, _Arbol] = {}
+        self._revisado: Dict[bool, float] = {}
+        self._lock = threading.Lock()
+
+    def _arbol(self, is_internal) -> _Arbol:
+        arbol = self._arboles.get(is_internal)
+        base_path = template_base_path(is_internal)
+        ahora = time.monotonic()
+        if arbol is not None and arbol.base_path == base_path:
+            check_seconds = self._check_seconds
+            if check_seconds is None:
+                check_seconds = getattr(settings, 'TEMPLATE_INDEX_CHECK_SECONDS', DEFAULT_CHECK_SECONDS)
+            if ahora - self._revisado.get(is_internal, 0) < check_seconds:
+                return arbol
+            if arbol.vigente():
+                self._revisado[is_internal] = ahora
+                return arbol
+
+        with self._lock:
+            # Otro hilo pudo reconstruirlo mientras se esperaba el lock
+            actual = self._arboles.get(is_internal)
+            if actual is arbol or actual is None or actual.base_path != base_path:
+                actual = _Arbol(base_path)
+                self._arboles[is_internal] = actual
+            self._revisado[is_internal] = ahora
+            return actual
+
+    def resolve(self, folder, filename, is_internal=False) -> Optional[str]:
+        """
+        Devuelve la ruta de la plantilla ``folder/filename``. Cada componente
+        de la carpeta y el archivo se buscan primero tal cual y luego sin
+        tildes ni mayúsculas; el archivo puede estar en una subcarpeta y
+        coincidir sin extensión. Devuelve None si no se encuentra.
+        """
+        if not folder:
+            return None
+        return self._arbol(is_internal).resolver(folder, filename)
+
+    def collisions(self, is_internal=False) -> List[Tuple[str, str, List[str]]]:
+        """Nombres normalizados que apuntan a más de un archivo o carpeta."""
+        return self._arbol(is_internal).colisiones
+
+    def warm(self) -> None:
+        """Construye el índice de ambas carpetas base."""
+        for is_internal in (False, True):
+            self._arbol(is_internal)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._arboles.clear()
+            self._revisado.clear()
+
+
+template_index = TemplateIndex()
@@ -0,0 +1,244 @@
+"""
+Manifiesto precalculado de las plantillas Excel.
+
+Al generar un .xlsx, ``process_excel_sheets`` recorre todas las celdas de
+todas las hojas buscando placeholders y luego, según el nombre del archivo,
+el procesador específico vuelve a recorrer la hoja para ubicar sus filas
+ancla (``buscar_tabla_sumaria``, ``buscar_filas_clave``, ``_buscar_secciones``).
+Todo eso depende solo de la plantilla y de la configuración de reemplazos, así
+que ``python manage.py build_template_manifest`` lo calcula una vez y lo guarda
+en ``TEMPLATE_MANIFEST_PATH``. Por cada plantilla se guarda:
+
+- ``procesador``: el procesador específico (ver ``procesador_para_archivo``),
+- ``cuenta``: la cuenta asociada de las cédulas SUMARIA,
+- ``hojas_con_reemplazos``: las hojas con al menos una celda que algún
+  reemplazo modifica; las demás se saltan,
+- ``anclas``: las filas y columnas ancla del procesador, por hoja. Si un
+  reemplazo cambia una celda de forma que la búsqueda de anclas la evaluaría
+  distinto, esa hoja vuelve a recorrerse (ver ``process_excel_sheets``).
+
+Una entrada solo se usa si el contenido de la plantilla (sha1) y la
+configuración de reemplazos son los mismos que al construir el manifiesto. Si
+no hay manifiesto, o la entrada no coincide, todo se calcula como antes.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from types import SimpleNamespace
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+
+from .replacements_utils import build_replacements_dict, get_replacements_config, get_tables_config
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+_CONFIG_FILES = ('replacements.json', 'tables.json')
+
+
+def manifest_path() -> str:
+    return str(getattr(settings, 'TEMPLATE_MANIFEST_PATH', os.path.join(settings.BASE_DIR, 'cache', 'template_manifest.json')))
+
+
+def _relative_key(template_path: str) -> str:
+    return os.path.relpath(os.path.abspath(template_path), settings.BASE_DIR).replace(os.sep, '/')
+
+
+def _sha1_file(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def config_fingerprint() -> str:
+    """Huella de los archivos de configuración de los que depende el manifiesto."""
+    digest = hashlib.sha1()
+    for nombre in _CONFIG_FILES:
+        try:
+            with open(os.path.join(settings.BASE_DIR, 'auditoria', 'config', nombre), 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(b'-')
+    return digest.hexdigest()
+
+
+class TemplateManifest:
+    """Lectura del manifiesto con validación por plantilla."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cargado = None          # (mtime_ns del manifiesto, plantillas)
+        self._validadas: Dict[str, tuple] = {}
+
+    def _plantillas(self) -> Dict[str, dict]:
+        path = manifest_path()
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return {}
+        cargado = self._cargado
+        if cargado is not None and cargado[0] == mtime:
+            return cargado[1]
+
+        with self._lock:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                logger.exception("No se pudo leer el manifiesto de plantillas %s", path)
+                data = {}
+            plantillas = data.get('plantillas', {})
+            if data.get('version') != MANIFEST_VERSION or data.get('config') != config_fingerprint():
+                logger.warning("El manifiesto de plantillas está desactualizado; vuelva a ejecutar build_template_manifest")
+                plantillas = {}
+            self._cargado = (mtime, plantillas)
+            self._validadas = {}
+            return plantillas
+
+    def entry(self, template_path: str) -> Optional[dict]:
+        """
+        Devuelve la entrada de la plantilla o None si no está en el manifiesto
+        o si la plantilla cambió desde que se construyó.
+        """
+        if not getattr(settings, 'TEMPLATE_MANIFEST_ENABLED', True) or not template_path:
+            return None
+        plantillas = self._plantillas()
+        entrada = plantillas.get(_relative_key(template_path))
+        if entrada is None:
+            return None
+
+        try:
+            stat = os.stat(template_path)
+        except OSError:
+            return None
+        firma = (stat.st_mtime_ns, stat.st_size)
+        validada = self._validadas.get(template_path)
+        if validada is None or validada[0] != firma:
+            vigente = stat.st_size == entrada['size'] and _sha1_file(template_path) == entrada['sha1']
+            validada = (firma, vigente)
+            self._validadas[template_path] = validada
+        return entrada if validada[1] else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cargado = None
+            self._validadas = {}
+
+
+template_manifest = TemplateManifest()
+
+
+# ----------------------------------------------------------------------
+#  Construcción
+# ----------------------------------------------------------------------
+
+def _claves_sonda():
+    """
+    Reemplazos con las mismas claves que los de cualquier auditoría: las
+    claves salen de la configuración, solo los valores dependen de la auditoría.
+    """
+    sonda = SimpleNamespace(identidad='', title='', tipoAuditoria='F', audit_manager=None, moneda='GTQ')
+    return build_replacements_dict(
+        config=get_replacements_config(), audit=sonda, fecha_inicio='', fecha_fin='',
+    )
+
+
+def _celda_con_reemplazo(valor, claves, patrones_exactos, patrones_regex):
+    """Mismas condiciones que process_excel_sheets para modificar una celda."""
+    if valor in patrones_exactos and patrones_exactos[valor] in claves:
+        return True
+    if any(clave in valor for clave in claves if clave):
+        return True
+    if isinstance(patrones_regex, dict):
+        return any(patron in valor and placeholder in claves for patron, placeholder in patrones_regex.items())
+    return False
+
+
+def _hoja_con_reemplazos(sheet, claves, patrones_exactos, patrones_regex) -> bool:
+    for row in sheet.iter_rows():
+        for cell in row:
+            if cell.value and isinstance(cell.value, str):
+                if _celda_con_reemplazo(cell.value.strip(), claves, patrones_exactos, patrones_regex):
+                    return True
+    return False
+
+
+def describe_template(template_path: str, claves=None, tables_config=None) -> dict:
+    """Calcula la entrada del manifiesto para una plantilla .xlsx."""
+    from openpyxl import load_workbook
+    from ..processors.excel.sheet_processor import procesador_para_archivo
+    from ..processors.excel.sumaria.deteccion import determinar_cuenta_por_nombre_archivo, buscar_tabla_sumaria
+    from ..processors.excel.processor_anual_semestral.utils import buscar_filas_clave
+    from ..processors.excel.horizontal_vertical_analysis.sheet_processing import _buscar_secciones
+
+    if claves is None:
+        claves = set(_claves_sonda())
+    if tables_config is None:
+        tables_config = get_tables_config()
+    patrones_exactos = tables_config.get('patrones_exactos', {})
+    patrones_regex = tables_config.get('patrones_regex', {})
+
+    file_name = os.path.basename(template_path)
+    procesador = procesador_para_archivo(file_name)
+    wb = load_workbook(template_path)
+
+    hojas_con_reemplazos = [
+        sheet.title for sheet in wb.worksheets
+        if _hoja_con_reemplazos(sheet, claves, patrones_exactos, patrones_regex)
+    ]
+    anclas = {}
+    cuenta = None
+    if procesador == 'sumaria':
+        cuenta = determinar_cuenta_por_nombre_archivo(file_name)
+        anclas[wb.active.title] = buscar_tabla_sumaria(wb.active)
+    elif procesador == 'estados_financieros':
+        anclas = {
+            sheet.title: buscar_filas_clave(sheet) for sheet in wb.worksheets
+            if sheet.title.upper() in ('ACTUAL', 'ANUAL', 'SEMESTRAL')
+        }
+    elif procesador == 'analisis_horizontal_vertical':
+        anclas = {
+            sheet.title: list(_buscar_secciones(sheet)) for sheet in wb.worksheets
+            if "BALANCE" in sheet.title.upper() or "BG" in sheet.title.upper()
+        }
+
+    return {
+        'sha1': _sha1_file(template_path),
+        'size': os.path.getsize(template_path),
+        'procesador': procesador,
+        'cuenta': cuenta,
+        'hojas_con_reemplazos': hojas_con_reemplazos,
+        'anclas': anclas,
+    }
+
+
+def build_manifest(template_paths: Iterable[str]) -> dict:
+    """Construye el manifiesto para las plantillas indicadas."""
+    claves = set(_claves_sonda())
+    tables_config = get_tables_config()
+    plantillas = {}
+    for path in template_paths:
+        try:
+            plantillas[_relative_key(path)] = describe_template(path, claves, tables_config)
+        except Exception:
+            logger.exception("No se pudo describir la plantilla %s", path)
+    return {'version': MANIFEST_VERSION, 'config': config_fingerprint(), 'plantillas': plantillas}
+
+
+def write_manifest(manifest: dict, path: Optional[str] = None) -> str:
+    path = path or manifest_path()
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+    template_manifest.clear()
+    return path
@@ -0,0 +1,155 @@
+"""
+Pool por proceso de plantillas ya parseadas.
+
+Parsear el XML de una plantilla con openpyxl o python-docx domina el tiempo de
+cada descarga. Este pool conserva una copia prístina de cada plantilla (un
+snapshot serializado del Workbook o el Document parseado) y entrega clones
+independientes, que son bastante más baratos que volver a leer el archivo.
+Las entradas se invalidan cuando cambia el mtime de la plantilla y el pool
+respeta un límite de memoria desalojando las menos usadas.
+"""
+
+import copy
+import copyreg
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from docx import Document
+from openpyxl import load_workbook
+from openpyxl.worksheet.table import TableList
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Un Document parseado ocupa en memoria varias veces el tamaño del .docx comprimido
+_DOCX_MEMORY_FACTOR = 10
+
+
+def _rebuild_table_list(tables):
+    table_list = TableList()
+    for table in tables:
+        table_list.add(table)
+    return table_list
+
+
+# TableList redefine items() para devolver (nombre, rango), lo que rompe el
+# protocolo de pickle de dict: se serializan las tablas explícitamente.
+copyreg.pickle(TableList, lambda table_list: (_rebuild_table_list, (list(dict.values(table_list)),)))
+
+
+class _PoolEntry:
+    __slots__ = ('mtime', 'snapshot', 'size')
+
+    def __init__(self, mtime, snapshot, size):
+        self.mtime = mtime
+        self.snapshot = snapshot
+        self.size = size
+
+
+class TemplatePool:
+    """
+    Pool LRU de plantillas Excel y Word parseadas, limitado en memoria.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    # ------------------------------------------------------------------
+    #  API pública
+    # ------------------------------------------------------------------
+
+    def get_workbook(self, template_path: str):
+        """Devuelve un Workbook independiente de la plantilla indicada."""
+        snapshot = self._get_snapshot(('xlsx', template_path), template_path, self._snapshot_workbook)
+        if snapshot is None:
+            return load_workbook(template_path)
+        return pickle.loads(snapshot)
+
+    def get_document(self, template_path: str):
+        """Devuelve un Document independiente de la plantilla indicada."""
+        snapshot = self._get_snapshot(('docx', template_path), template_path, self._snapshot_document)
+        if snapshot is None:
+            return Document(template_path)
+        return copy.deepcopy(snapshot)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            counters.update({'entries': len(self._entries), 'bytes': self._total, 'max_bytes': self.max_bytes})
+        return counters
+
+    # ------------------------------------------------------------------
+    #  Snapshots
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _snapshot_workbook(template_path):
+        snapshot = pickle.dumps(load_workbook(template_path), protocol=pickle.HIGHEST_PROTOCOL)
+        return snapshot, len(snapshot)
+
+    @staticmethod
+    def _snapshot_document(template_path):
+        return Document(template_path), os.path.getsize(template_path) * _DOCX_MEMORY_FACTOR
+
+    def _get_snapshot(self, key, template_path, build):
+        mtime = os.path.getmtime(template_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.mtime == mtime:
+                self._entries.move_to_end(key)
+                self._counters['hits'] += 1
+                return entry.snapshot
+            self._counters['misses'] += 1
+
+        try:
+            snapshot, size = build(template_path)
+        except Exception as e:
+            # Plantillas que no se pueden clonar se leen siempre desde disco
+            logger.warning(f"No se pudo agregar la plantilla al pool {template_path}: {str(e)}")
+            return None
+
+        if size > self.max_bytes:
+            return snapshot
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total -= previous.size
+            self._entries[key] = _PoolEntry(mtime, snapshot, size)
+            self._total += size
+            while self._total > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._total -= evicted.size
+                self._counters['evictions'] += 1
+        return snapshot
+
+
+template_pool = TemplatePool(max_bytes=getattr(settings, 'TEMPLATE_POOL_MAX_BYTES', DEFAULT_MAX_BYTES))
+
+
+def open_workbook_template(template_path: str):
+    """Abre una plantilla Excel usando el pool si está habilitado."""
+    if getattr(settings, 'TEMPLATE_POOL_ENABLED', True):
+        return template_pool.get_workbook(template_path)
+    return load_workbook(template_path)
+
+
+def open_document_template(template_path: str):
+    """Abre una plantilla Word usando el pool si está habilitado."""
+    if getattr(settings, 'TEMPLATE_POOL_ENABLED', True):
+        return template_pool.get_document(template_path)
+    return Document(template_path)
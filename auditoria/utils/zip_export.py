@@ -0,0 +1,177 @@
+"""
+Exportación de una auditoría completa (o de una carpeta) como ZIP en streaming.
+
+Los documentos se generan en paralelo en un pool de procesos y cada uno se
+escribe en el ZIP apenas termina, de modo que la respuesta empieza a salir
+enseguida y nunca se arma el archivo completo en memoria. Los datos
+financieros y la huella de la auditoría se obtienen una sola vez y se
+comparten con todos los procesos del pool, en lugar de leerlos por archivo.
+La generación de cada archivo está en ``utils.zip_worker``.
+
+El pool se crea una vez por proceso y lo comparten todas las exportaciones:
+sus procesos conservan entre descargas el pool de plantillas y los índices que
+arman al generar. Si un proceso del pool muere, el pool se descarta y los
+archivos que faltan se generan en el proceso actual.
+"""
+
+import io
+import logging
+import multiprocessing
+import os
+import pickle
+import threading
+import uuid
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Iterator, Optional, Tuple
+
+from django.conf import settings
+
+from .data_db import get_all_financial_data
+from .render_cache import compute_audit_fingerprint
+from .zip_worker import init_worker, render_archivo, render_archivo_en_worker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# Archivo: (ruta dentro del ZIP, ruta de la plantilla, nombre del archivo)
+Archivo = Tuple[str, str, str]
+
+
+class _ZipStream(io.RawIOBase):
+    """Destino no posicionable para ZipFile que acumula los bytes hasta que se leen."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _max_workers(workers):
+    if workers is None:
+        workers = getattr(settings, 'ZIP_EXPORT_WORKERS', None) or min(os.cpu_count() or 1, DEFAULT_MAX_WORKERS)
+    return max(1, workers)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: los procesos no heredan hilos, locks (template_pool, logging...) ni
+            # conexiones a la base de datos del proceso web
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def render_archivos(audit, archivos: Iterable[Archivo], workers: Optional[int] = None) -> Iterator[tuple]:
+    """
+    Genera los archivos y los devuelve a medida que terminan, como tuplas
+    ``(arcname, bytes | None, error | None)``.
+
+    Con un solo worker se generan en el proceso actual, en orden.
+    """
+    financial_data = get_all_financial_data(audit.id)
+    fingerprint = compute_audit_fingerprint(audit)
+    archivos = iter(archivos)
+    workers = _max_workers(workers)
+    if workers > 1:
+        yield from _render_en_pool(_get_pool(workers), workers, audit, financial_data, fingerprint, archivos)
+    # Sin pool, o lo que quedó sin generar si el pool se detuvo
+    for archivo in archivos:
+        yield render_archivo(*archivo, audit, financial_data, fingerprint)
+
+
+def _render_en_pool(pool, workers, audit, financial_data, fingerprint, archivos) -> Iterator[tuple]:
+    """
+    Genera los archivos en el pool. Si el pool se detiene, genera en el
+    proceso actual los que estaban en curso y deja el resto en ``archivos``.
+    """
+    token = uuid.uuid4().hex
+    datos = pickle.dumps((audit, financial_data, fingerprint))
+    pendientes = {}
+    sin_generar = []
+    try:
+        while True:
+            # Se limita lo que está en vuelo para no acumular resultados en memoria
+            while len(pendientes) < workers * 2:
+                archivo = next(archivos, None)
+                if archivo is None:
+                    break
+                try:
+                    futuro = pool.submit(render_archivo_en_worker, token, datos, *archivo)
+                except RuntimeError as e:
+                    # Pool roto o ya descartado por otra exportación
+                    sin_generar.append(archivo)
+                    raise BrokenProcessPool(str(e)) from e
+                pendientes[futuro] = archivo
+            if not pendientes:
+                return
+            terminados, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                try:
+                    resultado = futuro.result()
+                except CancelledError as e:
+                    # Cancelado al descartar el pool en otra exportación
+                    raise BrokenProcessPool('pool descartado') from e
+                del pendientes[futuro]
+                yield resultado
+    except BrokenProcessPool:
+        # Un proceso del pool murió (memoria, señal...): se crea otro pool en la siguiente exportación
+        logger.exception("El pool del ZIP se detuvo; se generan los archivos en el proceso actual")
+        _discard_pool(pool)
+        sin_generar.extend(pendientes.values())
+        pendientes = {}
+    finally:
+        for futuro in pendientes:
+            futuro.cancel()
+
+    for archivo in sin_generar:
+        yield render_archivo(*archivo, audit, financial_data, fingerprint)
+
+
+def stream_zip(audit, archivos: Iterable[Archivo], workers: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Genera el ZIP por partes para un ``StreamingHttpResponse``. Los archivos
+    que no se pudieron generar se listan en ``ERRORES.txt`` al final.
+    """
+    stream = _ZipStream()
+    errores = []
+    # Los .docx/.xlsx ya están comprimidos: se guardan sin volver a comprimir
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for arcname, data, error in render_archivos(audit, archivos, workers):
+            if error is not None:
+                errores.append(f"{arcname}: {error}")
+                continue
+            zf.writestr(arcname, data)
+            yield stream.drain()
+        if errores:
+            zf.writestr('ERRORES.txt', '\n'.join(errores), compress_type=zipfile.ZIP_DEFLATED)
+    yield stream.drain()
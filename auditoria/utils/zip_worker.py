@@ -0,0 +1,56 @@
+"""
+Generación de los archivos del ZIP (utils.zip_export).
+
+Corre en los procesos del pool o, con un solo worker, en el proceso web. Los
+procesos del pool se crean con "spawn" y cargan este módulo antes de
+``django.setup()``, por eso no importa Django ni los modelos al cargarse.
+"""
+
+import logging
+import pickle
+
+logger = logging.getLogger(__name__)
+
+# Datos de las últimas exportaciones de cada proceso del pool, por token (ver
+# render_archivo_en_worker). Solo se usa en los procesos hijos, que atienden
+# un archivo por vez.
+_contextos = {}
+_MAX_CONTEXTOS = 4
+
+
+def init_worker():
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def render_archivo_en_worker(token, datos: bytes, arcname, template_path, filename):
+    """
+    ``render_archivo`` en un proceso del pool. ``datos`` son la auditoría, sus
+    datos financieros y su huella serializados; se deserializan una vez por
+    exportación (``token``) y proceso.
+    """
+    contexto = _contextos.get(token)
+    if contexto is None:
+        if len(_contextos) >= _MAX_CONTEXTOS:
+            _contextos.pop(next(iter(_contextos)))
+        # Llegan serializados: la auditoría es un modelo y no se puede leer antes de django.setup()
+        contexto = _contextos[token] = pickle.loads(datos)
+    return render_archivo(arcname, template_path, filename, *contexto)
+
+
+def render_archivo(arcname, template_path, filename, audit, financial_data, fingerprint):
+    """Genera un archivo en el proceso actual. Devuelve (arcname, bytes, error)."""
+    from .document_render import render_with_cache
+
+    try:
+        data, _ = render_with_cache(
+            template_path, filename, audit,
+            financial_data=financial_data, fingerprint=fingerprint,
+        )
+        return arcname, data, None
+    except Exception as e:
+        logger.exception("No se pudo generar %s para el ZIP", arcname)
+        return arcname, None, str(e)
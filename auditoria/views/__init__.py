@@ -6,7 +6,11 @@ Importa todas las vistas desde los módulos especializados para mantener compati
 # Importar vistas de descarga de documentos
 from .download_views import (
     download_document,
-    download_document_by_pattern
+    download_document_by_pattern,
+    download_audit_zip,
+    render_cache_stats,
+    render_job_status,
+    render_job_download
 )
 
 # Importar vistas de auditorías
@@ -22,6 +26,7 @@ from .utils import (
     normalize_text,
     get_template_path,
     crear_mensaje_error,
+    crear_pagina_espera,
     generar_html_estructura
 )
 
@@ -30,6 +35,10 @@ __all__ = [
     # Vistas de descarga
     'download_document',
     'download_document_by_pattern',
+    'download_audit_zip',
+    'render_cache_stats',
+    'render_job_status',
+    'render_job_download',
     
     # Vistas de auditorías
     'auditorias_view',
@@ -41,5 +50,6 @@ __all__ = [
     'normalize_text',
     'get_template_path',
     'crear_mensaje_error',
+    'crear_pagina_espera',
     'generar_html_estructura'
 ]
@@ -3,13 +3,13 @@ Vistas para gestión de auditorías.
 Contiene funciones para listar auditorías financieras, internas y mostrar detalles.
 """
 
-import os
-import json
 from .config import (
     render, redirect, HttpResponse, mark_safe, settings,
     Audit, login_required
 )
-from .utils import crear_mensaje_error, generar_html_estructura
+from .utils import (
+    crear_mensaje_error, generar_html_estructura, cargar_estructura_carpetas, usuario_verificado
+)
 
 @login_required
 def auditorias_view(request):
@@ -75,19 +75,10 @@ def auditoria_detalle_view(request, audit_id):
         return HttpResponse(mark_safe(mensaje_error), status=404)
     
     # Leer la estructura desde el archivo JSON correspondiente al tipo de auditoría
-    if audit.tipoAuditoria == 'I':
-        json_path = os.path.join(settings.BASE_DIR, 'auditoria', 'config', 'folder_structure_interna.json')
-    else:
-        json_path = os.path.join(settings.BASE_DIR, 'auditoria', 'config', 'folder_structure_financiera.json')
-    
-    try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            estructura_carpetas = json.load(f)
-    except Exception:
-        estructura_carpetas = {}  # Estructura vacía en caso de error
+    estructura_carpetas = cargar_estructura_carpetas(is_internal=audit.tipoAuditoria == 'I')
     
     # Usuario verificado si es administrador o tiene plan Mensual o Anual
-    user_verified = request.user.username == 'administrador' or (hasattr(request.user, 'plan') and request.user.plan in ['M', 'A'])
+    user_verified = usuario_verificado(request.user)
     
     # Generar HTML de la estructura con la información de verificación
     estructura_html = generar_html_estructura(estructura_carpetas, audit_id, user_verified=user_verified)
@@ -5,7 +5,7 @@ Contiene imports comunes para las vistas.
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils.safestring import mark_safe
-from django.http import FileResponse, HttpResponse, JsonResponse
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.conf import settings
 from audits.models import Audit
 from django.contrib.auth.decorators import login_required
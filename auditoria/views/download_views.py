@@ -5,13 +5,63 @@ Contiene funciones para descargar documentos por carpeta/archivo y por patrón.
 
 import os
 import urllib.parse
+from django.urls import reverse
 from .config import (
-    get_object_or_404, HttpResponse, FileResponse, mark_safe,
+    get_object_or_404, HttpResponse, FileResponse, StreamingHttpResponse, mark_safe,
     Audit, login_required, io,
-    modify_document_word, modify_document_excel, modify_document_excel_with_macros,
-    get_file_info_from_pattern
+    get_file_info_from_pattern, settings, JsonResponse
 )
-from .utils import get_template_path, crear_mensaje_error
+from .utils import (
+    get_template_path, crear_mensaje_error, crear_pagina_espera,
+    cargar_estructura_carpetas, iterar_archivos_estructura, usuario_verificado, es_carpeta_libre
+)
+from ..utils.render_cache import render_cache
+from ..utils.template_pool import template_pool
+from ..utils.document_render import render_with_cache
+from ..utils.render_jobs import enqueue_render
+from ..utils.zip_export import stream_zip
+from ..models import RenderJob
+from user_management.decorators import superadmin_required
+
+CONTENT_TYPES = {
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.xlsm': 'application/vnd.ms-excel.sheet.macroEnabled.12',
+}
+
+def _document_response(template_path, filename, audit, allowed_extensions, request=None):
+    """
+    Construye la respuesta de descarga, usando la caché de documentos renderizados
+    cuando está habilitada. Los tipos no procesados se devuelven tal cual.
+
+    Con ``RENDER_JOBS_ENABLED`` los documentos que no están en caché se encolan
+    y se responde con una página que espera el resultado (ver utils.render_jobs).
+    """
+    extension = os.path.splitext(filename.lower())[1]
+    if extension not in allowed_extensions:
+        return FileResponse(
+            open(template_path, 'rb'),
+            as_attachment=True,
+            filename=os.path.basename(template_path)
+        )
+
+    if getattr(settings, 'RENDER_JOBS_ENABLED', False) and request is not None:
+        # Con caché válida se responde en el momento; si no, se encola
+        data = render_cache.peek(template_path, audit) if getattr(settings, 'RENDER_CACHE_ENABLED', True) else None
+        if data is None:
+            job = enqueue_render(audit, template_path, filename, user=request.user)
+            return HttpResponse(mark_safe(crear_pagina_espera(job)), status=202)
+        cache_status = 'HIT'
+    else:
+        data, cache_status = render_with_cache(template_path, filename, audit)
+
+    return _file_response(data, template_path, extension, cache_status)
+
+def _file_response(data, template_path, extension, cache_status):
+    response = FileResponse(io.BytesIO(data), as_attachment=True, filename=os.path.basename(template_path))
+    response['Content-Type'] = CONTENT_TYPES[extension]
+    response['X-Render-Cache'] = cache_status
+    return response
 
 @login_required
 def download_document(request, audit_id, folder, filename):
@@ -28,37 +78,7 @@ def download_document(request, audit_id, folder, filename):
     if not template_path or not os.path.exists(template_path):
         return HttpResponse(f'Plantilla no encontrada: {folder}/{filename}', status=404)
     try:
-        buffer = io.BytesIO()
-        if filename.lower().endswith('.docx'):
-            doc = modify_document_word(template_path, audit)
-            doc.save(buffer)
-            content_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        elif filename.lower().endswith('.xlsx'):
-            wb = modify_document_excel(template_path, audit)
-            wb.save(buffer)
-            content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        elif filename.lower().endswith('.xlsm'):
-            # modify_document_excel_with_macros devuelve una ruta de archivo, no un objeto workbook
-            processed_file_path = modify_document_excel_with_macros(template_path, audit)
-            # Leer el contenido del archivo procesado en el buffer
-            with open(processed_file_path, 'rb') as f:
-                buffer.write(f.read())
-            buffer.seek(0)
-            content_type = 'application/vnd.ms-excel.sheet.macroEnabled.12'
-        else:
-            # Tipo no procesado, se devuelve el archivo tal cual
-            return FileResponse(
-                open(template_path, 'rb'),
-                as_attachment=True,
-                filename=os.path.basename(template_path)
-            )
-
-        buffer.seek(0)
-        response = FileResponse(buffer, as_attachment=True, filename=os.path.basename(template_path))
-        response['Content-Type'] = content_type
-
-        return response
-
+        return _document_response(template_path, filename, audit, ('.docx', '.xlsx', '.xlsm'), request)
     except Exception as e:
         return HttpResponse(f'Error al descargar documento: {str(e)}', status=500)
 
@@ -135,29 +155,7 @@ def download_document_by_pattern(request, audit_id, pattern):
         
         # Procesar y devolver el documento
         try:
-            buffer = io.BytesIO()
-            if filename.lower().endswith('.docx'):
-                doc = modify_document_word(template_path, audit)
-                doc.save(buffer)
-                content_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-            elif filename.lower().endswith('.xlsx'):
-                wb = modify_document_excel(template_path, audit)
-                wb.save(buffer)
-                content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            else:
-                # Tipo no procesado, se devuelve el archivo tal cual
-                return FileResponse(
-                    open(template_path, 'rb'),
-                    as_attachment=True,
-                    filename=os.path.basename(template_path)
-                )
-
-            buffer.seek(0)
-            response = FileResponse(buffer, as_attachment=True, filename=os.path.basename(template_path))
-            response['Content-Type'] = content_type
-
-            return response
-
+            return _document_response(template_path, filename, audit, ('.docx', '.xlsx'), request)
         except Exception as e:
             mensaje_error = crear_mensaje_error(
                 "Error al procesar documento",
@@ -171,3 +169,107 @@ def download_document_by_pattern(request, audit_id, pattern):
             f"Ocurrió un error al procesar su solicitud: {str(e)}"
         )
         return HttpResponse(mark_safe(mensaje_error), status=500)
+
+@login_required
+def download_audit_zip(request, audit_id):
+    """
+    Descarga todos los documentos de la auditoría (o los de una carpeta, con
+    ``?carpeta=``) en un ZIP. Los documentos se generan en paralelo y el ZIP
+    se envía a medida que cada uno termina (ver utils.zip_export).
+    """
+    user_role = request.user.role.name
+    try:
+        if user_role == "audit_manager":
+            audit = Audit.objects.get(id=audit_id, audit_manager=request.user)
+        else:
+            audit = Audit.objects.get(id=audit_id, assigned_users=request.user)
+    except Audit.DoesNotExist:
+        mensaje_error = crear_mensaje_error(
+            "Auditoría no encontrada",
+            "La auditoría solicitada no existe o no tienes permisos para acceder a ella."
+        )
+        return HttpResponse(mark_safe(mensaje_error), status=404)
+
+    is_internal = audit.tipoAuditoria == 'I'
+    carpeta = request.GET.get('carpeta', '').strip('/')
+    user_verified = usuario_verificado(request.user)
+
+    archivos = []
+    estructura = cargar_estructura_carpetas(is_internal=is_internal)
+    for folder, filename in iterar_archivos_estructura(estructura):
+        if carpeta and folder != carpeta and not folder.startswith(carpeta + os.sep):
+            continue
+        # Mismas restricciones que los enlaces de la vista de detalle
+        if not (user_verified or es_carpeta_libre(folder)):
+            continue
+        template_path = get_template_path(folder, filename, is_internal=is_internal)
+        if template_path and os.path.exists(template_path):
+            archivos.append((f"{folder}/{filename}", template_path, filename))
+
+    if not archivos:
+        mensaje_error = crear_mensaje_error(
+            "Sin documentos",
+            "No hay documentos disponibles para descargar en esta auditoría."
+        )
+        return HttpResponse(mark_safe(mensaje_error), status=404)
+
+    response = StreamingHttpResponse(stream_zip(audit, archivos), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="auditoria_{audit.id}.zip"'
+    return response
+
+@login_required
+@superadmin_required
+def render_cache_stats(request):
+    """Devuelve los contadores de la caché de documentos y del pool de plantillas."""
+    stats = render_cache.stats()
+    stats['template_pool'] = template_pool.stats()
+    return JsonResponse(stats)
+
+def _job_for_user(request, job_id):
+    job = get_object_or_404(RenderJob.objects.select_related('audit'), id=job_id)
+    es_superadmin = request.user.role and request.user.role.name == "superadmin"
+    if job.user_id != request.user.id and not es_superadmin:
+        return None
+    return job
+
+@login_required
+def render_job_status(request, job_id):
+    """Devuelve el estado de un trabajo de generación para la página de espera."""
+    job = _job_for_user(request, job_id)
+    if job is None:
+        return JsonResponse({'error': 'Acceso restringido'}, status=403)
+    data = {
+        'id': job.id,
+        'estado': job.estado,
+        'intentos': job.intentos,
+        'max_intentos': job.max_intentos,
+        'error': job.error,
+        'segundos_espera': job.segundos_espera,
+        'segundos_render': job.segundos_render,
+    }
+    if job.estado == RenderJob.COMPLETADO:
+        data['url'] = reverse('render_job_download', args=[job.id])
+    return JsonResponse(data)
+
+@login_required
+def render_job_download(request, job_id):
+    """Descarga el documento generado por un trabajo terminado."""
+    job = _job_for_user(request, job_id)
+    if job is None:
+        mensaje_error = crear_mensaje_error(
+            "Acceso restringido",
+            "No tiene permisos para descargar este documento."
+        )
+        return HttpResponse(mark_safe(mensaje_error), status=403)
+    if job.estado != RenderJob.COMPLETADO or not os.path.exists(job.resultado):
+        mensaje_error = crear_mensaje_error(
+            "Documento no disponible",
+            f"El documento {job.filename} todavía no está listo o ya fue eliminado."
+        )
+        return HttpResponse(mark_safe(mensaje_error), status=404)
+    extension = os.path.splitext(job.filename.lower())[1]
+    response = FileResponse(
+        open(job.resultado, 'rb'), as_attachment=True, filename=os.path.basename(job.template_path)
+    )
+    response['Content-Type'] = CONTENT_TYPES[extension]
+    return response
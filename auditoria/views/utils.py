@@ -4,71 +4,22 @@ Contiene funciones de normalización, rutas, mensajes de error y generación de
 """
 
 import os
+import json
 import urllib.parse
-import unicodedata
 from django.conf import settings
+from django.urls import reverse
+from django.utils.html import escape
 
-def normalize_text(text):
-    """
-    Normaliza el texto removiendo tildes y caracteres especiales
-    """
-    # Normalizar Unicode y remover tildes
-    text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
-    # Convertir a minúsculas y remover espacios extras
-    return ' '.join(text.lower().split())
+from ..utils.template_index import normalize_text, template_index
 
 def get_template_path(folder, filename, is_internal=False):
     """
-    Obtiene la ruta completa de una plantilla
+    Obtiene la ruta completa de una plantilla.
+
+    La búsqueda (exacta, sin tildes ni mayúsculas, o sin extensión) se hace
+    sobre el índice en memoria de las plantillas (ver utils.template_index).
     """
-    # Determinar qué carpeta base usar según el tipo de auditoría
-    if is_internal:
-        base_path = os.path.join(settings.BASE_DIR, 'static', 'templates_base_interna')
-    else:
-        base_path = os.path.join(settings.BASE_DIR, 'static', 'templates_base_financiera')
-        
-    if folder:
-        # Normalizar la ruta usando os.path
-        folder = folder.replace('/', os.path.sep).replace('\\', os.path.sep)
-        current_path = base_path
-        # Dividir la ruta usando el separador correcto del sistema
-        folder_components = folder.split(os.path.sep)
-        # Navegar por cada componente de la carpeta
-        for component in folder_components:
-            if component:
-                current_path = os.path.join(current_path, component)
-                if not os.path.exists(current_path):
-                    # Buscar de forma case-insensitive y sin tildes
-                    parent_dir = os.path.dirname(current_path)
-                    if os.path.exists(parent_dir):
-                        found = False
-                        component_normalized = normalize_text(component)
-                        for item in os.listdir(parent_dir):
-                            if normalize_text(item) == component_normalized:
-                                current_path = os.path.join(parent_dir, item)
-                                found = True
-                                break
-                        if not found:
-                            return None
-        if os.path.exists(current_path):
-            # Primero intentar encontrar una coincidencia exacta
-            exact_path = os.path.join(current_path, filename)
-            if os.path.exists(exact_path):
-                return exact_path
-            # Si no hay coincidencia exacta, buscar de forma más flexible
-            filename_normalized = normalize_text(filename)
-            # Buscar recursivamente en la carpeta actual y subcarpetas
-            for root, dirs, files in os.walk(current_path):
-                for file in files:
-                    # Comparar nombres normalizados (sin tildes y case insensitive)
-                    if normalize_text(file) == filename_normalized:
-                        return os.path.join(root, file)        
-                    # Si aún no hay coincidencia, intentar comparar sin extensión
-                    filename_base = os.path.splitext(filename_normalized)[0]
-                    file_base = os.path.splitext(normalize_text(file))[0]
-                    if file_base == filename_base:
-                        return os.path.join(root, file)
-    return None
+    return template_index.resolve(folder, filename, is_internal=is_internal)
 
 def crear_mensaje_error(titulo, mensaje):
     """
@@ -114,6 +65,108 @@ def crear_mensaje_error(titulo, mensaje):
     </html>
     """
 
+def crear_pagina_espera(job):
+    """
+    Crea la página que se muestra mientras un trabajo de generación está en la
+    cola. Consulta el estado cada segundo y descarga el archivo al terminar.
+
+    Args:
+        job: RenderJob encolado
+
+    Returns:
+        str: HTML de la página de espera
+    """
+    status_url = reverse('render_job_status', args=[job.id])
+    return f"""
+    <html>
+    <head>
+        <title>Generando documento</title>
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 20px; line-height: 1.6; }}
+            .container {{ max-width: 800px; margin: 0 auto; padding: 20px; border: 1px solid #ddd; border-radius: 5px; }}
+            h1 {{ color: #3498db; }}
+            .info {{ background-color: #f8f9fa; padding: 15px; border-radius: 4px; }}
+            .button {{ 
+                display: inline-block;
+                background-color: #3498db;
+                color: white;
+                padding: 10px 15px;
+                text-decoration: none;
+                border-radius: 4px;
+                margin-top: 15px;
+            }}
+            .button:hover {{ background-color: #2980b9; }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>Generando documento</h1>
+            <div class="info">
+                <p>Se está generando <strong>{escape(job.filename)}</strong>. La descarga comenzará automáticamente.</p>
+                <p id="estado">En cola...</p>
+            </div>
+            <a href="/auditoria/" class="button">Volver a auditorías</a>
+        </div>
+        <script>
+            (function consultar() {{
+                fetch("{status_url}", {{credentials: "same-origin"}})
+                    .then(function (r) {{ return r.json(); }})
+                    .then(function (job) {{
+                        var estado = document.getElementById("estado");
+                        if (job.estado === "COMPLETADO") {{
+                            estado.textContent = "Listo.";
+                            window.location = job.url;
+                        }} else if (job.estado === "FALLIDO") {{
+                            estado.textContent = "No se pudo generar el documento: " + job.error;
+                        }} else {{
+                            estado.textContent = job.estado === "EN_PROCESO"
+                                ? "Procesando (intento " + (job.intentos + 1) + " de " + job.max_intentos + ")..."
+                                : "En cola...";
+                            setTimeout(consultar, 1000);
+                        }}
+                    }})
+                    .catch(function () {{ setTimeout(consultar, 3000); }});
+            }})();
+        </script>
+    </body>
+    </html>
+    """
+
+def cargar_estructura_carpetas(is_internal=False):
+    """
+    Lee la estructura de carpetas y archivos del tipo de auditoría.
+
+    Returns:
+        dict: Estructura del JSON o un diccionario vacío si no se puede leer
+    """
+    nombre = 'folder_structure_interna.json' if is_internal else 'folder_structure_financiera.json'
+    json_path = os.path.join(settings.BASE_DIR, 'auditoria', 'config', nombre)
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}  # Estructura vacía en caso de error
+
+def iterar_archivos_estructura(estructura, current_path=''):
+    """Recorre la estructura de carpetas y devuelve pares (carpeta, archivo) en orden."""
+    for nombre, contenido in estructura.items():
+        if isinstance(contenido, dict):  # Es una carpeta
+            new_path = os.path.join(current_path, nombre) if current_path else nombre
+            yield from iterar_archivos_estructura(contenido, new_path)
+        elif isinstance(contenido, list):  # Es un archivo
+            yield current_path, nombre
+
+def usuario_verificado(user):
+    """Usuario verificado si es administrador o tiene plan Mensual o Anual."""
+    return user.username == 'administrador' or (hasattr(user, 'plan') and user.plan in ['M', 'A'])
+
+def es_carpeta_libre(current_path):
+    """Carpetas cuyos archivos se pueden descargar aunque el usuario no esté verificado."""
+    return bool(current_path and
+                ("1 CAJA Y BANCOS" in current_path or
+                 "3 INVERSIONES" in current_path or
+                 "2 AUDITORIA PROCESOS CONTABILIDAD" in current_path))
+
 def generar_html_estructura(estructura, audit_id, current_path='', user_verified=False):
     """
     Genera HTML recursivo para la estructura de carpetas.
@@ -157,10 +210,7 @@ def generar_html_estructura(estructura, audit_id, current_path='', user_verified
             download_url = f"/auditoria/download/{audit_id}/{folder_encoded}/{filename_encoded}"
             
             # aunque el usuario no esté verificado
-            is_investment_folder = (current_path and 
-                                     ("1 CAJA Y BANCOS" in current_path or 
-                                      "3 INVERSIONES" in current_path or
-                                      "2 AUDITORIA PROCESOS CONTABILIDAD" in current_path))
+            is_investment_folder = es_carpeta_libre(current_path)
             
             # Mostrar con enlace si el usuario está verificado o si el archivo está en 3 INVERSIONES
             if user_verified or is_investment_folder:
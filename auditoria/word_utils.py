@@ -1,18 +1,55 @@
-from docx import Document
 from .processors.word import process_standard_text, process_tables
+from .processors.shared.text_replacer import get_replacement_engine
 from .utils.replacements_utils import (
     get_replacements_config,
     get_tables_config,
     build_replacements_dict
 )
+from .utils.template_pool import open_document_template
+from .utils.placeholder_map import ubicaciones_documento
+from .utils.template_fast_path import render_docx_text_only
 import os
 
 def modify_document_word(template_path, audit):
     """
     Modifica el documento Word con los datos de la auditoría
     """
-    doc = Document(template_path)
+    doc = open_document_template(template_path)
 
+    replacements, replacements_config = _build_replacements(audit)
+    tables_config = get_tables_config()
+
+    # Solo los párrafos y celdas con placeholders (None: documento completo)
+    ubicaciones = ubicaciones_documento(doc, template_path, replacements, replacements_config, tables_config)
+
+    # Procesar texto y tablas
+    process_standard_text(doc, replacements, replacements_config, ubicaciones)
+
+    # Extraer el nombre del documento para los hipervínculos
+    document_name = os.path.basename(template_path)
+    process_tables(doc, replacements, tables_config, document_name, template_path, audit.id, ubicaciones)
+    
+    return doc
+
+def render_document_word_text_only(template_path, audit):
+    """
+    Genera un .docx sin tablas ni hipervínculos reescribiendo su XML, sin cargar
+    el Document completo (ver utils.template_fast_path).
+
+    Returns:
+        bytes | None: Contenido del archivo o None si requiere la ruta completa
+    """
+    replacements, replacements_config = _build_replacements(audit)
+    engine = get_replacement_engine(replacements, replacements_config.get("patrones_regex", []))
+    return render_docx_text_only(template_path, engine)
+
+def _build_replacements(audit):
+    """
+    Construye los reemplazos de la auditoría.
+
+    Returns:
+        tuple: (replacements, replacements_config)
+    """
     # Formatear las fechas usando los nombres correctos de los campos
     fecha_inicio = audit.fechaInit.strftime('%d de %B de %Y') if audit.fechaInit else '01 de Enero de 2024'
     fecha_fin = audit.fechaEnd.strftime('%d de %B de %Y') if audit.fechaEnd else '31 de Diciembre de 2024'
@@ -36,18 +73,9 @@ def modify_document_word(template_path, audit):
     if len(fecha_fin_parts) >= 4:
         fecha_fin = f"{fecha_fin_parts[0].zfill(2)} de {fecha_fin_parts[2].capitalize()} de {fecha_fin_parts[4]}"
 
-    # Cargar configuraciones
+    # Cargar configuración
     replacements_config = get_replacements_config()
-    tables_config = get_tables_config()
 
     # Construir reemplazos
     replacements = build_replacements_dict(replacements_config, audit, fecha_inicio, fecha_fin)
-
-    # Procesar texto y tablas
-    process_standard_text(doc, replacements, replacements_config)
-
-    # Extraer el nombre del documento para los hipervínculos
-    document_name = os.path.basename(template_path)
-    process_tables(doc, replacements, tables_config, document_name, template_path, audit.id)
-    
-    return doc
+    return replacements, replacements_config
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AuditsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "audits"
+
+    def ready(self):
+        # Invalida los valores cacheados de los context processors (common.shared_context)
+        from . import signals  # noqa: F401
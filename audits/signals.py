@@ -0,0 +1,10 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from common import shared_context
+from .models import Audit
+
+
+@receiver([post_save, post_delete], sender=Audit)
+@receiver(m2m_changed, sender=Audit.assigned_users.through)
+def invalidate_assigned_audits(sender, **kwargs):
+    shared_context.invalidar(shared_context.ASSIGNED_AUDITS)
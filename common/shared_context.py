@@ -0,0 +1,129 @@
+"""
+Valores compartidos por los context processors, cacheados por proceso.
+
+Los context processors corren en cada render de plantilla. Los valores que
+salen de la base de datos (meses, estados actuales y auditorías asignadas) se
+guardan aquí por grupo:
+
+- ``tools.signals`` invalida ``months`` y ``current_statuses`` cuando se
+  guarda o borra un ``Months`` o un ``CurrentStatus``,
+- ``audits.signals`` invalida ``assigned_audits`` cuando cambia una
+  auditoría o sus usuarios asignados.
+
+Las señales solo llegan al proceso que hizo el cambio; en los demás, cada
+valor vence a los ``SHARED_CONTEXT_TTL_SECONDS`` segundos (0 desactiva la
+caché).
+
+Las URLs de la barra lateral también se resuelven una sola vez
+(``reverse_cacheado``).
+"""
+
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.urls import get_script_prefix, get_urlconf, reverse
+
+MONTHS = "months"
+CURRENT_STATUSES = "current_statuses"
+ASSIGNED_AUDITS = "assigned_audits"
+
+# Entradas a partir de las cuales se descartan las vencidas al guardar
+_MAX_ENTRADAS = 1000
+
+_lock = threading.Lock()
+# (grupo, clave) -> (generación, vence, valor)
+_valores = {}
+# grupo -> generación; invalidar un grupo la incrementa
+_generaciones = {}
+
+
+def _ttl() -> float:
+    return float(getattr(settings, "SHARED_CONTEXT_TTL_SECONDS", 60))
+
+
+def _obtener(grupo, clave, cargar):
+    """Valor cacheado de ``(grupo, clave)``; si no está o venció, lo calcula con ``cargar()``."""
+    ttl = _ttl()
+    if ttl <= 0:
+        return cargar()
+
+    ahora = time.monotonic()
+    with _lock:
+        generacion = _generaciones.get(grupo, 0)
+        cached = _valores.get((grupo, clave))
+    if cached is not None and cached[0] == generacion and cached[1] > ahora:
+        return cached[2]
+
+    valor = cargar()
+    with _lock:
+        # Si el grupo se invalidó mientras se cargaba, el valor puede estar viejo
+        if _generaciones.get(grupo, 0) == generacion:
+            if len(_valores) >= _MAX_ENTRADAS:
+                for vencida in [k for k, v in _valores.items() if v[1] <= ahora]:
+                    del _valores[vencida]
+            _valores[(grupo, clave)] = (generacion, ahora + ttl, valor)
+    return valor
+
+
+def invalidar(*grupos) -> None:
+    """Descarta los valores de los grupos indicados en este proceso."""
+    with _lock:
+        for grupo in grupos:
+            _generaciones[grupo] = _generaciones.get(grupo, 0) + 1
+        for clave in [k for k in _valores if k[0] in grupos]:
+            del _valores[clave]
+
+
+def clear_shared_context() -> None:
+    with _lock:
+        _valores.clear()
+        _generaciones.clear()
+    _reverse_cacheado.cache_clear()
+
+
+# ----------------------------------------------------------------------
+#  Valores
+# ----------------------------------------------------------------------
+
+def months():
+    from tools.models import Months
+
+    return _obtener(MONTHS, None, lambda: list(Months.objects.all()))
+
+
+def current_statuses():
+    from tools.models import CurrentStatus
+
+    return _obtener(CURRENT_STATUSES, None, lambda: list(CurrentStatus.objects.all()))
+
+
+def assigned_audits(req):
+    """Auditorías asignadas al usuario de la petición (lista vacía si no tiene)."""
+    from audits.utils import get_assigned_audits
+
+    user = req.user
+    if not user.is_authenticated:
+        return []
+    role = user.role.name
+
+    def cargar():
+        audits = get_assigned_audits(role, req)
+        return list(audits) if audits is not None else []
+
+    return _obtener(ASSIGNED_AUDITS, (user.pk, role), cargar)
+
+
+# ----------------------------------------------------------------------
+#  URLs
+# ----------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def _reverse_cacheado(route, urlconf, prefix):
+    return reverse(route, urlconf=urlconf)
+
+
+def reverse_cacheado(route: str) -> str:
+    """``reverse(route)`` sin argumentos, resuelto una vez por urlconf y prefijo."""
+    return _reverse_cacheado(route, get_urlconf(), get_script_prefix())
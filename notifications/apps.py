@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class NotificationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notifications'
+
+    def ready(self):
+        # Mantiene el contador de notificaciones sin leer (notifications.unread_counter)
+        from . import signals  # noqa: F401
@@ -0,0 +1,142 @@
+"""
+Notificaciones en vivo (server-sent events).
+
+``notifications.views.notifications_stream`` mantiene una conexión abierta por
+pestaña y envía cada ``NotificationStatus`` nuevo del usuario en cuanto se
+confirma la transacción que lo creó (``publish_notification_statuses``).
+
+La distribución de mensajes pasa por un broker intercambiable
+(``NOTIFICATIONS_BROKER``, ruta a la clase):
+
+- ``InProcessBroker`` (por defecto) reparte los mensajes entre las conexiones
+  del propio proceso. Solo alcanza a los usuarios conectados al mismo worker
+  que creó la notificación; con varios workers hay que reemplazarlo por un
+  broker compartido con la misma interfaz (``subscribe`` / ``unsubscribe`` /
+  ``publish``).
+
+Las conexiones son corrutinas esperando en una cola, así que bajo ASGI un
+worker sostiene muchas conexiones inactivas sin ocupar un hilo por cada una.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BROKER = "notifications.live.InProcessBroker"
+
+# Mensajes pendientes por conexión; si el cliente no los lee se descartan
+_MAX_PENDIENTES = 100
+
+
+class Subscription:
+    """Cola de mensajes de una conexión, ligada al event loop que la lee."""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=_MAX_PENDIENTES)
+
+    def put(self, message) -> None:
+        # Se llama desde cualquier hilo; la cola solo se toca desde su loop
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            logger.warning("Conexión del usuario %s saturada; se descarta una notificación", self.user_id)
+
+    async def get(self, timeout: float):
+        """Siguiente mensaje, o None si no llega ninguno en ``timeout`` segundos."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessBroker:
+    """Pub/sub en memoria entre las conexiones de este proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # user_id -> suscripciones abiertas
+        self._subscriptions = {}
+
+    def subscribe(self, user_id) -> Subscription:
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id, message) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.put(message)
+            except RuntimeError:
+                # El loop de la conexión ya se cerró
+                self.unsubscribe(subscription)
+
+
+@lru_cache(maxsize=None)
+def _broker(path):
+    return import_string(path)()
+
+
+def get_broker():
+    return _broker(getattr(settings, "NOTIFICATIONS_BROKER", DEFAULT_BROKER))
+
+
+def notification_status_message(notification_status) -> dict:
+    """Datos que recibe el navegador por cada notificación nueva."""
+    notification = notification_status.notification
+    return {
+        "id": notification_status.id,
+        "note": notification.note,
+        "audit": notification.audit.title,
+        "notifier": notification.notifier.get_full_name(),
+        "created_at": notification.created_at.isoformat(),
+    }
+
+
+def publish_notification_statuses(notification_statuses) -> None:
+    """
+    Publica los estados a sus usuarios cuando se confirme la transacción
+    actual (si se revierte, no se envía nada).
+    """
+    messages = [
+        (notification_status.user_id, notification_status_message(notification_status))
+        for notification_status in notification_statuses
+    ]
+
+    def publish():
+        broker = get_broker()
+        for user_id, message in messages:
+            broker.publish(user_id, message)
+
+    transaction.on_commit(publish)
+
+
+def format_event(message) -> str:
+    """Evento SSE ``notification`` con el mensaje en JSON."""
+    data = json.dumps(message, ensure_ascii=False)
+    event_id = f"id: {message['id']}\n" if message.get("id") is not None else ""
+    return f"{event_id}event: notification\ndata: {data}\n\n"
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificationstatus',
+            index=models.Index(fields=['user', 'is_read'], name='notif_status_user_read_idx'),
+        ),
+    ]
@@ -39,33 +39,52 @@ class NotificationStatus(models.Model):
     is_read = models.BooleanField(default=False)
     readed_date = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        # Bandeja de cada usuario, filtrada por leídas / no leídas
+        indexes = [
+            models.Index(fields=["user", "is_read"], name="notif_status_user_read_idx")
+        ]
+
     def __str__(self):
         return f"{self.user.first_name} {self.user.last_name} - {self.notification.note} - {'Leída' if self.is_read else 'Sin leer'}"
 
     def read_notification(self):
         self.is_read = True
         self.readed_date = timezone.now()
-        self.save()
+        self.save(update_fields=["is_read", "readed_date"])
 
-    def save(self, *args, **kwargs):
+    @staticmethod
+    def check_notified_user(user, notifier_role_name, audit_manager_id, is_assigned):
+        """
+        Valida que el notificador pueda notificar a ``user`` en la auditoría.
+
+        Recibe los datos ya resueltos (rol del notificador, jefe de auditoría y
+        si ``user`` tiene la auditoría asignada) para validar varios
+        destinatarios sin consultar la base de datos por cada uno.
+        """
+        role_name = user.role.name
         if (
-            self.user not in self.notification.audit.assigned_users.all()
-            and self.user.role.name == "auditor"
-            or self.user.role.name == "audit_manager"
-            and self.user.id != self.notification.audit.audit_manager.id
+            not is_assigned
+            and role_name == "auditor"
+            or role_name == "audit_manager"
+            and user.id != audit_manager_id
         ):
-            raise AuditNotAssignantToUser(self.user.get_full_name())
-        
+            raise AuditNotAssignantToUser(user.get_full_name())
+
         # Validar que la comunicación sea solo entre audit_manager y auditor
-        if (
-            self.notification.notifier.role.name == "auditor"
-            and self.user.role.name != "audit_manager"
-        ):
+        if notifier_role_name == "auditor" and role_name != "audit_manager":
             raise AuditorInvalidNotifierError()
-        elif (
-            self.notification.notifier.role.name == "audit_manager"
-            and self.user.role.name != "auditor"
-        ):
+        elif notifier_role_name == "audit_manager" and role_name != "auditor":
             raise SupervisorInvalidNotifierError()
-            
+
+    def save(self, *args, **kwargs):
+        # El destinatario se valida al crear el estado; marcarlo como leído no lo cambia
+        if self._state.adding:
+            audit = self.notification.audit
+            self.check_notified_user(
+                self.user,
+                self.notification.notifier.role.name,
+                audit.audit_manager_id,
+                audit.assigned_users.filter(pk=self.user.pk).exists(),
+            )
         super().save(*args, **kwargs)
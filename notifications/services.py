@@ -1,6 +1,9 @@
+from datetime import datetime
 from audits.models import Audit
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef, Prefetch, Q
 from .models import Notification, NotificationStatus
+from . import live, unread_counter
 from audits.errors import AuditDoNotExits, AuditsNullError
 from notifications.errors import (
     InvalidNotifiedsNotificationError,
@@ -16,6 +19,43 @@ from users.errors import UserDoNotExits, UserUnauthorized
 User = get_user_model()
 
 
+def _users_with_audit_assignment(audit):
+    """Usuarios con su rol y ``is_assigned``: si tienen la auditoría asignada."""
+    return User.objects.select_related("role").annotate(
+        is_assigned=Exists(
+            Audit.assigned_users.through.objects.filter(
+                audit_id=audit.id, user_id=OuterRef("pk")
+            )
+        )
+    )
+
+
+def _bulk_create_notification_status(notification, users_to_notify):
+    """
+    Valida y crea los estados de la notificación para todos los usuarios en un
+    solo INSERT. Los usuarios deben venir de ``_users_with_audit_assignment``.
+    """
+    notifier_role_name = notification.notifier.role.name
+    audit_manager_id = notification.audit.audit_manager_id
+    for user_to_notify in users_to_notify:
+        NotificationStatus.check_notified_user(
+            user_to_notify,
+            notifier_role_name,
+            audit_manager_id,
+            user_to_notify.is_assigned,
+        )
+
+    notification_statuses = NotificationStatus.objects.bulk_create(
+        [
+            NotificationStatus(notification=notification, user=user_to_notify)
+            for user_to_notify in users_to_notify
+        ]
+    )
+    unread_counter.add_unread(user_to_notify.id for user_to_notify in users_to_notify)
+    live.publish_notification_statuses(notification_statuses)
+    return notification_statuses
+
+
 def create_multiple_notification_status(
     notification,
     notifieds_ids: list[str],
@@ -27,15 +67,19 @@ def create_multiple_notification_status(
         if not notification:
             raise NotificationDoNotExits()
 
-        for id in notifieds_ids:
-            user_to_notify = User.objects.get(id=id)
+        # Sin repetidos y en el orden recibido
+        notifieds_ids = list(dict.fromkeys(int(id) for id in notifieds_ids))
+        users_to_notify = _users_with_audit_assignment(notification.audit).in_bulk(
+            notifieds_ids
+        )
 
-            if not user_to_notify:
+        for id in notifieds_ids:
+            if id not in users_to_notify:
                 raise NotifiedsNotificatonDoNotExitsError(id)
 
-            NotificationStatus.objects.create(
-                notification=notification, user=user_to_notify
-            )
+        _bulk_create_notification_status(
+            notification, [users_to_notify[id] for id in notifieds_ids]
+        )
     except Exception as e:
         raise e
 
@@ -49,7 +93,11 @@ def create_notification_status(notification_id, notifier_id):
         if not user:
             raise NotifiedsNotificatonDoNotExitsError(notifier_id)
 
-        NotificationStatus.objects.create(notification=notification, user=user)
+        notification_status = NotificationStatus.objects.create(
+            notification=notification, user=user
+        )
+        unread_counter.add_unread([user.id])
+        live.publish_notification_statuses([notification_status])
     except Exception as e:
         raise e
 
@@ -66,7 +114,7 @@ def create_notification(audit_id, notifieds_ids, notifier_id, notification_note)
         if not notification_note:
             raise InvalidNoteNotificationError()
 
-        notifier = User.objects.get(id=notifier_id)
+        notifier = User.objects.select_related("role").get(id=notifier_id)
         if not notifier:
             raise NotifierDoNotExits()
 
@@ -78,10 +126,63 @@ def create_notification(audit_id, notifieds_ids, notifier_id, notification_note)
             notifier=notifier, audit=related_audit, note=notification_note
         )
 
-        if isinstance(notifieds_ids, list):
-            create_multiple_notification_status(new_notification, notifieds_ids)
-        else:
-            create_notification_status(new_notification, notifieds_ids)
+        if not isinstance(notifieds_ids, list):
+            notifieds_ids = [notifieds_ids]
+        create_multiple_notification_status(new_notification, notifieds_ids)
+    except Exception as e:
+        if new_notification:
+            new_notification.delete()
+        raise e
+
+
+def create_audit_notification(audit_id, notifier_id, notification_note):
+    """
+    Notifica a todos los usuarios de la auditoría (asignados y jefe de
+    auditoría) a los que el notificador puede notificar.
+    """
+    new_notification = None
+    try:
+        if not audit_id:
+            raise AuditsNullError()
+        if not notifier_id:
+            raise InvalidNotifierError()
+        if not notification_note:
+            raise InvalidNoteNotificationError()
+
+        notifier = User.objects.select_related("role").get(id=notifier_id)
+        if not notifier:
+            raise NotifierDoNotExits()
+
+        related_audit = Audit.objects.get(id=audit_id)
+        if not related_audit:
+            raise AuditDoNotExits()
+
+        notifier_role_name = notifier.role.name
+        users_to_notify = []
+        for user in (
+            _users_with_audit_assignment(related_audit)
+            .filter(Q(is_assigned=True) | Q(pk=related_audit.audit_manager_id))
+            .exclude(pk=notifier.pk)
+            .order_by("pk")
+        ):
+            try:
+                NotificationStatus.check_notified_user(
+                    user,
+                    notifier_role_name,
+                    related_audit.audit_manager_id,
+                    user.is_assigned,
+                )
+            except ValueError:
+                continue
+            users_to_notify.append(user)
+
+        if not users_to_notify:
+            raise InvalidNotifiedsNotificationError()
+
+        new_notification = Notification.objects.create(
+            notifier=notifier, audit=related_audit, note=notification_note
+        )
+        _bulk_create_notification_status(new_notification, users_to_notify)
     except Exception as e:
         if new_notification:
             new_notification.delete()
@@ -99,12 +200,74 @@ def mark_notification_as_read(user, notification_status_id: int):
         )
         if not notification_status_to_read:
             raise NotificationDoNotExits()
-        if notification_status_to_read.user.id != user.id:
+        if notification_status_to_read.user_id != user.id:
             raise UserUnauthorized()
 
+        was_unread = not notification_status_to_read.is_read
         notification_status_to_read.read_notification()
-        notification_status_to_read.save()
+        if was_unread:
+            unread_counter.remove_unread(user.id)
     except NotificationStatus.DoesNotExist as e:
         raise NotificationDoNotExits()
     except Exception as e:
         raise e
+
+
+# Filtros de la bandeja: valor de ?filter= -> is_read
+INBOX_FILTERS = {"readed": True, "not_readed": False}
+
+
+def encode_inbox_cursor(notification_status) -> str:
+    return f"{notification_status.notification.created_at.isoformat()}_{notification_status.id}"
+
+
+def decode_inbox_cursor(cursor):
+    """(created_at, id) del cursor, o None si no es válido."""
+    try:
+        created_at, id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(created_at), int(id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def get_notifications_inbox(user, filter=None, cursor=None, page_size=20):
+    """
+    Página de la bandeja de ``user``, de la notificación más reciente a la más
+    antigua (por fecha de creación e id del estado).
+
+    La paginación es por cursor: ``cursor`` es la posición del último estado de
+    la página anterior, así cada página cuesta lo mismo sin importar cuántas
+    notificaciones haya antes.
+
+    Returns:
+        tuple: (lista de estados de la página, cursor de la página siguiente o None)
+    """
+    notifications = (
+        NotificationStatus.objects.filter(user=user)
+        .select_related(
+            "notification__notifier",
+            "notification__audit__audit_manager__role",
+        )
+        .prefetch_related(
+            Prefetch(
+                "notification__audit__assigned_users",
+                queryset=User.objects.select_related("role"),
+            )
+        )
+        .order_by("-notification__created_at", "-id")
+    )
+    if filter in INBOX_FILTERS:
+        notifications = notifications.filter(is_read=INBOX_FILTERS[filter])
+
+    position = decode_inbox_cursor(cursor) if cursor else None
+    if position:
+        created_at, id = position
+        notifications = notifications.filter(
+            Q(notification__created_at__lt=created_at)
+            | Q(notification__created_at=created_at, id__lt=id)
+        )
+
+    # Un estado de más indica si hay página siguiente
+    page = list(notifications[: page_size + 1])
+    next_cursor = encode_inbox_cursor(page[page_size - 1]) if len(page) > page_size else None
+    return page[:page_size], next_cursor
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from . import unread_counter
+from .models import NotificationStatus
+
+
+@receiver(post_delete, sender=NotificationStatus)
+def invalidate_unread_count(sender, instance, **kwargs):
+    if not instance.is_read:
+        unread_counter.invalidate_unread(instance.user_id)
@@ -1,10 +1,25 @@
-from django.test import TestCase, Client
+import asyncio
+import json
+import threading
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from .models import Notification, NotificationStatus
 from django.contrib.auth import get_user_model
 from audits.models import Audit
 from django.urls import reverse
 from urllib.parse import urlencode
 from django.contrib.messages import get_messages
+from users.models import Roles
+from .errors import AuditNotAssignantToUser, NotifiedsNotificatonDoNotExitsError
+from .services import (
+    create_audit_notification,
+    create_notification,
+    mark_notification_as_read,
+)
+from .live import InProcessBroker, get_broker
+from .unread_counter import get_unread_count
 
 User = get_user_model()
 
@@ -234,3 +249,235 @@ class NotificationTestCase(TestCase):
                 for message in messages
             )
         )
+
+
+class NotificationFanOutTestCase(TestCase):
+    def setUp(self) -> None:
+        auditor_role = Roles.objects.create(name="auditor", verbose_name="Auditor")
+        manager_role = Roles.objects.create(name="audit_manager", verbose_name="Jefe de Auditoría")
+        self.audit_manager = User.objects.create_user(
+            username="audit_manager",
+            email="audit_manager@gmail.com",
+            role=manager_role,
+            password="123",
+        )
+        self.audit = Audit.objects.create(title="Audit", audit_manager=self.audit_manager)
+        self.auditors = User.objects.bulk_create(
+            User(username=f"auditor_{i}", email=f"auditor_{i}@gmail.com", role=auditor_role)
+            for i in range(50)
+        )
+        self.audit.assigned_users.add(*self.auditors)
+        self.not_assigned = User.objects.create_user(
+            username="not_assigned",
+            email="not_assigned@gmail.com",
+            role=auditor_role,
+            password="123",
+        )
+
+    def test_notifying_a_team_costs_a_fixed_number_of_queries(self):
+        # Notificador, auditoría, notificación, destinatarios e INSERT de los estados
+        with self.assertNumQueries(5):
+            create_notification(
+                self.audit.id,
+                [str(auditor.id) for auditor in self.auditors],
+                self.audit_manager.id,
+                "Nota",
+            )
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.notified_users.count(), 50)
+
+    def test_recipients_are_validated_before_creating_statuses(self):
+        with self.assertRaises(AuditNotAssignantToUser):
+            create_notification(
+                self.audit.id,
+                [str(self.auditors[0].id), str(self.not_assigned.id)],
+                self.audit_manager.id,
+                "Nota",
+            )
+        with self.assertRaises(NotifiedsNotificatonDoNotExitsError):
+            create_notification(self.audit.id, ["9999"], self.audit_manager.id, "Nota")
+
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(NotificationStatus.objects.exists())
+
+    def test_audit_notification_reaches_every_notifiable_user(self):
+        create_audit_notification(self.audit.id, self.audit_manager.id, "Nota")
+        notification = Notification.objects.get()
+        self.assertEqual(
+            set(notification.notified_users.values_list("id", flat=True)),
+            {auditor.id for auditor in self.auditors},
+        )
+
+        create_audit_notification(self.audit.id, self.auditors[0].id, "Respuesta")
+        answer = Notification.objects.get(note="Respuesta")
+        self.assertEqual(list(answer.notified_users.all()), [self.audit_manager])
+
+
+@override_settings(
+    NOTIFICATIONS_PAGE_SIZE=2,
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage",
+)
+class NotificationInboxTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.addCleanup(cache.clear)
+        auditor_role = Roles.objects.create(name="auditor", verbose_name="Auditor")
+        manager_role = Roles.objects.create(name="audit_manager", verbose_name="Jefe de Auditoría")
+        self.audit_manager = User.objects.create_user(
+            username="audit_manager",
+            email="audit_manager@gmail.com",
+            role=manager_role,
+            password="123",
+        )
+        self.auditor = User.objects.create_user(
+            username="auditor",
+            email="auditor@gmail.com",
+            role=auditor_role,
+            password="123",
+        )
+        self.audit = Audit.objects.create(title="Audit", audit_manager=self.audit_manager)
+        self.audit.assigned_users.add(self.auditor)
+        self.client.force_login(self.auditor)
+
+    def notify(self, count):
+        for i in range(count):
+            create_notification(self.audit.id, [str(self.auditor.id)], self.audit_manager.id, f"Nota {i}")
+
+    def test_pages_follow_the_cursor_from_newest_to_oldest(self):
+        self.notify(5)
+
+        notes = []
+        url = reverse("notifications")
+        while url:
+            response = self.client.get(url)
+            notes.extend(status.notification.note for status in response.context["notifications"])
+            next_cursor = response.context["next_cursor"]
+            url = f"{reverse('notifications')}?{urlencode({'cursor': next_cursor})}" if next_cursor else None
+
+        self.assertEqual(notes, [f"Nota {i}" for i in reversed(range(5))])
+
+    def test_page_queries_do_not_depend_on_the_number_of_notifications(self):
+        self.notify(1)
+        # Los valores cacheados del layout (common.shared_context) se cargan en la primera página
+        self.client.get(reverse("notifications"))
+        with CaptureQueriesContext(connection) as one:
+            self.client.get(reverse("notifications"))
+
+        self.notify(4)
+        with CaptureQueriesContext(connection) as page:
+            self.client.get(reverse("notifications"))
+
+        self.assertEqual(len(one), len(page))
+
+    def test_filters(self):
+        self.notify(3)
+        status = NotificationStatus.objects.filter(user=self.auditor).first()
+        mark_notification_as_read(self.auditor, status.id)
+
+        response = self.client.get(reverse("notifications"), {"filter": "readed"})
+        self.assertEqual([s.id for s in response.context["notifications"]], [status.id])
+
+        response = self.client.get(reverse("notifications"), {"filter": "not_readed"})
+        self.assertNotIn(status.id, [s.id for s in response.context["notifications"]])
+        self.assertEqual(len(response.context["notifications"]), 2)
+
+    def test_unread_counter_is_updated_on_create_and_read(self):
+        self.assertEqual(get_unread_count(self.auditor.id), 0)
+
+        self.notify(3)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(self.auditor.id), 3)
+
+        mark_notification_as_read(self.auditor, NotificationStatus.objects.filter(user=self.auditor).first().id)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(self.auditor.id), 2)
+
+        NotificationStatus.objects.filter(user=self.auditor, is_read=False).first().delete()
+        self.assertEqual(get_unread_count(self.auditor.id), 1)
+
+
+class RecordingBroker(InProcessBroker):
+    """Broker de prueba que además guarda lo publicado."""
+
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def publish(self, user_id, message):
+        self.published.append((user_id, message))
+        super().publish(user_id, message)
+
+
+class LiveNotificationsTestCase(TestCase):
+    def setUp(self) -> None:
+        auditor_role = Roles.objects.create(name="auditor", verbose_name="Auditor")
+        manager_role = Roles.objects.create(name="audit_manager", verbose_name="Jefe de Auditoría")
+        self.audit_manager = User.objects.create_user(
+            username="audit_manager",
+            email="audit_manager@gmail.com",
+            role=manager_role,
+            password="123",
+        )
+        self.auditor = User.objects.create_user(
+            username="auditor",
+            email="auditor@gmail.com",
+            role=auditor_role,
+            password="123",
+        )
+        self.audit = Audit.objects.create(title="Audit", audit_manager=self.audit_manager)
+        self.audit.assigned_users.add(self.auditor)
+
+    def test_broker_delivers_messages_published_from_other_threads(self):
+        broker = InProcessBroker()
+
+        async def receive():
+            subscription = broker.subscribe(self.auditor.id)
+            try:
+                self.assertIsNone(await subscription.get(0.01))
+                publisher = threading.Thread(target=broker.publish, args=(self.auditor.id, {"id": 1}))
+                publisher.start()
+                publisher.join()
+                return await subscription.get(1)
+            finally:
+                broker.unsubscribe(subscription)
+
+        self.assertEqual(asyncio.run(receive()), {"id": 1})
+        self.assertEqual(broker._subscriptions, {})
+
+    @override_settings(NOTIFICATIONS_BROKER="notifications.tests.RecordingBroker")
+    def test_statuses_are_published_after_commit(self):
+        broker = get_broker()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_notification(self.audit.id, [str(self.auditor.id)], self.audit_manager.id, "Nota")
+            self.assertEqual(broker.published, [])
+
+        status = NotificationStatus.objects.get()
+        [(user_id, message)] = broker.published
+        self.assertEqual(user_id, self.auditor.id)
+        self.assertEqual(message["id"], status.id)
+        self.assertEqual(message["note"], "Nota")
+        self.assertEqual(message["audit"], "Audit")
+
+    def test_stream_is_not_served_over_wsgi(self):
+        self.client.force_login(self.auditor)
+        response = self.client.get(reverse("notifications_stream"))
+        self.assertEqual(response.status_code, 204)
+
+    async def test_stream_sends_published_notifications(self):
+        response = await self.async_client.get(reverse("notifications_stream"))
+        self.assertEqual(response.status_code, 401)
+
+        await self.async_client.aforce_login(self.auditor)
+        response = await self.async_client.get(reverse("notifications_stream"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        events = response.streaming_content.__aiter__()
+        self.assertEqual(await anext(events), b"retry: 5000\n\n")
+        get_broker().publish(self.auditor.id, {"id": 7, "note": "Nota"})
+        event = (await anext(events)).decode()
+        await events.aclose()
+
+        self.assertTrue(event.startswith("id: 7\nevent: notification\n"))
+        self.assertEqual(json.loads(event.split("data: ", 1)[1]), {"id": 7, "note": "Nota"})
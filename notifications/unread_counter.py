@@ -0,0 +1,63 @@
+"""
+Contador de notificaciones sin leer de cada usuario.
+
+El badge de notificaciones se muestra en todas las páginas; en lugar de un
+COUNT por render, el total se guarda en la caché de Django:
+
+- la primera lectura lo calcula con un COUNT (usa el índice por usuario y
+  ``is_read``) y lo guarda,
+- ``notifications.services`` lo incrementa al crear notificaciones y lo
+  decrementa al marcarlas como leídas,
+- ``notifications.signals`` lo descarta cuando se borra un estado sin leer.
+
+Si el valor no está en la caché, incrementar o decrementar no hace nada: se
+recalcula en la siguiente lectura. Con cachés por proceso (LocMemCache) los
+demás procesos lo ven actualizado a los ``NOTIFICATIONS_UNREAD_CACHE_TIMEOUT``
+segundos como mucho.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY = "notifications:unread:{}"
+
+
+def _timeout() -> int:
+    return getattr(settings, "NOTIFICATIONS_UNREAD_CACHE_TIMEOUT", 300)
+
+
+def _key(user_id) -> str:
+    return KEY.format(user_id)
+
+
+def get_unread_count(user_id) -> int:
+    count = cache.get(_key(user_id))
+    if count is None:
+        from .models import NotificationStatus
+
+        count = NotificationStatus.objects.filter(user_id=user_id, is_read=False).count()
+        cache.set(_key(user_id), count, _timeout())
+    return count
+
+
+def _adjust(user_id, delta: int) -> None:
+    try:
+        count = cache.incr(_key(user_id), delta)
+    except ValueError:
+        # No está en la caché: se calcula en la siguiente lectura
+        return
+    if count < 0:
+        cache.delete(_key(user_id))
+
+
+def add_unread(user_ids) -> None:
+    for user_id in user_ids:
+        _adjust(user_id, 1)
+
+
+def remove_unread(user_id) -> None:
+    _adjust(user_id, -1)
+
+
+def invalidate_unread(*user_ids) -> None:
+    cache.delete_many([_key(user_id) for user_id in user_ids])
@@ -4,6 +4,7 @@ from notifications import views
 urlpatterns = [
     path("", views.notifications, name="notifications"),
     path("crear/", views.create_notification_view, name="create_notification"),
+    path("stream/", views.notifications_stream, name="notifications_stream"),
     path(
         "mark_as_read/<int:notification_status_id>/",
         views.mark_notification_as_read,
@@ -1,17 +1,24 @@
+import time
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.conf import settings
 
 from users.models import Roles
-from .models import NotificationStatus
 from django.core.serializers import serialize
 from django.contrib.auth import get_user_model
 from audits.models import Audit
 from notifications.services import (
+    INBOX_FILTERS,
+    create_audit_notification,
     create_notification,
+    get_notifications_inbox,
     mark_notification_as_read as mark_notification_as_read_func,
 )
 from .const import CREATE_NOTIFICATION_ERRORS_INSTANCES
+from .live import format_event, get_broker
 import json
 from users.utils import user_to_dict
 from audits.utils import audit_to_dict
@@ -38,9 +45,13 @@ def push_notification(req):
     note = req.POST.get("notification_note")
     audit_id = req.POST.get("audit_id")
     notifieds_ids = req.POST.getlist("notifieds_ids")
+    notify_all = req.POST.get("notify_all") == "on"
 
     try:
-        create_notification(audit_id, notifieds_ids, req.user.id, note)
+        if notify_all:
+            create_audit_notification(audit_id, req.user.id, note)
+        else:
+            create_notification(audit_id, notifieds_ids, req.user.id, note)
         messages.success(req, "La notificación fue creada correctamente.")
         return redirect("create_notification")
     except ValueError as e:
@@ -87,15 +98,20 @@ def mark_notification_as_read(req, notification_status_id):
 
 @login_required
 def notifications_page(req):
-    notifications = NotificationStatus.objects.filter(user=req.user)
-    data = {"notifications": notifications}
-
-    if filter == "readed":
-        filter_notifications = notifications.filter(is_read=True)
-        data["notifications"] = filter_notifications
-    elif filter == "not_readed":
-        filter_notifications = notifications.filter(is_read=False)
-        data["notifications"] = filter_notifications
+    filter = req.GET.get("filter")
+    if filter not in INBOX_FILTERS:
+        filter = None
+    cursor = req.GET.get("cursor")
+
+    notifications, next_cursor = get_notifications_inbox(
+        req.user, filter, cursor, settings.NOTIFICATIONS_PAGE_SIZE
+    )
+    data = {
+        "notifications": notifications,
+        "filter": filter,
+        "cursor": cursor,
+        "next_cursor": next_cursor,
+    }
 
     return render(req, "notifications/notifications.html", data)
 
@@ -143,3 +159,39 @@ def create_notification_page(req):
     }
 
     return render(req, "notifications/create-notification.html", data)
+
+
+async def notifications_stream(req):
+    """
+    Notificaciones nuevas del usuario como server-sent events (notifications.live).
+
+    Solo bajo ASGI: con WSGI la respuesta ocuparía un hilo por conexión, así
+    que se responde 204 y el navegador no vuelve a intentar.
+    """
+    if not isinstance(req, ASGIRequest):
+        return HttpResponse(status=204)
+    user = await req.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+
+    return StreamingHttpResponse(
+        _notification_events(user.pk),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _notification_events(user_id):
+    broker = get_broker()
+    subscription = broker.subscribe(user_id)
+    heartbeat = settings.NOTIFICATIONS_STREAM_HEARTBEAT_SECONDS
+    # La conexión se cierra cada cierto tiempo y el navegador se reconecta solo
+    closes_at = time.monotonic() + settings.NOTIFICATIONS_STREAM_MAX_SECONDS
+    try:
+        yield "retry: 5000\n\n"
+        while time.monotonic() < closes_at:
+            message = await subscription.get(heartbeat)
+            # El comentario mantiene viva la conexión en los proxies
+            yield format_event(message) if message is not None else ": ping\n\n"
+    finally:
+        broker.unsubscribe(subscription)
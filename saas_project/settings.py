@@ -81,6 +81,7 @@ TEMPLATES = [
                 "common.context_processors.is_choose_new_audit_path",
                 "common.context_processors.months_processor",
                 "common.context_processors.current_statuses_processor",
+                "common.context_processors.unread_notifications_processor",
             ],
         },
     },
@@ -128,6 +129,60 @@ AUTHENTICATION_BACKENDS = [
     "django.contrib.auth.backends.ModelBackend",
 ]
 
+# Caché en disco de documentos renderizados (auditoria.utils.render_cache)
+RENDER_CACHE_ENABLED = os.environ.get("RENDER_CACHE_ENABLED", "True") == "True"
+RENDER_CACHE_DIR = os.environ.get("RENDER_CACHE_DIR", BASE_DIR / "cache" / "renders")
+RENDER_CACHE_MAX_BYTES = int(os.environ.get("RENDER_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+# Pool en memoria de plantillas parseadas (auditoria.utils.template_pool)
+TEMPLATE_POOL_ENABLED = os.environ.get("TEMPLATE_POOL_ENABLED", "True") == "True"
+TEMPLATE_POOL_MAX_BYTES = int(os.environ.get("TEMPLATE_POOL_MAX_BYTES", 256 * 1024 * 1024))
+
+# Reescritura directa del XML para plantillas de solo texto (auditoria.utils.template_fast_path)
+TEMPLATE_FAST_PATH_ENABLED = os.environ.get("TEMPLATE_FAST_PATH_ENABLED", "True") == "True"
+
+# Mapa de párrafos y celdas con placeholders de las plantillas Word (auditoria.utils.placeholder_map)
+PLACEHOLDER_MAP_ENABLED = os.environ.get("PLACEHOLDER_MAP_ENABLED", "True") == "True"
+
+# Exportación a PDF de las herramientas (tools.pdf_export); TOOLS_PDF_WORKERS=0 genera los PDFs en el proceso web
+TOOLS_PDF_WORKERS = int(os.environ.get("TOOLS_PDF_WORKERS", 2))
+TOOLS_PDF_CACHE_ENABLED = os.environ.get("TOOLS_PDF_CACHE_ENABLED", "True") == "True"
+TOOLS_PDF_CACHE_DIR = os.environ.get("TOOLS_PDF_CACHE_DIR", BASE_DIR / "cache" / "pdfs")
+TOOLS_PDF_CACHE_MAX_BYTES = int(os.environ.get("TOOLS_PDF_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+
+# Bandeja de notificaciones (notifications.views) y segundos que se guarda el contador de no leídas (notifications.unread_counter)
+NOTIFICATIONS_PAGE_SIZE = int(os.environ.get("NOTIFICATIONS_PAGE_SIZE", 20))
+NOTIFICATIONS_UNREAD_CACHE_TIMEOUT = int(os.environ.get("NOTIFICATIONS_UNREAD_CACHE_TIMEOUT", 300))
+
+# Notificaciones en vivo por server-sent events (notifications.live); el broker por defecto solo reparte dentro de cada proceso
+NOTIFICATIONS_BROKER = os.environ.get("NOTIFICATIONS_BROKER", "notifications.live.InProcessBroker")
+NOTIFICATIONS_STREAM_HEARTBEAT_SECONDS = float(os.environ.get("NOTIFICATIONS_STREAM_HEARTBEAT_SECONDS", 15))
+NOTIFICATIONS_STREAM_MAX_SECONDS = float(os.environ.get("NOTIFICATIONS_STREAM_MAX_SECONDS", 300))
+
+# Segundos que los context processors reutilizan meses, estados y auditorías asignadas (common.shared_context)
+SHARED_CONTEXT_TTL_SECONDS = float(os.environ.get("SHARED_CONTEXT_TTL_SECONDS", 60))
+
+# Segundos entre revisiones de cambios en las carpetas de plantillas (auditoria.utils.template_index)
+TEMPLATE_INDEX_CHECK_SECONDS = float(os.environ.get("TEMPLATE_INDEX_CHECK_SECONDS", 5))
+
+# Manifiesto precalculado de plantillas Excel (auditoria.utils.template_manifest)
+TEMPLATE_MANIFEST_ENABLED = os.environ.get("TEMPLATE_MANIFEST_ENABLED", "True") == "True"
+TEMPLATE_MANIFEST_PATH = os.environ.get("TEMPLATE_MANIFEST_PATH", BASE_DIR / "cache" / "template_manifest.json")
+
+# Cola de generación de documentos en segundo plano (auditoria.utils.render_jobs)
+RENDER_JOBS_ENABLED = os.environ.get("RENDER_JOBS_ENABLED", "False") == "True"
+RENDER_JOBS_IN_PROCESS = os.environ.get("RENDER_JOBS_IN_PROCESS", "True") == "True"
+RENDER_JOBS_CONCURRENCY = int(os.environ.get("RENDER_JOBS_CONCURRENCY", 2))
+RENDER_JOBS_MAX_ATTEMPTS = int(os.environ.get("RENDER_JOBS_MAX_ATTEMPTS", 3))
+# Debe superar la generación más lenta: al vencer, el trabajo se genera de nuevo en otro worker
+RENDER_JOBS_STALE_SECONDS = int(os.environ.get("RENDER_JOBS_STALE_SECONDS", 600))
+RENDER_JOBS_RETENTION_HOURS = int(os.environ.get("RENDER_JOBS_RETENTION_HOURS", 24))
+RENDER_JOBS_PURGE_INTERVAL_SECONDS = int(os.environ.get("RENDER_JOBS_PURGE_INTERVAL_SECONDS", 3600))
+RENDER_JOBS_DIR = os.environ.get("RENDER_JOBS_DIR", BASE_DIR / "cache" / "jobs")
+
+# Procesos para generar los documentos de la descarga en ZIP (auditoria.utils.zip_export); 0 = según los CPUs
+ZIP_EXPORT_WORKERS = int(os.environ.get("ZIP_EXPORT_WORKERS", 0))
+
 handler404 = "common.views.custom_404"
 BREADCRUMBS_TEMPLATE = "common/_breadcrumbs.html"
 
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ToolsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tools"
+
+    def ready(self):
+        # Invalida los valores cacheados de los context processors (common.shared_context)
+        from . import signals  # noqa: F401
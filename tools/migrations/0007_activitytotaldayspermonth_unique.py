@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:37
+
+from django.db import migrations, models
+
+
+def delete_duplicated_months(apps, schema_editor):
+    # Antes de la restricción, conserva la primera instancia de cada actividad, mes y año
+    ActivityTotalDaysPerMonth = apps.get_model("tools", "ActivityTotalDaysPerMonth")
+    seen = set()
+    duplicated = []
+    for pk, activity_id, year, month in ActivityTotalDaysPerMonth.objects.order_by(
+        "pk"
+    ).values_list("pk", "activity_id", "year", "month"):
+        if (activity_id, year, month) in seen:
+            duplicated.append(pk)
+        else:
+            seen.add((activity_id, year, month))
+    if duplicated:
+        ActivityTotalDaysPerMonth.objects.filter(pk__in=duplicated).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0006_activitytotaldayspermonth_year_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicated_months, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='activitytotaldayspermonth',
+            constraint=models.UniqueConstraint(fields=('activity', 'year', 'month'), name='unique_activity_total_days_per_month'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from datetime import timedelta
 from django.utils import timezone
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import formats
 from common.templatetags.filters import format_duration
 from tools.errors import (
@@ -15,6 +17,7 @@ from tools.utils import get_and_year_months_between_dates
 from users.errors import UserUnauthorized
 from django.core.validators import MinValueValidator, MaxValueValidator
 from functools import reduce
+import operator
 from django.utils import translation
 
 User = get_user_model()
@@ -226,29 +229,44 @@ class ActivityTotalDaysPerMonth(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["activity", "year", "month"],
+                name="unique_activity_total_days_per_month",
+            )
+        ]
+
     def save(self, *args, **kwargs):
         if not (1 <= self.month <= 12):
             raise ValueError("El valor de 'month' debe estar entre 1 y 12.")
 
-        activity_total_days_per_month_yet = (
-            ActivityTotalDaysPerMonth.objects.filter(
-                month=self.month, year=self.year, activity=self.activity
-            )
-            .exclude(pk=self.pk)
-            .first()
-        )
-
-        if activity_total_days_per_month_yet:
+        # El duplicado lo detecta la restricción única, sin consultar antes
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError:
             raise ValueError(
                 "Ya existe una instancia para la misma actividad, mes y año."
             )
 
-        super().save(*args, **kwargs)
-
     def __str__(self):
         return f"{self.activity} - {self.year}/{self.month} - {self.total_days}"
 
 
+# Días totales de cada actividad, sumados en la misma consulta de las actividades
+ACTIVITY_TOTAL_DAYS_ANNOTATIONS = {
+    "total_days_sum": Coalesce(
+        Sum("activity_total_days_per_month_activity__total_days"), Value(timedelta())
+    ),
+}
+
+
+class ActivityQuerySet(models.QuerySet):
+    def with_total_days(self):
+        return self.annotate(**ACTIVITY_TOTAL_DAYS_ANNOTATIONS)
+
+
 class Activity(models.Model):
     created_by = models.ForeignKey(
         User, related_name="created_by", on_delete=models.CASCADE
@@ -269,6 +287,8 @@ class Activity(models.Model):
 
     observations = models.TextField(blank=True, null=True)
 
+    objects = ActivityQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.activity} - {self.appointment_number} | {self.audit}"
 
@@ -294,32 +314,39 @@ class Activity(models.Model):
         )
         return months, years
 
-    def __create_activity_total_days_per_month_instances(self):
+    def __sync_activity_total_days_per_month_instances(self):
+        """
+        Deja una instancia de ActivityTotalDaysPerMonth por cada (mes, año) entre
+        start_date y end_date: crea las que faltan en un solo INSERT y borra las
+        que quedaron fuera del rango en un solo DELETE. Las demás conservan sus días.
+        """
         months, years = self.get_valid_years_and_months()
-        for month, year in zip(months, years):
-            if ActivityTotalDaysPerMonth.objects.filter(
-                activity=self,
-                month=month,
-                year=year,
-            ).exists():
-                continue
+        valid = set(zip(months, years))
+        existing = set(
+            ActivityTotalDaysPerMonth.objects.filter(activity=self).values_list(
+                "month", "year"
+            )
+        )
 
-            ActivityTotalDaysPerMonth.objects.create(
-                activity=self, month=month, year=year, total_days=timedelta()
+        missing = valid - existing
+        if missing:
+            ActivityTotalDaysPerMonth.objects.bulk_create(
+                [
+                    ActivityTotalDaysPerMonth(
+                        activity=self, month=month, year=year, total_days=timedelta()
+                    )
+                    for month, year in sorted(missing, key=lambda m: (m[1], m[0]))
+                ],
+                # Otro guardado simultáneo de la actividad pudo crearlas
+                ignore_conflicts=True,
             )
 
-    def __check_activity_total_days_per_month_instances(self):
-        activity_total_days_per_month_instances = (
-            ActivityTotalDaysPerMonth.objects.filter(activity=self)
-        )
-        months, years = self.get_valid_years_and_months()
-        for activity_total_days_per_month in activity_total_days_per_month_instances:
-            if (
-                activity_total_days_per_month.month not in months
-                or activity_total_days_per_month.year not in years
-            ):
-                activity_total_days_per_month.delete()
-                continue
+        stale = existing - valid
+        if stale:
+            ActivityTotalDaysPerMonth.objects.filter(
+                reduce(operator.or_, (Q(month=month, year=year) for month, year in stale)),
+                activity=self,
+            ).delete()
 
     def save(self, *args, **kwargs):
         if self.start_date and self.end_date and self.start_date >= self.end_date:
@@ -337,15 +364,16 @@ class Activity(models.Model):
 
         super().save(*args, **kwargs)
 
-        self.__create_activity_total_days_per_month_instances()
-        self.__check_activity_total_days_per_month_instances()
+        self.__sync_activity_total_days_per_month_instances()
 
     def get_total_days(self):
-        return reduce(
-            lambda acc, activity_p_m: activity_p_m.total_days + acc,
-            list(ActivityTotalDaysPerMonth.objects.filter(activity=self)),
-            timedelta(),
-        )
+        # Si la actividad viene de Activity.objects.with_total_days() no se consulta de nuevo
+        total_days = getattr(self, "total_days_sum", None)
+        if total_days is None:
+            total_days = self.activity_total_days_per_month_activity.aggregate(
+                total_days=Sum("total_days")
+            )["total_days"]
+        return total_days or timedelta()
 
     def get_total_days_legible(self):
         return format_duration(duration=self.get_total_days(), show_only="days")
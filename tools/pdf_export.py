@@ -0,0 +1,101 @@
+"""
+Exportación a PDF de las tablas y reportes de herramientas.
+
+Las vistas renderizan el HTML del reporte y llaman a ``pdf_response``:
+
+- el PDF se busca primero en una caché en disco (``RenderCache``), con una
+  clave calculada a partir del HTML renderizado, que cambia cuando cambian las
+  filas de la tabla, la plantilla o sus estilos,
+- si no está, WeasyPrint lo genera en un pool de ``TOOLS_PDF_WORKERS`` procesos
+  (``tools.pdf_worker``), para no ocupar la CPU del proceso web ni correr más
+  conversiones a la vez que procesos tenga el pool. Con 0 se genera en el
+  propio proceso.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.template.loader import get_template
+
+from auditoria.utils.render_cache import RenderCache
+from . import pdf_worker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+DEFAULT_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+pdf_cache = RenderCache(
+    directory=getattr(settings, "TOOLS_PDF_CACHE_DIR", os.path.join(settings.BASE_DIR, "cache", "pdfs")),
+    max_bytes=getattr(settings, "TOOLS_PDF_CACHE_MAX_BYTES", DEFAULT_CACHE_MAX_BYTES),
+)
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    workers = getattr(settings, "TOOLS_PDF_WORKERS", DEFAULT_WORKERS)
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: los procesos no heredan hilos ni conexiones del proceso web
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def render_pdf(html: str, base_url: str) -> bytes:
+    """Convierte el HTML a PDF en el pool (o en este proceso si está deshabilitado)."""
+    pool = _get_pool()
+    if pool is None:
+        return pdf_worker.render_pdf(html, base_url)
+    try:
+        return pool.submit(pdf_worker.render_pdf, html, base_url).result()
+    except BrokenProcessPool:
+        # Un proceso del pool murió (memoria, señal...): se crea otro pool en la siguiente exportación
+        logger.exception("El pool de PDFs se detuvo; se genera el PDF en el proceso actual")
+        _discard_pool(pool)
+        return pdf_worker.render_pdf(html, base_url)
+
+
+def get_pdf(html: str, base_url: str) -> bytes:
+    """PDF del HTML, desde la caché si ya se generó."""
+    if not getattr(settings, "TOOLS_PDF_CACHE_ENABLED", True):
+        return render_pdf(html, base_url)
+    key = hashlib.sha256(f"{base_url}|{html}".encode("utf-8")).hexdigest()
+    pdf = pdf_cache.get(key)
+    if pdf is None:
+        pdf = render_pdf(html, base_url)
+        pdf_cache.set(key, pdf)
+    return pdf
+
+
+def pdf_response(req: HttpRequest, template_name: str, context: dict, filename: str) -> HttpResponse:
+    """Renderiza la plantilla y la devuelve como PDF adjunto."""
+    html_content = get_template(template_name).render(context)
+    pdf = get_pdf(html_content, req.build_absolute_uri("/"))
+
+    res = HttpResponse(content_type="application/pdf")
+    res["Content-Disposition"] = f"attachment; filename={filename}"
+    res.write(pdf)
+    return res
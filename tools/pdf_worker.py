@@ -0,0 +1,104 @@
+"""
+Conversión de HTML a PDF con WeasyPrint.
+
+Corre en los procesos del pool de ``tools.pdf_export`` (o en el proceso web si
+el pool está deshabilitado), por eso no importa Django. weasyprint se importa
+la primera vez que se genera un PDF, no al cargar las vistas.
+
+Cada proceso conserva entre documentos:
+
+- la configuración de fuentes,
+- las hojas de estilo ya analizadas: los bloques ``<style>`` de las plantillas
+  se sacan del HTML y se pasan como ``CSS`` cacheados por contenido,
+- las imágenes ya descargadas (el logo de la cabecera es una URL externa).
+
+Funciona con la versión de WeasyPrint del Dockerfile (52.5) y con las
+actuales: ``FontConfiguration`` se movió a ``weasyprint.text.fonts`` en la 53 y
+``image_cache`` de ``render()`` pasó a llamarse ``cache`` en la 54.
+"""
+
+import hashlib
+import inspect
+import re
+import threading
+
+_STYLE = re.compile(r"<style(?P<attrs>[^>]*)>(?P<css>.*?)</style>", re.IGNORECASE | re.DOTALL)
+_MEDIA = re.compile(r"""media\s*=\s*["']?(?P<media>[^"'\s>]+)""", re.IGNORECASE)
+
+# Límites de lo que cada proceso guarda entre documentos
+_MAX_STYLESHEETS = 32
+_MAX_IMAGES = 64
+
+_state = None
+# WeasyPrint no es seguro entre hilos; en el proceso web los PDFs se generan de a uno
+_lock = threading.Lock()
+
+
+class _WorkerState:
+    def __init__(self):
+        import weasyprint
+
+        try:
+            from weasyprint.text.fonts import FontConfiguration
+        except ImportError:
+            # WeasyPrint < 53
+            from weasyprint.fonts import FontConfiguration
+
+        self.weasyprint = weasyprint
+        self.font_config = FontConfiguration()
+        self.stylesheets = {}
+        self.images = {}
+        parametros = inspect.signature(weasyprint.HTML.render).parameters
+        self.images_argument = "cache" if "cache" in parametros else "image_cache"
+
+    def stylesheet(self, css: str, base_url):
+        key = hashlib.sha256(f"{base_url}|{css}".encode("utf-8")).hexdigest()
+        sheet = self.stylesheets.get(key)
+        if sheet is None:
+            if len(self.stylesheets) >= _MAX_STYLESHEETS:
+                self.stylesheets.clear()
+            sheet = self.weasyprint.CSS(string=css, base_url=base_url, font_config=self.font_config)
+            self.stylesheets[key] = sheet
+        return sheet
+
+
+def _get_state() -> _WorkerState:
+    global _state
+    if _state is None:
+        _state = _WorkerState()
+    return _state
+
+
+def split_styles(html: str):
+    """
+    Separa los bloques ``<style>`` para impresión del HTML.
+
+    Returns:
+        tuple: (HTML sin esos bloques, lista de sus CSS en orden)
+    """
+    styles = []
+
+    def remove(match):
+        media = _MEDIA.search(match.group("attrs"))
+        if media and media.group("media").lower() not in ("all", "print"):
+            return match.group(0)
+        styles.append(match.group("css"))
+        return ""
+
+    return _STYLE.sub(remove, html), styles
+
+
+def render_pdf(html: str, base_url=None) -> bytes:
+    """Genera el PDF del documento HTML."""
+    html, styles = split_styles(html)
+    with _lock:
+        state = _get_state()
+        stylesheets = [state.stylesheet(css, base_url) for css in styles]
+        if len(state.images) >= _MAX_IMAGES:
+            state.images.clear()
+        document = state.weasyprint.HTML(string=html, base_url=base_url).render(
+            font_config=state.font_config,
+            stylesheets=stylesheets,
+            **{state.images_argument: state.images},
+        )
+        return document.write_pdf()
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from common import shared_context
+from .models import CurrentStatus, Months
+
+
+@receiver([post_save, post_delete], sender=Months)
+def invalidate_months(sender, **kwargs):
+    shared_context.invalidar(shared_context.MONTHS)
+
+
+@receiver([post_save, post_delete], sender=CurrentStatus)
+def invalidate_current_statuses(sender, **kwargs):
+    shared_context.invalidar(shared_context.CURRENT_STATUSES)
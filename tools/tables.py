@@ -1,7 +1,11 @@
 from datetime import datetime, timedelta
 import django_tables2 as tables
-from common.templatetags.filters import format_duration, format_duration_field
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+from common.templatetags.filters import format_duration
 from tools.models import (
+    ACTIVITY_TOTAL_DAYS_ANNOTATIONS,
     Activity,
     AuditMarks,
     AuditTimeSummary,
@@ -9,70 +13,135 @@ from tools.models import (
     WorkingPapersStatus,
 )
 from django.utils import formats
-import django_tables2 as tables
+
+
+# El HTML de las columnas se arma en Python: TemplateColumn compila su
+# template_code en cada celda. El modal de confirmación para borrar es uno solo
+# por tabla (tools/_table.html) y recibe la URL y el valor de cada fila por
+# atributos data-*.
+SELECT_CHECKBOX = mark_safe(
+    '<input type="checkbox" class="btn-checkbox" aria-checked="false">'
+)
+
+ACTIONS_DROPDOWN = (
+    '<div class="dropdown">'
+    '<button style="background-color: transparent; border: none; outline:none" type="button" data-bs-toggle="dropdown" aria-expanded="false">'
+    '<svg width="24" height="24" viewBox="0 0 24 24" fill="none" xmlns="http://www.w3.org/2000/svg"> <path d="M8 12C8 13.1046 7.10457 14 6 14C4.89543 14 4 13.1046 4 12C4 10.8954 4.89543 10 6 10C7.10457 10 8 10.8954 8 12Z" fill="currentColor"/> <path d="M14 12C14 13.1046 13.1046 14 12 14C10.8954 14 10 13.1046 10 12C10 10.8954 10.8954 10 12 10C13.1046 10 14 10.8954 14 12Z" fill="currentColor"/> <path d="M18 14C19.1046 14 20 13.1046 20 12C20 10.8954 19.1046 10 18 10C16.8954 10 16 10.8954 16 12C16 13.1046 16.8954 14 18 14Z" fill="currentColor"/> </svg>'
+    '</button>'
+    '<ul class="dropdown-menu">'
+    '<li><a class="dropdown-item" href="{edit_url}">Ver Más</a></li>'
+    '<li><button class="btn dropdown-item text-danger" data-bs-toggle="modal" data-bs-target="#confirm-delete-modal" data-delete-url="{delete_url}" data-confirmation="{confirmation}">Eliminar</button></li>'
+    '</ul>'
+    '</div>'
+)
+
+CURRENT_STATUS_BADGES = {
+    "inicializado": "badge-inicializado",
+    "en proceso": "badge-en-proceso",
+    "en revisión": "badge-en-revision",
+    "aprobado": "badge-aprobado",
+    "terminado": "badge-terminado",
+    "en espera": "badge-en-espera",
+    "rechazado": "badge-rechazado",
+    "completado": "badge-completado",
+    "archivado": "badge-archivado",
+    "cancelado": "badge-cancelado",
+}
+
+
+# Días totales de cada actividad en la misma consulta de la tabla
+ACTIVITY_ANNOTATIONS = ACTIVITY_TOTAL_DAYS_ANNOTATIONS
+
+
+class SelectColumn(tables.Column):
+    empty_values = ()
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("verbose_name", "")
+        kwargs.setdefault("orderable", False)
+        super().__init__(**kwargs)
+
+    def render(self):
+        return SELECT_CHECKBOX
+
+
+class ActionsColumn(tables.Column):
+    """Menú "Ver Más" / "Eliminar" con las URLs del ``BaseTable``."""
+
+    empty_values = ()
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("verbose_name", "")
+        kwargs.setdefault("orderable", False)
+        super().__init__(**kwargs)
+
+    def render(self, record, table):
+        return format_html(
+            ACTIONS_DROPDOWN,
+            edit_url=reverse(table.edit_url, args=[record.id]),
+            delete_url=reverse(table.delete_url, args=[record.id]),
+            confirmation=getattr(record, table.confirmation_field, ""),
+        )
+
+
+class DurationColumn(tables.Column):
+    """Duración con ``format_duration`` en la unidad indicada."""
+
+    def __init__(self, *args, show_only="days", **kwargs):
+        self.show_only = show_only
+        super().__init__(*args, **kwargs)
+
+    def render(self, value):
+        if isinstance(value, timedelta):
+            return format_duration(duration=value, show_only=self.show_only)
+        return "Días no disponibles"
+
+
+class FormattedDateColumn(tables.Column):
+    """Fecha con el ``DATE_FORMAT`` del idioma, o con ``strftime`` si se indica."""
+
+    def __init__(self, *args, strftime=None, **kwargs):
+        self.strftime = strftime
+        super().__init__(*args, **kwargs)
+
+    def render(self, value):
+        if isinstance(value, datetime):
+            if self.strftime:
+                return value.strftime(self.strftime)
+            return formats.date_format(value, "DATE_FORMAT")
+        return "Fecha no disponible"
+
+
+class CurrentStatusBadgeColumn(tables.Column):
+    def render(self, value):
+        return format_html(
+            '<span class="badge {}">{}</span>',
+            CURRENT_STATUS_BADGES.get(value.name, ""),
+            value,
+        )
+
+
+class AuditMarkImageColumn(tables.Column):
+    empty_values = ()
+
+    def render(self, record):
+        return format_html(
+            '<img src="{}" alt="{}" width="35" height="35" />', record.image, record.id
+        )
 
 
 class BaseTable(tables.Table):
-    select = tables.TemplateColumn(
-        '<input type="checkbox" class="btn-checkbox" aria-checked="false">',
-        verbose_name="",
+    select = SelectColumn(
         attrs={"td": {"class": "td-select"}, "th": {"class": "th-select"}},
     )
 
-    actions = tables.TemplateColumn(
-        verbose_name="",
-        template_code="""
-        <div class="dropdown">
-            <button style="background-color: transparent; border: none; outline:none" type="button"
-                    data-bs-toggle="dropdown" aria-expanded="false">
-                <svg width="24" height="24" viewBox="0 0 24 24" fill="none"
-                     xmlns="http://www.w3.org/2000/svg">
-                    <path
-                        d="M8 12C8 13.1046 7.10457 14 6 14C4.89543 14 4 13.1046 4 12C4 10.8954 4.89543 10 6 10C7.10457 10 8 10.8954 8 12Z"
-                        fill="currentColor" />
-                    <path
-                        d="M14 12C14 13.1046 13.1046 14 12 14C10.8954 14 10 13.1046 10 12C10 10.8954 10.8954 10 12 10C13.1046 10 14 10.8954 14 12Z"
-                        fill="currentColor" />
-                    <path
-                        d="M18 14C19.1046 14 20 13.1046 20 12C20 10.8954 19.1046 10 18 10C16.8954 10 16 10.8954 16 12C16 13.1046 16.8954 14 18 14Z"
-                        fill="currentColor" />
-                </svg>
-            </button>
-            <ul class="dropdown-menu">
-                <li><a class="dropdown-item" href="{% url record.edit_url record.id %}">Ver Más</a></li>
-                <li><button class="btn dropdown-item text-danger" data-bs-toggle="modal" data-bs-target="#confirm-delete-modal{{ record.id }}">Eliminar</button></li>
-            </ul>
-        </div>
-
-        <div class="modal fade" id="confirm-delete-modal{{ record.id }}" data-bs-backdrop="static" data-bs-keyboard="false" tabindex="-1" aria-labelledby="static-confirm-delete-modal{{ record.id }}-label" aria-hidden="true">
-            <form id="delete_register{{ record.id }}_form" method="post" action="{% url record.delete_url record.id %}" class="d-none">
-                {% csrf_token %}
-            </form>
-            <div class="modal-dialog">
-                <div class="modal-content">
-                    <div class="modal-header">
-                        <h1 class="modal-title fs-5" id="static-backdrop-confirm-delete-modal{{ record.id }}">Borrar Registro</h1>
-                        <button type="button" class="btn-close" data-bs-dismiss="modal" aria-label="Close"></button>
-                    </div>
-                    <div class="modal-body">
-                        <div class="alert alert-danger fs-6" role="alert">
-                            ¿Está seguro de borrar el registro con el valor: {{ record.confirmation_field }} ?
-                        </div>
-                    </div>
-                    <div class="modal-footer">
-                        <button type="button" class="btn btn-outline" data-bs-dismiss="modal">Cancelar</button>
-                        <button type="submit" class="btn btn-danger" form="delete_register{{ record.id }}_form">Sí, Borrar</button>
-                    </div>
-                </div>
-            </div>
-        </div>
-        """,
+    actions = ActionsColumn(
         attrs={"td": {"class": "td-options"}, "th": {"class": "th-options"}},
     )
 
     class Meta:
         abstract = True
-        template_name = "django_tables2/bootstrap.html"
+        template_name = "tools/_table.html"
         attrs = {"class": "custom-table"}
         orderable = False
 
@@ -86,15 +155,15 @@ class BaseTable(tables.Table):
         **kwargs,
     ):
         super().__init__(data, *args, **kwargs)
+        # Las columnas de acciones leen estos valores al renderizar cada fila
         self.delete_url = delete_url
-
-        for record in self.data:
-            record.edit_url = edit_url
-            record.delete_url = delete_url
-            record.confirmation_field = getattr(record, confirmation_field, "")
+        self.edit_url = edit_url
+        self.confirmation_field = confirmation_field
 
 
 class BaseAuditTimeSummaryTable(tables.Table):
+    related_fields = ("assigned_auditor__role",)
+
     appointment_number = tables.Column(verbose_name="Nombramiento no.")
     full_name = tables.Column(
         verbose_name="Nombre completo",
@@ -102,9 +171,9 @@ class BaseAuditTimeSummaryTable(tables.Table):
         orderable=False,
     )
     position = tables.Column(verbose_name="Posición", accessor="assigned_auditor.role")
-    scheduled_days = tables.Column(verbose_name="Días programados")
-    worked_days = tables.Column(verbose_name="Días trabajados")
-    differences = tables.Column(verbose_name="Diferencias")
+    scheduled_days = DurationColumn(verbose_name="Días programados", show_only="days")
+    worked_days = DurationColumn(verbose_name="Días trabajados", show_only="days")
+    differences = DurationColumn(verbose_name="Diferencias", show_only="days")
     observations = tables.Column(verbose_name="Observaciones")
 
     class Meta(BaseTable.Meta):
@@ -119,27 +188,12 @@ class BaseAuditTimeSummaryTable(tables.Table):
             "observations",
         )
 
-    def render_scheduled_days(self, value):
-        if isinstance(value, timedelta):
-            return format_duration(duration=value, show_only="days")
-        return "Días no disponibles"
-
-    def render_worked_days(self, value):
-        if isinstance(value, timedelta):
-            return format_duration(duration=value, show_only="days")
-        return "Días no disponibles"
-
-    def render_differences(self, value):
-        if isinstance(value, timedelta):
-            return format_duration(duration=value, show_only="days")
-        return "Días no disponibles"
-
 
 class BaseSummaryHoursWorkedTable(tables.Table):
     observations = tables.Column(verbose_name="Observaciones")
-    differences = tables.Column(verbose_name="Diferencias")
-    total_hours_worked = tables.Column(verbose_name="Total de horas trabajadas")
-    total_scheduled_hours = tables.Column(verbose_name="Total de horas programadas")
+    differences = DurationColumn(verbose_name="Diferencias", show_only="hours")
+    total_hours_worked = DurationColumn(verbose_name="Total de horas trabajadas", show_only="hours")
+    total_scheduled_hours = DurationColumn(verbose_name="Total de horas programadas", show_only="hours")
     month = tables.Column(verbose_name="Mes")
 
     class Meta(BaseTable.Meta):
@@ -152,33 +206,14 @@ class BaseSummaryHoursWorkedTable(tables.Table):
             "observations",
         )
 
-    def render_total_scheduled_hours(self, value):
-        if isinstance(value, timedelta):
-            return format_duration(duration=value, show_only="hours")
-        return "Días no disponibles"
-
-    def render_total_hours_worked(self, value):
-        if isinstance(value, timedelta):
-            return format_duration(duration=value, show_only="hours")
-        return "Días no disponibles"
-
-    def render_differences(self, value):
-        if isinstance(value, timedelta):
-            return format_duration(duration=value, show_only="hours")
-        return "Días no disponibles"
-
 
 class BaseWorkingPapersStatusesTable(tables.Table):
     working_papers = tables.Column(verbose_name="Papeles de Trabajo")
     observations = tables.Column(verbose_name="Observaciones")
     reference = tables.Column(verbose_name="Ref")
-    start_date = tables.Column(verbose_name="Fecha de Inicio")
-    end_date = tables.Column(verbose_name="Fecha de Finalización")
-    current_status = tables.TemplateColumn(
-        verbose_name="Estado Actual",
-        template_code="{{ record.current_status }}",
-        orderable=False,
-    )
+    start_date = FormattedDateColumn(verbose_name="Fecha de Inicio")
+    end_date = FormattedDateColumn(verbose_name="Fecha de Finalización")
+    current_status = tables.Column(verbose_name="Estado Actual", orderable=False)
 
     class Meta(BaseTable.Meta):
         model = WorkingPapersStatus
@@ -191,18 +226,10 @@ class BaseWorkingPapersStatusesTable(tables.Table):
             "observations",
         )
 
-    def render_start_date(self, value):
-        if isinstance(value, datetime):
-            return formats.date_format(value, "DATE_FORMAT")
-        return "Fecha no disponible"
-
-    def render_end_date(self, value):
-        if isinstance(value, datetime):
-            return formats.date_format(value, "DATE_FORMAT")
-        return "Fecha no disponible"
-
 
 class AuditTimeSummaryTable(BaseTable):
+    related_fields = ("assigned_auditor__role",)
+
     appointment_number = tables.Column(verbose_name="Número de nombramiento")
     full_name = tables.Column(
         verbose_name="Nombre completo",
@@ -213,9 +240,9 @@ class AuditTimeSummaryTable(BaseTable):
         verbose_name="Posición",
         accessor="assigned_auditor.role",
     )
-    scheduled_days = tables.Column(verbose_name="Días programados")
-    worked_days = tables.Column(verbose_name="Días trabajados")
-    differences = tables.Column(verbose_name="Diferencias")
+    scheduled_days = DurationColumn(verbose_name="Días programados", show_only="days")
+    worked_days = DurationColumn(verbose_name="Días trabajados", show_only="days")
+    differences = DurationColumn(verbose_name="Diferencias", show_only="days")
     observations = tables.Column(verbose_name="Observaciones")
 
     class Meta(BaseTable.Meta):
@@ -232,27 +259,12 @@ class AuditTimeSummaryTable(BaseTable):
             "actions",
         )
 
-    def render_scheduled_days(self, value):
-        if isinstance(value, timedelta):
-            return format_duration(duration=value, show_only="days")
-        return "Días no disponibles"
-
-    def render_worked_days(self, value):
-        if isinstance(value, timedelta):
-            return format_duration(duration=value, show_only="days")
-        return "Días no disponibles"
-
-    def render_differences(self, value):
-        if isinstance(value, timedelta):
-            return format_duration(duration=value, show_only="days")
-        return "Días no disponibles"
-
 
 class SummaryHoursWorkedTable(BaseTable):
     observations = tables.Column(verbose_name="Observaciones")
-    differences = tables.Column(verbose_name="Diferencias")
-    total_hours_worked = tables.Column(verbose_name="Total de horas trabajadas")
-    total_scheduled_hours = tables.Column(verbose_name="Total de horas programadas")
+    differences = DurationColumn(verbose_name="Diferencias", show_only="hours")
+    total_hours_worked = DurationColumn(verbose_name="Total de horas trabajadas", show_only="hours")
+    total_scheduled_hours = DurationColumn(verbose_name="Total de horas programadas", show_only="hours")
     month = tables.Column(verbose_name="Mes")
 
     class Meta(BaseTable.Meta):
@@ -267,36 +279,14 @@ class SummaryHoursWorkedTable(BaseTable):
             "actions",
         )
 
-    def render_total_scheduled_hours(self, value):
-        if isinstance(value, timedelta):
-            return format_duration(duration=value, show_only="hours")
-        return "Días no disponibles"
-
-    def render_total_hours_worked(self, value):
-        if isinstance(value, timedelta):
-            return format_duration(duration=value, show_only="hours")
-        return "Días no disponibles"
-
-    def render_differences(self, value):
-        if isinstance(value, timedelta):
-            return format_duration(duration=value, show_only="hours")
-        return "Días no disponibles"
-
 
 class WorkingPapersStatusesTable(BaseTable):
     working_papers = tables.Column(verbose_name="Papeles de Trabajo")
     observations = tables.Column(verbose_name="Observaciones")
     reference = tables.Column(verbose_name="Ref")
-    start_date = tables.Column(verbose_name="Fecha de Inicio")
-    end_date = tables.Column(verbose_name="Fecha de Finalización")
-    current_status = tables.TemplateColumn(
-        verbose_name="Estado Actual",
-        template_code="""
-        <span class="badge 
-            {% if record.current_status.name == "inicializado" %}badge-inicializado{% elif record.current_status.name == "en proceso" %}badge-en-proceso{% elif record.current_status.name == "en revisión" %}badge-en-revision{% elif record.current_status.name == "aprobado" %}badge-aprobado{% elif record.current_status.name == "terminado" %}badge-terminado{% elif record.current_status.name == "en espera" %}badge-en-espera{% elif record.current_status.name == "rechazado" %}badge-rechazado{% elif record.current_status.name == "completado" %}badge-completado{% elif record.current_status.name == "archivado" %}badge-archivado{% elif record.current_status.name == "cancelado" %}badge-cancelado{% endif %}
-        ">{{ record.current_status }}</span>
-        """,
-    )
+    start_date = FormattedDateColumn(verbose_name="Fecha de Inicio")
+    end_date = FormattedDateColumn(verbose_name="Fecha de Finalización")
+    current_status = CurrentStatusBadgeColumn(verbose_name="Estado Actual")
 
     class Meta(BaseTable.Meta):
         model = WorkingPapersStatus
@@ -311,21 +301,10 @@ class WorkingPapersStatusesTable(BaseTable):
             "actions",
         )
 
-    def render_start_date(self, value):
-        if isinstance(value, datetime):
-            return formats.date_format(value, "DATE_FORMAT")
-        return "Fecha no disponible"
-
-    def render_end_date(self, value):
-        if isinstance(value, datetime):
-            return formats.date_format(value, "DATE_FORMAT")
-        return "Fecha no disponible"
-
 
 class BaseAuditMarksTable(tables.Table):
-    image = tables.TemplateColumn(
+    image = AuditMarkImageColumn(
         verbose_name="Símbolo",
-        template_code="""<img src='{{record.image}}' alt={{record.id}} width=35 height=35 />""",
         orderable=False,
         attrs={"td": {"class": "td-image"}},
     )
@@ -342,10 +321,7 @@ class BaseAuditMarksTable(tables.Table):
 
 
 class AuditMarksTable(BaseTable):
-    image = tables.TemplateColumn(
-        verbose_name="Símbolo",
-        template_code="""<img src='{{record.image}}' alt={{record.id}} width=35 height=35 />""",
-    )
+    image = AuditMarkImageColumn(verbose_name="Símbolo")
     name = tables.Column(verbose_name="Nombre de la marca")
     description = tables.Column(verbose_name="Descripción")
 
@@ -382,6 +358,8 @@ class CurrencyTypesTable(BaseTable):
 
 
 class BaseActivitiesTable(tables.Table):
+    annotations = ACTIVITY_ANNOTATIONS
+
     activity = tables.Column(verbose_name="Actividad")
     reference = tables.Column(verbose_name="Ref.")
     appointment_number = tables.Column(verbose_name="Nombramiento No.")
@@ -390,11 +368,11 @@ class BaseActivitiesTable(tables.Table):
         accessor="created_by.get_full_name",
         orderable=False,
     )
-    start_date = tables.Column(verbose_name="F. Inicio")
-    end_date = tables.Column(verbose_name="F. Finalización")
+    start_date = FormattedDateColumn(verbose_name="F. Inicio", strftime="%d/%m/%Y")
+    end_date = FormattedDateColumn(verbose_name="F. Finalización", strftime="%d/%m/%Y")
     current_status = tables.Column(verbose_name="Edo. Actual")
-    total_days = tables.Column(
-        verbose_name="Días totales", accessor="get_total_days_legible"
+    total_days = DurationColumn(
+        verbose_name="Días totales", accessor="total_days_sum", show_only="days"
     )
     observations = tables.Column(verbose_name="Observaciones")
 
@@ -412,20 +390,10 @@ class BaseActivitiesTable(tables.Table):
             "observations",
         )
 
-    def render_start_date(self, value):
-        if isinstance(value, datetime):
-            # Formato: día/mes/año
-            return value.strftime("%d/%m/%Y")
-        return "Fecha no disponible"
-
-    def render_end_date(self, value):
-        if isinstance(value, datetime):
-            # Formato: día/mes/año
-            return value.strftime("%d/%m/%Y")
-        return "Fecha no disponible"
-
 
 class ActivitiesTable(BaseTable):
+    annotations = ACTIVITY_ANNOTATIONS
+
     activity = tables.Column(verbose_name="Actividad")
     created_by = tables.Column(
         verbose_name="Auditor Responsable",
@@ -434,11 +402,11 @@ class ActivitiesTable(BaseTable):
     )
     reference = tables.Column(verbose_name="Referencia")
     appointment_number = tables.Column(verbose_name="Nombramiento No.")
-    start_date = tables.Column(verbose_name="Fecha de inicio")
-    end_date = tables.Column(verbose_name="Fecha de finalización")
+    start_date = FormattedDateColumn(verbose_name="Fecha de inicio")
+    end_date = FormattedDateColumn(verbose_name="Fecha de finalización")
     current_status = tables.Column(verbose_name="Estado Actual")
-    total_days = tables.Column(
-        verbose_name="Días totales", accessor="get_total_days_legible"
+    total_days = DurationColumn(
+        verbose_name="Días totales", accessor="total_days_sum", show_only="days"
     )
     observations = tables.Column(verbose_name="Observaciones")
 
@@ -457,13 +425,3 @@ class ActivitiesTable(BaseTable):
             "observations",
             "actions",
         )
-
-    def render_start_date(self, value):
-        if isinstance(value, datetime):
-            return formats.date_format(value, "DATE_FORMAT")
-        return "Fecha no disponible"
-
-    def render_end_date(self, value):
-        if isinstance(value, datetime):
-            return formats.date_format(value, "DATE_FORMAT")
-        return "Fecha no disponible"
@@ -1,9 +1,16 @@
+import shutil
+import sys
+import tempfile
+import types
 from datetime import datetime, timedelta
-from django.test import TestCase
+from unittest.mock import patch
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
 from audits.models import Audit
 from users.models import Roles
 from .models import (
+    Activity,
+    ActivityTotalDaysPerMonth,
     AuditMarks,
     AuditTimeSummary,
     Country,
@@ -15,7 +22,12 @@ from .models import (
 )
 from django.contrib.auth import get_user_model
 from django.contrib.messages import get_messages
+from common import context_processors, shared_context
 from common.templatetags.filters import format_duration_day_number
+from . import pdf_export, pdf_worker
+from .pdf_worker import split_styles
+from .tables import ActivitiesTable
+from .utils import get_table
 from django.utils import timezone
 
 User = get_user_model()
@@ -3850,3 +3862,254 @@ class CurrencyTypesTestCase(TestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, 404)
+
+
+class SharedContextTestCase(TestCase):
+    def setUp(self):
+        shared_context.clear_shared_context()
+        manager_role = Roles.objects.create(name="audit_manager", verbose_name="Jefe de Auditoría")
+        auditor_role = Roles.objects.create(name="auditor", verbose_name="Auditor")
+        self.auditor_manager = User.objects.create_user(
+            username="auditor_manager",
+            email="auditor_manager@gmail.com",
+            role=manager_role,
+            password="password123",
+        )
+        self.auditor = User.objects.create_user(
+            username="auditor",
+            email="auditor@gmail.com",
+            role=auditor_role,
+            password="password123",
+        )
+        self.audit = Audit.objects.create(title="Auditoría 1", audit_manager=self.auditor_manager)
+
+    def tearDown(self):
+        # Los rollbacks de cada test no disparan las señales de invalidación
+        shared_context.clear_shared_context()
+
+    def _request(self, user):
+        req = RequestFactory().get("/")
+        req.user = User.objects.get(pk=user.pk)
+        return req
+
+    def test_processors_do_not_query_until_used(self):
+        req = self._request(self.auditor)
+
+        with self.assertNumQueries(0):
+            context = {
+                **context_processors.months_processor(req),
+                **context_processors.current_statuses_processor(req),
+                **context_processors.assigned_audits(req),
+                **context_processors.breadcrumbs_processor(req),
+                **context_processors.aside_navbar_processor(req),
+            }
+
+        with self.assertNumQueries(1):
+            list(context["months"])
+        with self.assertNumQueries(0):
+            list(context_processors.months_processor(req)["months"])
+
+    def test_months_and_statuses_are_invalidated_on_save_and_delete(self):
+        req = self._request(self.auditor)
+        self.assertEqual(list(context_processors.months_processor(req)["months"]), list(Months.objects.all()))
+
+        month = Months.objects.create(name="mes de prueba", days=30)
+        self.assertIn(month, list(context_processors.months_processor(req)["months"]))
+        month.delete()
+        self.assertNotIn(month, list(context_processors.months_processor(req)["months"]))
+
+        list(context_processors.current_statuses_processor(req)["current_statuses"])
+        status = CurrentStatus.objects.create(name="prueba", verbose_name="Prueba")
+        self.assertIn(status, list(context_processors.current_statuses_processor(req)["current_statuses"]))
+
+    def test_assigned_audits_are_cached_per_user_and_invalidated(self):
+        manager_req = self._request(self.auditor_manager)
+        auditor_req = self._request(self.auditor)
+
+        self.assertEqual(list(context_processors.assigned_audits(manager_req)["assigned_audits"]), [self.audit])
+        self.assertFalse(context_processors.assigned_audits(auditor_req)["assigned_audits"])
+
+        self.audit.assigned_users.add(self.auditor)
+        self.assertEqual(list(context_processors.assigned_audits(auditor_req)["assigned_audits"]), [self.audit])
+
+        self.audit.delete()
+        self.assertFalse(context_processors.assigned_audits(manager_req)["assigned_audits"])
+
+
+class ToolTablesTestCase(TestCase):
+    def setUp(self):
+        manager_role = Roles.objects.create(name="audit_manager", verbose_name="Jefe de Auditoría")
+        self.auditor_manager = User.objects.create_user(
+            username="auditor_manager",
+            first_name="Ana",
+            last_name="Pérez",
+            email="auditor_manager@gmail.com",
+            role=manager_role,
+            password="password123",
+            is_superuser=True,
+        )
+        self.audit = Audit.objects.create(title="Auditoría 1", audit_manager=self.auditor_manager)
+        self.current_status = CurrentStatus.objects.create(name="en proceso", verbose_name="En proceso")
+        for i in range(20):
+            Activity.objects.create(
+                created_by=self.auditor_manager,
+                audit=self.audit,
+                activity=f"Actividad {i}",
+                appointment_number=str(i),
+                start_date=datetime(2024, 1, 1),
+                end_date=datetime(2024, 2, 10),
+                current_status=self.current_status,
+            )
+
+    def _render(self, search_query=""):
+        req = RequestFactory().get("/", {"q": search_query} if search_query else {})
+        req.user = self.auditor_manager
+        table = get_table(
+            req=req,
+            search_query=search_query,
+            Model=Activity,
+            TableClass=ActivitiesTable,
+            filters=("activity",),
+            confirmation_field="activity",
+            delete_url="delete_activity",
+            edit_url="activity",
+        )
+        return table.as_html(req)
+
+    def test_rows_share_one_delete_modal(self):
+        html = self._render()
+
+        self.assertEqual(html.count('id="confirm-delete-modal"'), 1)
+        self.assertEqual(html.count('data-bs-target="#confirm-delete-modal"'), 15)
+        activity = Activity.objects.get(activity="Actividad 0")
+        self.assertIn(f'data-delete-url="{reverse("delete_activity", args=[activity.pk])}"', html)
+        self.assertIn('data-confirmation="Actividad 0"', html)
+
+    def test_total_days_come_from_the_table_query(self):
+        activity = Activity.objects.get(activity="Actividad 0")
+
+        with self.assertNumQueries(2):
+            html = self._render(search_query="Actividad")
+
+        self.assertIn(f"<td >{activity.get_total_days_legible()}</td>", html)
+
+
+class ActivityTotalDaysPerMonthTestCase(TestCase):
+    def setUp(self):
+        manager_role = Roles.objects.create(name="audit_manager", verbose_name="Jefe de Auditoría")
+        self.auditor_manager = User.objects.create_user(
+            username="auditor_manager",
+            email="auditor_manager@gmail.com",
+            role=manager_role,
+            password="password123",
+        )
+        self.audit = Audit.objects.create(title="Auditoría 1", audit_manager=self.auditor_manager)
+        self.activity = Activity.objects.create(
+            created_by=self.auditor_manager,
+            audit=self.audit,
+            activity="Actividad 1",
+            appointment_number="1",
+            start_date=datetime(2024, 11, 1),
+            end_date=datetime(2025, 2, 10),
+            current_status=CurrentStatus.objects.create(name="en proceso", verbose_name="En proceso"),
+        )
+
+    def months(self):
+        return sorted(
+            ActivityTotalDaysPerMonth.objects.filter(activity=self.activity).values_list("year", "month")
+        )
+
+    def test_save_creates_one_instance_per_month(self):
+        self.assertEqual(self.months(), [(2024, 11), (2024, 12), (2025, 1), (2025, 2)])
+
+    def test_changing_dates_keeps_days_and_removes_months_out_of_range(self):
+        ActivityTotalDaysPerMonth.objects.filter(activity=self.activity, year=2024, month=12).update(
+            total_days=timedelta(days=5)
+        )
+        self.activity.start_date = datetime(2024, 12, 1)
+        self.activity.end_date = datetime(2025, 3, 15)
+
+        # Consulta los meses existentes, un INSERT y un DELETE (más el UPDATE de la actividad)
+        with self.assertNumQueries(4):
+            self.activity.save()
+
+        # Noviembre de 2025 no se conserva aunque su mes y su año estén en el rango por separado
+        self.assertEqual(self.months(), [(2024, 12), (2025, 1), (2025, 2), (2025, 3)])
+        self.assertEqual(self.activity.get_total_days(), timedelta(days=5))
+
+    def test_duplicated_month_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            ActivityTotalDaysPerMonth.objects.create(activity=self.activity, year=2025, month=1)
+
+    def test_total_days_from_annotation(self):
+        ActivityTotalDaysPerMonth.objects.filter(activity=self.activity, month__in=(1, 2)).update(
+            total_days=timedelta(days=3)
+        )
+        activity = Activity.objects.with_total_days().get(pk=self.activity.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(activity.get_total_days(), timedelta(days=6))
+        self.assertEqual(self.activity.get_total_days(), timedelta(days=6))
+
+
+class PdfExportTestCase(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        patcher = patch.object(pdf_export.pdf_cache, "directory", self.cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_print_styles_are_split_from_the_html(self):
+        html = (
+            '<html><head><style media="all">td { color: red; }</style>'
+            '<style media="screen">td { color: blue; }</style></head><body></body></html>'
+        )
+
+        without_styles, styles = split_styles(html)
+
+        self.assertEqual(styles, ["td { color: red; }"])
+        self.assertIn('<style media="screen">', without_styles)
+        self.assertNotIn("color: red", without_styles)
+
+    @override_settings(TOOLS_PDF_WORKERS=0)
+    def test_pdf_is_rendered_once_per_html(self):
+        with patch.object(pdf_export.pdf_worker, "render_pdf", return_value=b"%PDF-1") as render_pdf:
+            first = pdf_export.get_pdf("<p>Tabla 1</p>", "http://testserver/")
+            second = pdf_export.get_pdf("<p>Tabla 1</p>", "http://testserver/")
+            pdf_export.get_pdf("<p>Tabla 2</p>", "http://testserver/")
+
+        self.assertEqual(first, b"%PDF-1")
+        self.assertEqual(second, b"%PDF-1")
+        self.assertEqual(render_pdf.call_count, 2)
+
+    def test_worker_supports_weasyprint_52(self):
+        # WeasyPrint 52.5 (Dockerfile): weasyprint.fonts y render(image_cache=...)
+        calls = {}
+
+        class Document:
+            def write_pdf(self):
+                return b"%PDF-52"
+
+        class HTML:
+            def __init__(self, string, base_url=None):
+                pass
+
+            def render(self, stylesheets=None, enable_hinting=False, presentational_hints=False,
+                       font_config=None, counter_style=None, image_cache=None):
+                calls["image_cache"] = image_cache
+                return Document()
+
+        weasyprint = types.ModuleType("weasyprint")
+        weasyprint.HTML = HTML
+        weasyprint.CSS = lambda **kwargs: kwargs
+        fonts = types.ModuleType("weasyprint.fonts")
+        fonts.FontConfiguration = object
+        weasyprint.fonts = fonts
+
+        with patch.dict(sys.modules, {"weasyprint": weasyprint, "weasyprint.fonts": fonts}), \
+                patch.object(pdf_worker, "_state", None):
+            pdf = pdf_worker.render_pdf("<style>p {}</style><p>Tabla</p>", "http://testserver/")
+
+        self.assertEqual(pdf, b"%PDF-52")
+        self.assertEqual(calls["image_cache"], {})
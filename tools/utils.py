@@ -61,15 +61,16 @@ def get_table(
             if search_query
             else Model.objects.filter(
                 auditor=req.user, audit__id=selected_audit["id"]
-            ).select_related(*relation_fields)
+            )
         )
         if selected_audit
         else (
             search_query_table(req, search_query, Model, filters)
             if search_query
-            else Model.objects.select_related(*relation_fields)
+            else Model.objects.all()
         )
     )
+    values = prepare_table_queryset(values, TableClass, relation_fields)
 
     if edit_url and delete_url and confirmation_field:
         table = TableClass(
@@ -96,15 +97,27 @@ def get_table_to_pdf(
     values = (
         Model.objects.filter(
             auditor=req.user, audit__id=selected_audit["id"]
-        ).select_related(*relation_fields)
+        )
         if selected_audit
-        else Model.objects.filter().select_related(*relation_fields)
+        else Model.objects.filter()
     )
+    values = prepare_table_queryset(values, TableClass, relation_fields)
 
     table = TableClass(values)
     return table
 
 
+def prepare_table_queryset(values, TableClass: Type[tables.Table], relation_fields):
+    # Las relaciones y los valores calculados que muestran las columnas se traen en la misma consulta: "related_fields" agrega relaciones anidadas (por ejemplo "assigned_auditor__role") y "annotations" valores como los días totales de una actividad.
+    values = values.select_related(
+        *relation_fields, *getattr(TableClass, "related_fields", ())
+    )
+    annotations = getattr(TableClass, "annotations", None)
+    if annotations:
+        values = values.annotate(**annotations)
+    return values
+
+
 # Devuelve los campos que sean relaciones
 def get_related_fields(model):
     return [
@@ -13,14 +13,13 @@ from django.db.models import Q
 User = get_user_model()
 
 from django.contrib import messages
-from django.template.loader import get_template
 from audits.types import Audit as AuditType
 from audits.decorators import audit_manager_required, selected_audit_required
 from audits.utils import get_assigned_audits, get_selected_audit
 from tools.constants import AUDIT_TIME_SUMMARY_TOOLS, REPORT_ERROR_INSTANCES
 from tools.utils import get_table, get_table_to_pdf
+from tools.pdf_export import pdf_response
 from users.decorators import superuser_required
-from weasyprint import HTML
 from .tables import (
     ActivitiesTable,
     AuditMarksTable,
@@ -947,18 +946,8 @@ def audit_time_summary_table_page(req: HttpRequest):
         data["table"] = table
 
         # Generamos el PDF
-        template = get_template("tools/audit-time-summaries_pdf.html")
-        html_content = template.render(data)
-
-        res = HttpResponse(content_type="application/pdf")
         filename = f"resumen_de_tiempo_de_auditorías.pdf"
-        res["Content-Disposition"] = f"attachment; filename={filename}"
-
-        html = HTML(string=html_content, base_url=req.build_absolute_uri("/"))
-        pdf_result = html.write_pdf()
-
-        res.write(pdf_result)
-        return res
+        return pdf_response(req, "tools/audit-time-summaries_pdf.html", data, filename)
     else:
         # Aquí se tienen que pasar la request, el texto que ingresó el usuario para buscar, el modelo y el modelo de la tabla, luego se pasa una tupla los elementos que servirán para filtrarse, tienen que ser campos del primer modelo y, en caso de que sean relaciones, se tienen que pasar como tuplas adentro de la tupla con el campo de relación y el campo de la relación, en caso de que ese campo de relación que se busca también tenga como campo que se busca una relación solo se pone __ para indicar el campo. Luego se pasa la ruta para eliminar una fila, luego la ruta para ver los detalles de una fila, luego se pasa la auditoría seleccionada y de último se pasa el campo de confirmación que tendrá que ingresar el usuario a la hora de eliminar una fila, para asegurar. Opcionalmente se puede pasar un campo de tipo Literal['days', 'seconds', 'minutes', 'hours'] el cual servirá para mostrar el campo fecha o tiempo (si es el que el modelo de tabla lo tiene).
         table = get_table(
@@ -996,18 +985,8 @@ def audit_marks_page(req: HttpRequest):
         data["table"] = table
 
         # Generamos el PDF
-        template = get_template("tools/audit-marks_pdf.html")
-        html_content = template.render(data)
-
-        res = HttpResponse(content_type="application/pdf")
         filename = f"marcas-de-auditoría.pdf"
-        res["Content-Disposition"] = f"attachment; filename={filename}"
-
-        html = HTML(string=html_content, base_url=req.build_absolute_uri("/"))
-        pdf_result = html.write_pdf()
-
-        res.write(pdf_result)
-        return res
+        return pdf_response(req, "tools/audit-marks_pdf.html", data, filename)
 
     table = get_table(
         req=req,
@@ -1037,18 +1016,8 @@ def currency_types_page(req: HttpRequest):
         data["table"] = table
 
         # Generamos el PDF
-        template = get_template("tools/currency-types_pdf.html")
-        html_content = template.render(data)
-
-        res = HttpResponse(content_type="application/pdf")
         filename = f"tipos-de-moneda.pdf"
-        res["Content-Disposition"] = f"attachment; filename={filename}"
-
-        html = HTML(string=html_content, base_url=req.build_absolute_uri("/"))
-        pdf_result = html.write_pdf()
-
-        res.write(pdf_result)
-        return res
+        return pdf_response(req, "tools/currency-types_pdf.html", data, filename)
 
     table = get_table(
         req=req,
@@ -1082,18 +1051,8 @@ def activities_page(req: HttpRequest):
         context["table"] = table
 
         # Generamos el PDF
-        template = get_template("tools/activities_pdf.html")
-        html_content = template.render(context)
-
-        res = HttpResponse(content_type="application/pdf")
         filename = f"activades.pdf"
-        res["Content-Disposition"] = f"attachment; filename={filename}"
-
-        html = HTML(string=html_content, base_url=req.build_absolute_uri("/"))
-        pdf_result = html.write_pdf()
-
-        res.write(pdf_result)
-        return res
+        return pdf_response(req, "tools/activities_pdf.html", context, filename)
 
     table = get_table(
         req=req,
@@ -1136,18 +1095,8 @@ def summary_hours_worked_table_page(req: HttpRequest):
         data["table"] = table
 
         # Generamos el PDF
-        template = get_template("tools/summaries-hours-worked_pdf.html")
-        html_content = template.render(data)
-
-        res = HttpResponse(content_type="application/pdf")
         filename = f"resumen_de_tiempo_de_auditorías.pdf"
-        res["Content-Disposition"] = f"attachment; filename={filename}"
-
-        html = HTML(string=html_content, base_url=req.build_absolute_uri("/"))
-        pdf_result = html.write_pdf()
-
-        res.write(pdf_result)
-        return res
+        return pdf_response(req, "tools/summaries-hours-worked_pdf.html", data, filename)
     else:
         table = get_table(
             req=req,
@@ -1184,18 +1133,8 @@ def status_of_work_papers_table_page(req: HttpRequest):
         data["table"] = table
 
         # Generamos el PDF
-        template = get_template("tools/summaries-hours-worked_pdf.html")
-        html_content = template.render(data)
-
-        res = HttpResponse(content_type="application/pdf")
         filename = f"resumen_de_tiempo_de_auditorías.pdf"
-        res["Content-Disposition"] = f"attachment; filename={filename}"
-
-        html = HTML(string=html_content, base_url=req.build_absolute_uri("/"))
-        pdf_result = html.write_pdf()
-
-        res.write(pdf_result)
-        return res
+        return pdf_response(req, "tools/summaries-hours-worked_pdf.html", data, filename)
     else:
         table = get_table(
             req=req,
@@ -1296,19 +1235,8 @@ def audit_time_summary_page(req: HttpRequest, id: int):
 
     if req.GET.get("generate_pdf") == "true":
         # Generamos el PDF
-        template = get_template("tools/audit-time-summary_pdf.html")
-        html_content = template.render(data)
-
-        res = HttpResponse(content_type="application/pdf")
         filename = f"reporte_de_resumen_de_tiempo_de_auditoría-nombramiento_no_{audit_time_summary.appointment_number}.pdf"
-        res["Content-Disposition"] = f"attachment; filename={filename}"
-
-        # Convertimos el contenido HTML a PDF
-        html = HTML(string=html_content, base_url=req.build_absolute_uri("/"))
-        pdf_result = html.write_pdf()  # Corregido el typo aquí
-
-        res.write(pdf_result)
-        return res
+        return pdf_response(req, "tools/audit-time-summary_pdf.html", data, filename)
 
     data["progress"] = int(
         (audit_time_summary.worked_days / audit_time_summary.scheduled_days) * 100
@@ -1343,7 +1271,10 @@ def currency_type_page(req: HttpRequest, id: int):
 @selected_audit_required("activities_page")
 def activity_page(req: HttpRequest, id: int):
     activity = get_object_or_404(
-        Activity, pk=id, created_by=req.user, audit__audit_manager=req.user
+        Activity.objects.with_total_days(),
+        pk=id,
+        created_by=req.user,
+        audit__audit_manager=req.user,
     )
     context = {
         "activity": activity,
@@ -1363,19 +1294,8 @@ def status_of_work_papers_page(req: HttpRequest, id: int):
 
     if req.GET.get("generate_pdf") == "true":
         # Generamos el PDF
-        template = get_template("tools/status-of-work-papers_pdf.html")
-        html_content = template.render(data)
-
-        res = HttpResponse(content_type="application/pdf")
         filename = f"reporte_de_estado_de_papeles_de_trabajo-referencia_{status_of_work_papers.reference}.pdf"
-        res["Content-Disposition"] = f"attachment; filename={filename}"
-
-        # Convertimos el contenido HTML a PDF
-        html = HTML(string=html_content, base_url=req.build_absolute_uri("/"))
-        pdf_result = html.write_pdf()  # Corregido el typo aquí
-
-        res.write(pdf_result)
-        return res
+        return pdf_response(req, "tools/status-of-work-papers_pdf.html", data, filename)
 
     time_line = get_working_papers_time_line_dic(
         status_of_work_papers.current_status.name
@@ -1397,18 +1317,8 @@ def summary_hours_worked_page(req: HttpRequest, id: int):
 
     if req.GET.get("generate_pdf") == "true":
         # Generamos el PDF
-        template = get_template("tools/summary-hours-worked_pdf.html")
-        html_content = template.render(data)
-
-        res = HttpResponse(content_type="application/pdf")
         filename = f"reporte_de_resumen_de_horas_trabajadas_del_mes-{summary_hours_worked.month.name.lower()}.pdf"
-        res["Content-Disposition"] = f"attachment; filename={filename}"
-
-        html = HTML(string=html_content, base_url=req.build_absolute_uri("/"))
-        pdf_result = html.write_pdf()
-
-        res.write(pdf_result)
-        return res
+        return pdf_response(req, "tools/summary-hours-worked_pdf.html", data, filename)
 
     data["progress"] = int(
         (